@@ -0,0 +1,140 @@
+# benchmarks/bench_baseline.py
+"""
+История результатов бенчмарков БД в JSON-файле базовой линии
+
+Из отчета pytest-benchmark (--benchmark-json) берутся медиана, среднее и
+максимум каждого замера. `record` дописывает прогон в историю, `compare`
+сравнивает медианы с последним записанным прогоном и завершается с кодом 1,
+если какой-то замер стал медленнее порога.
+
+    python -m benchmarks.bench_baseline compare bench.json --threshold 0.25
+    python -m benchmarks.bench_baseline record bench.json --note "индекс по orders.user_id"
+    python -m benchmarks.bench_baseline history --name get_active_orders
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline_database.json'
+
+
+def summarize(report_path: Path) -> Dict[str, dict]:
+    """Сжать отчет pytest-benchmark до {имя замера: {median_ms, mean_ms, max_ms, rounds}}"""
+    with open(report_path, encoding='utf-8') as f:
+        report = json.load(f)
+    return {
+        bench['name']: {
+            'median_ms': round(bench['stats']['median'] * 1000, 3),
+            'mean_ms': round(bench['stats']['mean'] * 1000, 3),
+            'max_ms': round(bench['stats']['max'] * 1000, 3),
+            'rounds': bench['stats']['rounds'],
+        }
+        for bench in report.get('benchmarks', [])
+    }
+
+
+def load_history(path: Path = BASELINE_PATH) -> list:
+    if not path.exists():
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('history', [])
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=BASELINE_PATH.parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def record(report_path: Path, note: str = '', path: Path = BASELINE_PATH) -> dict:
+    """Дописать прогон в историю базовой линии"""
+    history = load_history(path)
+    with open(report_path, encoding='utf-8') as f:
+        machine_info = json.load(f).get('machine_info', {})
+    entry = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'note': note,
+        'machine': f"{machine_info.get('machine', '?')} python {machine_info.get('python_version', '?')} "
+                   f"{machine_info.get('cpu', {}).get('brand_raw', '')}".strip(),
+        'results': summarize(report_path),
+    }
+    history.append(entry)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'history': history}, f, ensure_ascii=False, indent=2)
+    return entry
+
+
+def compare(report_path: Path, threshold: float = 0.25, path: Path = BASELINE_PATH) -> int:
+    """Сравнить медианы с последним прогоном истории; вернуть число регрессий"""
+    history = load_history(path)
+    if not history:
+        print("База пуста - сначала выполните record")
+        return 0
+
+    baseline = history[-1]['results']
+    current = summarize(report_path)
+    regressions = 0
+
+    print(f"{'замер':<60} {'было, мс':>10} {'стало, мс':>10} {'изм.':>8}")
+    for name, stats in sorted(current.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<60} {'-':>10} {stats['median_ms']:>10.2f} {'новый':>8}")
+            continue
+        change = stats['median_ms'] / previous['median_ms'] - 1 if previous['median_ms'] else 0.0
+        mark = ''
+        if change > threshold:
+            regressions += 1
+            mark = '  ⚠️'
+        print(f"{name:<60} {previous['median_ms']:>10.2f} {stats['median_ms']:>10.2f} {change:>+8.0%}{mark}")
+
+    print(f"\nРегрессий (медленнее на {threshold:.0%}+): {regressions}")
+    return regressions
+
+
+def print_history(name: str, path: Path = BASELINE_PATH):
+    """Медиана замеров с подстрокой name по всем прогонам истории"""
+    for entry in load_history(path):
+        matches = {key: value for key, value in entry['results'].items() if name in key}
+        for key, stats in sorted(matches.items()):
+            print(f"{entry['recorded_at']} {entry.get('commit') or '-':>9} {key:<60} {stats['median_ms']:>10.2f} мс")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Базовая линия бенчмарков БД")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH), help="файл истории")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help="дописать прогон в историю")
+    record_parser.add_argument('report', help="отчет --benchmark-json")
+    record_parser.add_argument('--note', default='', help="что изменилось")
+
+    compare_parser = commands.add_parser('compare', help="сравнить с последним прогоном")
+    compare_parser.add_argument('report', help="отчет --benchmark-json")
+    compare_parser.add_argument('--threshold', type=float, default=0.25, help="допустимое замедление (доля)")
+
+    history_parser = commands.add_parser('history', help="история замера")
+    history_parser.add_argument('--name', default='', help="подстрока имени замера")
+
+    args = parser.parse_args(argv)
+    path = Path(args.baseline)
+
+    if args.command == 'record':
+        entry = record(Path(args.report), note=args.note, path=path)
+        print(f"Записано замеров: {len(entry['results'])} в {path}")
+    elif args.command == 'compare':
+        sys.exit(1 if compare(Path(args.report), threshold=args.threshold, path=path) else 0)
+    else:
+        print_history(args.name, path=path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,403 @@
+# benchmarks/fake_bot_api.py
+"""
+Локальная замена Telegram Bot API для нагрузочных прогонов
+
+Поддерживаются getMe, getUpdates (long polling), sendMessage, sendPhoto,
+sendMediaGroup, editMessageText, editMessageCaption, editMessageReplyMarkup,
+answerCallbackQuery, deleteMessage, getFile и скачивание файлов. Остальные
+методы отвечают {"ok": true, "result": true}. Можно добавить задержку
+ответа и долю ответов 429 Too Many Requests.
+
+Бот подключается через apihelper.API_URL / apihelper.FILE_URL:
+    api = FakeBotAPI(latency=(0.02, 0.08), rate_limit_rate=0.01)
+    api.start()
+    api.configure_telebot()
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+BOT_USER = {'id': 7000000001, 'is_bot': True, 'first_name': 'FakeBot', 'username': 'fake_confectionery_bot'}
+
+# Методы, которые не задерживаются и не получают 429 (служебные)
+_EXEMPT_METHODS = {'getMe', 'getUpdates', 'deleteWebhook', 'setMyCommands'}
+
+
+def _parse_body(content_type: str, body: bytes) -> Tuple[Dict[str, str], Dict[str, bytes]]:
+    """Разбор тела запроса: urlencoded, json или multipart (файлы отдельно)"""
+    if not body:
+        return {}, {}
+
+    if content_type.startswith('application/json'):
+        return {key: value if isinstance(value, str) else json.dumps(value)
+                for key, value in json.loads(body).items()}, {}
+
+    if content_type.startswith('multipart/form-data'):
+        message = BytesParser(policy=HTTP).parsebytes(
+            b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+        )
+        params, files = {}, {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            payload = part.get_payload(decode=True) or b''
+            if part.get_filename():
+                files[name] = payload
+            else:
+                params[name] = payload.decode('utf-8')
+        return params, files
+
+    return dict(parse_qsl(body.decode('utf-8'), keep_blank_values=True)), {}
+
+
+class FakeBotAPI:
+    """
+    HTTP-сервер, изображающий Bot API, и журнал действий бота по чатам
+
+    Клиенты нагрузки кладут апдейты через push_message/push_callback и ждут
+    ответов бота через wait_for_events.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 latency: Tuple[float, float] = (0.0, 0.0),
+                 rate_limit_rate: float = 0.0, retry_after: int = 1):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+
+        self._lock = threading.Condition()
+        self._updates: List[dict] = []
+        self._next_update_id = 1
+        self._next_message_id: Dict[int, int] = {}
+        self._messages: Dict[Tuple[int, int], dict] = {}
+        self._events: Dict[int, List[dict]] = {}
+        self._callback_chats: Dict[str, int] = {}
+        self._next_callback_id = 1
+        self._files: Dict[str, bytes] = {}
+
+        self.method_counts: Dict[str, int] = {}
+        self.rate_limited = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # --- запуск ---
+
+    def start(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                api._handle_request(self)
+
+            def do_POST(self):
+                api._handle_request(self)
+
+            def log_message(self, format, *args):
+                logger.debug("fake api: " + format, *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, name='fake-bot-api', daemon=True).start()
+        logger.info(f"Fake Bot API на http://{self.host}:{self.port}")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._lock:
+            self._lock.notify_all()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def configure_telebot(self):
+        """Направить telebot на этот сервер"""
+        from telebot import apihelper
+        apihelper.API_URL = self.base_url + "/bot{0}/{1}"
+        apihelper.FILE_URL = self.base_url + "/file/bot{0}/{1}"
+
+    # --- HTTP ---
+
+    def _handle_request(self, request: BaseHTTPRequestHandler):
+        url = urlsplit(request.path)
+        length = int(request.headers.get('Content-Length') or 0)
+        body = request.rfile.read(length) if length else b''
+
+        if url.path.startswith('/file/'):
+            file_path = url.path.split('/', 3)[-1]
+            content = self._files.get(file_path.rsplit('/', 1)[-1].split('.', 1)[0])
+            if content is None:
+                self._send(request, 404, b'not found', 'text/plain')
+            else:
+                self._send(request, 200, content, 'application/octet-stream')
+            return
+
+        method = url.path.rsplit('/', 1)[-1]
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        body_params, files = _parse_body(request.headers.get('Content-Type', ''), body)
+        params.update(body_params)
+
+        with self._lock:
+            self.method_counts[method] = self.method_counts.get(method, 0) + 1
+
+        if method not in _EXEMPT_METHODS:
+            low, high = self.latency
+            if high > 0:
+                time.sleep(random.uniform(low, high))
+            if self.rate_limit_rate and random.random() < self.rate_limit_rate:
+                with self._lock:
+                    self.rate_limited += 1
+                self._send_json(request, 429, {
+                    'ok': False, 'error_code': 429,
+                    'description': f"Too Many Requests: retry after {self.retry_after}",
+                    'parameters': {'retry_after': self.retry_after},
+                })
+                return
+
+        handler = getattr(self, f"_api_{method}", None)
+        try:
+            result = handler(params, files) if handler else True
+        except (KeyError, ValueError) as e:
+            self._send_json(request, 400, {'ok': False, 'error_code': 400, 'description': f"Bad Request: {e}"})
+            return
+        self._send_json(request, 200, {'ok': True, 'result': result})
+
+    @staticmethod
+    def _send(request, status: int, body: bytes, content_type: str):
+        request.send_response(status)
+        request.send_header('Content-Type', content_type)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def _send_json(self, request, status: int, payload: dict):
+        self._send(request, status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    # --- журнал действий бота ---
+
+    def _record(self, chat_id: int, method: str, message: Optional[dict] = None):
+        """Добавить действие бота в журнал чата и разбудить ожидающих"""
+        event = {'method': method, 'message': message, 'time': time.perf_counter()}
+        with self._lock:
+            self._events.setdefault(chat_id, []).append(event)
+            self._lock.notify_all()
+
+    def _new_message(self, chat_id: int, **fields) -> dict:
+        with self._lock:
+            message_id = self._next_message_id.get(chat_id, 1)
+            self._next_message_id[chat_id] = message_id + 1
+        message = {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+        }
+        message.update({key: value for key, value in fields.items() if value is not None})
+        with self._lock:
+            self._messages[(chat_id, message_id)] = message
+        return message
+
+    def event_count(self, chat_id: int) -> int:
+        with self._lock:
+            return len(self._events.get(chat_id, []))
+
+    def wait_for_events(self, chat_id: int, after: int, timeout: float = 10.0,
+                        quiet: float = 0.05) -> List[dict]:
+        """
+        Дождаться ответа бота: первое действие после after, затем пауза quiet
+
+        Returns:
+            list: Действия бота (пустой список - таймаут)
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while len(self._events.get(chat_id, [])) <= after:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._server is None:
+                    return []
+                self._lock.wait(remaining)
+
+            # Бот часто отвечает несколькими вызовами подряд - ждем затишья
+            count = len(self._events[chat_id])
+            last_change = time.monotonic()
+            while True:
+                now = time.monotonic()
+                if now - last_change >= quiet or now >= deadline:
+                    break
+                self._lock.wait(quiet - (now - last_change))
+                if len(self._events[chat_id]) != count:
+                    count = len(self._events[chat_id])
+                    last_change = time.monotonic()
+            return list(self._events[chat_id][after:])
+
+    # --- апдейты от пользователей ---
+
+    def _push_update(self, update: dict) -> int:
+        with self._lock:
+            update['update_id'] = self._next_update_id
+            self._next_update_id += 1
+            self._updates.append(update)
+            self._lock.notify_all()
+            return update['update_id']
+
+    def push_message(self, user: dict, text: str) -> int:
+        """Пользователь пишет боту"""
+        message = {
+            'message_id': random.randint(1, 2 ** 31),
+            'date': int(time.time()),
+            'chat': {'id': user['id'], 'type': 'private', 'first_name': user.get('first_name')},
+            'from': user,
+            'text': text,
+        }
+        if text.startswith('/'):
+            command_length = len(text.split(' ', 1)[0])
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': command_length}]
+        return self._push_update({'message': message})
+
+    def push_callback(self, user: dict, message: dict, data: str) -> int:
+        """Пользователь нажимает inline-кнопку под сообщением бота"""
+        with self._lock:
+            callback_id = str(self._next_callback_id)
+            self._next_callback_id += 1
+            self._callback_chats[callback_id] = message['chat']['id']
+        return self._push_update({'callback_query': {
+            'id': callback_id,
+            'from': user,
+            'message': message,
+            'chat_instance': str(message['chat']['id']),
+            'data': data,
+        }})
+
+    def add_file(self, file_id: str, content: bytes):
+        """Файл, доступный через getFile и скачивание"""
+        self._files[file_id] = content
+
+    # --- методы Bot API ---
+
+    def _api_getMe(self, params, files):
+        return BOT_USER
+
+    def _api_getUpdates(self, params, files):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        deadline = time.monotonic() + timeout
+
+        with self._lock:
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+            while not self._updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._server is None:
+                    break
+                self._lock.wait(remaining)
+            return self._updates[:limit]
+
+    def _reply_markup(self, params) -> Optional[dict]:
+        """Как и настоящий API, в сообщении возвращается только inline-клавиатура"""
+        markup = json.loads(params.get('reply_markup') or 'null')
+        return markup if markup and 'inline_keyboard' in markup else None
+
+    def _api_sendMessage(self, params, files):
+        chat_id = int(params['chat_id'])
+        message = self._new_message(chat_id, text=params['text'], reply_markup=self._reply_markup(params))
+        self._record(chat_id, 'sendMessage', message)
+        return message
+
+    def _store_photo(self, value) -> str:
+        """Сохранить загруженное фото и вернуть его file_id"""
+        file_id = f"photo{random.getrandbits(48):012x}"
+        self._files[file_id] = value if isinstance(value, bytes) else b''
+        return file_id
+
+    def _photo_sizes(self, file_id: str) -> List[dict]:
+        return [{'file_id': file_id, 'file_unique_id': file_id, 'width': 1280, 'height': 960,
+                 'file_size': len(self._files.get(file_id, b''))}]
+
+    def _api_sendPhoto(self, params, files):
+        chat_id = int(params['chat_id'])
+        file_id = self._store_photo(files['photo']) if 'photo' in files else params['photo']
+        message = self._new_message(
+            chat_id, photo=self._photo_sizes(file_id), caption=params.get('caption'),
+            reply_markup=self._reply_markup(params)
+        )
+        self._record(chat_id, 'sendPhoto', message)
+        return message
+
+    def _api_sendMediaGroup(self, params, files):
+        chat_id = int(params['chat_id'])
+        media_group_id = str(random.getrandbits(48))
+        messages = []
+        for item in json.loads(params['media']):
+            media = item['media']
+            if media.startswith('attach://'):
+                file_id = self._store_photo(files.get(media[len('attach://'):], b''))
+            else:
+                file_id = media
+            message = self._new_message(
+                chat_id, photo=self._photo_sizes(file_id), caption=item.get('caption'),
+                media_group_id=media_group_id
+            )
+            messages.append(message)
+        self._record(chat_id, 'sendMediaGroup', messages[-1] if messages else None)
+        return messages
+
+    def _edit(self, params, method: str, **fields) -> dict:
+        chat_id = int(params['chat_id'])
+        message_id = int(params['message_id'])
+        with self._lock:
+            message = dict(self._messages.get((chat_id, message_id)) or {
+                'message_id': message_id, 'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'}, 'from': BOT_USER,
+            })
+            message.update({key: value for key, value in fields.items() if value is not None})
+            message['reply_markup'] = self._reply_markup(params)
+            if message['reply_markup'] is None:
+                message.pop('reply_markup')
+            message['edit_date'] = int(time.time())
+            self._messages[(chat_id, message_id)] = message
+        self._record(chat_id, method, message)
+        return message
+
+    def _api_editMessageText(self, params, files):
+        return self._edit(params, 'editMessageText', text=params['text'])
+
+    def _api_editMessageCaption(self, params, files):
+        return self._edit(params, 'editMessageCaption', caption=params.get('caption'))
+
+    def _api_editMessageReplyMarkup(self, params, files):
+        return self._edit(params, 'editMessageReplyMarkup')
+
+    def _api_answerCallbackQuery(self, params, files):
+        with self._lock:
+            chat_id = self._callback_chats.pop(params['callback_query_id'], None)
+        if chat_id is not None:
+            self._record(chat_id, 'answerCallbackQuery')
+        return True
+
+    def _api_deleteMessage(self, params, files):
+        with self._lock:
+            self._messages.pop((int(params['chat_id']), int(params['message_id'])), None)
+        return True
+
+    def _api_getFile(self, params, files):
+        file_id = params['file_id']
+        content = self._files.get(file_id)
+        if content is None:
+            raise KeyError(f"file {file_id} not found")
+        return {'file_id': file_id, 'file_unique_id': file_id,
+                'file_size': len(content), 'file_path': f"photos/{file_id}.jpg"}
@@ -0,0 +1,322 @@
+# benchmarks/load_generator.py
+"""
+Нагрузочный прогон бота против локального Fake Bot API
+
+Сотни виртуальных покупателей проходят путь каталог -> товар -> заказ,
+администраторы меняют статусы заказов. В конце печатается пропускная
+способность (апдейтов/с) и задержка ответа бота p50/p95/p99.
+
+Запуск из корня проекта:
+    python -m benchmarks.load_generator --customers 200 --admins 5 --latency-ms 20-80 --rate-limit 0.01
+
+Бот работает в отдельном рабочем каталоге (по умолчанию временном), поэтому
+база data/confbot.db и файлы проекта не затрагиваются.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+BOT_TOKEN = '7000000001:FAKE-load-generator-token'
+CUSTOMER_ID_BASE = 100_000_000
+ADMIN_ID_BASE = 900_000_000
+
+# Шаги сценариев: ('text', текст) - сообщение, ('click', префикс) - нажатие
+# случайной подходящей inline-кнопки из последнего ответа бота
+CUSTOMER_FLOW = [
+    ('text', '/start'),
+    ('text', '🎂 Продукция'),
+    ('click', 'order_category_'),
+    ('click', 'order_product_'),
+    ('click', 'order_start_'),
+    ('text', '2'),
+    ('click', 'order_date_'),
+    ('click', 'order_time_'),
+    ('click', 'order_delivery_continue'),
+    ('click', 'order_payment_continue'),
+    ('text', 'Без орехов, пожалуйста'),
+    ('click', 'order_confirm_'),
+]
+
+ADMIN_FLOW = [
+    ('text', '📦 Заказы'),
+    ('click', 'orderadm_active_orders'),
+    ('click', 'orderadm_order_'),
+    ('click', 'orderadm_change_status_'),
+    ('click', 'orderadm_add_status_'),
+    ('click', 'orderadm_select_status_'),
+    ('click', 'skip_notes'),
+    ('click', 'skip_photo'),
+]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+class LoadStats:
+    """Общие результаты прогона (потокобезопасно)"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.latencies_by_step: Dict[str, List[float]] = {}
+        self.updates_sent = 0
+        self.timeouts = 0
+        self.missing_buttons = 0
+        self.flows_completed: Dict[str, int] = {}
+        self.flows_failed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, step: str, latency: Optional[float]):
+        with self._lock:
+            self.updates_sent += 1
+            if latency is None:
+                self.timeouts += 1
+            else:
+                self.latencies.append(latency)
+                self.latencies_by_step.setdefault(step, []).append(latency)
+
+    def flow_finished(self, flow: str, completed: bool):
+        with self._lock:
+            target = self.flows_completed if completed else self.flows_failed
+            target[flow] = target.get(flow, 0) + 1
+
+    def button_missing(self):
+        with self._lock:
+            self.missing_buttons += 1
+
+
+class VirtualUser:
+    """Пользователь, который пишет боту и нажимает кнопки из его ответов"""
+
+    def __init__(self, api, user_id: int, name: str, stats: LoadStats,
+                 think_time: float = 0.0, timeout: float = 15.0):
+        self.api = api
+        self.user = {'id': user_id, 'is_bot': False, 'first_name': name, 'username': f"user{user_id}"}
+        self.stats = stats
+        self.think_time = think_time
+        self.timeout = timeout
+        # Сообщения с inline-клавиатурой из последнего ответа бота
+        self.keyboard_messages: List[dict] = []
+
+    def _send(self, step: str, push) -> bool:
+        after = self.api.event_count(self.user['id'])
+        sent_at = time.perf_counter()
+        push()
+        events = self.api.wait_for_events(self.user['id'], after, timeout=self.timeout)
+        if not events:
+            self.stats.record(step, None)
+            return False
+
+        self.stats.record(step, events[0]['time'] - sent_at)
+        keyboards = [
+            event['message'] for event in events
+            if event['message'] and (event['message'].get('reply_markup') or {}).get('inline_keyboard')
+        ]
+        if keyboards:
+            self.keyboard_messages = keyboards
+        return True
+
+    def _find_button(self, prefix: str) -> Optional[Tuple[dict, str]]:
+        """Случайная кнопка с callback data, начинающейся с prefix: (сообщение, data)"""
+        buttons = [
+            (message, button['callback_data'])
+            for message in self.keyboard_messages
+            for row in message['reply_markup']['inline_keyboard']
+            for button in row
+            if button.get('callback_data', '').startswith(prefix)
+        ]
+        return random.choice(buttons) if buttons else None
+
+    def run_flow(self, name: str, steps) -> bool:
+        for kind, value in steps:
+            if self.think_time:
+                time.sleep(random.uniform(0, self.think_time))
+
+            if kind == 'text':
+                ok = self._send(value, lambda: self.api.push_message(self.user, value))
+            else:
+                button = self._find_button(value)
+                if button is None:
+                    self.stats.button_missing()
+                    self.stats.flow_finished(name, False)
+                    return False
+                message, data = button
+                ok = self._send(value, lambda: self.api.push_callback(self.user, message, data))
+
+            if not ok:
+                self.stats.flow_finished(name, False)
+                return False
+
+        self.stats.flow_finished(name, True)
+        return True
+
+
+def seed_database(db_manager, customers: int, admins: int, categories: int = 3,
+                  products_per_category: int = 5, orders: int = 20):
+    """Каталог, пользователи и стартовые заказы для админских сценариев"""
+    for index in range(categories):
+        db_manager.add_category(f"Категория {index + 1}", "Тестовая категория")
+
+    category_ids = [category['id'] for category in db_manager.get_all_categories()]
+    product_ids = []
+    for category_id in category_ids:
+        for index in range(products_per_category):
+            product_ids.append(db_manager.add_product_returning_id({
+                'name': f"Торт {category_id}-{index + 1}",
+                'category_id': category_id,
+                'short_description': "Нагрузочный товар",
+                'measurement_unit': 'шт',
+                'quantity': 1,
+                'price': 1500 + index * 100,
+                'prepayment_conditions': '50% предоплата',
+            }))
+
+    for index in range(customers):
+        db_manager.add_user(CUSTOMER_ID_BASE + index, f"Покупатель {index}", phone='+70000000000')
+    for index in range(admins):
+        db_manager.add_user(ADMIN_ID_BASE + index, f"Админ {index}", phone='+70000000001', is_admin=True)
+
+    for index in range(orders):
+        db_manager.create_order_and_get_id({
+            'user_id': CUSTOMER_ID_BASE + index % max(customers, 1),
+            'product_id': random.choice(product_ids),
+            'quantity': 1,
+            'total_cost': 1500,
+            'delivery_type': 'самовывоз',
+            'ready_at': datetime.now() + timedelta(days=2),
+        })
+
+
+def run_load(customers: int, admins: int, latency=(0.0, 0.0), rate_limit: float = 0.0,
+             think_time: float = 0.0, timeout: float = 15.0, workdir: Optional[str] = None) -> LoadStats:
+    """Поднять Fake Bot API и бота, прогнать сценарии и вернуть статистику"""
+    workdir = workdir or tempfile.mkdtemp(prefix='myconfbot-load-')
+    os.chdir(workdir)
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    os.environ['TELEGRAM_BOT_TOKEN'] = BOT_TOKEN
+    # Виртуальные пользователи жмут без пауз: замеряем бота, а не защиту от флуда
+    os.environ.setdefault('FLOOD_RATE', '0')
+    os.environ.setdefault('FLOOD_ADMIN_RATE', '0')
+
+    from benchmarks.fake_bot_api import FakeBotAPI
+
+    api = FakeBotAPI(latency=latency, rate_limit_rate=rate_limit)
+    api.start()
+    api.configure_telebot()
+
+    # Бот пишет data/ и logs/ относительно текущего каталога - уже рабочего
+    from src.myconfbot.bot.confectionery_bot import ConfectioneryBot
+    from src.myconfbot.config import Config
+    from src.myconfbot.utils.database import get_db_manager
+
+    db_manager = get_db_manager()
+    seed_database(db_manager, customers, admins)
+    admin_ids = [ADMIN_ID_BASE + index for index in range(admins)]
+    bot = ConfectioneryBot(BOT_TOKEN, Config(bot_token=BOT_TOKEN, admin_ids=admin_ids), db_manager)
+
+    polling = threading.Thread(
+        target=bot.bot.polling,
+        kwargs={'non_stop': True, 'interval': 0, 'timeout': 5, 'long_polling_timeout': 1},
+        name='bot-polling',
+        daemon=True,
+    )
+    polling.start()
+
+    stats = LoadStats()
+    users = [
+        (VirtualUser(api, CUSTOMER_ID_BASE + index, f"Покупатель {index}", stats, think_time, timeout),
+         'customer', CUSTOMER_FLOW)
+        for index in range(customers)
+    ] + [
+        (VirtualUser(api, ADMIN_ID_BASE + index, f"Админ {index}", stats, think_time, timeout),
+         'admin', ADMIN_FLOW)
+        for index in range(admins)
+    ]
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=user.run_flow, args=(flow_name, flow), daemon=True)
+        for user, flow_name, flow in users
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.elapsed = time.perf_counter() - started
+
+    bot.bot.stop_polling()
+    polling.join(timeout=10)
+    api.stop()
+
+    stats.api_method_counts = dict(api.method_counts)
+    stats.rate_limited = api.rate_limited
+    stats.workdir = workdir
+    return stats
+
+
+def print_report(stats: LoadStats):
+    print(f"Рабочий каталог: {stats.workdir}")
+    print(f"Время прогона: {stats.elapsed:.1f} с")
+    print(f"Апдейтов: {stats.updates_sent}, {stats.updates_sent / stats.elapsed:.1f} апдейтов/с")
+    print(f"Без ответа (таймаут): {stats.timeouts}, нет нужной кнопки: {stats.missing_buttons}, "
+          f"ответов 429: {stats.rate_limited}")
+    print(f"Сценарии пройдены: {stats.flows_completed}, прерваны: {stats.flows_failed}")
+
+    print(f"\n{'шаг':<28} {'шт':>6} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9}")
+    rows = [('ВСЕГО', stats.latencies)] + sorted(stats.latencies_by_step.items())
+    for step, samples in rows:
+        print(f"{step[:28]:<28} {len(samples):>6} {percentile(samples, 0.5) * 1000:>9.1f} "
+              f"{percentile(samples, 0.95) * 1000:>9.1f} {percentile(samples, 0.99) * 1000:>9.1f}")
+
+    print("\nВызовы Bot API:", ', '.join(f"{name}={count}" for name, count in sorted(stats.api_method_counts.items())))
+
+
+def _parse_latency(value: str):
+    """'20-80' -> (0.02, 0.08), '50' -> (0.05, 0.05)"""
+    low, _, high = value.partition('-')
+    return float(low) / 1000, float(high or low) / 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон бота против Fake Bot API")
+    parser.add_argument('--customers', type=int, default=100, help="число покупателей")
+    parser.add_argument('--admins', type=int, default=3, help="число администраторов")
+    parser.add_argument('--latency-ms', default='0', help="задержка ответа API, мс: 50 или 20-80")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument('--think-time', type=float, default=0.0, help="пауза пользователя между шагами, с (максимум)")
+    parser.add_argument('--timeout', type=float, default=15.0, help="ожидание ответа бота, с")
+    parser.add_argument('--workdir', help="рабочий каталог бота (по умолчанию временный)")
+    parser.add_argument('--log-level', default='WARNING', help="уровень логов бота")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s | %(name)s | %(message)s")
+
+    stats = run_load(
+        customers=args.customers,
+        admins=args.admins,
+        latency=_parse_latency(args.latency_ms),
+        rate_limit=args.rate_limit,
+        think_time=args.think_time,
+        timeout=args.timeout,
+        workdir=args.workdir,
+    )
+    print_report(stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/logging_bench.py
+"""
+Сравнение задержки логирования в потоке обработчика
+
+Старая схема: синхронные console+file handlers и f-строки на уровне INFO.
+Новая схема: QueueHandler + QueueListener, ленивое %-форматирование на DEBUG.
+
+Запуск из корня проекта:
+    python -m benchmarks.logging_bench
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import tempfile
+import time
+
+from src.myconfbot.logging_config import RateLimitFilter
+
+ORDER_DATA = {
+    'state': 'order_quantity',
+    'product_id': 42,
+    'product_name': 'Торт «Наполеон»',
+    'quantity': 2,
+    'notes': ['без орехов', 'надпись «С днем рождения»'],
+}
+
+
+def _make_targets(log_path):
+    """Те же обработчики, что в build_log_config()"""
+    console = logging.StreamHandler(open(os.devnull, 'w'))
+    console.setFormatter(logging.Formatter("%(levelname)s | %(name)s | %(message)s"))
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_path, maxBytes=10 * 1024 * 1024, backupCount=1, encoding='utf-8'
+    )
+    file_handler.setFormatter(logging.Formatter(
+        "[%(asctime)s] %(levelname)-8s %(name)-20s %(filename)s:%(lineno)d | %(message)s"
+    ))
+    return [console, file_handler]
+
+
+def legacy_handler_step(logger, user_id):
+    """Логирование как в прежнем debug_all_messages/get_order_data"""
+    logger.info(f"🔍 ALL MESSAGES DEBUG: user_id={user_id}, text='2'")
+    logger.info(f"🔍 Получены данные заказа для {user_id}: {ORDER_DATA}")
+    logger.info(f"✅ Valid order data found")
+
+
+def lazy_handler_step(logger, user_id):
+    """Логирование после перевода горячих путей на ленивый DEBUG"""
+    logger.debug("🔍 ALL MESSAGES DEBUG: user_id=%s, text=%r", user_id, '2')
+    logger.debug("🔍 Получены данные заказа для %s: %s", user_id, ORDER_DATA)
+
+
+def measure(step, logger, iterations):
+    samples = []
+    for user_id in range(iterations):
+        started = time.perf_counter()
+        step(logger, user_id)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        'p50': samples[len(samples) // 2] * 1e6,
+        'p99': samples[int(len(samples) * 0.99)] * 1e6,
+        'mean': statistics.fmean(samples) * 1e6,
+    }
+
+
+def run_benchmark(iterations=20000):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Старая схема: запись на диск в потоке обработчика
+        legacy = logging.getLogger('bench.legacy')
+        legacy.propagate = False
+        legacy.setLevel(logging.INFO)
+        legacy_targets = _make_targets(os.path.join(tmp_dir, 'legacy.log'))
+        for handler in legacy_targets:
+            legacy.addHandler(handler)
+
+        # Новая схема: в потоке обработчика только постановка в очередь
+        queued = logging.getLogger('bench.queued')
+        queued.propagate = False
+        queued.setLevel(logging.INFO)
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter())
+        queued.addHandler(queue_handler)
+        queued_targets = _make_targets(os.path.join(tmp_dir, 'queued.log'))
+        listener = logging.handlers.QueueListener(log_queue, *queued_targets, respect_handler_level=True)
+        listener.start()
+
+        results = [
+            ('sync + f-string INFO', measure(legacy_handler_step, legacy, iterations)),
+            ('queue + f-string INFO', measure(legacy_handler_step, queued, iterations)),
+            ('queue + lazy DEBUG', measure(lazy_handler_step, queued, iterations)),
+        ]
+
+        listener.stop()
+        for handler in legacy_targets + queued_targets:
+            handler.close()
+
+    for name, stats in results:
+        print(f"{name:<24} p50 {stats['p50']:7.2f} мкс  p99 {stats['p99']:8.2f} мкс  "
+              f"среднее {stats['mean']:7.2f} мкс")
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,161 @@
+# benchmarks/startup_report.py
+"""
+Отчет о времени запуска бота и проверка целевого холодного старта
+
+Каждый замер - отдельный процесс python, который выполняет bootstrap() на
+фиксированном окружении: временный рабочий каталог, SQLite-файл, тестовый
+токен, без сети. Первый прогон готовит базу и .pyc и в замер не входит.
+Отдельный прогон с -X importtime показывает, какие импорты дороже всего.
+
+Запуск из корня проекта:
+    python -m benchmarks.startup_report                  # отчет
+    python -m benchmarks.startup_report --check          # код 1, если медиана дольше цели (для CI)
+    python -m benchmarks.startup_report --runs 10 --target-ms 1200 --top 30
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Цель для медианы холодного старта (от запуска интерпретатора до готового бота)
+STARTUP_TARGET_MS = float(os.getenv('STARTUP_TARGET_MS', '1000'))
+
+CHILD_CODE = """
+import json, os, sys, time
+started = time.perf_counter()
+from src.myconfbot.bootstrap import bootstrap
+imported = time.perf_counter() - started
+bot = bootstrap()
+timings = {'import_bootstrap': imported, **bot.startup_timings}
+with open(os.environ['STARTUP_REPORT_OUT'], 'w') as f:
+    json.dump(timings, f)
+from src.myconfbot.logging_config import stop_logging
+stop_logging()
+"""
+
+
+def _fixture_env(workdir: Path, out_path: Path) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        'PYTHONPATH': str(PROJECT_ROOT),
+        'TELEGRAM_BOT_TOKEN': '7000000001:FAKE-startup-report-token',
+        'ADMIN_IDS': '1',
+        'USE_POSTGRES': 'false',
+        'DATABASE_URL': f"sqlite:///{workdir / 'data' / 'confbot.db'}",
+        'FILE_STORAGE_BASE_DIR': str(workdir / 'data'),
+        'LOG_FILE_PATH': str(workdir / 'logs' / 'myconfbot.log'),
+        'LOG_LEVEL': 'WARNING',
+        'METRICS_PORT': '0',
+        'PROFILE_SAMPLE_RATE': '0',
+        'PROFILE_SLOW_THRESHOLD': '0',
+        'MEMORY_SNAPSHOT_INTERVAL': '0',
+        'STARTUP_REPORT_OUT': str(out_path),
+    })
+    return env
+
+
+def run_once(workdir: Path, importtime: bool = False) -> Tuple[float, dict, str]:
+    """Один холодный старт: (секунды от запуска процесса, этапы bootstrap, вывод importtime)"""
+    out_path = workdir / 'startup.json'
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD_CODE]
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=workdir, env=_fixture_env(workdir, out_path),
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Запуск завершился с кодом {result.returncode}:\n{result.stderr[-3000:]}")
+    with open(out_path, encoding='utf-8') as f:
+        phases = json.load(f)
+    return elapsed, phases, result.stderr
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Строки `import time: self | cumulative | name` -> [{name, self_us, cumulative_us, depth}]"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        imports.append({
+            'name': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': depth,
+        })
+    return imports
+
+
+def print_import_report(imports: List[dict], top: int = 20):
+    total_us = sum(item['self_us'] for item in imports)
+    print(f"Импортов: {len(imports)}, суммарно {total_us / 1000:.0f} мс\n")
+
+    print("Верхний уровень (cumulative):")
+    roots = sorted((item for item in imports if item['depth'] == 0), key=lambda item: -item['cumulative_us'])
+    for item in roots[:top]:
+        print(f"  {item['cumulative_us'] / 1000:>8.1f} мс  {item['name']}")
+
+    by_package: Dict[str, int] = {}
+    for item in imports:
+        parts = item['name'].split('.')
+        package = '.'.join(parts[:3]) if parts[0] == 'src' else parts[0]
+        by_package[package] = by_package.get(package, 0) + item['self_us']
+    print("\nПо пакетам (self):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {self_us / 1000:>8.1f} мс  {package}")
+
+    print("\nСамые дорогие модули (self):")
+    for item in sorted(imports, key=lambda item: -item['self_us'])[:top]:
+        print(f"  {item['self_us'] / 1000:>8.1f} мс  {item['name']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время запуска бота")
+    parser.add_argument('--runs', type=int, default=5, help="число замеренных запусков")
+    parser.add_argument('--top', type=int, default=20, help="строк в отчете об импортах")
+    parser.add_argument('--target-ms', type=float, default=STARTUP_TARGET_MS, help="цель для медианы, мс")
+    parser.add_argument('--check', action='store_true', help="код возврата 1, если цель не выполнена")
+    parser.add_argument('--no-imports', action='store_true', help="без отчета -X importtime")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='myconfbot-startup-') as tmp:
+        workdir = Path(tmp)
+        # Прогрев: база, каталоги, .pyc
+        run_once(workdir)
+
+        samples, phases = [], []
+        for _ in range(args.runs):
+            elapsed, run_phases, _ = run_once(workdir)
+            samples.append(elapsed)
+            phases.append(run_phases)
+
+        median_ms = statistics.median(samples) * 1000
+        print(f"Холодный старт ({args.runs} запусков): медиана {median_ms:.0f} мс, "
+              f"мин {min(samples) * 1000:.0f} мс, макс {max(samples) * 1000:.0f} мс, цель {args.target_ms:.0f} мс")
+        print("Этапы bootstrap (медиана, мс): " + ', '.join(
+            f"{name} {statistics.median(run[name] for run in phases) * 1000:.0f}"
+            for name in phases[0]
+        ))
+
+        if not args.no_imports:
+            _, _, stderr = run_once(workdir, importtime=True)
+            print()
+            print_import_report(parse_importtime(stderr), top=args.top)
+
+    if median_ms > args.target_ms:
+        print(f"\n⚠️ Цель не выполнена: {median_ms:.0f} мс > {args.target_ms:.0f} мс")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,296 @@
+# benchmarks/synthetic_data.py
+"""
+Генератор синтетических данных магазина для бенчмарков БД
+
+Создает пользователей, категории, товары с фото, заказы с историей статусов,
+заметки и избранное с правдоподобными распределениями:
+    - заказы на пользователя - распределение Парето (немного постоянных
+      покупателей делают большую часть заказов);
+    - популярность товаров - закон Ципфа;
+    - даты заказов - за два года, ближе к текущей дате заказов больше;
+    - старые заказы в основном выполнены, свежие - в работе.
+
+Запуск из корня проекта:
+    python -m benchmarks.synthetic_data --orders 10000 --url sqlite:///shop_10k.db
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import sqlalchemy as sa
+
+from src.myconfbot.utils.database import DatabaseManager
+from src.myconfbot.utils.models import (
+    Base, Category, Order, OrderNote, OrderStatus, OrderStatusEnum,
+    Product, ProductPhoto, User, UserFavorite
+)
+
+USER_TELEGRAM_ID_BASE = 200_000_000
+ADMIN_TELEGRAM_ID_BASE = 990_000_000
+ADMINS = 3
+HISTORY_DAYS = 730
+BATCH_SIZE = 5000
+
+CATEGORY_NAMES = [
+    "Торты", "Пирожные", "Капкейки", "Макаронс", "Печенье", "Эклеры",
+    "Муссовые десерты", "Чизкейки", "Пряники", "Конфеты ручной работы",
+]
+
+DELIVERY_TYPES = ['самовывоз', 'доставка']
+PAYMENT_TYPES = ['наличные', 'перевод', 'карта']
+
+# Путь заказа по статусам; доставка добавляет статус "у курьера"
+PICKUP_FLOW = [
+    OrderStatusEnum.CREATED, OrderStatusEnum.CONFIRMED, OrderStatusEnum.IN_PROGRESS,
+    OrderStatusEnum.READY_FOR_PICKUP, OrderStatusEnum.COMPLETED,
+]
+DELIVERY_FLOW = PICKUP_FLOW[:-1] + [OrderStatusEnum.IN_DELIVERY, OrderStatusEnum.COMPLETED]
+
+NOTE_TEXTS = [
+    "Без орехов, пожалуйста", "Надпись: С днем рождения!", "Позвоните за час до доставки",
+    "Меньше сахара", "Добавьте свечи", "Можно забрать пораньше?", "Уточните состав крема",
+]
+
+
+def _insert(connection, model, rows: List[dict]):
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.execute(sa.insert(model), rows[start:start + BATCH_SIZE])
+
+
+def _reset_sequences(connection):
+    """После вставки с явными id подтянуть последовательности PostgreSQL"""
+    for table in Base.metadata.sorted_tables:
+        if 'id' in table.c:
+            connection.execute(sa.text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 1))"
+            ))
+
+
+def _status_chain(order_created: datetime, delivery_type: str, now: datetime, rng: random.Random):
+    """История статусов заказа: (статус, время) по возрастанию времени"""
+    flow = DELIVERY_FLOW if delivery_type == 'доставка' else PICKUP_FLOW
+    age_days = (now - order_created).days
+
+    if rng.random() < 0.06:
+        # Отмена на раннем этапе
+        steps = flow[:rng.randint(1, 3)] + [OrderStatusEnum.CANCELLED]
+    elif age_days > 14:
+        steps = list(flow)
+        if rng.random() < 0.03:
+            steps.insert(rng.randint(2, len(steps) - 1), OrderStatusEnum.ON_HOLD)
+    else:
+        # Свежие заказы - на случайном этапе
+        steps = flow[:rng.randint(1, len(flow))]
+        if rng.random() < 0.02:
+            steps.append(OrderStatusEnum.PROBLEMATIC)
+
+    chain = []
+    moment = order_created
+    for status in steps:
+        chain.append((status.value, moment))
+        moment = min(moment + timedelta(hours=rng.uniform(1, 30)), now)
+    return chain
+
+
+def generate_shop(db_manager: DatabaseManager, orders: int = 1000, seed: int = 42) -> Dict:
+    """
+    Наполнить базу синтетическим магазином
+
+    Таблицы должны быть пустыми: id назначаются явно, чтобы не делать
+    лишних запросов при построении связей.
+
+    Returns:
+        dict: количество строк по таблицам и выборки id для бенчмарков
+              (heavy_user_telegram_id, typical_user_telegram_id, favorites_user_telegram_id,
+              order_ids, category_ids, product_ids, admin_telegram_id)
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    started = time.perf_counter()
+
+    users_count = max(orders // 4, 10)
+    products_count = max(30, min(int(orders ** 0.5) * 2, 600))
+
+    # --- пользователи ---
+    users = [
+        {
+            'id': index + 1,
+            'telegram_id': USER_TELEGRAM_ID_BASE + index,
+            'telegram_username': f"user{index}",
+            'full_name': f"Покупатель {index}",
+            'phone': f"+7900{index:07d}",
+            'created_at': now - timedelta(days=rng.uniform(0, HISTORY_DAYS)),
+            'is_admin': False,
+        }
+        for index in range(users_count)
+    ]
+    for index in range(ADMINS):
+        users.append({
+            'id': users_count + index + 1,
+            'telegram_id': ADMIN_TELEGRAM_ID_BASE + index,
+            'telegram_username': f"admin{index}",
+            'full_name': f"Админ {index}",
+            'phone': f"+7999{index:07d}",
+            'created_at': now - timedelta(days=HISTORY_DAYS),
+            'is_admin': True,
+        })
+    admin_ids = [user['id'] for user in users[users_count:]]
+
+    # --- каталог ---
+    categories = [
+        {'id': index + 1, 'name': name, 'description': f"Раздел «{name}»",
+         'created_at': now - timedelta(days=HISTORY_DAYS)}
+        for index, name in enumerate(CATEGORY_NAMES)
+    ]
+    products, photos = [], []
+    for index in range(products_count):
+        product_id = index + 1
+        products.append({
+            'id': product_id,
+            'name': f"{CATEGORY_NAMES[index % len(CATEGORY_NAMES)]} №{index + 1}",
+            'category_id': index % len(CATEGORY_NAMES) + 1,
+            'cover_photo_path': f"data/products/{product_id}/cover.jpg",
+            'short_description': "Нежный бисквит, сливочный крем и ягоды",
+            'is_available': rng.random() > 0.1,
+            'measurement_unit': rng.choice(['шт', 'кг']),
+            'quantity': 1,
+            'price': rng.choice([350, 900, 1500, 2200, 3500, 5000]),
+            'prepayment_conditions': '50% предоплата',
+            'created_at': now - timedelta(days=rng.uniform(0, HISTORY_DAYS)),
+        })
+        for photo_index in range(rng.randint(1, 5)):
+            photos.append({
+                'id': len(photos) + 1,
+                'product_id': product_id,
+                'photo_path': f"data/products/{product_id}/photo_{photo_index}.jpg",
+                'order_index': photo_index,
+                'is_main': photo_index == 0,
+                'created_at': products[-1]['created_at'],
+            })
+
+    # Популярность товаров по Ципфу, активность покупателей по Парето
+    product_weights = [1 / (rank + 1) ** 1.1 for rank in range(products_count)]
+    rng.shuffle(product_weights)
+    # Хвост Парето обрезан: даже самый постоянный покупатель - не больше пары процентов заказов
+    user_weights = [min(rng.paretovariate(1.5), 50) for _ in range(users_count)]
+
+    order_users = rng.choices(range(1, users_count + 1), weights=user_weights, k=orders)
+    order_products = rng.choices(range(1, products_count + 1), weights=product_weights, k=orders)
+
+    # --- заказы, статусы, заметки ---
+    order_rows, status_rows, note_rows = [], [], []
+    for index in range(orders):
+        order_id = index + 1
+        # Треугольное распределение с модой в "сегодня": магазин растет
+        created_at = now - timedelta(days=rng.triangular(0, HISTORY_DAYS, 0), seconds=rng.randint(0, 86399))
+        created_at = max(created_at.replace(microsecond=0), now - timedelta(days=HISTORY_DAYS))
+        delivery_type = rng.choices(DELIVERY_TYPES, weights=[70, 30])[0]
+        product = products[order_products[index] - 1]
+        quantity = rng.choices([1, 2, 3, 6, 12], weights=[60, 20, 8, 7, 5])[0]
+        chain = _status_chain(created_at, delivery_type, now, rng)
+        completed = chain[-1][0] == OrderStatusEnum.COMPLETED.value
+
+        order_rows.append({
+            'id': order_id,
+            'user_id': order_users[index],
+            'product_id': product['id'],
+            'quantity': quantity,
+            'weight_grams': rng.choice([None, 500, 1000, 1500, 2000]),
+            'delivery_type': delivery_type,
+            'delivery_address': "ул. Кондитерская, 15" if delivery_type == 'доставка' else None,
+            'created_at': created_at,
+            'ready_at': created_at + timedelta(days=rng.randint(1, 5)),
+            'total_cost': product['price'] * quantity,
+            'payment_type': rng.choice(PAYMENT_TYPES),
+            'payment_status': 'Оплачен' if completed else rng.choice(['Не оплачен', 'Предоплата']),
+            'admin_notes': "Постоянный клиент" if rng.random() < 0.05 else None,
+        })
+        for status, moment in chain:
+            status_rows.append({
+                'id': len(status_rows) + 1,
+                'order_id': order_id,
+                'status': status,
+                'admin_notes': "Фото готового изделия" if status == OrderStatusEnum.READY_FOR_PICKUP.value else None,
+                'photo_path': (f"data/orders/order_{order_id}/status_photos/ready.jpg"
+                               if status == OrderStatusEnum.READY_FOR_PICKUP.value and rng.random() < 0.3 else None),
+                'created_at': moment,
+            })
+        for note_index in range(rng.choices([0, 1, 2, 3], weights=[60, 25, 10, 5])[0]):
+            note_rows.append({
+                'id': len(note_rows) + 1,
+                'order_id': order_id,
+                'user_id': order_users[index] if note_index % 2 == 0 else rng.choice(admin_ids),
+                'note_text': rng.choice(NOTE_TEXTS),
+                'created_at': created_at + timedelta(minutes=10 * (note_index + 1)),
+            })
+
+    # --- избранное ---
+    favorite_rows = []
+    for user_id in range(1, users_count + 1):
+        count = rng.choices([0, 1, 2, 4, 8], weights=[45, 25, 15, 10, 5])[0]
+        for product_id in sorted(set(rng.choices(range(1, products_count + 1), weights=product_weights, k=count))):
+            favorite_rows.append({
+                'id': len(favorite_rows) + 1,
+                'user_id': user_id,
+                'product_id': product_id,
+                'created_at': now - timedelta(days=rng.uniform(0, HISTORY_DAYS)),
+            })
+
+    with db_manager.engine.begin() as connection:
+        for model, rows in ((User, users), (Category, categories), (Product, products),
+                            (ProductPhoto, photos), (Order, order_rows), (OrderStatus, status_rows),
+                            (OrderNote, note_rows), (UserFavorite, favorite_rows)):
+            _insert(connection, model, rows)
+        if db_manager.get_db_type() == 'postgresql':
+            _reset_sequences(connection)
+
+    orders_per_user = {}
+    for user_id in order_users:
+        orders_per_user[user_id] = orders_per_user.get(user_id, 0) + 1
+    heavy_user_id = max(orders_per_user, key=orders_per_user.get)
+    typical_user_id = sorted(orders_per_user, key=orders_per_user.get)[len(orders_per_user) // 2]
+
+    favorites_per_user = {}
+    for favorite in favorite_rows:
+        favorites_per_user[favorite['user_id']] = favorites_per_user.get(favorite['user_id'], 0) + 1
+    favorites_user_id = max(favorites_per_user, key=favorites_per_user.get, default=1)
+
+    return {
+        'counts': {
+            'users': len(users), 'categories': len(categories), 'products': len(products),
+            'product_photos': len(photos), 'orders': len(order_rows), 'order_statuses': len(status_rows),
+            'order_notes': len(note_rows), 'user_favorites': len(favorite_rows),
+        },
+        'heavy_user_telegram_id': USER_TELEGRAM_ID_BASE + heavy_user_id - 1,
+        'heavy_user_orders': orders_per_user[heavy_user_id],
+        'typical_user_telegram_id': USER_TELEGRAM_ID_BASE + typical_user_id - 1,
+        'favorites_user_telegram_id': USER_TELEGRAM_ID_BASE + favorites_user_id - 1,
+        'admin_telegram_id': ADMIN_TELEGRAM_ID_BASE,
+        'order_ids': rng.sample(range(1, orders + 1), min(orders, 200)),
+        'category_ids': [category['id'] for category in categories],
+        'product_ids': [product['id'] for product in products if product['is_available']],
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Синтетические данные магазина")
+    parser.add_argument('--orders', type=int, default=1000, help="число заказов")
+    parser.add_argument('--url', default='sqlite:///synthetic_shop.db', help="URL базы (таблицы должны быть пустыми)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    summary = generate_shop(DatabaseManager(args.url), orders=args.orders, seed=args.seed)
+    print(f"Сгенерировано за {summary['seconds']} с:")
+    for table, count in summary['counts'].items():
+        print(f"  {table:<16} {count:>9}")
+    print(f"Самый активный покупатель: {summary['heavy_user_telegram_id']} "
+          f"({summary['heavy_user_orders']} заказов)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/text_converter_bench.py
+"""
+Микро-бенчмарк и проверка свойств форматтера простой разметки
+
+Запуск из корня проекта:
+    python -m benchmarks.text_converter_bench
+"""
+
+import html
+import random
+import re
+import timeit
+
+from src.myconfbot.utils.content_manager import validate_markdown_v2
+from src.myconfbot.utils.text_converter import (
+    render_simple_markup, simple_text_to_html, simple_text_to_markdown_v2
+)
+
+SAMPLE = """**Добро пожаловать!**
+_Мы рады вас видеть_ в нашей кондитерской.
+• Торты от 1500 ₽ (вес > 1 кг)
+- Пирожные & капкейки
+* Конфеты `ручной работы`
+Заказы: ул. Кондитерская, 15 — 9:00-21:00 🎂"""
+
+PLAIN_ALPHABET = list("абвгд abc 123.,!?-+=()[]{}<>&#|~\\")
+MARKUP = [('**', '**'), ('_', '_'), ('`', '`'), ('', '')]
+
+
+def legacy_simple_text_to_html(text):
+    """Прежняя реализация на четырех re.sub (для сравнения)"""
+    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
+    text = re.sub(r'_(.+?)_', r'<i>\1</i>', text)
+    text = re.sub(r'`(.+?)`', r'<code>\1</code>', text)
+    text = re.sub(r'^[•\-*]\s+(.+)$', r'• \1', text, flags=re.MULTILINE)
+    text = text.replace('\n', '<br>')
+    text = text.replace('&', '&amp;')
+    text = text.replace('<', '&lt;')
+    text = text.replace('>', '&gt;')
+    return text
+
+
+def random_document(rng, segments=8):
+    """Случайный текст с разметкой и ожидаемый видимый текст"""
+    # Начинаем с обычного слова, чтобы строка не стала элементом списка
+    source, visible = ['x'], ['x']
+    for _ in range(segments):
+        word = ''.join(rng.choice(PLAIN_ALPHABET) for _ in range(rng.randint(1, 10))).strip() or 'x'
+        opening, closing = rng.choice(MARKUP)
+        source.append(f"{opening}{word}{closing}")
+        visible.append(word)
+    return ' '.join(source), ' '.join(visible)
+
+
+def strip_markdown_v2(text):
+    """Убрать маркеры MarkdownV2 и экранирование"""
+    return re.sub(r'\\(.)|[*_`]', lambda match: match.group(1) or '', text)
+
+
+def check_properties(iterations=5000, seed=42):
+    """Разметка не теряет текст: после удаления тегов остается исходный текст"""
+    rng = random.Random(seed)
+    for _ in range(iterations):
+        text, expected = random_document(rng)
+
+        rendered_html = render_simple_markup.__wrapped__(text, 'HTML')
+        visible_html = html.unescape(re.sub(r'</?(b|i|code)>', '', rendered_html))
+        assert visible_html == expected, (text, rendered_html)
+
+        rendered_md = render_simple_markup.__wrapped__(text, 'MarkdownV2')
+        error = validate_markdown_v2(rendered_md)
+        assert error is None, (text, rendered_md, error)
+        assert strip_markdown_v2(rendered_md) == expected, (text, rendered_md)
+
+    print(f"Свойства проверены на {iterations} случайных текстах")
+
+
+def run_benchmark(number=20000):
+    legacy = timeit.timeit(lambda: legacy_simple_text_to_html(SAMPLE), number=number)
+    uncached = timeit.timeit(lambda: render_simple_markup.__wrapped__(SAMPLE, 'HTML'), number=number)
+    cached = timeit.timeit(lambda: simple_text_to_html(SAMPLE), number=number)
+    markdown = timeit.timeit(lambda: render_simple_markup.__wrapped__(SAMPLE, 'MarkdownV2'), number=number)
+
+    for name, total in [
+        ('legacy re.sub x4', legacy),
+        ('single-pass HTML', uncached),
+        ('single-pass HTML (LRU)', cached),
+        ('single-pass MarkdownV2', markdown),
+    ]:
+        print(f"{name:<26} {total / number * 1e6:8.2f} мкс/вызов")
+
+
+if __name__ == '__main__':
+    print(simple_text_to_html(SAMPLE))
+    print()
+    print(simple_text_to_markdown_v2(SAMPLE))
+    print()
+    check_properties()
+    run_benchmark()
@@ -1,227 +1,472 @@
 #!/usr/bin/env python3
 """
 Миграционный скрипт для переноса данных из SQLite в PostgreSQL
-Использование: python migrate_to_postgres.py
+
+Таблицы читаются батчами по id и пишутся через COPY FROM STDIN (или
+execute_values), независимые таблицы переносятся параллельно в порядке
+внешних ключей. После каждого батча в той же транзакции PostgreSQL
+сохраняется контрольная точка (_sqlite_migration_state), поэтому
+прерванный перенос продолжается с места остановки. В конце сбрасываются
+последовательности id и сравниваются контрольные суммы каждой таблицы.
+
+Использование (из корня проекта):
+    python migrations/migrate_to_postgres.py
+    python migrations/migrate_to_postgres.py --workers 4 --batch-size 10000 --yes
+    python migrations/migrate_to_postgres.py --restart       # начать заново, очистив целевые таблицы
+    python migrations/migrate_to_postgres.py --verify-only   # только сравнить контрольные суммы
 """
 
-import sqlite3
-import psycopg2
+import argparse
+import hashlib
+import io
+import json
 import os
+import sqlite3
 import sys
-from datetime import datetime
-from dotenv import load_dotenv
-import shutil
-import json
-from pathlib import Path
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime
+from decimal import Decimal
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import make_url
+
+from src.myconfbot.config import DatabaseConfig
+from src.myconfbot.migrations import MigrationRunner
+from src.myconfbot.utils.backup import snapshot_sqlite
+from src.myconfbot.utils.database import create_database_engine
+
+STATE_TABLE = '_sqlite_migration_state'
+# Служебные таблицы, которые не переносятся: версия схемы у PostgreSQL своя
+SKIP_TABLES = {'schema_version', STATE_TABLE}
+
+
+def _pg_kind(data_type: str) -> str:
+    if data_type == 'boolean':
+        return 'boolean'
+    if data_type.startswith('timestamp'):
+        return 'timestamp'
+    if data_type == 'date':
+        return 'date'
+    if data_type == 'numeric':
+        return 'numeric'
+    if data_type in ('smallint', 'integer', 'bigint'):
+        return 'integer'
+    if data_type in ('real', 'double precision'):
+        return 'float'
+    return 'text'
+
+
+def to_pg_value(value, kind: str, scale=None):
+    """Значение SQLite -> значение, которое вернул бы psycopg2 из колонки PostgreSQL"""
+    if value is None:
+        return None
+    if kind == 'boolean':
+        if isinstance(value, str):
+            return value.strip().lower() in ('1', 't', 'true')
+        return bool(value)
+    if kind == 'timestamp':
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+    if kind == 'date':
+        return date.fromisoformat(value[:10]) if isinstance(value, str) else value
+    if kind == 'numeric':
+        number = Decimal(str(value))
+        return number.quantize(Decimal(1).scaleb(-scale)) if scale is not None else number
+    if kind == 'integer':
+        return int(value)
+    if kind == 'float':
+        return float(value)
+    return value if isinstance(value, (str, bytes)) else str(value)
+
+
+def canonical(value) -> str:
+    """Одинаковое текстовое представление значения для обеих баз (для контрольных сумм и COPY)"""
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, Decimal):
+        return f"{value:f}"
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, bytes):
+        return '\\x' + value.hex()
+    return str(value)
 
-# Загрузка переменных окружения
-load_dotenv()
 
 class DatabaseMigrator:
-    def __init__(self):
+    def __init__(self, sqlite_path: str = None, pg_url: str = None, batch_size: int = 5000,
+                 workers: int = 4, method: str = 'copy'):
         self.migration_start = datetime.now()
         self.migration_id = self.migration_start.strftime("%Y%m%d_%H%M%S")
         self.log_file = f"migrations/migration_log_{self.migration_id}.txt"
-        
+        self._log_lock = threading.Lock()
+
         # Путь к SQLite базе
-        self.sqlite_path = os.path.join('data', 'confbot.db')
-        
+        self.sqlite_path = sqlite_path or os.path.join('data', 'confbot.db')
+        self.pg_url = pg_url or DatabaseConfig(use_postgres=True).url
+        # libpq не понимает имя драйвера SQLAlchemy (postgresql+psycopg2://)
+        self.pg_dsn = make_url(self.pg_url).set(drivername='postgresql').render_as_string(hide_password=False)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.method = method
+
         self.setup_logging()
         self.connect_databases()
-    
+
     def setup_logging(self):
         """Настройка логирования"""
         self.log("=" * 60)
         self.log(f"НАЧАЛО МИГРАЦИИ: {self.migration_start}")
         self.log(f"SQLite база: {self.sqlite_path}")
+        self.log(f"Батч: {self.batch_size}, потоков: {self.workers}, запись: {self.method}")
         self.log("=" * 60)
-    
+
     def log(self, message):
         """Запись в лог-файл и вывод в консоль"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_message = f"[{timestamp}] {message}"
-        print(log_message)
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(log_message + '\n')
-    
+        with self._log_lock:
+            print(log_message)
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(log_message + '\n')
+
+    def _sqlite_connect(self):
+        # Только чтение: исходная база не меняется, даже если бот еще работает
+        conn = sqlite3.connect(f"file:{self.sqlite_path}?mode=ro", uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _pg_connect(self):
+        return psycopg2.connect(self.pg_dsn)
+
     def connect_databases(self):
-        """Подключение к обеим базам данных"""
+        """Подключение к обеим базам данных и подготовка схемы PostgreSQL"""
         try:
             # Проверяем существование SQLite файла
             if not os.path.exists(self.sqlite_path):
                 raise FileNotFoundError(f"SQLite файл не найден: {self.sqlite_path}")
-            
+
             # Подключение к SQLite (исходная БД)
-            self.sqlite_conn = sqlite3.connect(self.sqlite_path)
-            self.sqlite_conn.row_factory = sqlite3.Row
+            self.sqlite_conn = self._sqlite_connect()
             self.log("✓ Подключение к SQLite успешно")
-            
+
+            # Схема PostgreSQL - теми же версионными миграциями, что и у бота
+            engine = create_database_engine(self.pg_url)
+            try:
+                MigrationRunner(engine).upgrade(include_online=True)
+                self.pg_tables = {
+                    table: {
+                        'depends_on': {
+                            fk['referred_table'] for fk in inspect(engine).get_foreign_keys(table)
+                            if fk['referred_table'] != table
+                        },
+                    }
+                    for table in inspect(engine).get_table_names() if table not in SKIP_TABLES
+                }
+            finally:
+                engine.dispose()
+
             # Подключение к PostgreSQL (целевая БД)
-            self.pg_conn = psycopg2.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                database=os.getenv('DB_NAME', 'confectioner_bot'),
-                user=os.getenv('DB_USER', 'postgres'),
-                password=os.getenv('DB_PASSWORD', ''),
-                port=os.getenv('DB_PORT', '5432')
-            )
+            self.pg_conn = self._pg_connect()
+            with self.pg_conn.cursor() as pg_cur:
+                pg_cur.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                        table_name TEXT PRIMARY KEY,
+                        last_id BIGINT NOT NULL DEFAULT 0,
+                        rows_copied BIGINT NOT NULL DEFAULT 0,
+                        rows_skipped BIGINT NOT NULL DEFAULT 0,
+                        finished BOOLEAN NOT NULL DEFAULT FALSE,
+                        updated_at TIMESTAMP NOT NULL DEFAULT now()
+                    )
+                """)
+            self.pg_conn.commit()
             self.log("✓ Подключение к PostgreSQL успешно")
-            
+
         except Exception as e:
             self.log(f"✗ Ошибка подключения: {e}")
             raise
-    
+
     def backup_sqlite(self):
-        """Создание резервной копии SQLite"""
+        """Создание резервной копии SQLite (онлайн, через backup API)"""
         # Создаем папку для бэкапов если нет
         os.makedirs('migrations/backups', exist_ok=True)
-        
+
         backup_path = f"migrations/backups/sqlite_backup_{self.migration_id}.db"
-        shutil.copy2(self.sqlite_path, backup_path)
+        if not snapshot_sqlite(self.sqlite_path, backup_path):
+            raise RuntimeError(f"не удалось создать резервную копию {self.sqlite_path}")
         self.log(f"✓ Резервная копия SQLite создана: {backup_path}")
         return backup_path
-    
+
     def get_table_list(self):
         """Получение списка таблиц из SQLite"""
         cursor = self.sqlite_conn.cursor()
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row['name'] for row in cursor.fetchall()]
+        tables = [row['name'] for row in cursor.fetchall()
+                  if not row['name'].startswith('sqlite_') and row['name'] not in SKIP_TABLES]
         self.log(f"Найдены таблицы: {tables}")
         return tables
-    
-    def migrate_table(self, table_name, custom_query=None):
-        """Миграция конкретной таблицы"""
-        self.log(f"Миграция таблицы: {table_name}")
-        
+
+    def _columns(self, table_name, sqlite_conn, pg_cur):
+        """Общие колонки таблицы в обеих базах: [(имя, вид типа PostgreSQL, scale)]"""
+        sqlite_columns = {row['name'] for row in sqlite_conn.execute(f"PRAGMA table_info({table_name})")}
+        pg_cur.execute("""
+            SELECT column_name, data_type, numeric_scale FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s ORDER BY ordinal_position
+        """, (table_name,))
+        return [(name, _pg_kind(data_type), scale) for name, data_type, scale in pg_cur.fetchall()
+                if name in sqlite_columns]
+
+    def _load_state(self, pg_cur, table_name):
+        pg_cur.execute(f"SELECT last_id, rows_copied, rows_skipped, finished FROM {STATE_TABLE} "
+                       f"WHERE table_name = %s", (table_name,))
+        row = pg_cur.fetchone()
+        if row is None:
+            return {'last_id': 0, 'rows': 0, 'skipped': 0, 'finished': False, 'new': True}
+        return {'last_id': row[0], 'rows': row[1], 'skipped': row[2], 'finished': row[3], 'new': False}
+
+    def _save_state(self, pg_cur, table_name, state, finished=False):
+        pg_cur.execute(f"""
+            INSERT INTO {STATE_TABLE} (table_name, last_id, rows_copied, rows_skipped, finished, updated_at)
+            VALUES (%s, %s, %s, %s, %s, now())
+            ON CONFLICT (table_name) DO UPDATE SET
+                last_id = EXCLUDED.last_id, rows_copied = EXCLUDED.rows_copied,
+                rows_skipped = EXCLUDED.rows_skipped, finished = EXCLUDED.finished, updated_at = now()
+        """, (table_name, state['last_id'], state['rows'], state['skipped'], finished))
+
+    def _write_batch(self, pg_cur, table_name, column_names, rows):
+        """Записать батч одной командой: COPY FROM STDIN (CSV) или execute_values"""
+        if self.method == 'copy':
+            # CSV: значения в кавычках, NULL - пустое поле без кавычек
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write(','.join(
+                    '' if value is None else '"' + canonical(value).replace('"', '""') + '"' for value in row
+                ))
+                buffer.write('\n')
+            buffer.seek(0)
+            pg_cur.copy_expert(
+                f"COPY {table_name} ({', '.join(column_names)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        else:
+            execute_values(
+                pg_cur, f"INSERT INTO {table_name} ({', '.join(column_names)}) VALUES %s",
+                rows, page_size=len(rows)
+            )
+
+    def _write_rows_one_by_one(self, pg_cur, table_name, column_names, rows):
+        """Запасной путь для батча с нарушением ограничений: вставка по строке, плохие строки пропускаются"""
+        placeholders = ', '.join(['%s'] * len(column_names))
+        skipped = 0
+        for row in rows:
+            pg_cur.execute("SAVEPOINT migrate_row")
+            try:
+                pg_cur.execute(f"INSERT INTO {table_name} ({', '.join(column_names)}) VALUES ({placeholders})", row)
+                pg_cur.execute("RELEASE SAVEPOINT migrate_row")
+            except psycopg2.Error as e:
+                pg_cur.execute("ROLLBACK TO SAVEPOINT migrate_row")
+                skipped += 1
+                self.log(f"  Пропущена строка {table_name}: {dict(zip(column_names, row))} - {str(e).strip()}")
+        return skipped
+
+    def migrate_table(self, table_name):
+        """Миграция конкретной таблицы батчами с контрольными точками"""
+        sqlite_conn = self._sqlite_connect()
+        pg_conn = self._pg_connect()
         try:
-            # Получаем данные из SQLite
-            with self.sqlite_conn:
-                cursor = self.sqlite_conn.cursor()
-                if custom_query:
-                    cursor.execute(custom_query)
-                else:
-                    cursor.execute(f"SELECT * FROM {table_name}")
-                rows = cursor.fetchall()
-            
-            if not rows:
-                self.log(f"  Таблица {table_name} пуста, пропускаем")
-                return 0
-            
-            # Получаем структуру таблицы для правильного порядка колонок
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns_info = cursor.fetchall()
-            column_names = [col['name'] for col in columns_info]
-            
-            # Мигрируем в PostgreSQL
-            migrated_count = 0
-            with self.pg_conn.cursor() as pg_cur:
-                for row in rows:
+            with pg_conn.cursor() as pg_cur:
+                state = self._load_state(pg_cur, table_name)
+                if state['finished']:
+                    self.log(f"  {table_name}: уже перенесена ({state['rows']} записей), пропускаем")
+                    return {'rows': state['rows'], 'skipped': state['skipped'], 'resumed': True}
+
+                if state['new']:
+                    pg_cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table_name})")
+                    if pg_cur.fetchone()[0]:
+                        raise RuntimeError(f"таблица {table_name} в PostgreSQL не пуста - запустите с --restart")
+                elif state['last_id']:
+                    self.log(f"  {table_name}: продолжение после id={state['last_id']} ({state['rows']} записей)")
+
+                columns = self._columns(table_name, sqlite_conn, pg_cur)
+                column_names = [name for name, _, _ in columns]
+                total = sqlite_conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+                select_sql = (f"SELECT {', '.join(column_names)} FROM {table_name} "
+                              f"WHERE id > ? ORDER BY id LIMIT ?")
+                id_position = column_names.index('id')
+
+                started = time.perf_counter()
+                copied_now = 0
+                while True:
+                    batch = sqlite_conn.execute(select_sql, (state['last_id'], self.batch_size)).fetchall()
+                    if not batch:
+                        break
+                    rows = [
+                        tuple(to_pg_value(row[index], kind, scale) for index, (_, kind, scale) in enumerate(columns))
+                        for row in batch
+                    ]
+
+                    pg_cur.execute("SAVEPOINT migrate_batch")
                     try:
-                        # Формируем значения в правильном порядке
-                        values = [row[col] for col in column_names]
-                        placeholders = ', '.join(['%s'] * len(column_names))
-                        
-                        insert_query = f"""
-                            INSERT INTO {table_name} ({', '.join(column_names)})
-                            VALUES ({placeholders})
-                            ON CONFLICT DO NOTHING
-                        """
-                        
-                        pg_cur.execute(insert_query, values)
-                        migrated_count += 1
-                        
-                    except Exception as e:
-                        self.log(f"  Ошибка в строке {migrated_count + 1}: {e}")
-                        self.log(f"  Данные: {dict(row)}")
-                        continue
-            
-            self.pg_conn.commit()
-            self.log(f"  ✓ Перенесено записей: {migrated_count}/{len(rows)}")
-            return migrated_count
-            
+                        self._write_batch(pg_cur, table_name, column_names, rows)
+                        pg_cur.execute("RELEASE SAVEPOINT migrate_batch")
+                        written = len(rows)
+                    except psycopg2.IntegrityError:
+                        pg_cur.execute("ROLLBACK TO SAVEPOINT migrate_batch")
+                        skipped = self._write_rows_one_by_one(pg_cur, table_name, column_names, rows)
+                        state['skipped'] += skipped
+                        written = len(rows) - skipped
+
+                    state['rows'] += written
+                    state['last_id'] = batch[-1][id_position]
+                    # Данные батча и контрольная точка фиксируются вместе
+                    self._save_state(pg_cur, table_name, state)
+                    pg_conn.commit()
+                    copied_now += written
+
+                    elapsed = time.perf_counter() - started
+                    self.log(f"  {table_name}: {state['rows']}/{total} "
+                             f"({copied_now / elapsed if elapsed else 0:.0f} строк/с)")
+
+                # Следующий INSERT бота должен получить id после перенесенных
+                pg_cur.execute(f"""
+                    SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL)
+                    FROM {table_name}
+                """, (table_name,))
+                self._save_state(pg_cur, table_name, state, finished=True)
+                pg_conn.commit()
+
+            self.log(f"  ✓ {table_name}: перенесено {state['rows']}, пропущено {state['skipped']}, "
+                     f"{time.perf_counter() - started:.1f} с")
+            return {'rows': state['rows'], 'skipped': state['skipped'], 'resumed': not state['new']}
+
         except Exception as e:
+            pg_conn.rollback()
             self.log(f"  ✗ Ошибка миграции таблицы {table_name}: {e}")
-            self.pg_conn.rollback()
-            return 0
-    
-    def migrate_users(self):
-        """Специфичная миграция пользователей"""
-        return self.migrate_table('users')
-    
-    def migrate_products(self):
-        """Специфичная миграция продуктов"""
-        return self.migrate_table('products')
-    
-    def migrate_orders(self):
-        """Специфичная миграция заказов"""
-        return self.migrate_table('orders')
-    
+            raise
+        finally:
+            sqlite_conn.close()
+            pg_conn.close()
+
+    def restart(self):
+        """Очистить целевые таблицы и контрольные точки перед переносом заново"""
+        tables = sorted(self.pg_tables)
+        with self.pg_conn.cursor() as pg_cur:
+            pg_cur.execute(f"TRUNCATE {', '.join(tables + [STATE_TABLE])} RESTART IDENTITY")
+        self.pg_conn.commit()
+        self.log(f"Целевые таблицы очищены: {tables}")
+
     def migrate_all_tables(self):
-        """Миграция всех таблиц"""
-        tables = self.get_table_list()
+        """Миграция всех таблиц: параллельно, таблица стартует после тех, на которые ссылается"""
+        source_tables = self.get_table_list()
+        tables = [table for table in source_tables if table in self.pg_tables]
+        for table in source_tables:
+            if table not in self.pg_tables:
+                self.log(f"  ⚠️ Таблицы {table} нет в схеме PostgreSQL, пропускаем")
+
+        pending = {table: self.pg_tables[table]['depends_on'] & set(tables) for table in tables}
         migration_stats = {}
-        
-        # Определяем порядок миграции для избежания foreign key constraints
-        migration_order = [
-            'users',  # Сначала пользователи
-            'product_categories',  # Затем категории
-            'products',  # Потом продукты
-            'order_statuses',  # Статусы заказов
-            'orders',  # Затем заказы
-            'reviews',  # Отзывы
-            'recipe_categories',  # Категории рецептов
-            'recipes',  # Рецепты
-            'recipe_ingredients'  # Ингредиенты
-        ]
-        
-        # Добавляем остальные таблицы в конец
-        for table in tables:
-            if table not in migration_order and not table.startswith('sqlite_'):
-                migration_order.append(table)
-        
-        for table in migration_order:
-            if table in tables and not table.startswith('sqlite_'):
-                count = self.migrate_table(table)
-                migration_stats[table] = count
-        
+        failed = set()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            while pending or running:
+                for table, depends_on in list(pending.items()):
+                    if depends_on & failed:
+                        failed.add(table)
+                        migration_stats[table] = {'error': f"не перенесены зависимости: {sorted(depends_on & failed)}"}
+                        del pending[table]
+                    elif not depends_on - set(migration_stats):
+                        running[pool.submit(self.migrate_table, table)] = table
+                        del pending[table]
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    table = running.pop(future)
+                    try:
+                        migration_stats[table] = future.result()
+                    except Exception as e:
+                        failed.add(table)
+                        migration_stats[table] = {'error': str(e)}
+
         return migration_stats
-    
+
+    def table_checksum(self, table_name, source):
+        """Число строк и md5 по строкам в порядке id (source: 'sqlite' или 'postgresql')"""
+        digest = hashlib.md5()
+        count = 0
+        sqlite_conn = self._sqlite_connect()
+        pg_conn = self._pg_connect()
+        try:
+            with pg_conn.cursor() as pg_cur:
+                columns = self._columns(table_name, sqlite_conn, pg_cur)
+            select_sql = f"SELECT {', '.join(name for name, _, _ in columns)} FROM {table_name} ORDER BY id"
+
+            if source == 'sqlite':
+                cursor = sqlite_conn.execute(select_sql)
+                convert = lambda row: [to_pg_value(row[index], kind, scale)
+                                       for index, (_, kind, scale) in enumerate(columns)]
+            else:
+                cursor = pg_conn.cursor(name=f"checksum_{table_name}")
+                cursor.itersize = self.batch_size
+                cursor.execute(select_sql)
+                convert = list
+
+            while True:
+                batch = cursor.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    digest.update('\x1f'.join(
+                        '\x00' if value is None else canonical(value) for value in convert(row)
+                    ).encode('utf-8'))
+                    digest.update(b'\x1e')
+                    count += 1
+            return count, digest.hexdigest()
+        finally:
+            sqlite_conn.close()
+            pg_conn.close()
+
     def verify_migration(self):
-        """Проверка целостности миграции"""
+        """Проверка целостности миграции: число строк и контрольная сумма каждой таблицы"""
         self.log("Проверка целостности данных...")
-        
+
+        tables = [table for table in self.get_table_list() if table in self.pg_tables]
         verification_results = {}
-        
-        # Проверяем количество записей в основных таблицах
-        tables_to_check = ['users', 'products', 'orders']
-        
-        for table in tables_to_check:
-            try:
-                # SQLite count
-                with self.sqlite_conn:
-                    cursor = self.sqlite_conn.cursor()
-                    cursor.execute(f"SELECT COUNT(*) as count FROM {table}")
-                    sqlite_count = cursor.fetchone()['count']
-                
-                # PostgreSQL count
-                with self.pg_conn.cursor() as pg_cur:
-                    pg_cur.execute(f"SELECT COUNT(*) as count FROM {table}")
-                    pg_count = pg_cur.fetchone()['count']
-                
-                verification_results[table] = {
-                    'sqlite': sqlite_count,
-                    'postgresql': pg_count,
-                    'match': sqlite_count == pg_count
-                }
-                
-                status = "✓" if sqlite_count == pg_count else "✗"
-                self.log(f"  {table}: SQLite={sqlite_count}, PostgreSQL={pg_count} {status}")
-                
-            except Exception as e:
-                self.log(f"  ✗ Ошибка проверки таблицы {table}: {e}")
-                verification_results[table] = {'error': str(e)}
-        
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                (table, source): pool.submit(self.table_checksum, table, source)
+                for table in tables for source in ('sqlite', 'postgresql')
+            }
+            for table in tables:
+                try:
+                    sqlite_count, sqlite_sum = futures[(table, 'sqlite')].result()
+                    pg_count, pg_sum = futures[(table, 'postgresql')].result()
+                    match = sqlite_count == pg_count and sqlite_sum == pg_sum
+                    verification_results[table] = {
+                        'sqlite': sqlite_count,
+                        'postgresql': pg_count,
+                        'sqlite_checksum': sqlite_sum,
+                        'postgresql_checksum': pg_sum,
+                        'match': match,
+                    }
+                    status = "✓" if match else "✗"
+                    self.log(f"  {table}: SQLite={sqlite_count}, PostgreSQL={pg_count}, "
+                             f"md5 {sqlite_sum[:12]}/{pg_sum[:12]} {status}")
+                except Exception as e:
+                    self.log(f"  ✗ Ошибка проверки таблицы {table}: {e}")
+                    verification_results[table] = {'error': str(e)}
+
         return verification_results
-    
+
     def generate_report(self, migration_stats, verification_results):
         """Генерация отчета о миграции"""
         report = {
@@ -229,20 +474,24 @@ class DatabaseMigrator:
             'start_time': self.migration_start.isoformat(),
             'end_time': datetime.now().isoformat(),
             'duration_seconds': (datetime.now() - self.migration_start).total_seconds(),
+            'batch_size': self.batch_size,
+            'workers': self.workers,
+            'method': self.method,
             'migration_stats': migration_stats,
             'verification_results': verification_results,
-            'success': all(result.get('match', False) for result in verification_results.values() 
-                          if isinstance(result, dict) and 'match' in result)
+            'success': bool(verification_results) and all(
+                result.get('match', False) for result in verification_results.values()
+            ) and not any('error' in stats for stats in migration_stats.values()),
         }
-        
+
         # Сохраняем отчет в JSON
         report_file = f"migrations/migration_report_{self.migration_id}.json"
         with open(report_file, 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=2, ensure_ascii=False)
-        
+
         self.log(f"Отчет сохранен: {report_file}")
         return report
-    
+
     def cleanup(self):
         """Очистка ресурсов"""
         if hasattr(self, 'sqlite_conn'):
@@ -251,65 +500,91 @@ class DatabaseMigrator:
             self.pg_conn.close()
         self.log("Ресурсы очищены")
 
-def main():
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Перенос данных из SQLite в PostgreSQL")
+    parser.add_argument('--sqlite', default=os.path.join('data', 'confbot.db'), help="исходная база SQLite")
+    parser.add_argument('--pg-url', help="URL PostgreSQL (по умолчанию из DB_* в .env)")
+    parser.add_argument('--batch-size', type=int, default=5000, help="строк в батче")
+    parser.add_argument('--workers', type=int, default=4, help="таблиц параллельно")
+    parser.add_argument('--method', choices=['copy', 'values'], default='copy',
+                        help="COPY FROM STDIN или INSERT ... VALUES (execute_values)")
+    parser.add_argument('--restart', action='store_true', help="очистить целевые таблицы и начать заново")
+    parser.add_argument('--verify-only', action='store_true', help="только проверка контрольных сумм")
+    parser.add_argument('--no-backup', action='store_true', help="без резервной копии SQLite")
+    parser.add_argument('--yes', action='store_true', help="без запроса подтверждения")
+    return parser.parse_args(argv)
+
+
+def main(args):
     """Основная функция миграции"""
     migrator = None
     try:
-        migrator = DatabaseMigrator()
-        
-        # 1. Резервное копирование
-        backup_path = migrator.backup_sqlite()
-        
-        # 2. Миграция данных
-        migrator.log("Начало миграции данных...")
-        migration_stats = migrator.migrate_all_tables()
-        
+        migrator = DatabaseMigrator(args.sqlite, args.pg_url, args.batch_size, args.workers, args.method)
+
+        migration_stats = {}
+        if not args.verify_only:
+            # 1. Резервное копирование
+            if not args.no_backup:
+                migrator.backup_sqlite()
+
+            # 2. Миграция данных
+            if args.restart:
+                migrator.restart()
+            migrator.log("Начало миграции данных...")
+            migration_stats = migrator.migrate_all_tables()
+
         # 3. Проверка целостности
         migrator.log("Проверка целостности...")
         verification_results = migrator.verify_migration()
-        
+
         # 4. Генерация отчета
         report = migrator.generate_report(migration_stats, verification_results)
-        
+
         # 5. Итоговый статус
         if report['success']:
             migrator.log("🎉 МИГРАЦИЯ УСПЕШНО ЗАВЕРШЕНА!")
             migrator.log(f"Общее время: {report['duration_seconds']:.2f} секунд")
         else:
             migrator.log("❌ МИГРАЦИЯ ЗАВЕРШЕНА С ОШИБКАМИ!")
-            migrator.log("Проверьте лог-файл для деталей")
+            migrator.log("Проверьте лог-файл для деталей; повторный запуск продолжит перенос")
             sys.exit(1)
-            
+
     except Exception as e:
         if migrator:
             migrator.log(f"❌ КРИТИЧЕСКАЯ ОШИБКА: {e}")
         else:
             print(f"Критическая ошибка при инициализации: {e}")
         sys.exit(1)
-        
+
     finally:
         if migrator:
             migrator.cleanup()
 
+
 if __name__ == "__main__":
+    args = parse_args()
+
     # Проверяем существование исходной БД
-    sqlite_path = os.path.join('data', 'confbot.db')
-    if not os.path.exists(sqlite_path):
-        print(f"❌ Файл {sqlite_path} не найден!")
+    if not os.path.exists(args.sqlite):
+        print(f"❌ Файл {args.sqlite} не найден!")
         print("Запустите скрипт из корневой директории проекта")
         sys.exit(1)
-    
-    # Запрос подтверждения
-    print("⚠️  ВНИМАНИЕ: Это миграционный скрипт для переноса данных")
-    print("⚠️  Убедитесь, что:")
-    print("  1. Сделана резервная копия всего проекта")
-    print("  2. PostgreSQL база создана и настроена")
-    print("  3. Бот остановлен на время миграции")
-    print(f"  4. Будет перенесена база: {sqlite_path}")
-    
-    confirmation = input("Продолжить миграцию? (y/N): ")
-    if confirmation.lower() != 'y':
-        print("Миграция отменена")
-        sys.exit(0)
-    
-    main()
\ No newline at end of file
+
+    if not args.yes and not args.verify_only:
+        # Запрос подтверждения
+        print("⚠️  ВНИМАНИЕ: Это миграционный скрипт для переноса данных")
+        print("⚠️  Убедитесь, что:")
+        print("  1. Сделана резервная копия всего проекта")
+        print("  2. PostgreSQL база создана и настроена")
+        print("  3. Бот остановлен на время миграции")
+        print(f"  4. Будет перенесена база: {args.sqlite}")
+        if args.restart:
+            print("  5. Данные в таблицах PostgreSQL будут удалены (--restart)")
+
+        confirmation = input("Продолжить миграцию? (y/N): ")
+        if confirmation.lower() != 'y':
+            print("Миграция отменена")
+            sys.exit(0)
+
+    main(args)
@@ -2,8 +2,16 @@
 
 __version__ = "0.1.0"
 
-# Импорты для удобства
-from .bot.confectionery_bot import ConfectioneryBot, create_bot
-from .config import Config
-
 __all__ = ['ConfectioneryBot', 'create_bot', 'Config', '__version__']
+
+
+def __getattr__(name):
+    # Импорты для удобства - лениво: `import src.myconfbot.config` не должен
+    # тянуть telebot, SQLAlchemy и все обработчики
+    if name in ('ConfectioneryBot', 'create_bot'):
+        from .bot import confectionery_bot
+        return getattr(confectionery_bot, name)
+    if name == 'Config':
+        from .config import Config
+        return Config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
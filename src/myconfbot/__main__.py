@@ -1,24 +1,20 @@
 # src\myconfbot\__main__.py
 
-import logging.config
-from .logging_config import setup_logging
-
-# 🔴 ВАЖНО: вызываем setup_logging() ПЕРЕД импортом остальных модулей!
-setup_logging()
-
+import logging
 import sys
-from src.myconfbot.config import Config
+
 
 def main():
     """Основная точка входа для запуска как модуля"""
     try:
         # python -m src.myconfbot
-        from src.myconfbot.bot.confectionery_bot import create_bot
-        bot = create_bot()
+        # Окружение, логирование, БД и обработчики готовятся в bootstrap() - один раз
+        from src.myconfbot.bootstrap import bootstrap
+        bot = bootstrap()
         bot.run()
     except Exception as e:
         logging.critical(f"💥 Ошибка запуска: {e}", exc_info=True)
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
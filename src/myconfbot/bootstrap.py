@@ -0,0 +1,99 @@
+# src/myconfbot/bootstrap.py
+"""
+Единая точка запуска бота
+
+Импорт модулей пакета не делает никакой работы с окружением, файлами и БД.
+Всё это выполняется здесь, один раз и по порядку:
+    .env -> логирование -> конфигурация и каталоги -> БД (блокирующие
+    миграции) -> известные пользователи -> подписчики доменных событий ->
+    импорт и регистрация обработчиков -> фоновые онлайн-миграции
+
+Длительность каждого этапа сохраняется в bot.startup_timings и пишется в лог.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from src.myconfbot.config import Config, load_environment
+
+logger = logging.getLogger(__name__)
+
+_bot = None
+_bootstrap_lock = threading.Lock()
+
+
+@contextmanager
+def _phase(timings: Dict[str, float], name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - started
+
+
+def bootstrap(config: Optional[Config] = None, db_manager=None, setup_logs: bool = True):
+    """
+    Подготовить окружение и создать бота (повторный вызов вернет того же бота)
+
+    Args:
+        config: готовая конфигурация (по умолчанию - из окружения)
+        db_manager: менеджер БД (по умолчанию - общий get_db_manager())
+        setup_logs: настраивать ли логирование (файл и очередь)
+
+    Returns:
+        ConfectioneryBot: бот с зарегистрированными обработчиками
+    """
+    global _bot
+    with _bootstrap_lock:
+        if _bot is not None:
+            return _bot
+
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+
+        with _phase(timings, 'env'):
+            load_environment()
+
+        if setup_logs:
+            with _phase(timings, 'logging'):
+                from src.myconfbot.logging_config import setup_logging
+                setup_logging()
+
+        with _phase(timings, 'config'):
+            config = config or Config()
+            config.files.ensure_directories()
+
+        with _phase(timings, 'database'):
+            from src.myconfbot.utils.database import get_db_manager, set_db_manager
+            if db_manager is None:
+                db_manager = get_db_manager()
+            else:
+                set_db_manager(db_manager)
+
+        with _phase(timings, 'known_users'):
+            db_manager.warm_known_users()
+
+        with _phase(timings, 'events'):
+            from src.myconfbot.utils.events import get_event_bus
+            from src.myconfbot.services.event_subscribers import register_subscribers
+            register_subscribers(get_event_bus())
+
+        with _phase(timings, 'imports'):
+            from src.myconfbot.bot.confectionery_bot import ConfectioneryBot
+
+        with _phase(timings, 'handlers'):
+            bot = ConfectioneryBot(config.bot_token, config, db_manager)
+
+        timings['total'] = time.perf_counter() - started
+        db_manager.start_online_migrations()
+        bot.startup_timings = timings
+        logger.info(
+            "🚀 Бот готов за %.0f мс (%s)", timings['total'] * 1000,
+            ', '.join(f"{name} {seconds * 1000:.0f}" for name, seconds in timings.items() if name != 'total')
+        )
+
+        _bot = bot
+        return bot
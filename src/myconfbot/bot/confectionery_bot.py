@@ -6,29 +6,35 @@ logger = logging.getLogger(__name__)
 import os
 from typing import Optional
 
-import telebot
-from dotenv import load_dotenv
-
-from src.myconfbot.config import Config
+from src.myconfbot.config import Config, load_environment
 logger = logging.getLogger(__name__)
 
-from src.myconfbot.utils.database import db_manager
+from src.myconfbot.utils.bot_middleware import MiddlewareBot
+from src.myconfbot.utils.database import DatabaseManager, get_db_manager
+from src.myconfbot.utils.events import get_event_bus
+from src.myconfbot.utils.metrics import get_metrics
+from src.myconfbot.utils.memory_monitor import get_memory_monitor
+from src.myconfbot.utils.profiler import UpdateProfiler
+from src.myconfbot.services.auth_service import AuthService
+from src.myconfbot.services.notification_service import NotificationService
+from src.myconfbot.utils.telegram_sender import RateLimitedSender
+from src.myconfbot.utils.album_sender import get_album_sender
+from src.myconfbot.utils.flood_guard import FloodGuard
+from src.myconfbot.utils.update_lanes import LanePool
 from src.myconfbot.handlers import HandlerFactory
+from src.myconfbot.handlers.shared.constants import ButtonText
 from src.myconfbot.handlers.user.order_handler import OrderHandler
 from src.myconfbot.handlers.user.my_order_handler import MyOrderHandler
 from src.myconfbot.handlers.admin.order_admin_handler import OrderAdminHandler
 
 
-# Загрузка переменных окружения
-load_dotenv()
-
-
 
 
 class ConfectioneryBot:
-    def __init__(self, token: str, config: Config):
-        self.bot = telebot.TeleBot(token)
+    def __init__(self, token: str, config: Config, db_manager: Optional[DatabaseManager] = None):
+        self.bot = MiddlewareBot(token)
         self.config = config
+        self.db_manager = db_manager = db_manager or get_db_manager()
         self.handler_factory = HandlerFactory(self.bot, self.config, db_manager)
         self.setup_handlers()
         order_handler = OrderHandler(self.bot, self.config, db_manager)
@@ -37,22 +43,101 @@ class ConfectioneryBot:
         my_order_handler.register_handlers()
         order_admin_handler = OrderAdminHandler(self.bot, config, db_manager)
         order_admin_handler.register_handlers()
+
+        menu_texts = [text for name, text in vars(ButtonText).items() if name.isupper()]
+
+        # Метрики - первым middleware: замер апдейта охватывает остальные
+        self.metrics = get_metrics()
+        self.metrics.instrument_api()
+        self.metrics.instrument_engine(db_manager.engine)
+        self.metrics.instrument_bot(self.bot, menu_texts)
+
+        # Профилировщик - внутри замера метрик, вокруг сессии БД и обработчиков
+        auth_service = AuthService(db_manager)
+        self.profiler = UpdateProfiler(
+            role_resolver=lambda user_id: 'admin' if auth_service.is_admin(user_id) else 'user'
+        )
+        self.profiler.instrument_bot(self.bot, menu_texts)
+
+        # Одна сессия БД на апдейт и на шаг диалога: поиск пользователя апдейта попадает в замеры выше
+        db_manager.instrument_bot(self.bot)
+
+        # Защита от флуда - последней: проверка внутри unit of work апдейта, отброшенные апдейты видны в метриках
+        self.flood_guard = FloodGuard(is_admin=auth_service.is_admin, metrics=self.metrics)
+        self.flood_guard.instrument_bot(self.bot)
+
+        # Полосы приоритета: действия администраторов и оформление заказов не ждут за просмотром каталога
+        self.lane_pool = LanePool.install(
+            self.bot, is_admin=self._known_admin, metrics=self.metrics,
+            menu_texts=menu_texts
+        )
+
+        self.memory_monitor = get_memory_monitor()
+        self._register_memory_probes()
+
+        # Уведомления о заказах из outbox: после метрик, чтобы sendMessage попадал в замеры
+        self.notifications = NotificationService(db_manager, RateLimitedSender(self.bot))
         
         logger.info("Бот инициализирован")
 
+    def _known_admin(self, user_id: int) -> bool:
+        """Роль без запроса к БД (вызывается в потоке получения апдейтов)"""
+        user = self.db_manager.user_cache.get(user_id)
+        return user.is_admin if user is not None else user_id in self.config.admin_ids
+
     def setup_handlers(self):
         """Настройка обработчиков через фабрику"""
         self.handler_factory.register_all_handlers()
         logger.info("Все обработчики зарегистрированы")
 
+    def _register_memory_probes(self):
+        """Размеры реестров в памяти процесса для отчетов /memory"""
+        from src.myconfbot.handlers.shared.states_manager import StatesManager
+        from src.myconfbot.handlers.admin.photo_manager import PhotoManager
+        from src.myconfbot.utils.content_manager import get_content_manager
+        from src.myconfbot.utils.text_converter import render_simple_markup
+
+        def backend_sizes(backend):
+            handlers = getattr(backend, 'handlers', {}) or {}
+            return {'chats': len(handlers), 'handlers': sum(len(items) for items in handlers.values())}
+
+        def series_count():
+            histograms = [self.metrics.handler_duration, self.metrics.api_duration, self.metrics.db_duration]
+            return {name: len(histogram.snapshot()) for name, histogram in
+                    zip(('handlers', 'api_methods', 'statements'), histograms)}
+
+        monitor = self.memory_monitor
+        monitor.add_probe('states', StatesManager.registry_sizes)
+        monitor.add_probe('next_step_handlers', lambda: backend_sizes(self.bot.next_step_backend))
+        monitor.add_probe('reply_handlers', lambda: backend_sizes(self.bot.reply_backend))
+        monitor.add_probe('album_buffers', PhotoManager.pending_album_sizes)
+        monitor.add_probe('content_pages', lambda: get_content_manager().cache_info())
+        monitor.add_probe('formatter_cache', lambda: {'entries': render_simple_markup.cache_info().currsize})
+        monitor.add_probe('metrics_series', series_count)
+        if self.lane_pool is not None:
+            monitor.add_probe('update_lanes', self.lane_pool.tasks.sizes)
+        monitor.add_probe('users', lambda: {'known': len(self.db_manager.known_users),
+                                            'contexts': len(self.db_manager.user_cache)})
+        monitor.add_probe('photo_file_ids', lambda: {'entries': len(get_album_sender(self.bot).cache)})
+
     def run(self):
         """Запуск бота"""
         logger.info("Запуск бота...")
-        self.bot.infinity_polling()
+        self.metrics.start_http_server()
+        self.memory_monitor.start_periodic()
+        self.notifications.start()
+        try:
+            self.bot.infinity_polling()
+        finally:
+            self.notifications.stop()
+            get_event_bus().stop()
+            self.memory_monitor.stop_periodic()
+            self.metrics.stop_http_server()
 
 
 def create_bot() -> ConfectioneryBot:
     """Фабричная функция для создания бота"""
+    load_environment()
     token = os.getenv('TELEGRAM_BOT_TOKEN')
     if not token:
         raise ValueError("TELEGRAM_BOT_TOKEN не найден в переменных окружения")
@@ -65,12 +150,9 @@ def main():
     """Основная функция запуска бота"""
     
     try:
-        # Инициализация базы данных
-        db_manager.init_db()
-        logger.info("База данных инициализирована")
-        
-        # Создание и запуск бота
-        bot = create_bot()
+        # Окружение, БД (создание таблиц) и обработчики - в bootstrap()
+        from src.myconfbot.bootstrap import bootstrap
+        bot = bootstrap()
         bot.run()
         
     except Exception as e:
@@ -4,29 +4,47 @@ import logging
 logger = logging.getLogger(__name__)
 
 import os
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Загружаем переменные окружения
-load_dotenv()
+_environment_loaded = False
+_environment_lock = threading.Lock()
+
+
+def load_environment():
+    """Загрузить .env один раз за процесс (при первом обращении к настройкам)"""
+    global _environment_loaded
+    with _environment_lock:
+        if not _environment_loaded:
+            load_dotenv()
+            _environment_loaded = True
+
 
 class DatabaseConfig:
-    def __init__(self):
-        self.use_postgres = os.getenv('USE_POSTGRES', 'false').lower() == 'true'
+    def __init__(self, use_postgres: bool = None, url: str = None):
+        load_environment()
+        if use_postgres is None:
+            use_postgres = os.getenv('USE_POSTGRES', 'false').lower() == 'true'
+        self.use_postgres = use_postgres
         self.host = os.getenv('DB_HOST', 'localhost')
         self.port = os.getenv('DB_PORT', '5432')
         self.name = os.getenv('DB_NAME', 'confectioner_bot')
         self.user = os.getenv('DB_USER', 'postgres')
         self.password = os.getenv('DB_PASSWORD', '')
         
-        # Для PostgreSQL используем полный URL из env или собираем его
-        if self.use_postgres:
+        # Явно переданный URL (тесты, инструменты) важнее окружения;
+        # для PostgreSQL используем полный URL из env или собираем его
+        if url:
+            self.url = url
+        elif self.use_postgres:
             self.url = os.getenv('DATABASE_URL') or f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
         else:
             self.url = os.getenv('DATABASE_URL', 'sqlite:///data/confbot.db')
 
 class FileStorageConfig:
     def __init__(self):
+        load_environment()
         # Базовая директория для всех файлов
         self.base_dir = Path(os.getenv('FILE_STORAGE_BASE_DIR', 'data'))
         
@@ -36,13 +54,12 @@ class FileStorageConfig:
         self.users_dir = self.base_dir / 'users'
         self.temp_dir = self.base_dir / 'temp'
         
-        # Создаем директории при инициализации
-        self._create_directories()
+        # Директории создаются при запуске (bootstrap) или по требованию в get_*_path
     
-    def _create_directories(self):
+    def ensure_directories(self):
         """Создание необходимых директорий"""
         try:
-            self.base_dir.mkdir(exist_ok=True)
+            self.base_dir.mkdir(parents=True, exist_ok=True)
             self.orders_dir.mkdir(exist_ok=True)
             self.products_dir.mkdir(exist_ok=True)
             self.users_dir.mkdir(exist_ok=True)
@@ -54,7 +71,7 @@ class FileStorageConfig:
     def get_order_path(self, order_id: int, filename: str = None) -> Path:
         """Получить путь к файлам заказа"""
         order_dir = self.orders_dir / f"order_{order_id}"
-        order_dir.mkdir(exist_ok=True)
+        order_dir.mkdir(parents=True, exist_ok=True)
         
         if filename:
             return order_dir / filename
@@ -72,7 +89,7 @@ class FileStorageConfig:
     def get_product_path(self, product_id: int, filename: str = None) -> Path:
         """Получить путь к файлам продукта"""
         product_dir = self.products_dir / str(product_id)
-        product_dir.mkdir(exist_ok=True)
+        product_dir.mkdir(parents=True, exist_ok=True)
         
         if filename:
             return product_dir / filename
@@ -107,6 +124,7 @@ class FileStorageConfig:
 
 class Config:
     def __init__(self, bot_token=None, admin_ids=None):
+        load_environment()
         self.bot_token = bot_token or self.get_bot_token()
         self.admin_ids = admin_ids or self.get_admin_ids()
         self.db = DatabaseConfig()
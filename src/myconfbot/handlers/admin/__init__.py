@@ -1,11 +1,17 @@
 # src\myconfbot\handlers\admin\__init__.py
 
-from .admin_main import AdminMainHandler
-from .user_management import UserManagementHandler
-from .order_management import OrderManagementHandler
-from .content_management import ContentManagementHandler
-from .product_management import ProductManagementHandler
-from .stats_management import StatsHandler
+from importlib import import_module
+
+# Обработчики импортируются по первому обращению: импорт одного модуля
+# пакета (например, order_admin_handler) не тянет все остальные
+_HANDLER_MODULES = {
+    'AdminMainHandler': '.admin_main',
+    'UserManagementHandler': '.user_management',
+    'OrderManagementHandler': '.order_management',
+    'ContentManagementHandler': '.content_management',
+    'ProductManagementHandler': '.product_management',
+    'StatsHandler': '.stats_management',
+}
 
 __all__ = [
     'AdminMainHandler',
@@ -14,4 +20,10 @@ __all__ = [
     'ContentManagementHandler',
     'ProductManagementHandler',
     'StatsHandler'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _HANDLER_MODULES:
+        return getattr(import_module(_HANDLER_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
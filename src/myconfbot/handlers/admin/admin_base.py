@@ -51,21 +51,17 @@ class BaseAdminHandler(ABC):
             request_type = "MESSAGE"
             chat_id = message.chat.id if message else user_id
         
-        # Отладочная информация
-        print(f"Checking admin access for user_id: {user_id} (Type: {request_type})")
-        
-        # Пропускаем проверку для сообщений от самого бота
-        if user_id == self.bot.get_me().id:
-            print("Skipping admin check for bot itself")
+        # Пропускаем проверку для сообщений от самого бота (bot.user кэширует getMe)
+        if user_id == self.bot.user.id:
+            logger.debug("Skipping admin check for bot itself")
             return True
         
         is_admin_result = self.is_admin(user_id)
-        # Отладочная информация
-        print(f"Is admin: {is_admin_result}")
+        logger.debug("Admin access check: user_id=%s, type=%s, is_admin=%s",
+                     user_id, request_type, is_admin_result)
         
         # Если пользователь не найден в базе, автоматически нет прав
         if is_admin_result is None:
-            print(f"User {user_id} not found in database - access denied") # Отладочная информация
             is_admin_result = False
         
         if not is_admin_result:
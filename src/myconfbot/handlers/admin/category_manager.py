@@ -622,7 +622,7 @@ class CategoryManager:
             return False
         
         # Пропускаем проверку для сообщений от самого бота
-        if user_id == self.bot.get_me().id:
+        if user_id == self.bot.user.id:
             return True
         
         # Используем AuthService для проверки прав
@@ -6,7 +6,7 @@ from telebot import types
 from telebot.types import Message, CallbackQuery
 
 from .admin_base import BaseAdminHandler
-from src.myconfbot.utils.content_manager import ContentManager
+from src.myconfbot.utils.content_manager import get_content_manager
 
 
 class ContentManagementHandler(BaseAdminHandler):
@@ -14,7 +14,7 @@ class ContentManagementHandler(BaseAdminHandler):
     
     def __init__(self, bot, config, db_manager):
         super().__init__(bot, config, db_manager)
-        self.content_manager = ContentManager()
+        self.content_manager = get_content_manager()
     
     def register_handlers(self):
         """Регистрация обработчиков управления контентом"""
@@ -240,6 +240,16 @@ class ContentManagementHandler(BaseAdminHandler):
             self.bot.send_message(message.chat.id, "❌ Ошибка: не найден файл для редактирования")
             return
         
+        # Проверяем разметку до сохранения, а не при отправке пользователю
+        markup_error = self.content_manager.validate_content(message.text)
+        if markup_error:
+            self.bot.send_message(
+                message.chat.id,
+                f"❌ Ошибка разметки MarkdownV2: {markup_error}\n\n"
+                "Исправьте текст и отправьте его еще раз."
+            )
+            return
+        
         try:
             if self.content_manager.update_content(filename, message.text):
                 # Удаляем состояние редактирования
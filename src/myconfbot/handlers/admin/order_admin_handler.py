@@ -11,6 +11,11 @@ from src.myconfbot.handlers.admin.admin_base import BaseAdminHandler
 from src.myconfbot.handlers.user.base_user_handler import BaseUserHandler
 from src.myconfbot.handlers.shared.admin_constants import AdminConstants
 from src.myconfbot.handlers.shared.constants import UserStates
+from src.myconfbot.handlers.shared.utils import (
+    history_page_header, note_text_html, parse_history_callback, render_history_page
+)
+from src.myconfbot.utils.file_downloader import get_file_downloader
+from src.myconfbot.utils.album_sender import get_album_sender
 
 logger = logging.getLogger(__name__)
 
@@ -397,11 +402,8 @@ class OrderAdminHandler(BaseAdminHandler):
     def _show_status_history(self, callback: CallbackQuery):
         """Показать историю статусов"""
         try:
-            order_id = int(callback.data.replace("orderadm_change_status_", ""))
-            status_history = self._get_order_status_history(order_id)
-            
-            keyboard = AdminConstants.create_status_history_keyboard(order_id)
-            text = self._format_status_history_for_admin(status_history, order_id)
+            order_id, before = parse_history_callback(callback.data, AdminConstants.STATUS_HISTORY_PREFIX)
+            text, keyboard = self._render_status_history(order_id, before)
             
             self.bot.edit_message_text(
                 chat_id=callback.message.chat.id,
@@ -645,9 +647,7 @@ class OrderAdminHandler(BaseAdminHandler):
                 self.bot.send_message(chat_id, success_message)
                 
                 # Показываем обновленную историю статусов
-                status_history = self._get_order_status_history(order_id)
-                keyboard = AdminConstants.create_status_history_keyboard(order_id)
-                text = self._format_status_history_for_admin(status_history, order_id)
+                text, keyboard = self._render_status_history(order_id)
                 
                 self.bot.send_message(
                     chat_id,
@@ -824,22 +824,17 @@ class OrderAdminHandler(BaseAdminHandler):
             photo = message.photo[-1]
             file_id = photo.file_id
             
-            # Получаем информацию о файле
-            file_info = self.bot.get_file(file_id)
-            file_extension = os.path.splitext(file_info.file_path)[1] or '.jpg'
-            
-            # Генерируем уникальное имя файла
+            # Генерируем уникальное имя файла и скачиваем потоково
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"status_photo_{timestamp}{file_extension}"
-            file_path = os.path.join(status_photos_dir, filename)
+            downloader = get_file_downloader(self.bot, self.config.files.temp_dir)
+            file_path = downloader.download(file_id, status_photos_dir, f"status_photo_{timestamp}")
             
-            # Скачиваем и сохраняем файл
-            downloaded_file = self.bot.download_file(file_info.file_path)
-            
-            with open(file_path, 'wb') as new_file:
-                new_file.write(downloaded_file)
+            if not file_path:
+                return None
             
+            filename = file_path.name
             logger.info(f"Фото статуса сохранено: {file_path}")
+            get_album_sender(self.bot).remember(file_path, file_id)
             
             # Возвращаем относительный путь для хранения в БД
             relative_path = os.path.join("orders", f"order_{order_id}", "status_photos", filename)
@@ -1032,14 +1027,15 @@ class OrderAdminHandler(BaseAdminHandler):
             logger.error(f"Ошибка при получении деталей заказа: {e}")
             return None
     
-    def _get_order_status_history(self, order_id: int):
-        """Получить историю статусов заказа"""
-        try:
-            # Используем метод из DatabaseManager
-            return self.db_manager.get_order_status_history(order_id)
-        except Exception as e:
-            logger.error(f"Ошибка при получении истории статусов: {e}")
-            return []
+    def _get_order_status_history(self, order_id: int, before: str = None) -> dict:
+        """Получить страницу истории статусов заказа (новые сверху)"""
+        return self.db_manager.get_order_status_history_page(order_id, before)
+
+    def _render_status_history(self, order_id: int, before: str = None) -> tuple:
+        """Страница истории статусов и ее клавиатура"""
+        page = self._get_order_status_history(order_id, before)
+        text, next_cursor = self._format_status_history_for_admin(page, order_id, before)
+        return text, AdminConstants.create_status_history_keyboard(order_id, next_cursor, before)
     
     # Методы форматирования
     
@@ -1128,30 +1124,33 @@ class OrderAdminHandler(BaseAdminHandler):
         
         return text
     
-    def _format_status_history_for_admin(self, status_history: list, order_id: int) -> str:
-        """Форматирование истории статусов для администратора с фото"""
-        text = f"🔄 <b>История статусов заказа #{order_id}</b>\n\n"
+    def _format_status_history_for_admin(self, page: dict, order_id: int, before: str = None) -> tuple:
+        """Форматирование страницы истории статусов для администратора с фото"""
+        header = history_page_header(f"🔄 <b>История статусов заказа #{order_id}</b>", page, before)
         
-        if not status_history:
-            text += "📭 История статусов пуста\n"
-            return text
+        if not page['items']:
+            return header + "📭 История статусов пуста\n", None
         
-        for status in status_history:
-            text += f"📅 <b>{status['created_at'].strftime('%d.%m.%Y %H:%M')}</b>\n"
-            text += f"🔄 <b>Статус:</b> {status['status']}\n"
-            
-            if status['admin_notes']:
-                text += f"📝 <b>Примечание:</b> {status['admin_notes']}\n"
-            
-            if status['photo_path']:
-                # Показываем, что есть фото
-                text += f"📸 <b>Есть фото</b>\n"
-                
-                # Можно также отправить само фото, но для этого нужен отдельный метод
-                # text += f"📸 <a href=\"{self._get_full_photo_url(status['photo_path'])}\">Фото</a>\n"
+        text, _, next_cursor = render_history_page(header, page, self._format_status_for_admin)
+        return text, next_cursor
+
+    def _format_status_for_admin(self, status: dict) -> str:
+        """Запись истории статусов для администратора"""
+        text = f"📅 <b>{status['created_at'].strftime('%d.%m.%Y %H:%M')}</b>\n"
+        text += f"🔄 <b>Статус:</b> {status['status']}\n"
+        
+        if status['admin_notes']:
+            text += f"📝 <b>Примечание:</b> {note_text_html(status['admin_notes'])}\n"
+        
+        if status['photo_path']:
+            # Показываем, что есть фото
+            text += f"📸 <b>Есть фото</b>\n"
             
-            text += "━━━━━━━━━━━━━━━━━━━━\n\n"
+            # Можно также отправить само фото, но для этого нужен отдельный метод
+            # text += f"📸 <a href=\"{self._get_full_photo_url(status['photo_path'])}\">Фото</a>\n"
         
+        text += "━━━━━━━━━━━━━━━━━━━━\n\n"
+    
         return text
     
     def _get_full_photo_url(self, relative_path: str) -> str:
@@ -1187,19 +1186,8 @@ class OrderAdminHandler(BaseAdminHandler):
     def _show_order_notes(self, callback: CallbackQuery):
         """Показать примечания к заказу для администратора"""
         try:
-            order_id = int(callback.data.replace('orderadm_notes_', ''))
-            order_notes = self.db_manager.get_order_notes(order_id)
-            
-            if not order_notes:
-                message_text = (
-                    "💬 <b>Примечания к заказу #{}</b>\n\n"
-                    "📭 Пока нет примечаний.\n\n"
-                    "Здесь отображается переписка по заказу между клиентом и администратором."
-                ).format(order_id)
-            else:
-                message_text = self._format_order_notes_admin(order_notes, order_id)
-            
-            keyboard = AdminConstants.create_order_notes_keyboard(order_id)
+            order_id, before = parse_history_callback(callback.data, AdminConstants.ORDER_NOTES_PREFIX)
+            message_text, keyboard = self._render_order_notes_admin(order_id, before)
 
             self.bot.edit_message_text(
                 chat_id=callback.message.chat.id,
@@ -1270,20 +1258,8 @@ class OrderAdminHandler(BaseAdminHandler):
             self.states_manager.clear_user_state(user_id)
             
             if success:
-                # Получаем обновленные примечания
-                order_notes = self.db_manager.get_order_notes(order_id)
-                
-                if not order_notes:
-                    message_text = (
-                        "💬 <b>Примечания к заказу #{}</b>\n\n"
-                        "📭 Пока нет примечаний.\n\n"
-                        "Здесь отображается переписка по заказу между клиентом и администратором."
-                    ).format(order_id)
-                else:
-                    message_text = self._format_order_notes_admin(order_notes, order_id)
-                
-                # Используем клавиатуру для примечаний
-                keyboard = AdminConstants.create_order_notes_keyboard(order_id)
+                # Первая страница обновленной переписки с клавиатурой для примечаний
+                message_text, keyboard = self._render_order_notes_admin(order_id)
                 
                 # Отправляем новое сообщение с обновленными примечаниями
                 self.bot.send_message(
@@ -1306,28 +1282,36 @@ class OrderAdminHandler(BaseAdminHandler):
                 "❌ Произошла ошибка. Попробуйте позже."
             )
 
-    def _format_order_notes_admin(self, order_notes: list, order_id: int) -> str:
-        """Форматирование примечаний к заказу для администратора"""
-        text = f"💬 <b>Примечания к заказу #{order_id}</b>\n\n"
-        
-        for note in order_notes:
-            # Определяем тип отправителя
-            sender_type = "👤 Администратор" if self._is_admin_user(note['user_name']) else "👥 Клиент"
+    def _render_order_notes_admin(self, order_id: int, before: str = None) -> tuple:
+        """Страница переписки по заказу (новые сверху) и ее клавиатура"""
+        page = self.db_manager.get_order_notes_page(order_id, before)
+        next_cursor = None
+        if not page['items']:
+            message_text = (
+                "💬 <b>Примечания к заказу #{}</b>\n\n"
+                "📭 Пока нет примечаний.\n\n"
+                "Здесь отображается переписка по заказу между клиентом и администратором."
+            ).format(order_id)
+        else:
+            message_text, next_cursor = self._format_order_notes_admin(page, order_id, before)
+        return message_text, AdminConstants.create_order_notes_keyboard(order_id, next_cursor, before)
+
+    def _format_order_notes_admin(self, page: dict, order_id: int, before: str = None) -> tuple:
+        """Форматирование страницы примечаний к заказу для администратора"""
+        def format_note(note: dict) -> str:
+            # Тип отправителя - по users.is_admin автора (приходит из запроса страницы)
+            sender_type = "👤 Администратор" if note['is_admin'] else "👥 Клиент"
             
-            text += f"{sender_type} | {note['created_at'].strftime('%d.%m.%Y %H:%M')}\n"
+            text = f"{sender_type} | {note['created_at'].strftime('%d.%m.%Y %H:%M')}\n"
             text += "----\n"
-            text += f"💬 {note['note_text']}\n"
+            text += f"💬 {note_text_html(note['note_text'])}\n"
             text += "━━━━━━━━━━━━━━━━━━\n\n"
-        
-        return text
+            return text
+
+        header = history_page_header(f"💬 <b>Примечания к заказу #{order_id}</b>", page, before)
+        text, _, next_cursor = render_history_page(header, page, format_note)
+        return text, next_cursor
 
-    def _is_admin_user(self, user_name: str) -> bool:
-        """Проверка, является ли отправитель администратором (простая эвристика)"""
-        # Здесь можно добавить более сложную логику проверки,
-        # например, по наличию определенных маркеров в имени или через базу данных
-        admin_indicators = ['admin', 'админ', 'administrator']
-        return any(indicator in user_name.lower() for indicator in admin_indicators)
-    
     # Методы для изменения стоимости
     def _start_change_cost_process(self, callback: CallbackQuery):
         """Начать процесс изменения стоимости"""
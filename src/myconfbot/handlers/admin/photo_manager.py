@@ -1,22 +1,53 @@
 # src/myconfbot/handlers/admin/photo_manager.py
 import logging
 import os
-import uuid
+import threading
+import weakref
+from typing import Dict
 from telebot import types
 from telebot.types import Message, CallbackQuery
 from .product_states import ProductState
 from ..shared.product_constants import ProductConstants
+from src.myconfbot.utils.file_downloader import get_file_downloader
+from src.myconfbot.utils.album_sender import get_album_sender, product_photo_paths
 
 logger = logging.getLogger(__name__)
 
 class PhotoManager:
     """Универсальный менеджер фотографий"""
+
+    # Пауза после последнего фото альбома перед его обработкой (сек)
+    ALBUM_DEBOUNCE_SECONDS = 1.5
+    # Сколько '✅ Готово' ждет альбом, который уже загружается (сек)
+    ALBUM_FLUSH_WAIT_SECONDS = 60
+    
+    # Живые экземпляры - для отчета о памяти
+    _instances = weakref.WeakSet()
     
     def __init__(self, bot, db_manager, states_manager, photos_dir):
         self.bot = bot
         self.db_manager = db_manager
         self.photos_dir = photos_dir
         self.states_manager = states_manager
+        self.downloader = get_file_downloader(bot)
+        # Буфер альбомов: media_group_id -> накопленные сообщения
+        self._album_buffer = {}
+        self._album_lock = threading.Lock()
+        # Альбомы, которые сейчас загружаются и сохраняются: chat_id -> количество
+        self._albums_in_flight: Dict[int, int] = {}
+        self._album_done = threading.Condition(self._album_lock)
+        PhotoManager._instances.add(self)
+    
+    @classmethod
+    def pending_album_sizes(cls) -> Dict[str, int]:
+        """Сколько альбомов и фото ждут обработки во всех экземплярах"""
+        albums = 0
+        photos = 0
+        for manager in list(cls._instances):
+            with manager._album_lock:
+                albums += len(manager._album_buffer)
+                photos += sum(len(album['messages']) for album in manager._album_buffer.values())
+        return {'albums': albums, 'photos': photos}
 
     # === ОСНОВНЫЕ CALLBACK ОБРАБОТЧИКИ ===
     
@@ -180,6 +211,11 @@ class PhotoManager:
             self.bot.send_message(message.chat.id, "❌ Ошибка: товар не найден")
             return
         
+        # Фото из альбома собираем в буфер и обрабатываем одним пакетом
+        if message.media_group_id:
+            self._buffer_album_photo(message, product_id)
+            return
+        
         # Обрабатываем фото
         success = self._handle_photo_addition(message, product_id)
         
@@ -201,6 +237,9 @@ class PhotoManager:
         product_data = self.states_manager.get_product_data(user_id)
         product_id = product_data.get('id')
         
+        # Дожидаемся альбомов, которые еще не успели обработаться
+        self.flush_pending_albums(message.chat.id)
+        
         try:
             if product_id:
                 photos = self.db_manager.get_product_photos(product_id)
@@ -437,33 +476,132 @@ class PhotoManager:
             logger.error(f"Ошибка при удалении фото: {e}")
             return False
 
+    # === АЛЬБОМЫ (MEDIA GROUP) ===
+
+    def _buffer_album_photo(self, message: Message, product_id: int):
+        """Добавить фото альбома в буфер и перезапустить таймер ожидания"""
+        group_id = message.media_group_id
+        
+        with self._album_lock:
+            album = self._album_buffer.get(group_id)
+            if album is None:
+                album = {
+                    'chat_id': message.chat.id,
+                    'product_id': product_id,
+                    'messages': [],
+                    'timer': None
+                }
+                self._album_buffer[group_id] = album
+            elif album['timer']:
+                album['timer'].cancel()
+            
+            album['messages'].append(message)
+            
+            timer = threading.Timer(self.ALBUM_DEBOUNCE_SECONDS, self._flush_album, args=(group_id,))
+            timer.daemon = True
+            album['timer'] = timer
+            timer.start()
+
+    def flush_pending_albums(self, chat_id: int):
+        """
+        Немедленно обработать все накопленные альбомы чата
+
+        Альбомы, которые уже обрабатываются по таймеру, тоже дожидаемся:
+        иначе итог '✅ Готово' не увидит их фото.
+        """
+        with self._album_lock:
+            group_ids = [
+                group_id for group_id, album in self._album_buffer.items()
+                if album['chat_id'] == chat_id
+            ]
+        
+        for group_id in group_ids:
+            self._flush_album(group_id)
+
+        with self._album_done:
+            if not self._album_done.wait_for(lambda: not self._albums_in_flight.get(chat_id),
+                                             timeout=self.ALBUM_FLUSH_WAIT_SECONDS):
+                logger.warning(f"Альбом чата {chat_id} не обработан за {self.ALBUM_FLUSH_WAIT_SECONDS} с")
+
+    def _flush_album(self, group_id: str):
+        """Обработать накопленный альбом: загрузка, одна транзакция, один ответ"""
+        with self._album_lock:
+            album = self._album_buffer.pop(group_id, None)
+            if not album:
+                return
+            chat_id = album['chat_id']
+            self._albums_in_flight[chat_id] = self._albums_in_flight.get(chat_id, 0) + 1
+        
+        try:
+            self._process_album(group_id, album)
+        finally:
+            with self._album_done:
+                left = self._albums_in_flight.pop(chat_id) - 1
+                if left:
+                    self._albums_in_flight[chat_id] = left
+                self._album_done.notify_all()
+
+    def _process_album(self, group_id: str, album: dict):
+        """Загрузка фото альбома, сохранение одной транзакцией и ответ админу"""
+        if album['timer']:
+            album['timer'].cancel()
+        
+        chat_id = album['chat_id']
+        product_id = album['product_id']
+        
+        try:
+            messages = sorted(album['messages'], key=lambda m: m.message_id)
+            file_ids = [m.photo[-1].file_id for m in messages]
+            
+            # Загружаем все фото альбома параллельно через общий пул
+            product_dir = os.path.join(self.photos_dir, str(product_id))
+            photo_paths = self.downloader.download_many(file_ids, product_dir)
+            
+            saved_paths = [str(path) for path in photo_paths if path]
+            album_sender = get_album_sender(self.bot)
+            for file_id, path in zip(file_ids, photo_paths):
+                if path:
+                    album_sender.remember(path, file_id)
+            photo_ids = self.db_manager.add_product_photos(product_id, saved_paths)
+            
+            logger.info(
+                f"Альбом {group_id}: получено {len(file_ids)} фото, "
+                f"сохранено {len(photo_ids)} для товара {product_id}"
+            )
+            
+            if not photo_ids:
+                self.bot.send_message(chat_id, "❌ Ошибка при добавлении фото")
+            elif len(photo_ids) < len(file_ids):
+                self.bot.send_message(
+                    chat_id,
+                    f"⚠️ Добавлено фото: {len(photo_ids)} из {len(file_ids)}. "
+                    "Отправьте недостающие фото еще раз или нажмите '✅ Готово'"
+                )
+            else:
+                self.bot.send_message(
+                    chat_id,
+                    f"✅ Добавлено фото: {len(photo_ids)}! Отправьте еще фото или нажмите '✅ Готово'"
+                )
+                
+        except Exception as e:
+            logger.error(f"Ошибка при обработке альбома {group_id}: {e}")
+            self.bot.send_message(chat_id, "❌ Ошибка при обработке фото")
+
     # === ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ===
     
     def _save_photo(self, photo_file_id: str, product_id: int) -> str:
         """Сохранение фото на диск"""
         try:
             logger.info(f"Начало сохранения фото для товара {product_id}")
-            file_info = self.bot.get_file(photo_file_id)
-            logger.info(f"Информация о файле: {file_info.file_path}")
-            
-            downloaded_file = self.bot.download_file(file_info.file_path)
-            logger.info(f"Файл скачан, размер: {len(downloaded_file)} байт")
-            
-            file_extension = os.path.splitext(file_info.file_path)[1] or '.jpg'
-            filename = f"{uuid.uuid4().hex}{file_extension}"
-            
             product_dir = os.path.join(self.photos_dir, str(product_id))
-            os.makedirs(product_dir, exist_ok=True)
-            filepath = os.path.join(product_dir, filename)
-            
-            with open(filepath, 'wb') as new_file:
-                new_file.write(downloaded_file)
+            filepath = self.downloader.download(photo_file_id, product_dir)
             
-            if os.path.exists(filepath):
+            if filepath:
+                get_album_sender(self.bot).remember(filepath, photo_file_id)
                 logger.info(f"Фото сохранено: {filepath}")
-                return filepath
+                return str(filepath)
             else:
-                logger.error(f"Файл не был создан: {filepath}")
+                logger.error(f"Фото не было сохранено для товара {product_id}")
                 return None
                 
         except Exception as e:
@@ -472,45 +610,16 @@ class PhotoManager:
 
     def _send_product_photos(self, message: Message, product_id: int, product: dict, photos: list):
         """Отправить фотографии товара"""
+        caption = f"📸 Фотографии товара: {product['name']}\nВсего фото: {len(photos)}"
         try:
-            media_group = []
-            file_objects = []
-            
-            # Сортируем фото: основное первое
-            main_photos = [p for p in photos if p.get('is_main')]
-            other_photos = [p for p in photos if not p.get('is_main')]
-            sorted_photos = main_photos + other_photos
-            
-            for i, photo_info in enumerate(sorted_photos[:10]):  # Ограничение Telegram
-                if os.path.exists(photo_info['photo_path']):
-                    file_obj = open(photo_info['photo_path'], 'rb')
-                    file_objects.append(file_obj)
-                    
-                    if i == 0:  # Первое фото с описанием
-                        media_group.append(types.InputMediaPhoto(
-                            file_obj,
-                            caption=f"📸 Фотографии товара: {product['name']}\nВсего фото: {len(photos)}",
-                            parse_mode='HTML'
-                        ))
-                    else:  # Остальные фото без подписи
-                        media_group.append(types.InputMediaPhoto(file_obj))
-            
-            if media_group:
-                self.bot.send_media_group(message.chat.id, media_group)
-                
+            sent = get_album_sender(self.bot).send_album(
+                message.chat.id, product_photo_paths(photos), caption=caption, parse_mode=None
+            )
         except Exception as e:
             logger.error(f"Ошибка отправки медиагруппы: {e}")
-            self.bot.send_message(
-                message.chat.id,
-                f"📸 Фотографии товара: {product['name']}\nВсего фото: {len(photos)}"
-            )
-        finally:
-            # Закрываем все файлы
-            for file_obj in file_objects:
-                try:
-                    file_obj.close()
-                except:
-                    pass
+            sent = []
+        if not sent:
+            self.bot.send_message(message.chat.id, caption)
 
     def _view_all_photos(self, message: Message, product_id: int):
         """Просмотр всех фото товара"""
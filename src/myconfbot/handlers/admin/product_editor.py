@@ -4,6 +4,8 @@ import os
 from telebot import types
 from telebot.types import Message, CallbackQuery
 from ..shared.product_constants import ProductConstants
+from src.myconfbot.utils.file_downloader import get_file_downloader
+from src.myconfbot.utils.album_sender import get_album_sender, product_photo_paths
 
 logger = logging.getLogger(__name__)
 
@@ -298,63 +300,25 @@ class ProductEditor:
             callback_data="view_back_products"
         ))
         
-        # Если есть фото, отправляем их все в одной медиагруппе
-        if photos and any(os.path.exists(p['photo_path']) for p in photos):
-            media_group = []
-            file_objects = []  # Для отслеживания открытых файлов
-            
+        # Фото отправляем альбомами по 10, описание - подписью к первому фото
+        sent = []
+        if photos:
             try:
-                # Сортируем фото: основное первое
-                main_photos = [p for p in photos if p.get('is_main')]
-                other_photos = [p for p in photos if not p.get('is_main')]
-                sorted_photos = main_photos + other_photos
-                
-                for i, photo_info in enumerate(sorted_photos[:10]):  # Ограничение Telegram
-                    if os.path.exists(photo_info['photo_path']):
-                        file_obj = open(photo_info['photo_path'], 'rb')
-                        file_objects.append(file_obj)
-                        
-                        if i == 0:  # Первое фото с описанием
-                            media_group.append(types.InputMediaPhoto(
-                                file_obj,
-                                caption=product_text,  # Используем отформатированный текст
-                                parse_mode='HTML'
-                            ))
-                        else:  # Остальные фото без подписи
-                            media_group.append(types.InputMediaPhoto(file_obj))
-                
-                if media_group:
-                    # Отправляем медиагруппу
-                    self.bot.send_media_group(
-                        callback.message.chat.id, 
-                        media_group, 
-                    )
-                    
-                    # Отправляем клавиатуру отдельным сообщением
-                    self.bot.send_message(
-                        callback.message.chat.id,
-                        "📸 Все фотографии товара",
-                        reply_markup=keyboard
-                    )
-                    
+                sent = get_album_sender(self.bot).send_album(
+                    callback.message.chat.id, product_photo_paths(photos), caption=product_text
+                )
             except Exception as e:
                 logger.error(f"Ошибка отправки медиагруппы: {e}")
-                # Fallback: отправляем описание товара
-                self.bot.send_message(
-                    callback.message.chat.id,
-                    text=product_text,
-                    parse_mode='HTML',
-                    reply_markup=keyboard
-                )
-            finally:
-                # Закрываем все файлы
-                for file_obj in file_objects:
-                    try:
-                        file_obj.close()
-                    except:
-                        pass
+        
+        if sent:
+            # Отправляем клавиатуру отдельным сообщением
+            self.bot.send_message(
+                callback.message.chat.id,
+                "📸 Все фотографии товара",
+                reply_markup=keyboard
+            )
         else:
-            # Если фото нет, отправляем просто текст
+            # Фото нет или не удалось отправить - отправляем просто текст
             self.bot.send_message(
                 callback.message.chat.id,
                 text=product_text,
@@ -885,63 +849,25 @@ class ProductEditor:
             callback_data="view_back_products"
         ))
         
-        # Если есть фото, отправляем их все в одной медиагруппе
-        if photos and any(os.path.exists(p['photo_path']) for p in photos):
-            media_group = []
-            file_objects = []  # Для отслеживания открытых файлов
-            
+        # Фото отправляем альбомами по 10, описание - подписью к первому фото
+        sent = []
+        if photos:
             try:
-                # Сортируем фото: основное первое
-                main_photos = [p for p in photos if p.get('is_main')]
-                other_photos = [p for p in photos if not p.get('is_main')]
-                sorted_photos = main_photos + other_photos
-                
-                for i, photo_info in enumerate(sorted_photos[:10]):  # Ограничение Telegram
-                    if os.path.exists(photo_info['photo_path']):
-                        file_obj = open(photo_info['photo_path'], 'rb')
-                        file_objects.append(file_obj)
-                        
-                        if i == 0:  # Первое фото с описанием
-                            media_group.append(types.InputMediaPhoto(
-                                file_obj,
-                                caption=product_text,  # Используем отформатированный текст
-                                parse_mode='HTML'
-                            ))
-                        else:  # Остальные фото без подписи
-                            media_group.append(types.InputMediaPhoto(file_obj))
-                
-                if media_group:
-                    # Отправляем медиагруппу
-                    self.bot.send_media_group(
-                        message.chat.id, 
-                        media_group, 
-                    )
-                    
-                    # Отправляем клавиатуру отдельным сообщением
-                    self.bot.send_message(
-                        message.chat.id,
-                        "📸 Все фотографии товара",
-                        reply_markup=keyboard
-                    )
-                    
+                sent = get_album_sender(self.bot).send_album(
+                    message.chat.id, product_photo_paths(photos), caption=product_text
+                )
             except Exception as e:
                 logger.error(f"Ошибка отправки медиагруппы: {e}")
-                # Fallback: отправляем описание товара
-                self.bot.send_message(
-                    message.chat.id,
-                    text=product_text,
-                    parse_mode='HTML',
-                    reply_markup=keyboard
-                )
-            finally:
-                # Закрываем все файлы
-                for file_obj in file_objects:
-                    try:
-                        file_obj.close()
-                    except:
-                        pass
+        
+        if sent:
+            # Отправляем клавиатуру отдельным сообщением
+            self.bot.send_message(
+                message.chat.id,
+                "📸 Все фотографии товара",
+                reply_markup=keyboard
+            )
         else:
-            # Если фото нет, отправляем просто текст
+            # Фото нет или не удалось отправить - отправляем просто текст
             self.bot.send_message(
                 message.chat.id,
                 text=product_text,
@@ -958,22 +884,13 @@ class ProductEditor:
 
     def _save_photo(self, photo_file_id: str, product_id: int) -> str:
         """Сохранение фото на диск"""
-        import uuid
         try:
-            file_info = self.bot.get_file(photo_file_id)
-            downloaded_file = self.bot.download_file(file_info.file_path)
-            
-            file_extension = os.path.splitext(file_info.file_path)[1] or '.jpg'
-            filename = f"{uuid.uuid4().hex}{file_extension}"
-            
             product_dir = os.path.join(self.photos_dir, str(product_id))
-            os.makedirs(product_dir, exist_ok=True)
-            filepath = os.path.join(product_dir, filename)
-            
-            with open(filepath, 'wb') as new_file:
-                new_file.write(downloaded_file)
-            
-            return filepath if os.path.exists(filepath) else None
+            filepath = get_file_downloader(self.bot).download(photo_file_id, product_dir)
+            if not filepath:
+                return None
+            get_album_sender(self.bot).remember(filepath, photo_file_id)
+            return str(filepath)
                 
         except Exception as e:
             logger.error(f"Ошибка при сохранении фото: {e}")
@@ -1,8 +1,13 @@
 import logging
 logger = logging.getLogger(__name__)
 
+import time
+
 from telebot.types import Message
 
+from src.myconfbot.services.order_stats_service import get_order_stats_service
+from src.myconfbot.utils.memory_monitor import get_memory_monitor
+from src.myconfbot.utils.metrics import get_metrics
 from .admin_base import BaseAdminHandler
 
 
@@ -14,21 +19,108 @@ class StatsHandler(BaseAdminHandler):
     
     def register_handlers(self):
         """Регистрация обработчиков статистики"""
-        # Будут добавлены позже
-        pass
+        @self.bot.message_handler(commands=['perf'])
+        def handle_perf(message: Message):
+            self.show_performance(message)
+        
+        @self.bot.message_handler(commands=['memory'])
+        def handle_memory(message: Message):
+            self.show_memory(message)
+    
+    def show_performance(self, message: Message):
+        """Показать сводку производительности бота"""
+        if not self._check_admin_access(message=message):
+            return
+        
+        metrics = get_metrics()
+        uptime_minutes = (time.time() - metrics.started_at) / 60
+        
+        response = f"⏱ Производительность (за {uptime_minutes:.0f} мин):\n"
+        sections = [
+            ("📨 Апдейты", metrics.update_duration),
+            ("🚥 Ожидание в очереди", metrics.update_queue_wait),
+            ("🧩 Обработчики", metrics.handler_duration),
+            ("📡 Bot API", metrics.api_duration),
+            ("🗄 SQL", metrics.db_duration),
+            ("📣 Подписчики событий", metrics.event_handler_duration),
+        ]
+        for title, histogram in sections:
+            rows = metrics.histogram_summary(histogram, limit=5)
+            response += f"\n{title}:\n"
+            if not rows:
+                response += "  нет данных\n"
+            for row in rows:
+                response += (
+                    f"  {row['label']}: {row['count']} шт, "
+                    f"p50 {row['p50'] * 1000:.1f} мс, p95 {row['p95'] * 1000:.1f} мс\n"
+                )
+        
+        transactions = metrics.update_db_transactions.snapshot()
+        if transactions:
+            response += "\n🔁 Транзакций БД на апдейт:\n"
+            for labels, (counts, total, count) in sorted(transactions.items(), key=lambda item: -item[1][2])[:5]:
+                response += (f"  {','.join(labels)}: {count} апд., в среднем {total / count:.1f}, "
+                             f"p95 {metrics.update_db_transactions.quantile(0.95, counts, count):.0f}\n")
+        
+        handler_errors = sum(value for _, value in metrics.handler_errors.items())
+        api_errors = sum(value for _, value in metrics.api_errors.items())
+        event_errors = sum(value for _, value in metrics.event_handler_errors.items())
+        response += (f"\n❌ Ошибки: обработчики {handler_errors:.0f}, Bot API {api_errors:.0f}, "
+                     f"подписчики событий {event_errors:.0f}\n")
+        
+        dropped = {}
+        for (_, reason, _), value in metrics.updates_dropped.items():
+            dropped[reason] = dropped.get(reason, 0) + value
+        if dropped:
+            response += (f"🚦 Отброшено апдейтов: лимит {dropped.get('throttled', 0):.0f}, "
+                         f"повторные нажатия {dropped.get('duplicate', 0):.0f}\n")
+        shed = sum(value for _, value in metrics.updates_shed.items())
+        if shed:
+            response += f"🚥 Сброшено при перегрузке: {shed:.0f}\n"
+        
+        self.bot.send_message(message.chat.id, response)
     
     def show_orders_stats(self, message: Message):
         """Показать статистику заказов"""
         if not self._check_admin_access(message=message):
             return
         
-        stats = self.db_manager.get_orders_statistics()
+        stats = get_order_stats_service().get_statistics()
         
         response = "📈 Статистика заказов:\n\n"
         response += f"📊 Всего заказов: {stats['total']}\n"
         response += f"✅ Выполнено: {stats['completed']}\n"
         response += f"🔄 В работе: {stats['in_progress']}\n"
-        response += f"🆕 Новые: {stats['new']}\n"
+        response += f"🆕 Новые: {stats['created']}\n"
         response += f"💰 Общая сумма: {stats['total_amount']} руб.\n"
         
-        self.bot.send_message(message.chat.id, response)
\ No newline at end of file
+        self.bot.send_message(message.chat.id, response)
+    
+    def show_memory(self, message: Message):
+        """
+        Снимок памяти: рост по местам выделения и размеры реестров
+        
+        /memory - новый снимок, /memory reset - начать сравнение заново
+        """
+        if not self._check_admin_access(message=message):
+            return
+        
+        monitor = get_memory_monitor()
+        args = (message.text or '').split()[1:]
+        if args and args[0] == 'reset':
+            monitor.reset_baseline()
+        
+        first_snapshot = not monitor.tracing
+        try:
+            report = monitor.take_snapshot()
+        except Exception as e:
+            logger.error(f"Ошибка при снимке памяти: {e}")
+            self.bot.send_message(message.chat.id, "❌ Не удалось снять снимок памяти")
+            return
+        
+        response = monitor.format_report(report)
+        if first_snapshot:
+            response += "\n\nℹ️ Отслеживание только что включено - повторите /memory позже, чтобы увидеть рост"
+        
+        # Ограничение Telegram на длину сообщения
+        self.bot.send_message(message.chat.id, response[:4000])
@@ -1,10 +1,14 @@
 from telebot import types
 
+from src.myconfbot.handlers.shared.utils import add_history_buttons
+
 class AdminConstants:
     """Константы для админского функционала"""
     
     # Callback префиксы
     ORDER_ADMIN_PREFIX = "orderadm_"
+    STATUS_HISTORY_PREFIX = "orderadm_change_status_"
+    ORDER_NOTES_PREFIX = "orderadm_notes_"
     
     # Тексты кнопок
     ACTIVE_ORDERS = "📋 Активные заказы"
@@ -143,9 +147,10 @@ class AdminConstants:
     
     
     @staticmethod
-    def create_status_history_keyboard(order_id):
-        """Клавиатура для истории статусов"""
+    def create_status_history_keyboard(order_id, next_cursor=None, before=None):
+        """Клавиатура для истории статусов с листанием"""
         keyboard = types.InlineKeyboardMarkup(row_width=2)
+        add_history_buttons(keyboard, AdminConstants.STATUS_HISTORY_PREFIX, order_id, next_cursor, before)
         
         keyboard.add(
             types.InlineKeyboardButton(
@@ -161,9 +166,10 @@ class AdminConstants:
         return keyboard
     
     @staticmethod
-    def create_order_notes_keyboard(order_id: int):
-        """Клавиатура для примечаний к заказу с кнопкой добавления сообщения"""
+    def create_order_notes_keyboard(order_id: int, next_cursor=None, before=None):
+        """Клавиатура для примечаний к заказу с кнопкой добавления сообщения и листанием"""
         keyboard = types.InlineKeyboardMarkup(row_width=1)
+        add_history_buttons(keyboard, AdminConstants.ORDER_NOTES_PREFIX, order_id, next_cursor, before)
         
         keyboard.add(
             types.InlineKeyboardButton(
@@ -1,7 +1,7 @@
 # product_constants.py
 import logging
 from telebot import types
-from src.myconfbot.utils.database import db_manager
+from src.myconfbot.utils.database import get_db_manager
 
 logger = logging.getLogger(__name__)
 class ProductConstants:
@@ -44,16 +44,18 @@ class ProductConstants:
         return keyboard
     
     @staticmethod
-    def create_categories_keyboard_reply(row_width: int = 2):
+    def create_categories_keyboard_reply(row_width: int = 2, db_manager=None):
         """
         Создает репли клавиатуру с категориями из базы данных
         
         Args:
             include_cancel: Добавлять ли кнопку отмены
             row_width: Количество кнопок в строке
+            db_manager: менеджер БД (по умолчанию общий)
         """     
         keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True, row_width=row_width)  
         try:     
+            db_manager = db_manager or get_db_manager()
             categories = db_manager.get_all_categories()
             if not categories:
                 # Если категорий нет, добавляем информационную кнопку
@@ -1,13 +1,29 @@
 # src\myconfbot\handlers\shared\states_manager.py
 
+import weakref
 from typing import Dict, Any, Optional
 
 class StatesManager:
     """Централизованный менеджер состояний пользователей для бота."""
+    # Живые экземпляры - для отчета о памяти (у каждого обработчика свой менеджер)
+    _instances = weakref.WeakSet()
+
     def __init__(self):
         self.user_states: Dict[int, Dict[str, Any]] = {}
         self.user_management_states: Dict[int, Dict[str, Any]] = {}
         self.product_states = {}
+        StatesManager._instances.add(self)
+
+    @classmethod
+    def registry_sizes(cls) -> Dict[str, int]:
+        """Суммарное число записей состояний во всех экземплярах"""
+        instances = list(cls._instances)
+        return {
+            'instances': len(instances),
+            'user_states': sum(len(manager.user_states) for manager in instances),
+            'user_management_states': sum(len(manager.user_management_states) for manager in instances),
+            'product_states': sum(len(manager.product_states) for manager in instances),
+        }
     
     def get_user_state(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Получить состояние пользователя"""
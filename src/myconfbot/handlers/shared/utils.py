@@ -0,0 +1,75 @@
+# src/myconfbot/handlers/shared/utils.py
+
+import html
+from typing import Callable, List, Optional, Tuple
+
+from telebot import types
+
+# Лимит текста сообщения Telegram (с запасом на кнопки и подпись «страница»)
+MESSAGE_TEXT_LIMIT = 3900
+# Длинное сообщение в переписке показывается обрезанным, чтобы страница не была пустой
+NOTE_TEXT_LIMIT = 1000
+
+OLDER_BUTTON = "⬅️ Раньше"
+NEWEST_BUTTON = "⏮ К новым"
+
+
+def parse_history_callback(data: str, prefix: str) -> Tuple[int, Optional[str]]:
+    """
+    Заказ и курсор страницы из callback data истории
+
+    prefix{order_id} - первая (новейшая) страница,
+    prefix{order_id}_{cursor} - страница старше курсора.
+    """
+    order_id, _, cursor = data[len(prefix):].partition('_')
+    return int(order_id), cursor or None
+
+
+def note_text_html(note_text: str) -> str:
+    """Текст сообщения переписки или примечания статуса для HTML-разметки (обрезается до NOTE_TEXT_LIMIT)"""
+    note_text = note_text or ''
+    if len(note_text) > NOTE_TEXT_LIMIT:
+        note_text = note_text[:NOTE_TEXT_LIMIT] + '…'
+    return html.escape(note_text)
+
+
+def render_history_page(header: str, page: dict, format_item: Callable[[dict], str],
+                        limit: int = MESSAGE_TEXT_LIMIT) -> Tuple[str, List[dict], Optional[str]]:
+    """
+    Текст страницы истории (get_order_notes_page, get_order_status_history_page)
+
+    Записи, не поместившиеся в одно сообщение, переходят на следующую
+    страницу: курсор кнопки «Раньше» - последняя показанная запись.
+
+    Returns:
+        tuple: (текст, показанные записи, курсор следующей страницы или None)
+    """
+    text = header
+    items = page['items']
+    for index, item in enumerate(items):
+        block = format_item(item)
+        if index and len(text) + len(block) > limit:
+            return text, items[:index], items[index - 1]['cursor']
+        text += block
+    return text, items, page['next_cursor']
+
+
+def history_page_header(title: str, page: dict, before: Optional[str]) -> str:
+    """Заголовок страницы истории: всего записей и где мы (новые сверху)"""
+    header = f"{title}\n"
+    if page['total']:
+        header += f"Всего: {page['total']}" + (" · более ранние" if before else " · новые сверху") + "\n"
+    return header + "\n"
+
+
+def add_history_buttons(keyboard: types.InlineKeyboardMarkup, prefix: str, order_id: int,
+                        next_cursor: Optional[str], before: Optional[str]):
+    """Кнопки листания истории: «Раньше» (курсор) и возврат к новым записям"""
+    buttons = []
+    if next_cursor:
+        buttons.append(types.InlineKeyboardButton(OLDER_BUTTON, callback_data=f"{prefix}{order_id}_{next_cursor}"))
+    if before:
+        buttons.append(types.InlineKeyboardButton(NEWEST_BUTTON, callback_data=f"{prefix}{order_id}"))
+    if buttons:
+        keyboard.row(*buttons)
+    return keyboard
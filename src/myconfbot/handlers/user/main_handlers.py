@@ -4,7 +4,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 from telebot.types import Message
-from src.myconfbot.utils.content_manager import ContentManager
+from src.myconfbot.utils.content_manager import get_content_manager
 from src.myconfbot.handlers.user.base_user_handler import BaseUserHandler
 from src.myconfbot.handlers.shared.constants import UserStates, ButtonText, Validation
 from src.myconfbot.keyboards.user_keyboards import UserKeyboards
@@ -16,7 +16,7 @@ class MainHandler(BaseUserHandler):
     
     def __init__(self, bot, config, db_manager):
         super().__init__(bot, config, db_manager)
-        self.content_manager = ContentManager()
+        self.content_manager = get_content_manager()
     
     def register_handlers(self):
         """Регистрация всех обработчиков"""
@@ -132,48 +132,49 @@ class MainHandler(BaseUserHandler):
         username = message.from_user.username
         
         try:
-            user_info = self.db_manager.get_user_info(user_id)
+            # Вернувшийся пользователь: уже найден на входе апдейта, без запросов к БД
+            user = None
+            if user_id in self.db_manager.known_users:
+                user = self.db_manager.get_user_context(user_id)
+            created = False
+            if user is None:
+                # Регистрация одним запросом (повторный /start не создаст дубликат)
+                registered = self.db_manager.upsert_user(
+                    telegram_id=user_id,
+                    full_name=full_name,
+                    telegram_username=username,
+                    is_admin=user_id in self.config.admin_ids
+                )
+                if not registered:
+                    self.bot.send_message(chat_id, "Произошла ошибка при создании пользователя. Попробуйте позже.")
+                    return
+                user, created = registered
             
-            if user_info:
+            if not created:
                 # Пользователь уже существует
-                status = "администратор" if user_info['is_admin'] else "клиент"
-                welcome_msg = f"С возвращением, {user_info['full_name']}! 👋\nРады снова видеть. Ваш статус: {status}!"
+                status = "администратор" if user.is_admin else "клиент"
+                welcome_msg = f"С возвращением, {user.full_name}! 👋\nРады снова видеть. Ваш статус: {status}!"
                 self.bot.send_message(chat_id, welcome_msg)
                 
                 # Показываем главное меню
-                markup = self.show_main_menu(chat_id, user_info['is_admin'])
+                markup = self.show_main_menu(chat_id, user.is_admin)
                 self.bot.send_message(chat_id, "Главное меню", reply_markup=markup)
+            elif user.is_admin:
+                self.bot.send_message(chat_id, "Добро пожаловать, администратор! 👑")
+                # Устанавливаем состояние для запроса телефона
+                self.states_manager.set_user_state(user_id, {'state': UserStates.AWAITING_PHONE})
+                self.bot.send_message(chat_id, "Пожалуйста, укажите ваш телефонный номер:")
             else:
-                # Создаем нового пользователя
-                is_admin = user_id in self.config.admin_ids
-                success = self.db_manager.add_user(
-                    telegram_id=user_id,
-                    full_name=full_name,
-                    telegram_username=username,
-                    is_admin=is_admin
-                )
-                
-                if success:
-                    if is_admin:
-                        self.bot.send_message(chat_id, "Добро пожаловать, администратор! 👑")
-                        # Устанавливаем состояние для запроса телефона
-                        self.states_manager.set_user_state(user_id, {'state': UserStates.AWAITING_PHONE})
-                        self.bot.send_message(chat_id, "Пожалуйста, укажите ваш телефонный номер:")
-                    else:
-                        welcome_msg = f"Приятно познакомиться, {full_name}! 😊"
-                        self.bot.send_message(chat_id, welcome_msg)
-                        markup = self.show_main_menu(chat_id, False)
-                        self.bot.send_message(chat_id, "Главное меню", reply_markup=markup)
-                else:
-                    self.bot.send_message(chat_id, "Произошла ошибка при создании пользователя. Попробуйте позже.")
-                    return
+                welcome_msg = f"Приятно познакомиться, {full_name}! 😊"
+                self.bot.send_message(chat_id, welcome_msg)
+                markup = self.show_main_menu(chat_id, False)
+                self.bot.send_message(chat_id, "Главное меню", reply_markup=markup)
             
             # Отправляем приветственный текст
-            welcome_text = self.content_manager.get_content('welcome.md')
-            if not welcome_text:
-                welcome_text = "Добро пожаловать! Я бот-помощник мастера кондитера!"
-            
-            self.send_formatted_message(chat_id, welcome_text)
+            self._send_content_page(
+                chat_id, 'welcome.md',
+                "Добро пожаловать! Я бот-помощник мастера кондитера!"
+            )
             
         except Exception as e:
             logger.error(f"⛔️ Ошибка при обработке /start: {e}", exc_info=True)
@@ -211,19 +212,24 @@ class MainHandler(BaseUserHandler):
         keyboard = AdminKeyboards.get_management_panel()
         self.bot.send_message(message.chat.id, "🏪 Панель управления\nВыберите раздел:", reply_markup=keyboard)
     
+    def _send_content_page(self, chat_id: int, filename: str, default_text: str):
+        """Отправка страницы контента из кэша ContentManager"""
+        page = self.content_manager.get_page(filename)
+        if not page or not page['text']:
+            self.bot.send_message(chat_id, default_text)
+        elif page['parse_mode']:
+            self.send_formatted_message(chat_id, page['text'], page['parse_mode'])
+        else:
+            # Разметка уже признана невалидной - сразу отправляем как обычный текст
+            self.bot.send_message(chat_id, page['text'])
+    
     def _send_contacts(self, message: Message):
         """Отправка контактов"""
-        contacts_text = self.content_manager.get_content('contacts.md')
-        if not contacts_text:
-            contacts_text = "Контактная информация пока не добавлена"
-        self.send_formatted_message(message.chat.id, contacts_text)
+        self._send_content_page(message.chat.id, 'contacts.md', "Контактная информация пока не добавлена")
     
     def _send_services(self, message: Message):
         """Отправка информации об услугах"""
-        services_text = self.content_manager.get_content('services.md')
-        if not services_text:
-            services_text = "🎁 Информация по услугам пока не добавлена"
-        self.send_formatted_message(message.chat.id, services_text)
+        self._send_content_page(message.chat.id, 'services.md', "🎁 Информация по услугам пока не добавлена")
     
     def _show_recipes(self, message: Message):
         """Показ рецептов"""
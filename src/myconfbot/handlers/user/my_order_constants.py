@@ -2,6 +2,8 @@
 
 from telebot import types
 
+from src.myconfbot.handlers.shared.utils import add_history_buttons
+
 class MyOrderConstants:
     """Константы для модуля Мои заказы"""
     
@@ -66,6 +68,17 @@ class MyOrderConstants:
             callback_data="my_order_back_to_list"
         ))
         return keyboard
+
+    @staticmethod
+    def create_status_history_keyboard(order_id, next_cursor=None, before=None):
+        """Клавиатура истории статусов: листание и возврат к списку заказов"""
+        keyboard = types.InlineKeyboardMarkup()
+        add_history_buttons(keyboard, MyOrderConstants.MY_ORDER_STATUS_PREFIX, order_id, next_cursor, before)
+        keyboard.add(types.InlineKeyboardButton(
+            "🔙 Назад к заказам",
+            callback_data="my_order_back_to_list"
+        ))
+        return keyboard
     
     @staticmethod
     def create_order_detail_keyboard(order_id):
@@ -91,9 +104,10 @@ class MyOrderConstants:
         return keyboard
     
     @staticmethod
-    def create_order_notes_keyboard(order_id):
-        """Клавиатура для примечаний к заказу с кнопкой добавления сообщения"""
+    def create_order_notes_keyboard(order_id, next_cursor=None, before=None):
+        """Клавиатура для примечаний к заказу с кнопкой добавления сообщения и листанием"""
         keyboard = types.InlineKeyboardMarkup(row_width=1)
+        add_history_buttons(keyboard, MyOrderConstants.MY_ORDER_NOTES_PREFIX, order_id, next_cursor, before)
         
         keyboard.add(
             types.InlineKeyboardButton(
@@ -1,5 +1,6 @@
 # src/myconfbot/handlers/user/my_order_handler.py
 
+import html
 import logging
 import os
 from pathlib import Path
@@ -9,6 +10,10 @@ from telebot.types import Message, CallbackQuery, ReplyKeyboardRemove
 
 from src.myconfbot.handlers.user.base_user_handler import BaseUserHandler
 from src.myconfbot.handlers.user.my_order_constants import MyOrderConstants
+from src.myconfbot.utils.album_sender import AlbumPhoto, get_album_sender
+from src.myconfbot.handlers.shared.utils import (
+    history_page_header, note_text_html, parse_history_callback, render_history_page
+)
 
 logger = logging.getLogger(__name__)
 
@@ -120,16 +125,16 @@ class MyOrderHandler(BaseUserHandler):
     def _show_order_status(self, callback: CallbackQuery):
         """Показать историю статусов заказа с фото"""
         try:
-            order_id = int(callback.data.replace('my_order_status_', ''))
-            status_history = self._get_order_status_history(order_id)
+            order_id, before = parse_history_callback(callback.data, MyOrderConstants.MY_ORDER_STATUS_PREFIX)
+            page = self._get_order_status_history(order_id, before)
             
-            if not status_history:
+            if not page['items']:
                 self.bot.answer_callback_query(callback.id, "❌ История статусов не найдена")
                 return
             
-            # Получаем текст и информацию о фото
-            message_text, has_photos, photos_data = self._format_status_history(status_history)
-            keyboard = MyOrderConstants.create_back_to_orders_keyboard()
+            # Получаем текст страницы и информацию о фото показанных статусов
+            message_text, has_photos, photos_data, next_cursor = self._format_status_history(page, before)
+            keyboard = MyOrderConstants.create_status_history_keyboard(order_id, next_cursor, before)
             
             # Сначала отправляем текстовое сообщение
             self.bot.edit_message_text(
@@ -140,42 +145,9 @@ class MyOrderHandler(BaseUserHandler):
                 reply_markup=keyboard
             )
             
-            # Затем отправляем фото, если они есть
+            # Затем отправляем фото статусов альбомами (по 10 в группе)
             if has_photos:
-                for photo_data in photos_data:
-                    try:
-                        caption = (f"📸 <b>Фото к статусу:</b> {photo_data['status']}\n"
-                                f"📅 <b>Дата:</b> {photo_data['created_at'].strftime('%d.%m.%Y %H:%M')}")
-                        # Проверяем существование файла перед отправкой
-                        if photo_data['photo_path'] and os.path.exists(photo_data['photo_path']):
-
-                            with open(photo_data['photo_path'], 'rb') as photo:
-                                self.bot.send_photo(
-                                    chat_id=callback.message.chat.id,
-                                    photo=photo,
-                                    caption=caption,
-                                    parse_mode='HTML'
-                                )
-                            logger.info(f"Фото успешно отправлено: {photo_data['photo_path']}")
-                        else:
-                            logger.error(f"Файл не существует: {photo_data['photo_path']}")
-                            self.bot.send_message(
-                                chat_id=callback.message.chat.id,
-                                text=f"❌ Фото для статуса '{photo_data['status']}' не найдено\n"
-                                    f"Путь: {photo_data['photo_path']}"
-                            )
-                    except FileNotFoundError:
-                        logger.error(f"Фото не найдено: {photo_data['photo_path']}")
-                        self.bot.send_message(
-                            chat_id=callback.message.chat.id,
-                            text=f"❌ Фото для статуса '{photo_data['status']}' не найдено на сервере"
-                        )
-                    except Exception as e:
-                        logger.error(f"Ошибка при отправке фото: {e}")
-                        self.bot.send_message(
-                            chat_id=callback.message.chat.id,
-                            text=f"❌ Ошибка при отправке фото для статуса '{photo_data['status']}': {str(e)}"
-                        )
+                self._send_status_photos(callback.message.chat.id, photos_data)
             
             self.bot.answer_callback_query(callback.id)
             
@@ -183,6 +155,33 @@ class MyOrderHandler(BaseUserHandler):
             logger.error(f"Ошибка при показе статусов заказа: {e}")
             self.bot.answer_callback_query(callback.id, "❌ Ошибка при загрузке статусов")
     
+    def _send_status_photos(self, chat_id: int, photos_data: list):
+        """Отправить фото статусов альбомами, подпись - у каждого фото"""
+        album = []
+        missing = []
+        for photo_data in photos_data:
+            if photo_data['photo_path'] and os.path.exists(photo_data['photo_path']):
+                album.append(AlbumPhoto(
+                    photo_data['photo_path'],
+                    f"📸 <b>Фото к статусу:</b> {photo_data['status']}\n"
+                    f"📅 <b>Дата:</b> {photo_data['created_at'].strftime('%d.%m.%Y %H:%M')}"
+                ))
+            else:
+                logger.error(f"Файл не существует: {photo_data['photo_path']}")
+                missing.append(photo_data['status'])
+        
+        try:
+            get_album_sender(self.bot).send_album(chat_id, album)
+        except Exception as e:
+            logger.error(f"Ошибка при отправке фото статусов: {e}")
+            self.bot.send_message(chat_id, "❌ Ошибка при отправке фото статусов")
+        
+        if missing:
+            self.bot.send_message(
+                chat_id,
+                "❌ Не найдены на сервере фото для статусов: " + ", ".join(f"'{status}'" for status in missing)
+            )
+    
     # def _show_order_status(self, callback: CallbackQuery):
     #     """Показать историю статусов заказа"""
     #     try:
@@ -213,19 +212,8 @@ class MyOrderHandler(BaseUserHandler):
     def _show_order_notes(self, callback: CallbackQuery):
         """Показать примечания к заказу"""
         try:
-            order_id = int(callback.data.replace('my_order_notes_', ''))
-            order_notes = self.db_manager.get_order_notes(order_id)
-            
-            if not order_notes:
-                message_text = (
-                    "💬 <b>Примечания к заказу</b>\n\n"
-                    "📭 Пока нет примечаний.\n\n"
-                    "Здесь будет отображаться переписка по заказу."
-                )
-            else:
-                message_text = self._format_order_notes(order_notes)
-            
-            keyboard = MyOrderConstants.create_order_notes_keyboard(order_id)
+            order_id, before = parse_history_callback(callback.data, MyOrderConstants.MY_ORDER_NOTES_PREFIX)
+            message_text, keyboard = self._render_order_notes(order_id, before)
 
             self.bot.edit_message_text(
                 chat_id=callback.message.chat.id,
@@ -419,37 +407,14 @@ class MyOrderHandler(BaseUserHandler):
     #         logger.error(f"Ошибка при получении деталей заказа: {e}")
     #         return None
     
-    def _get_order_status_history(self, order_id: int) -> list:
-        """Получить историю статусов заказа"""
-        try:
-            with self.db_manager.session_scope() as session:
-                from src.myconfbot.utils.models import OrderStatus
-                
-                status_history = session.query(OrderStatus).filter_by(
-                    order_id=order_id
-                ).order_by(OrderStatus.created_at).all()
-                
-                # Преобразуем в словари чтобы избежать проблем с сессией
-                result = []
-                for status in status_history:
-                    photo_path = None
-                    if status.photo_path:
-                        # строим абсолютный путь используя config.py
-                        photo_path = str(self.config.files.resolve_relative_path(status.photo_path))
-                    
-                    result.append({
-                        'id': status.id,
-                        'order_id': status.order_id,
-                        'status': status.status,
-                        'created_at': status.created_at,
-                        'photo_path': photo_path  
-                    })
-                
-                return result
-                
-        except Exception as e:
-            logger.error(f"Ошибка при получении истории статусов: {e}")
-            return []
+    def _get_order_status_history(self, order_id: int, before: str = None) -> dict:
+        """Получить страницу истории статусов заказа (новые сверху)"""
+        page = self.db_manager.get_order_status_history_page(order_id, before)
+        for status in page['items']:
+            if status['photo_path']:
+                # строим абсолютный путь используя config.py
+                status['photo_path'] = str(self.config.files.resolve_relative_path(status['photo_path']))
+        return page
 
     # def _get_order_status_history(self, order_id: int) -> list:
     #     """Получить историю статусов заказа"""
@@ -537,29 +502,29 @@ class MyOrderHandler(BaseUserHandler):
         
         return text
     
-    def _format_status_history(self, status_history: list) -> str:
-        """Форматирование истории статусов с отправкой фото"""
-        text = "🔄 <b>История статусов заказа</b>\n\n"
-        
-        has_photos = False
-        photos_data = []  # Будем хранить данные о фото для отправки
-        
-        for status in status_history:
-            text += f"📅 <b>{status['created_at'].strftime('%d.%m.%Y %H:%M')}</b>\n"
+    def _format_status_history(self, page: dict, before: str = None) -> tuple:
+        """Форматирование страницы истории статусов с отправкой фото"""
+        def format_status(status: dict) -> str:
+            text = f"📅 <b>{status['created_at'].strftime('%d.%m.%Y %H:%M')}</b>\n"
             text += f"<b>Статус:</b> {status['status']}\n"
-            
             if status['photo_path']:
                 text += f"📸 <b>Есть фото</b>\n"
-                has_photos = True
-                photos_data.append({
-                    'status': status['status'],
-                    'created_at': status['created_at'],
-                    'photo_path': status['photo_path']
-                })
-            
             text += "━━━━━━━━━━━━━━━━━━━━\n\n"
-        
-        return text, has_photos, photos_data
+            return text
+
+        header = history_page_header("🔄 <b>История статусов заказа</b>", page, before)
+        text, shown, next_cursor = render_history_page(header, page, format_status)
+
+        # Фото отправляем только для статусов этой страницы
+        photos_data = [
+            {
+                'status': status['status'],
+                'created_at': status['created_at'],
+                'photo_path': status['photo_path']
+            }
+            for status in shown if status['photo_path']
+        ]
+        return text, bool(photos_data), photos_data, next_cursor
     
     # def _format_status_history(self, status_history: list) -> str:
     #     """Форматирование истории статусов"""
@@ -576,17 +541,32 @@ class MyOrderHandler(BaseUserHandler):
         
     #     return text
     
-    def _format_order_notes(self, order_notes: list) -> str:
-        """Форматирование примечаний к заказу"""
-        text = "💬 <b>Примечания к заказу</b>\n\n"
-        
-        for note in order_notes:
-            text += f"👤 <b>{note['user_name']}</b> | {note['created_at'].strftime('%d.%m.%Y %H:%M')}\n"
+    def _render_order_notes(self, order_id: int, before: str = None) -> tuple:
+        """Страница переписки по заказу (новые сверху) и ее клавиатура"""
+        page = self.db_manager.get_order_notes_page(order_id, before)
+        next_cursor = None
+        if not page['items']:
+            message_text = (
+                "💬 <b>Примечания к заказу</b>\n\n"
+                "📭 Пока нет примечаний.\n\n"
+                "Здесь будет отображаться переписка по заказу."
+            )
+        else:
+            message_text, next_cursor = self._format_order_notes(page, before)
+        return message_text, MyOrderConstants.create_order_notes_keyboard(order_id, next_cursor, before)
+
+    def _format_order_notes(self, page: dict, before: str = None) -> tuple:
+        """Форматирование страницы примечаний к заказу"""
+        def format_note(note: dict) -> str:
+            text = f"👤 <b>{html.escape(note['user_name'])}</b> | {note['created_at'].strftime('%d.%m.%Y %H:%M')}\n"
             text += "----\n"
-            text += f"💬 {note['note_text']}\n"
+            text += f"💬 {note_text_html(note['note_text'])}\n"
             text += "━━━━━━━━━━━━━━━━━━\n\n"
-        
-        return text
+            return text
+
+        header = history_page_header("💬 <b>Примечания к заказу</b>", page, before)
+        text, _, next_cursor = render_history_page(header, page, format_note)
+        return text, next_cursor
     
     def _handle_add_note(self, callback: CallbackQuery):
         """Обработка добавления сообщения к заказу"""
@@ -623,20 +603,8 @@ class MyOrderHandler(BaseUserHandler):
             )
             
             if success:
-                # Получаем обновленные примечания
-                order_notes = self.db_manager.get_order_notes(order_id)
-                
-                if not order_notes:
-                    message_text = (
-                        "💬 <b>Примечания к заказу</b>\n\n"
-                        "📭 Пока нет примечаний.\n\n"
-                        "Здесь будет отображаться переписка по заказу."
-                    )
-                else:
-                    message_text = self._format_order_notes(order_notes)
-                
-                # Используем новую клавиатуру с кнопкой добавления сообщения
-                keyboard = MyOrderConstants.create_order_notes_keyboard(order_id)
+                # Первая страница обновленной переписки с кнопкой добавления сообщения
+                message_text, keyboard = self._render_order_notes(order_id)
                 
                 # Отправляем НОВОЕ сообщение вместо редактирования старого
                 self.bot.send_message(
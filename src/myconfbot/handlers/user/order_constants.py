@@ -2,7 +2,7 @@
 
 import os
 from telebot import types
-from src.myconfbot.utils.database import db_manager
+from src.myconfbot.utils.database import get_db_manager
 
 class OrderConstants:
     """Константы для модуля заказов"""
@@ -33,9 +33,10 @@ class OrderConstants:
     }
     
     @staticmethod
-    def create_categories_keyboard(categories, back_callback="main_menu"):
+    def create_categories_keyboard(categories, back_callback="main_menu", db_manager=None):
         """Создание клавиатуры для выбора категории"""
         keyboard = types.InlineKeyboardMarkup(row_width=2)
+        db_manager = db_manager or get_db_manager()
         
         buttons = []
         for category in categories:
@@ -11,6 +11,7 @@ from src.myconfbot.handlers.user.order_constants import OrderConstants
 from src.myconfbot.handlers.user.order_states import OrderStatesManager
 from src.myconfbot.handlers.user.order_product_viewer import OrderProductViewer
 from src.myconfbot.handlers.user.order_processor import OrderProcessor
+from src.myconfbot.utils.album_sender import AlbumPhoto, get_album_sender
 
 logger = logging.getLogger(__name__)
 
@@ -168,16 +169,13 @@ class OrderHandler(BaseUserHandler):
             in_order_process = self.order_states.is_in_order_process(user_id)
             order_data = self.order_states.get_order_data(user_id)
             
-            logger.info(f"🔍 ALL MESSAGES DEBUG: user_id={user_id}, text='{message.text}'")
-            logger.info(f"🔍 In order process: {in_order_process}")
-            logger.info(f"🔍 Order data: {order_data}")
+            logger.debug("🔍 ALL MESSAGES DEBUG: user_id=%s, text=%r, in_order_process=%s, order_data=%s",
+                         user_id, message.text, in_order_process, order_data)
             
             # Если в процессе заказа - обрабатываем
             if in_order_process and order_data:
-                logger.info(f"🎯 ПЕРЕДАЕМ В ОБРАБОТЧИК ЗАКАЗА!")
+                logger.debug("🎯 ПЕРЕДАЕМ В ОБРАБОТЧИК ЗАКАЗА!")
                 self._handle_order_message(message)
-            else:
-                logger.info(f"🔍 Не в процессе заказа, пропускаем")
 
         
         # В order_handler.py добавьте временный обработчик:
@@ -272,7 +270,8 @@ class OrderHandler(BaseUserHandler):
         
         keyboard = OrderConstants.create_categories_keyboard(
             categories=categories,
-            back_callback="main_menu"
+            back_callback="main_menu",
+            db_manager=self.db_manager
         )
         
         self.bot.send_message(
@@ -284,48 +283,23 @@ class OrderHandler(BaseUserHandler):
 
     def _send_products_media_group(self, chat_id, products):
         """Отправка медиагруппы с товарами"""
-        media_group = []
-        file_objects = []
+        album = []
+        for product in products:
+            # Проверяем наличие основного фото
+            cover_photo_path = product.get('cover_photo_path')
+            if cover_photo_path and os.path.exists(cover_photo_path):
+                # Формируем подпись
+                short_desc = product['short_description'] or ''
+                if len(short_desc) > 25:
+                    short_desc = short_desc[:25] + "..."
+                album.append(AlbumPhoto(cover_photo_path, f"🎂 {product['name']}\n{short_desc}"))
         
         try:
-            for product in products:
-                # Проверяем наличие основного фото
-                cover_photo_path = product.get('cover_photo_path')
-                if cover_photo_path and os.path.exists(cover_photo_path):
-                    # Формируем подпись
-                    short_desc = product['short_description'] or ''
-                    if len(short_desc) > 25:
-                        short_desc = short_desc[:25] + "..."
-                    
-                    caption = f"🎂 {product['name']}\n{short_desc}"
-                    
-                    # Открываем файл
-                    file_obj = open(cover_photo_path, 'rb')
-                    file_objects.append(file_obj)
-                    
-                    # Добавляем в медиагруппу
-                    media_group.append(types.InputMediaPhoto(
-                        file_obj,
-                        caption=caption,
-                        parse_mode='HTML'
-                    ))
-            
-            # Отправляем медиагруппу если есть фото
-            if media_group:
-                self.bot.send_media_group(chat_id, media_group)
-                return True
-            return False
-            
+            # Отправляем медиагруппы по 10 фото, если есть фото
+            return bool(get_album_sender(self.bot).send_album(chat_id, album))
         except Exception as e:
             logger.error(f"Ошибка отправки медиагруппы товаров: {e}")
             return False
-        finally:
-            # Закрываем все файлы
-            for file_obj in file_objects:
-                try:
-                    file_obj.close()
-                except:
-                    pass
     
     def _handle_category_selection(self, callback: CallbackQuery):
         """Обработка выбора категории с отправкой фото товаров"""
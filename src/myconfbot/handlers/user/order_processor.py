@@ -2,11 +2,13 @@
 
 import logging
 import os
+import uuid
 from datetime import datetime, timedelta
 from telebot import types
 from telebot.types import Message, CallbackQuery
 
 from src.myconfbot.handlers.user.order_constants import OrderConstants
+from src.myconfbot.services.order_service import OrderService
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,7 @@ class OrderProcessor:
         self.bot = bot
         self.db_manager = db_manager
         self.order_states = order_states
+        self.order_service = OrderService(db_manager)
     
     def start_order_process(self, callback: CallbackQuery):
         """Начало оформления заказа - Шаг 1: Проверка доступности"""
@@ -620,10 +623,13 @@ class OrderProcessor:
         
         summary += f"\n<b>Время создания:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}"
         
-        # Создаем временный ID для подтверждения
-        temp_order_id = f"temp_{message.from_user.id}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        # Кнопки подтверждения несут ключ черновика: повторное нажатие не создаст второй заказ
+        idempotency_key = order_data.get('idempotency_key')
+        if not idempotency_key:
+            idempotency_key = uuid.uuid4().hex
+            self.order_states.update_order_data(message.from_user.id, idempotency_key=idempotency_key)
         
-        keyboard = OrderConstants.create_order_confirmation_keyboard(temp_order_id)
+        keyboard = OrderConstants.create_order_confirmation_keyboard(idempotency_key)
         
         self.bot.send_message(
             message.chat.id,
@@ -640,16 +646,33 @@ class OrderProcessor:
         
         try:
             user_id = callback.from_user.id
-            order_data = self.order_states.complete_order(user_id)
-            
-            if not order_data:
-                self.bot.answer_callback_query(callback.id, "❌ Данные заказа не найдены")
+            idempotency_key = callback.data.replace('order_confirm_', '', 1)
+            # Черновик закрывается только после оформления: повторное нажатие
+            # во время оформления вернет тот же заказ по idempotency_key
+            order_data = self.order_states.get_order_data(user_id)
+            
+            if not order_data or order_data.get('idempotency_key') != idempotency_key:
+                # Кнопка оформленного черновика или старого итога: открытый
+                # черновик оформляется только своей кнопкой и не меняется
+                if self.db_manager.get_order_id_by_idempotency_key(idempotency_key):
+                    self.bot.answer_callback_query(callback.id, "✅ Заказ уже оформлен")
+                elif order_data:
+                    self.bot.answer_callback_query(callback.id, "⚠️ Итог заказа устарел, подтвердите последний")
+                else:
+                    self.bot.answer_callback_query(callback.id, "❌ Данные заказа не найдены")
                 return
             
             # Создаем заказ в базе данных
-            order_success = self._create_order_in_db(user_id, order_data)
-            
-            if order_success:
+            placed = self.order_service.place_order(user_id, order_data)
+            
+            if placed:
+                order_id, created = placed
+                self.order_states.complete_order(user_id)
+                if not created:
+                    # Сообщение с итогом уже показало первое нажатие
+                    logger.info(f"🔁 Повторное подтверждение заказа {order_id} пользователем {user_id}")
+                    self.bot.answer_callback_query(callback.id, "✅ Заказ уже оформлен")
+                    return
                 self.bot.answer_callback_query(callback.id, "✅ Заказ создан!")
                 
                 # Шаг 8: Финальное сообщение
@@ -665,7 +688,7 @@ class OrderProcessor:
                     parse_mode='HTML'
                 )
                 
-                # TODO: Уведомление администраторов
+                # Администраторы получат уведомление из outbox (NotificationService)
                 
             else:
                 self.bot.answer_callback_query(callback.id, "❌ Ошибка при создании заказа")
@@ -674,81 +697,6 @@ class OrderProcessor:
             logger.error(f"Ошибка при подтверждении заказа: {e}")
             self.bot.answer_callback_query(callback.id, "❌ Ошибка при создании заказа")
 
-    def _create_order_in_db(self, user_id: int, order_data: dict) -> bool:
-        """Создание заказа в базе данных с учетом новых полей"""
-        try:
-            product = self.db_manager.get_product_by_id(order_data['product_id'])
-            
-            if not product:
-                return False
-            
-            # Вычисляем стоимость
-            measurement_unit = product['measurement_unit'] or 'шт'
-            is_weight_based = 'грамм' in measurement_unit.lower()
-            
-            if is_weight_based:
-                weight_grams = order_data.get('weight_grams', 0)
-                total_cost = float(product['price']) * weight_grams / float(product['quantity'])
-                quantity = None
-            else:
-                quantity = order_data.get('quantity', 0)
-                total_cost = float(product['price']) * quantity
-                weight_grams = None
-            
-            # Формируем дату и время готовности
-            ready_at = None
-            if 'ready_date' in order_data:
-                ready_date = datetime.fromisoformat(order_data['ready_date'])
-                
-                if 'ready_time' in order_data:
-                    time_str = order_data['ready_time']
-                    hour, minute = map(int, time_str.split(':'))
-                    ready_at = ready_date.replace(hour=hour, minute=minute)
-                else:
-                    ready_at = ready_date
-
-            # Определяем статус оплаты
-            prepayment_conditions = product.get('prepayment_conditions', '')
-            if "предоплата" in prepayment_conditions:
-                payment_status = "Ожидает предоплату"
-            else:
-                payment_status = "Не оплачен"
-            
-            order_db_data = {
-                'user_id': user_id,  # telegram_id пользователя
-                'product_id': order_data['product_id'],
-                'quantity': quantity,
-                'weight_grams': weight_grams,
-                'total_cost': total_cost,
-                'delivery_type': order_data.get('delivery_type', 'самовывоз'),
-                'payment_type': prepayment_conditions,
-                'payment_status': payment_status,
-                'admin_notes': '',
-                'ready_at': ready_at.isoformat() if ready_at else None
-            }
-            
-            # Создаем заказ через новый метод
-            order_id = self.db_manager.create_order_and_get_id(order_db_data)
-            
-            if order_id:
-                # Сохраняем примечания пользователя
-                if 'notes' in order_data:
-                    user_notes = [note for note in order_data['notes'] if not note.get('is_admin', False)]
-                    if user_notes:
-                        for note in user_notes:
-                            self.db_manager.add_order_note(
-                                order_id,
-                                user_id,  # telegram_id пользователя
-                                note['text']
-                            )
-                
-                return True
-            return False
-            
-        except Exception as e:
-            logger.error(f"Ошибка при создании заказа в БД: {e}")
-            return False
-
     # def _create_order_in_db(self, user_id: int, order_data: dict) -> bool:
     #     """Создание заказа в базе данных с учетом новых полей"""
     #     try:
@@ -3,6 +3,7 @@ import logging
 import os
 from telebot import types
 from telebot.types import Message, CallbackQuery
+from src.myconfbot.utils.album_sender import get_album_sender, product_photo_paths
 from .order_constants import OrderConstants
 
 logger = logging.getLogger(__name__)
@@ -36,60 +37,18 @@ class OrderProductViewer:
         # keyboard.add(types.InlineKeyboardButton("🔙 К выбору продукции",
         #     callback_data=f"order_back_to_category_{product_id}"))
         
-        # Если есть фото, отправляем их все в одной медиагруппе
-        if photos and any(os.path.exists(p['photo_path']) for p in photos):
-            media_group = []
-            file_objects = []  # Для отслеживания открытых файлов
-            
+        # Фото отправляем альбомами по 10, описание - подписью к первому фото
+        sent = []
+        if photos:
             try:
-                # Сортируем фото: основное первое
-                main_photos = [p for p in photos if p.get('is_main')]
-                other_photos = [p for p in photos if not p.get('is_main')]
-                sorted_photos = main_photos + other_photos
-                
-                for i, photo_info in enumerate(sorted_photos[:10]):  # Ограничение Telegram
-                    if os.path.exists(photo_info['photo_path']):
-                        file_obj = open(photo_info['photo_path'], 'rb')
-                        file_objects.append(file_obj)
-                        
-                        if i == 0:  # Первое фото с описанием
-                            media_group.append(types.InputMediaPhoto(
-                                file_obj,
-                                caption=product_text,
-                                parse_mode='HTML'
-                            ))
-                        else:  # Остальные фото без подписи
-                            media_group.append(types.InputMediaPhoto(file_obj))
-                
-                if media_group:
-                    # Отправляем медиагруппу. Нужно будет реализовать в случае если фотографий >10
-                    self.bot.send_media_group(message.chat.id, media_group)
-                    
-                    # # Отправляем клавиатуру отдельным сообщением
-                    # self.bot.send_message(
-                    #     message.chat.id,
-                    #     #"📸 Все фотографии товара",
-                    #     reply_markup=keyboard
-                    # )
-                    
+                sent = get_album_sender(self.bot).send_album(
+                    message.chat.id, product_photo_paths(photos), caption=product_text
+                )
             except Exception as e:
                 logger.error(f"Ошибка отправки медиагруппы: {e}")
-                # Fallback: отправляем описание товара
-                self.bot.send_message(
-                    message.chat.id,
-                    product_text,
-                    parse_mode='HTML',
-                    # reply_markup=keyboard
-                )
-            finally:
-                # Закрываем все файлы
-                for file_obj in file_objects:
-                    try:
-                        file_obj.close()
-                    except:
-                        pass
-        else:
-            # Если фото нет, отправляем просто текст
+        
+        if not sent:
+            # Фото нет или не удалось отправить - отправляем просто текст
             self.bot.send_message(
                 message.chat.id,
                 product_text,
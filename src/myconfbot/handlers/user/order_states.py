@@ -1,6 +1,7 @@
 # src/myconfbot/handlers/user/order_states.py
 
 import logging
+import uuid
 from typing import Dict, Any, Optional
 from datetime import datetime
 
@@ -14,7 +15,8 @@ class OrderStatesManager:
 
     def _is_bot_user(self, user_id: int) -> bool:
         """Проверяет, является ли пользователь ботом"""
-        if self.bot and user_id == self.bot.get_me().id:
+        # bot.user кэширует getMe, чтобы не ходить в API на каждую проверку
+        if self.bot and user_id == self.bot.user.id:
             return True
         return False
     
@@ -31,7 +33,9 @@ class OrderStatesManager:
             'product_id': product_id,
             'step': 2, # Шаг 2, т.к. шаг 1 (проверка доступности) уже пройден
             'created_at': datetime.now().isoformat(),
-            'notes': []  # Временное хранение примечаний до подтверждения
+            'notes': [],  # Временное хранение примечаний до подтверждения
+            # Ключ черновика: повторное подтверждение вернет уже созданный заказ
+            'idempotency_key': uuid.uuid4().hex
 
         }
         self.states_manager.set_user_state(user_id, order_data)
@@ -43,17 +47,15 @@ class OrderStatesManager:
             return None
     
         data = self.states_manager.get_user_state(user_id)
-        logger.info(f"🔍 Получены данные заказа для {user_id}: {data}")
+        logger.debug("🔍 Получены данные заказа для %s: %s", user_id, data)
 
         # Проверяем структуру данных
         if data and isinstance(data, dict) and data.get('state', '').startswith('order_'):
-            logger.info(f"✅ Valid order data found")
             return data
         elif data:
-            logger.warning(f"⚠️ Invalid order data structure: {data}")
+            logger.debug("⚠️ Invalid order data structure: %s", data)
             return None
         else:
-            logger.info(f"🔍 No order data found")
             return None
         return data
     
@@ -63,12 +65,12 @@ class OrderStatesManager:
             logger.warning(f"⚠️ Пропускаем обновление данных для бота: {user_id}")
             return
         
-        logger.info(f"🔍 Обновление данных заказа для {user_id}: {kwargs}")
+        logger.debug("🔍 Обновление данных заказа для %s: %s", user_id, kwargs)
         order_data = self.get_order_data(user_id)
         if order_data:
             order_data.update(kwargs)
             self.states_manager.set_user_state(user_id, order_data)
-            logger.info(f"✅ Данные заказа обновлены")
+            logger.debug("✅ Данные заказа обновлены")
         else:
             logger.warning(f"⚠️ Нет данных заказа для обновления у пользователя {user_id}")
 
@@ -121,9 +123,7 @@ class OrderStatesManager:
         order_data = self.get_order_data(user_id)
         result = order_data is not None and order_data.get('state', '').startswith('order_')
         
-        logger.info(f"🔍 DEBUG is_in_order_process: user_id={user_id}, result={result}")
-        logger.info(f"🔍 DEBUG order_data: {order_data}")
-        if order_data:
-            logger.info(f"🔍 DEBUG state: {order_data.get('state')}")
+        logger.debug("🔍 is_in_order_process: user_id=%s, result=%s, order_data=%s",
+                     user_id, result, order_data)
         
         return result
\ No newline at end of file
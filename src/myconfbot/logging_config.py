@@ -1,95 +1,202 @@
 # src/myconfbot/logging_config.py
 
+import atexit
 import logging
+import logging.config
 import logging.handlers
 import os
+import queue
+import threading
+import time
 from pathlib import Path
-from dotenv import load_dotenv
+from src.myconfbot.config import load_environment
 
-load_dotenv()
-
-# Путь к директории логов (в корне проекта)
-LOG_FILE_PATH = os.getenv("LOG_FILE_PATH", "logs/myconfbot.log")
-LOG_FILE_PATH = Path(LOG_FILE_PATH)
-LOG_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
+# Путь к файлу лога по умолчанию (в корне проекта); переопределяется LOG_FILE_PATH
+DEFAULT_LOG_FILE_PATH = "logs/myconfbot.log"
 # LOG_DIR = Path(__file__).parent.parent.parent / "logs"
 # LOG_DIR.mkdir(exist_ok=True)
 
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Ограничение повторяющихся DEBUG/INFO строк по умолчанию: не больше N одинаковых записей за интервал
+LOG_RATE_LIMIT = 20
+LOG_RATE_LIMIT_INTERVAL = 60.0
 
-# Настройки логирования
-LOG_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,  # 🔴 ВАЖНО: не отключать существующие логгеры!
-    "formatters": {
-        "detailed": {
-            "format": "[%(asctime)s] %(levelname)-8s %(name)-20s %(filename)s:%(lineno)d | %(message)s",
-            "datefmt": "%Y-%m-%d %H:%M:%S",
-        },
-        "simple": {
-            "format": "%(levelname)s | %(name)s | %(message)s",
-        },
-    },
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "level": LOG_LEVEL,
-            "formatter": "simple",
-            "stream": "ext://sys.stdout",
-        },
-        "file": {
-            "class": "logging.handlers.RotatingFileHandler",
-            "level": "DEBUG",
-            "formatter": "detailed",
-            "filename": LOG_FILE_PATH,
-            "maxBytes": 10 * 1024 * 1024,  # 10 MB
-            "backupCount": 5,
-            "encoding": "utf-8",
-        },
-    },
-    "root": {
-        "level": LOG_LEVEL,
-        "handlers": ["console", "file"],
-    },
-    "loggers": {
-        "aiogram": {
-            "level": "DEBUG",
-            "handlers": ["console", "file"],
-            "propagate": False,
-        },
-        "sqlalchemy": {
-            "level": "DEBUG",
-            "handlers": ["console", "file"],
-            "propagate": True,
+
+def build_log_config() -> dict:
+    """
+    Настройки логирования из окружения
+
+    Читаются при вызове setup_logging(), а не при импорте модуля, чтобы
+    учитывался .env и каталог логов создавался только при запуске бота.
+    """
+    log_file_path = Path(os.getenv("LOG_FILE_PATH", DEFAULT_LOG_FILE_PATH))
+    log_file_path.parent.mkdir(parents=True, exist_ok=True)
+    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,  # 🔴 ВАЖНО: не отключать существующие логгеры!
+        "formatters": {
+            "detailed": {
+                "format": "[%(asctime)s] %(levelname)-8s %(name)-20s %(filename)s:%(lineno)d | %(message)s",
+                "datefmt": "%Y-%m-%d %H:%M:%S",
+            },
+            "simple": {
+                "format": "%(levelname)s | %(name)s | %(message)s",
+            },
         },
-        "httpx": {
-            "level": "INFO",
-            "handlers": ["console", "file"],
-            "propagate": False,
+        "handlers": {
+            "console": {
+                "class": "logging.StreamHandler",
+                "level": log_level,
+                "formatter": "simple",
+                "stream": "ext://sys.stdout",
+            },
+            "file": {
+                "class": "logging.handlers.RotatingFileHandler",
+                "level": "DEBUG",
+                "formatter": "detailed",
+                "filename": log_file_path,
+                "maxBytes": 10 * 1024 * 1024,  # 10 MB
+                "backupCount": 5,
+                "encoding": "utf-8",
+            },
         },
-        # 🔴 ВАЖНО: отключаем DEBUG-логи urllib3 (которые творят беспорядок)
-        "urllib3.connectionpool": {
-            "level": "WARNING",  # ✅ Только WARNING и выше — больше не видим DEBUG
+        "root": {
+            "level": log_level,
             "handlers": ["console", "file"],
-            "propagate": False,
         },
-        # 🔴 Дополнительно: если aiogram использует httpx (в новых версиях), но urllib3 всё равно может быть
-        "urllib3.util.retry": {
-            "level": "WARNING",
-            "handlers": ["console", "file"],
-            "propagate": False,
+        # 🔴 Логгеры подсистем только задают уровень: записи идут через корневой
+        # логгер и общую очередь, поэтому собственные handlers им не нужны
+        "loggers": {
+            "aiogram": {
+                "level": "INFO",
+            },
+            # DEBUG у sqlalchemy пишет каждый SQL-запрос и строку результата
+            "sqlalchemy": {
+                "level": "WARNING",
+            },
+            "httpx": {
+                "level": "INFO",
+            },
+            # 🔴 ВАЖНО: отключаем DEBUG-логи urllib3 (которые творят беспорядок)
+            "urllib3.connectionpool": {
+                "level": "WARNING",  # ✅ Только WARNING и выше — больше не видим DEBUG
+            },
+            "urllib3.util.retry": {
+                "level": "WARNING",
+            },
         },
-    },
-}
+    }
+
 
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничивает повторяющиеся записи ниже WARNING
 
-def setup_logging():
+    Ключ записи - логгер, файл, строка и шаблон сообщения (до подстановки
+    аргументов), поэтому одна и та же строка лога с разными user_id
+    считается повтором. Число отброшенных записей дописывается к первой
+    пропущенной записи следующего интервала.
+    """
+
+    def __init__(self, limit: int = LOG_RATE_LIMIT, interval: float = LOG_RATE_LIMIT_INTERVAL):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0 or record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, record.pathname, record.lineno, record.msg)
+        now = time.monotonic()
+
+        with self._lock:
+            window_start, count, suppressed = self._windows.get(key, (now, 0, 0))
+
+            if now - window_start >= self.interval:
+                window_start, count = now, 0
+
+            if count >= self.limit:
+                self._windows[key] = (window_start, count, suppressed + 1)
+                return False
+
+            self._windows[key] = (window_start, count + 1, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} [подавлено повторов: {suppressed}]"
+        return True
+
+
+_queue_listener = None
+
+
+def _parse_log_levels(value: str) -> dict:
+    """Разбор LOG_LEVELS в словарь {логгер: уровень}"""
+    levels = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        name, level = item.split('=', 1)
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(use_queue: bool = True):
     """
     Инициализирует логирование на основе конфига.
     Вызывается ОДИН РАЗ при старте приложения.
+
+    Консоль и файл обслуживаются отдельным потоком QueueListener, а в потоках
+    обработчиков апдейтов остается только постановка записи в очередь.
     """
-    logging.config.dictConfig(LOG_CONFIG)
+    global _queue_listener
+
+    load_environment()
+    logging.config.dictConfig(build_log_config())
+
+    # Уровни по подсистемам: LOG_LEVELS="sqlalchemy.engine=INFO,src.myconfbot.handlers.user=DEBUG"
+    for name, level in _parse_log_levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    if not use_queue:
+        return
+
+    if _queue_listener is not None:
+        _queue_listener.stop()
+    else:
+        atexit.register(stop_logging)
+
+    root = logging.getLogger()
+    target_handlers = list(root.handlers)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(
+        limit=int(os.getenv("LOG_RATE_LIMIT", LOG_RATE_LIMIT)),
+        interval=float(os.getenv("LOG_RATE_LIMIT_INTERVAL", LOG_RATE_LIMIT_INTERVAL)),
+    ))
+
+    for handler in target_handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *target_handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
+
+
+def stop_logging():
+    """Дописать оставшиеся в очереди записи и остановить поток логирования"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
 
 
 # 🔴 ВАЖНО: если вы используете `uvicorn`, `gunicorn` или другой ASGI-сервер —
-# вызывайте setup_logging() в точке входа, а не в модуле, чтобы избежать повторного вызова.
\ No newline at end of file
+# вызывайте setup_logging() в точке входа, а не в модуле, чтобы избежать повторного вызова.
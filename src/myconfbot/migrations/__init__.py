@@ -0,0 +1,6 @@
+# src/myconfbot/migrations/__init__.py
+"""Версионные миграции схемы БД (см. runner.py)"""
+
+from .runner import MigrationContext, MigrationRunner, schema_version
+
+__all__ = ['MigrationContext', 'MigrationRunner', 'schema_version']
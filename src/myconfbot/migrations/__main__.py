@@ -0,0 +1,54 @@
+# src/myconfbot/migrations/__main__.py
+"""
+Миграции схемы из командной строки
+
+    python -m src.myconfbot.migrations status
+    python -m src.myconfbot.migrations upgrade              # все, включая онлайн
+    python -m src.myconfbot.migrations upgrade --blocking   # только блокирующие
+    python -m src.myconfbot.migrations stamp 2              # отметить 1..2 примененными
+    python -m src.myconfbot.migrations --url sqlite:///data/confbot.db status
+"""
+
+import argparse
+import logging
+
+from src.myconfbot.config import DatabaseConfig
+from src.myconfbot.migrations.runner import MigrationRunner
+from src.myconfbot.utils.database import create_database_engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Миграции схемы БД")
+    parser.add_argument('--url', help="URL базы (по умолчанию из окружения)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help="примененные и ожидающие миграции")
+    upgrade_parser = commands.add_parser('upgrade', help="применить ожидающие миграции")
+    upgrade_parser.add_argument('--blocking', action='store_true', help="без онлайн-миграций")
+    stamp_parser = commands.add_parser('stamp', help="отметить миграции примененными без выполнения")
+    stamp_parser.add_argument('version', type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    engine = create_database_engine(args.url or DatabaseConfig().url)
+    runner = MigrationRunner(engine)
+
+    try:
+        if args.command == 'status':
+            for item in runner.status():
+                details = ''
+                if item['status'] == 'applied':
+                    details = f"{item['applied_at']:%Y-%m-%d %H:%M:%S}, {item['duration_ms']} мс"
+                elif item['checkpoint']:
+                    details = f"контрольная точка {item['checkpoint']}"
+                print(f"{item['version']:>5}  {item['status']:<12} {item['name']:<40} {details}")
+        elif args.command == 'upgrade':
+            count = runner.upgrade(include_online=not args.blocking)
+            print(f"Применено миграций: {count}")
+        else:
+            print(f"Отмечено миграций: {runner.stamp(args.version)}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,411 @@
+# src/myconfbot/migrations/runner.py
+"""
+Версионные миграции схемы БД
+
+Миграция - модуль versions/vNNNN_<имя>.py с функцией upgrade(ctx) и
+необязательными DESCRIPTION и ONLINE. Примененные версии хранятся в таблице
+schema_version; при старте бота runner одним запросом сравнивает их со
+списком модулей и импортирует только недостающие.
+
+Блокирующие миграции (ONLINE = False) выполняются при старте до запуска
+бота. Онлайн-миграции (ONLINE = True: заполнение данных, построение
+индексов) выполняются в фоне уже работающим ботом, батчами, с прогрессом
+в логе и контрольными точками в schema_version - после перезапуска
+продолжаются с места остановки. Блокирующие миграции не должны зависеть
+от онлайн-миграций.
+"""
+
+import importlib
+import json
+import logging
+import pkgutil
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateTable
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_PACKAGE = 'src.myconfbot.migrations.versions'
+_MODULE_NAME = re.compile(r'^v(\d{4})_(\w+)$')
+
+STATUS_APPLIED = 'applied'
+STATUS_IN_PROGRESS = 'in_progress'
+
+_version_metadata = sa.MetaData()
+schema_version = sa.Table(
+    'schema_version', _version_metadata,
+    sa.Column('version', sa.Integer, primary_key=True, autoincrement=False),
+    sa.Column('name', sa.String(200), nullable=False),
+    sa.Column('status', sa.String(20), nullable=False),
+    # JSON: {шаг: состояние} - выполненные шаги и последний обработанный id
+    sa.Column('checkpoint', sa.Text),
+    sa.Column('started_at', sa.DateTime),
+    sa.Column('applied_at', sa.DateTime),
+    sa.Column('duration_ms', sa.Integer),
+)
+
+
+class MigrationContext:
+    """
+    Операции, доступные миграции
+
+    Каждая операция идемпотентна: повторный запуск миграции после сбоя
+    пропускает уже выполненное. Шаги с ключом (step) запоминаются в
+    контрольной точке и при возобновлении не повторяются.
+    """
+
+    def __init__(self, runner: 'MigrationRunner', version: int, name: str, checkpoint: Optional[dict]):
+        self.runner = runner
+        self.engine = runner.engine
+        self.dialect = runner.engine.dialect.name
+        self.version = version
+        self.name = name
+        self._checkpoint = checkpoint or {}
+
+    # --- состояние ---
+
+    def is_done(self, step: str) -> bool:
+        return self._checkpoint.get(step) == 'done'
+
+    def get_state(self, step: str):
+        return self._checkpoint.get(step)
+
+    def save_state(self, step: str, value):
+        self._checkpoint[step] = value
+        self.runner._save_checkpoint(self.version, self._checkpoint)
+
+    @contextmanager
+    def step(self, key: str):
+        """
+        Шаг миграции, выполняемый один раз:
+
+            with ctx.step('add_column') as todo:
+                if todo:
+                    ...
+        """
+        if self.is_done(key):
+            yield False
+            return
+        yield True
+        self.save_state(key, 'done')
+
+    # --- схема ---
+
+    def execute(self, statement: str, params: Optional[dict] = None):
+        with self.engine.begin() as connection:
+            return connection.execute(sa.text(statement), params or {})
+
+    def has_table(self, table: str) -> bool:
+        return sa.inspect(self.engine).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return any(item['name'] == column for item in sa.inspect(self.engine).get_columns(table))
+
+    def has_index(self, table: str, name: str) -> bool:
+        return any(item['name'] == name for item in sa.inspect(self.engine).get_indexes(table))
+
+    def add_column(self, table: str, column: str, ddl_type: str):
+        """ALTER TABLE ... ADD COLUMN, если колонки еще нет"""
+        if self.has_column(table, column):
+            return
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}")
+        logger.info(f"🧱 {table}.{column} добавлена")
+
+    def create_index(self, name: str, table: str, columns: List[str], unique: bool = False):
+        """
+        Индекс без блокировки записи
+
+        PostgreSQL - CREATE INDEX CONCURRENTLY вне транзакции; недостроенный
+        (INVALID) индекс после сбоя удаляется и строится заново. SQLite
+        строит индекс обычным образом: запись блокируется на время построения.
+        """
+        unique_sql = 'UNIQUE ' if unique else ''
+        columns_sql = ', '.join(columns)
+        started = time.perf_counter()
+
+        if self.dialect == 'postgresql':
+            with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                valid = connection.execute(sa.text(
+                    "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                    "WHERE c.relname = :name"
+                ), {'name': name}).scalar()
+                if valid:
+                    return
+                if valid is False:
+                    logger.warning(f"⚠️ Индекс {name} недостроен, строим заново")
+                    connection.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                connection.execute(sa.text(
+                    f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns_sql})"
+                ))
+        else:
+            if self.has_index(table, name):
+                return
+            self.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table} ({columns_sql})")
+
+        logger.info(f"🧱 Индекс {name} построен за {time.perf_counter() - started:.1f} с")
+
+    def rebuild_sqlite_table(self, table: sa.Table, column_map: Optional[Dict[str, str]] = None):
+        """
+        Пересоздать таблицу SQLite по новому описанию
+
+        Для изменений, которые SQLite не умеет делать через ALTER TABLE (тип
+        или ограничения колонки, внешние ключи): новая таблица создается под
+        временным именем, данные копируются, старая удаляется, новая
+        переименовывается, индексы из описания создаются заново.
+
+        Args:
+            table: описание таблицы в новом виде (sa.Table)
+            column_map: {новая колонка: SQL-выражение по старой таблице};
+                        по умолчанию копируются одноименные колонки
+        """
+        if self.dialect != 'sqlite':
+            raise RuntimeError("rebuild_sqlite_table применяется только к SQLite")
+
+        temp_name = f"_rebuild_{table.name}"
+        old_columns = {item['name'] for item in sa.inspect(self.engine).get_columns(table.name)}
+        column_map = column_map or {
+            column.name: column.name for column in table.columns if column.name in old_columns
+        }
+
+        create_sql = str(CreateTable(table).compile(dialect=self.engine.dialect)).strip()
+        create_sql = create_sql.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {temp_name} ", 1)
+
+        with self.engine.connect() as connection:
+            # PRAGMA foreign_keys не действует внутри транзакции
+            connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            connection.commit()
+            try:
+                with connection.begin():
+                    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {temp_name}")
+                    connection.exec_driver_sql(create_sql)
+                    connection.exec_driver_sql(
+                        f"INSERT INTO {temp_name} ({', '.join(column_map)}) "
+                        f"SELECT {', '.join(column_map.values())} FROM {table.name}"
+                    )
+                    connection.exec_driver_sql(f"DROP TABLE {table.name}")
+                    connection.exec_driver_sql(f"ALTER TABLE {temp_name} RENAME TO {table.name}")
+                    for index in table.indexes:
+                        index.create(connection)
+                    problems = connection.exec_driver_sql('PRAGMA foreign_key_check').fetchall()
+                    if problems:
+                        raise RuntimeError(f"Нарушены внешние ключи после пересоздания {table.name}: {problems[:5]}")
+            finally:
+                connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+                connection.commit()
+
+        logger.info(f"🧱 Таблица {table.name} пересоздана")
+
+    # --- данные ---
+
+    def backfill(self, step: str, table: str, set_sql: str, where_sql: str = '1=1',
+                 batch_size: int = 5000, params: Optional[dict] = None):
+        """
+        UPDATE большой таблицы диапазонами id с коммитом после каждого батча
+
+        Последний обработанный id сохраняется в контрольной точке, поэтому
+        прерванное заполнение продолжается с места остановки.
+        """
+        state = self.get_state(step)
+        if state == 'done':
+            return
+
+        with self.engine.connect() as connection:
+            max_id = connection.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+
+        last_id = state or 0
+        updated = 0
+        started = time.perf_counter()
+        last_report = started
+
+        while last_id < max_id:
+            upper = min(last_id + batch_size, max_id)
+            with self.engine.begin() as connection:
+                result = connection.execute(sa.text(
+                    f"UPDATE {table} SET {set_sql} WHERE id > :low AND id <= :high AND ({where_sql})"
+                ), {'low': last_id, 'high': upper, **(params or {})})
+                updated += result.rowcount or 0
+            last_id = upper
+            self.save_state(step, last_id)
+
+            if time.perf_counter() - last_report >= 5:
+                last_report = time.perf_counter()
+                logger.info(f"⏳ {self.name}/{step}: {last_id}/{max_id} ({last_id / max_id:.0%}), обновлено {updated}")
+
+        self.save_state(step, 'done')
+        logger.info(f"🧱 {self.name}/{step}: обновлено {updated} строк за {time.perf_counter() - started:.1f} с")
+
+
+class MigrationRunner:
+    """Применение версионных миграций к движку SQLAlchemy"""
+
+    def __init__(self, engine, package: str = VERSIONS_PACKAGE):
+        self.engine = engine
+        self.package = package
+        self._available: Optional[List[Tuple[int, str]]] = None
+        self._lock = threading.Lock()
+        self._online_thread: Optional[threading.Thread] = None
+
+    # --- обнаружение ---
+
+    def available(self) -> List[Tuple[int, str]]:
+        """Версии из имен модулей пакета, без их импорта: [(версия, модуль)]"""
+        if self._available is None:
+            package = importlib.import_module(self.package)
+            versions = []
+            for module in pkgutil.iter_modules(package.__path__):
+                match = _MODULE_NAME.match(module.name)
+                if match:
+                    versions.append((int(match.group(1)), module.name))
+            self._available = sorted(versions)
+        return self._available
+
+    def _ensure_version_table(self):
+        _version_metadata.create_all(self.engine, checkfirst=True)
+
+    def applied(self) -> Dict[int, dict]:
+        self._ensure_version_table()
+        with self.engine.connect() as connection:
+            rows = connection.execute(sa.select(schema_version)).mappings().all()
+        return {row['version']: dict(row) for row in rows}
+
+    def pending(self) -> List[Tuple[int, str]]:
+        applied = self.applied()
+        return [
+            (version, name) for version, name in self.available()
+            if applied.get(version, {}).get('status') != STATUS_APPLIED
+        ]
+
+    def _has_data_tables(self) -> bool:
+        return any(name != schema_version.name for name in sa.inspect(self.engine).get_table_names())
+
+    def _load(self, name: str):
+        return importlib.import_module(f"{self.package}.{name}")
+
+    # --- применение ---
+
+    def upgrade(self, include_online: bool = True,
+                progress: Optional[Callable[[int, str], None]] = None) -> int:
+        """
+        Применить ожидающие миграции по порядку
+
+        Args:
+            include_online: выполнять ли онлайн-миграции (иначе только блокирующие).
+                            На новой базе без таблиц выполняются все миграции сразу.
+
+        Returns:
+            int: число примененных миграций
+        """
+        with self._lock:
+            applied = self.applied()
+            pending = [
+                (version, name) for version, name in self.available()
+                if applied.get(version, {}).get('status') != STATUS_APPLIED
+            ]
+            if not pending:
+                return 0
+
+            # На пустой базе онлайн-миграциям нечего обрабатывать
+            fresh_database = not applied and not self._has_data_tables()
+            count = 0
+            for version, name in pending:
+                module = self._load(name)
+                if getattr(module, 'ONLINE', False) and not (include_online or fresh_database):
+                    continue
+                if progress:
+                    progress(version, name)
+                self._apply(version, name, module, applied.get(version))
+                count += 1
+            return count
+
+    def _apply(self, version: int, name: str, module, row: Optional[dict]):
+        checkpoint = json.loads(row['checkpoint']) if row and row.get('checkpoint') else {}
+        resumed = row is not None
+        now = datetime.now()
+
+        with self.engine.begin() as connection:
+            if row is None:
+                connection.execute(sa.insert(schema_version).values(
+                    version=version, name=name, status=STATUS_IN_PROGRESS,
+                    checkpoint=json.dumps(checkpoint), started_at=now,
+                ))
+
+        logger.info(f"🧱 Миграция {name}{' (продолжение)' if resumed else ''}: "
+                    f"{getattr(module, 'DESCRIPTION', '')}")
+        started = time.perf_counter()
+        context = MigrationContext(self, version, name, checkpoint)
+        try:
+            module.upgrade(context)
+        except Exception as e:
+            logger.error(f"❌ Миграция {name} прервана: {e}")
+            raise
+
+        duration_ms = int((time.perf_counter() - started) * 1000)
+        with self.engine.begin() as connection:
+            connection.execute(
+                sa.update(schema_version).where(schema_version.c.version == version).values(
+                    status=STATUS_APPLIED, applied_at=datetime.now(), duration_ms=duration_ms,
+                )
+            )
+        logger.info(f"✅ Миграция {name} применена за {duration_ms} мс")
+
+    def _save_checkpoint(self, version: int, checkpoint: dict):
+        with self.engine.begin() as connection:
+            connection.execute(
+                sa.update(schema_version).where(schema_version.c.version == version)
+                .values(checkpoint=json.dumps(checkpoint))
+            )
+
+    def stamp(self, version: int) -> int:
+        """Отметить версии до version включительно примененными, не выполняя их"""
+        applied = self.applied()
+        count = 0
+        with self.engine.begin() as connection:
+            for number, name in self.available():
+                if number > version or applied.get(number, {}).get('status') == STATUS_APPLIED:
+                    continue
+                values = dict(name=name, status=STATUS_APPLIED, applied_at=datetime.now(), duration_ms=0)
+                if number in applied:
+                    connection.execute(sa.update(schema_version)
+                                       .where(schema_version.c.version == number).values(**values))
+                else:
+                    connection.execute(sa.insert(schema_version).values(version=number, **values))
+                count += 1
+        return count
+
+    def start_online(self) -> bool:
+        """Выполнить оставшиеся (онлайн) миграции в фоновом потоке"""
+        if self._online_thread is not None and self._online_thread.is_alive():
+            return False
+        if not self.pending():
+            return False
+
+        def run():
+            try:
+                self.upgrade(include_online=True)
+            except Exception as e:
+                logger.error(f"❌ Фоновые миграции остановлены: {e}")
+
+        self._online_thread = threading.Thread(target=run, name='schema-migrations', daemon=True)
+        self._online_thread.start()
+        return True
+
+    def status(self) -> List[dict]:
+        applied = self.applied()
+        result = []
+        for version, name in self.available():
+            row = applied.get(version, {})
+            result.append({
+                'version': version,
+                'name': name,
+                'status': row.get('status', 'pending'),
+                'applied_at': row.get('applied_at'),
+                'duration_ms': row.get('duration_ms'),
+                'checkpoint': json.loads(row['checkpoint']) if row.get('checkpoint') else None,
+            })
+        return result
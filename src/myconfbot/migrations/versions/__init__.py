@@ -0,0 +1,13 @@
+# src/myconfbot/migrations/versions/__init__.py
+"""
+Модули миграций: vNNNN_<имя>.py, применяются по возрастанию номера
+
+    DESCRIPTION = "что меняется"
+    ONLINE = False          # True - выполняется в фоне работающим ботом
+
+    def upgrade(ctx):       # ctx: MigrationContext
+        ...
+
+Номер примененной миграции не меняют и модуль не редактируют - изменения
+схемы оформляются новой миграцией.
+"""
@@ -0,0 +1,10 @@
+# src/myconfbot/migrations/versions/v0001_baseline.py
+"""Исходная схема: таблицы моделей, которых еще нет в базе"""
+
+DESCRIPTION = "создание таблиц по моделям"
+ONLINE = False
+
+
+def upgrade(ctx):
+    from src.myconfbot.utils.models import Base
+    Base.metadata.create_all(ctx.engine, checkfirst=True)
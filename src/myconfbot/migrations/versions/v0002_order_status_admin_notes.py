@@ -0,0 +1,9 @@
+# src/myconfbot/migrations/versions/v0002_order_status_admin_notes.py
+"""Комментарий администратора к смене статуса (бывший migrations/add_admin_notes_to_order_statuses.py)"""
+
+DESCRIPTION = "order_statuses.admin_notes"
+ONLINE = False
+
+
+def upgrade(ctx):
+    ctx.add_column('order_statuses', 'admin_notes', 'TEXT')
@@ -0,0 +1,27 @@
+# src/myconfbot/migrations/versions/v0003_query_indexes.py
+"""
+Индексы для списков заказов и истории статусов
+
+Без них текущий статус заказа ищется полным просмотром order_statuses, и
+списки заказов растут квадратично от числа заказов. На PostgreSQL индексы
+строятся CONCURRENTLY, бот в это время продолжает принимать заказы.
+"""
+
+DESCRIPTION = "индексы orders, order_statuses, order_notes, products, product_photos"
+ONLINE = True
+
+INDEXES = [
+    ('ix_order_statuses_order_id_created_at', 'order_statuses', ['order_id', 'created_at']),
+    ('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at']),
+    ('ix_orders_created_at', 'orders', ['created_at']),
+    ('ix_order_notes_order_id', 'order_notes', ['order_id']),
+    ('ix_products_category_id', 'products', ['category_id']),
+    ('ix_product_photos_product_id', 'product_photos', ['product_id']),
+]
+
+
+def upgrade(ctx):
+    for name, table, columns in INDEXES:
+        with ctx.step(name) as todo:
+            if todo:
+                ctx.create_index(name, table, columns)
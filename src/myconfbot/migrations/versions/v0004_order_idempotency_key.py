@@ -0,0 +1,11 @@
+# src/myconfbot/migrations/versions/v0004_order_idempotency_key.py
+"""Ключ идемпотентности заказа: повторное подтверждение черновика возвращает уже созданный заказ"""
+
+DESCRIPTION = "orders.idempotency_key + уникальный индекс"
+ONLINE = False
+
+
+def upgrade(ctx):
+    ctx.add_column('orders', 'idempotency_key', 'VARCHAR(64)')
+    # У старых заказов ключа нет (NULL), индекс строится быстро
+    ctx.create_index('ux_orders_idempotency_key', 'orders', ['idempotency_key'], unique=True)
@@ -0,0 +1,11 @@
+# src/myconfbot/migrations/versions/v0005_outbox_events.py
+"""Таблица outbox_events: уведомления о заказах для фоновой рассылки"""
+
+DESCRIPTION = "outbox_events"
+ONLINE = False
+
+
+def upgrade(ctx):
+    from src.myconfbot.utils.models import OutboxEvent
+    # Новая таблица пустая - индексы создаются вместе с ней
+    OutboxEvent.__table__.create(ctx.engine, checkfirst=True)
@@ -0,0 +1,21 @@
+# src/myconfbot/migrations/versions/v0006_order_notes_history_index.py
+"""
+Индекс страниц переписки по заказу
+
+Переписка показывается страницами, новые сверху: WHERE order_id = ...
+AND (created_at, id) < курсора ORDER BY created_at DESC, id DESC. Индекс
+(order_id, created_at, id) отдает страницу без сортировки и заменяет
+ix_order_notes_order_id из v0003.
+"""
+
+DESCRIPTION = "индекс order_notes (order_id, created_at, id)"
+ONLINE = True
+
+
+def upgrade(ctx):
+    with ctx.step('ix_order_notes_order_id_created_at') as todo:
+        if todo:
+            ctx.create_index('ix_order_notes_order_id_created_at', 'order_notes', ['order_id', 'created_at', 'id'])
+    with ctx.step('drop_ix_order_notes_order_id') as todo:
+        if todo:
+            ctx.execute("DROP INDEX IF EXISTS ix_order_notes_order_id")
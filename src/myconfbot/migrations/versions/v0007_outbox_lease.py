@@ -0,0 +1,15 @@
+# src/myconfbot/migrations/versions/v0007_outbox_lease.py
+"""
+Аренда уведомлений outbox в отдельной колонке
+
+Взятое на отправку уведомление помечается leased_until, а available_at
+остается временем отправки: его сдвигает объединение серии правок и
+откладывание после ошибки отправки.
+"""
+
+DESCRIPTION = "outbox_events.leased_until"
+ONLINE = False
+
+
+def upgrade(ctx):
+    ctx.add_column('outbox_events', 'leased_until', 'TIMESTAMP')
@@ -1,4 +1,6 @@
 from .auth_service import AuthService
+from .notification_service import NotificationService
+from .order_service import OrderService
 from .user_service import UserService
 
-__all__ = ['AuthService', 'UserService']
\ No newline at end of file
+__all__ = ['AuthService', 'NotificationService', 'OrderService', 'UserService']
\ No newline at end of file
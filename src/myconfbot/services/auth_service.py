@@ -12,14 +12,9 @@ class AuthService:
     
     def is_admin(self, user_id: int) -> bool:
         """Проверка, является ли пользователь администратором"""
-        # user = self.db_manager.get_user_by_telegram_id(user_id)
-        #user_info = self.db_manager.get_user_info(user_id)
-        user_info = self.get_user_info(user_id)
-
-        # Отладлочная информация
-        # print(f"User info for {user_id}: {user_info}")
-
-        return bool(user_info and user_info.get('is_admin'))
+        # Пользователь апдейта уже найден (DatabaseManager.instrument_bot) - без запроса к БД
+        user = self.db_manager.get_user_context(user_id)
+        return bool(user and user.is_admin)
 
     def get_user_info(self, user_id: int) -> Optional[Dict]:
         """Получить информацию о пользователе"""
@@ -0,0 +1,27 @@
+# src/myconfbot/services/event_subscribers.py
+"""Подписчики доменных событий, подключаемые при запуске бота (bootstrap)"""
+
+import logging
+from dataclasses import asdict
+
+from src.myconfbot.utils.events import DomainEvent, EventBus
+from .order_stats_service import get_order_stats_service
+
+audit_logger = logging.getLogger('src.myconfbot.audit')
+
+
+def audit_event(event: DomainEvent):
+    """Журнал изменений данных: одна строка на событие"""
+    audit_logger.info("🧾 %s %s", type(event).__name__, asdict(event))
+
+
+def register_subscribers(bus: EventBus):
+    """
+    Подписать производные данные на изменения
+
+    Уведомления о заказах сюда не входят: они пишутся в outbox в той же
+    транзакции, что и изменение (DatabaseManager._enqueue_notification),
+    и не теряются при падении процесса после коммита.
+    """
+    get_order_stats_service().subscribe(bus)
+    bus.subscribe(DomainEvent, audit_event, deferred=True, name='audit')
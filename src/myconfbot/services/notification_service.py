@@ -0,0 +1,185 @@
+# src/myconfbot/services/notification_service.py
+
+import html
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from telebot import apihelper
+
+from src.myconfbot.utils.database import DatabaseManager
+from src.myconfbot.utils.telegram_sender import RateLimitedSender, retry_after
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_LIMIT = 4096
+MAX_NOTES_PER_ORDER = 5
+
+FIELD_TITLES = {
+    'total_cost': '💵 Стоимость',
+    'ready_at': '⏰ Дата и время готовности',
+}
+
+
+def _format_value(field: str, value) -> str:
+    if value is None:
+        return 'не указано'
+    if field == 'total_cost':
+        return f"{float(value):.2f} руб."
+    if field == 'ready_at':
+        return datetime.fromisoformat(value).strftime('%d.%m.%Y %H:%M')
+    return html.escape(str(value))
+
+
+class NotificationService:
+    """
+    Рассылка уведомлений о заказах из outbox
+
+    Изменения заказа записывают уведомления в outbox_events в той же
+    транзакции (DatabaseManager._enqueue_notification), а фоновый поток
+    забирает их пачками и отправляет через RateLimitedSender. Все
+    ожидающие уведомления одного получателя объединяются в одно сообщение:
+    серия правок администратора - одно сообщение клиенту. Неудачная
+    отправка повторяется с растущей паузой, после max_attempts попыток
+    уведомление помечается failed.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, sender: RateLimitedSender,
+                 poll_interval: float = None, batch_size: int = None, max_attempts: int = None):
+        self.db_manager = db_manager
+        self.sender = sender
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv('NOTIFY_POLL_INTERVAL', '2'))
+        self.batch_size = batch_size or int(os.getenv('NOTIFY_BATCH_SIZE', '50'))
+        self.max_attempts = max_attempts or int(os.getenv('NOTIFY_MAX_ATTEMPTS', '5'))
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- формирование сообщений ---
+
+    @staticmethod
+    def _format_created(payload: dict) -> List[str]:
+        lines = [f"👤 {html.escape(payload.get('customer') or 'Клиент')}"]
+        amount = f"{payload['weight_grams']} г" if payload.get('weight_grams') else f"{payload.get('quantity') or 0} шт"
+        lines.append(f"🎂 {html.escape(payload.get('product') or '')} — {amount}")
+        if payload.get('total_cost') is not None:
+            lines.append(f"{FIELD_TITLES['total_cost']}: {_format_value('total_cost', payload['total_cost'])}")
+        if payload.get('ready_at'):
+            lines.append(f"{FIELD_TITLES['ready_at']}: {_format_value('ready_at', payload['ready_at'])}")
+        if payload.get('delivery_type'):
+            lines.append(f"🚚 {html.escape(payload['delivery_type'])}")
+        lines.extend(f"💬 {html.escape(note)}" for note in payload.get('notes') or [])
+        return lines
+
+    @classmethod
+    def format_message(cls, events: List[dict]) -> str:
+        """
+        Одно сообщение из уведомлений получателя
+
+        По каждому заказу: новый заказ целиком, последний статус, последние
+        значения измененных полей и сообщения переписки. Одинаковые
+        уведомления (повтор события) показываются один раз.
+        """
+        orders: Dict[int, dict] = OrderedDict()
+        for event in events:
+            order = orders.setdefault(event['order_id'], {'created': None, 'status': None, 'fields': OrderedDict(), 'notes': []})
+            payload = event['payload']
+            if event['event_type'] == 'order_created':
+                order['created'] = payload
+            elif event['event_type'] == 'status_changed':
+                order['status'] = payload
+            elif event['event_type'] == 'field_changed':
+                order['fields'][payload['field']] = payload['value']
+            elif event['event_type'] == 'note_added' and payload not in order['notes']:
+                order['notes'].append(payload)
+
+        blocks = []
+        for order_id, order in orders.items():
+            if order['created']:
+                lines = [f"🆕 <b>Новый заказ #{order_id}</b>"] + cls._format_created(order['created'])
+            else:
+                lines = [f"🔔 <b>Заказ #{order_id}</b>"]
+            status = order['status']
+            if status:
+                lines.append(f"📊 Статус: <b>{html.escape(status['status'])}</b>")
+                if status.get('admin_notes'):
+                    lines.append(f"📝 {html.escape(status['admin_notes'])}")
+                if status.get('photo'):
+                    lines.append("📸 К статусу добавлено фото")
+            for field, value in order['fields'].items():
+                lines.append(f"{FIELD_TITLES.get(field, field)}: {_format_value(field, value)}")
+            notes = order['notes']
+            for note in notes[-MAX_NOTES_PER_ORDER:]:
+                lines.append(f"💬 <b>{html.escape(note.get('author') or '')}</b>: {html.escape(note['text'])}")
+            if len(notes) > MAX_NOTES_PER_ORDER:
+                lines.append(f"… и еще {len(notes) - MAX_NOTES_PER_ORDER} сообщ.")
+            blocks.append('\n'.join(lines))
+
+        text = '\n\n'.join(blocks)
+        if len(text) > MESSAGE_LIMIT:
+            # Обрезаем по границе строки, чтобы не разорвать HTML-тег
+            text = text[:MESSAGE_LIMIT - 40].rsplit('\n', 1)[0] + "\n\n… подробности в «Моих заказах»"
+        return text
+
+    # --- отправка ---
+
+    def _retry_delay(self, error: Exception, attempts: int) -> Optional[float]:
+        """Пауза перед повтором или None - повторять бессмысленно"""
+        if isinstance(error, apihelper.ApiTelegramException) and error.error_code in (400, 403):
+            return None  # Бот заблокирован, чат не найден
+        if attempts + 1 >= self.max_attempts:
+            return None
+        delay = retry_after(error)
+        return delay if delay is not None else min(10 * 2 ** attempts, 600)
+
+    def drain_once(self) -> int:
+        """Отправить одну пачку; возвращает число обработанных уведомлений"""
+        events = self.db_manager.claim_outbox_events(max_chats=self.batch_size)
+        by_chat: Dict[int, List[dict]] = OrderedDict()
+        for event in events:
+            by_chat.setdefault(event['chat_id'], []).append(event)
+
+        for chat_id, chat_events in by_chat.items():
+            event_ids = [event['id'] for event in chat_events]
+            try:
+                self.sender.send_message(chat_id, self.format_message(chat_events), parse_mode='HTML')
+            except Exception as e:
+                delay = self._retry_delay(e, max(event['attempts'] for event in chat_events))
+                self.db_manager.mark_outbox_failed(event_ids, str(e), retry_in=delay)
+                if delay is None:
+                    logger.error(f"❌ Уведомление для {chat_id} не доставлено: {e}")
+                else:
+                    logger.warning(f"⚠️ Уведомление для {chat_id} не отправлено, повтор через {delay:.0f} с: {e}")
+                continue
+            self.db_manager.mark_outbox_sent(event_ids)
+            if len(chat_events) > 1:
+                logger.debug("📨 %s уведомлений для %s объединены в одно сообщение", len(chat_events), chat_id)
+        return len(events)
+
+    def start(self) -> bool:
+        """Запустить фоновую рассылку (NOTIFY_POLL_INTERVAL=0 - выключена)"""
+        if self.poll_interval <= 0 or self._thread is not None:
+            return False
+        self._stop_event.clear()
+
+        def loop():
+            while not self._stop_event.wait(self.poll_interval):
+                try:
+                    # Пока есть очередь - без паузы между пачками
+                    while self.drain_once() and not self._stop_event.is_set():
+                        pass
+                except Exception as e:
+                    logger.error(f"❌ Ошибка рассылки уведомлений: {e}")
+
+        self._thread = threading.Thread(target=loop, name='order-notifications', daemon=True)
+        self._thread.start()
+        logger.info(f"📨 Рассылка уведомлений о заказах каждые {self.poll_interval:g} с")
+        return True
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout=5)
+            self._thread = None
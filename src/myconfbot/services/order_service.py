@@ -0,0 +1,75 @@
+# src/myconfbot/services/order_service.py
+
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+
+from src.myconfbot.utils.database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class OrderService:
+    """Сервис оформления заказов из черновика (данных состояния оформления)"""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+
+    @staticmethod
+    def build_order_data(product: dict, draft: dict) -> dict:
+        """Поля заказа из черновика: стоимость, дата готовности, статус оплаты"""
+        measurement_unit = product['measurement_unit'] or 'шт'
+        is_weight_based = 'грамм' in measurement_unit.lower()
+
+        if is_weight_based:
+            weight_grams = draft.get('weight_grams', 0)
+            total_cost = float(product['price']) * weight_grams / float(product['quantity'])
+            quantity = None
+        else:
+            quantity = draft.get('quantity', 0)
+            total_cost = float(product['price']) * quantity
+            weight_grams = None
+
+        # Дата и время готовности
+        ready_at = None
+        if 'ready_date' in draft:
+            ready_at = datetime.fromisoformat(draft['ready_date'])
+            if 'ready_time' in draft:
+                hour, minute = map(int, draft['ready_time'].split(':'))
+                ready_at = ready_at.replace(hour=hour, minute=minute)
+
+        prepayment_conditions = product.get('prepayment_conditions') or ''
+        payment_status = "Ожидает предоплату" if "предоплата" in prepayment_conditions else "Не оплачен"
+
+        return {
+            'product_id': draft['product_id'],
+            'quantity': quantity,
+            'weight_grams': weight_grams,
+            'total_cost': total_cost,
+            'delivery_type': draft.get('delivery_type', 'самовывоз'),
+            'payment_type': prepayment_conditions,
+            'payment_status': payment_status,
+            'admin_notes': '',
+            'ready_at': ready_at,
+        }
+
+    def place_order(self, telegram_id: int, draft: dict) -> Optional[Tuple[int, bool]]:
+        """
+        Оформить заказ из черновика
+
+        Returns:
+            tuple: (id заказа, создан ли сейчас) - повторное подтверждение того же
+                   черновика возвращает уже созданный заказ; None при ошибке
+        """
+        product = self.db_manager.get_product_by_id(draft['product_id'])
+        if not product:
+            logger.error(f"Товар {draft['product_id']} не найден при оформлении заказа")
+            return None
+
+        notes = [note['text'] for note in draft.get('notes', []) if not note.get('is_admin', False)]
+        return self.db_manager.place_order(
+            telegram_id,
+            self.build_order_data(product, draft),
+            notes=notes,
+            idempotency_key=draft.get('idempotency_key'),
+        )
@@ -0,0 +1,110 @@
+# src/myconfbot/services/order_stats_service.py
+
+import logging
+import threading
+import time
+from typing import Optional
+
+from src.myconfbot.utils.database import DatabaseManager, get_db_manager
+from src.myconfbot.utils.events import EventBus, OrderCreated, OrderFieldChanged, OrderStatusChanged
+from src.myconfbot.utils.models import OrderStatusEnum
+
+logger = logging.getLogger(__name__)
+
+# Страховочный полный пересчет: записи в обход шины (скрипты, другой процесс)
+ORDER_STATS_MAX_AGE = 3600
+
+_STATUS_KEYS = {status.value: status.name.lower() for status in OrderStatusEnum}
+
+
+def _amount(value) -> float:
+    return float(value) if value is not None else 0.0
+
+
+class OrderStatsService:
+    """
+    Статистика заказов, обновляемая по событиям
+
+    Первое обращение считает статистику запросом к БД
+    (get_orders_statistics), дальше счетчики меняются по событиям
+    OrderCreated, OrderStatusChanged и OrderFieldChanged(total_cost) без
+    обращения к БД. Если событие пришло во время подсчета, результат не
+    кэшируется и следующее обращение считает заново.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, max_age: float = ORDER_STATS_MAX_AGE):
+        self.db_manager = db_manager
+        self.max_age = max_age
+        self._stats: Optional[dict] = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, bus: EventBus):
+        bus.subscribe(OrderCreated, self.on_order_created, name='order_stats')
+        bus.subscribe(OrderStatusChanged, self.on_status_changed, name='order_stats')
+        bus.subscribe(OrderFieldChanged, self.on_field_changed, name='order_stats')
+
+    def get_statistics(self) -> dict:
+        """Статистика в формате DatabaseManager.get_orders_statistics"""
+        with self._lock:
+            if self._stats is not None and time.monotonic() - self._loaded_at < self.max_age:
+                return dict(self._stats)
+            version = self._version
+
+        stats = self.db_manager.get_orders_statistics()
+        stats['total_amount'] = _amount(stats.get('total_amount'))
+        with self._lock:
+            # Ошибка подсчета возвращает только total/total_amount - такое не кэшируем
+            if self._version == version and all(key in stats for key in _STATUS_KEYS.values()):
+                self._stats = dict(stats)
+                self._loaded_at = time.monotonic()
+        return stats
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._stats = None
+
+    # --- подписчики ---
+
+    def on_order_created(self, event: OrderCreated):
+        with self._lock:
+            self._version += 1
+            if self._stats is not None:
+                self._stats['total'] += 1
+                self._stats['total_amount'] += _amount(event.total_cost)
+                self._stats[_STATUS_KEYS[OrderStatusEnum.CREATED.value]] += 1
+
+    def on_status_changed(self, event: OrderStatusChanged):
+        with self._lock:
+            self._version += 1
+            if self._stats is None:
+                return
+            previous_key = _STATUS_KEYS.get(event.previous_status)
+            if previous_key and self._stats[previous_key] > 0:
+                self._stats[previous_key] -= 1
+            key = _STATUS_KEYS.get(event.status)
+            if key:
+                self._stats[key] += 1
+
+    def on_field_changed(self, event: OrderFieldChanged):
+        if event.field != 'total_cost':
+            return
+        with self._lock:
+            self._version += 1
+            if self._stats is not None:
+                self._stats['total_amount'] += _amount(event.new_value) - _amount(event.old_value)
+
+
+_order_stats_service: Optional[OrderStatsService] = None
+_order_stats_lock = threading.Lock()
+
+
+def get_order_stats_service() -> OrderStatsService:
+    """Общая статистика заказов поверх get_db_manager()"""
+    global _order_stats_service
+    with _order_stats_lock:
+        if _order_stats_service is None:
+            _order_stats_service = OrderStatsService(get_db_manager())
+        return _order_stats_service
@@ -1,7 +1,14 @@
 # 
 # Утилиты для бота
-from .database import DatabaseManager, db_manager
-from .content_manager import ContentManager
+from .database import DatabaseManager, get_db_manager
+from .content_manager import ContentManager, get_content_manager
 #from .text_converter import TextConverter
 
-__all__ = ['DatabaseManager', 'db_manager', 'ContentManager', 'TextConverter']
\ No newline at end of file
+__all__ = ['DatabaseManager', 'get_db_manager', 'db_manager', 'ContentManager', 'get_content_manager', 'TextConverter']
+
+
+def __getattr__(name):
+    # db_manager создается лениво, при первом обращении
+    if name == 'db_manager':
+        return get_db_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
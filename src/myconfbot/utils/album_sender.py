@@ -0,0 +1,186 @@
+# src/myconfbot/utils/album_sender.py
+"""
+Отправка фотографий альбомами
+
+Bot API принимает в sendMediaGroup от 2 до 10 фото, подпись - до 1024
+символов. AlbumSender режет любой список фото на такие группы (одиночное
+фото уходит через sendPhoto), ставит подпись альбома на первое фото и
+отправляет уже загруженные файлы по file_id: файл с диска загружается
+только при первой отправке или после его изменения.
+
+file_id действителен только для токена, которым получен, поэтому
+отправитель и его кэш - один на бота (get_album_sender).
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from telebot import apihelper, types
+
+logger = logging.getLogger(__name__)
+
+MEDIA_GROUP_LIMIT = 10
+CAPTION_LIMIT = 1024
+
+
+@dataclass(frozen=True)
+class AlbumPhoto:
+    """Фото альбома: путь к файлу и своя подпись (необязательно)"""
+    path: str
+    caption: Optional[str] = None
+
+
+class FileIdCache:
+    """
+    file_id загруженных фото по пути к файлу
+
+    Запись действительна, пока у файла те же размер и время изменения:
+    замененное фото загрузится заново.
+    """
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._items: 'OrderedDict[str, Tuple[tuple, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def get(self, path: str) -> Optional[str]:
+        path = os.path.abspath(path)
+        signature = self._signature(path)
+        with self._lock:
+            item = self._items.get(path)
+            if item is None or item[0] != signature:
+                return None
+            self._items.move_to_end(path)
+            return item[1]
+
+    def put(self, path: str, file_id: str):
+        path = os.path.abspath(path)
+        signature = self._signature(path)
+        if signature is None:
+            return
+        with self._lock:
+            self._items.pop(path, None)
+            self._items[path] = (signature, file_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._items.pop(os.path.abspath(path), None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class AlbumSender:
+    """Фото группами до MEDIA_GROUP_LIMIT с file_id из кэша вместо повторной загрузки"""
+
+    def __init__(self, bot, cache: Optional[FileIdCache] = None):
+        self.bot = bot
+        self.cache = cache or FileIdCache()
+
+    def remember(self, path: Union[str, Path], file_id: str):
+        """Фото, сохраненное из сообщения, уже есть в Telegram - отправлять его по file_id"""
+        self.cache.put(str(path), file_id)
+
+    def send_album(self, chat_id: int, photos: Iterable[Union[str, Path, AlbumPhoto]],
+                   caption: Optional[str] = None, parse_mode: Optional[str] = 'HTML') -> List[types.Message]:
+        """
+        Отправить фото альбомами
+
+        Args:
+            photos: пути или AlbumPhoto; отсутствующие на диске файлы пропускаются
+            caption: подпись альбома - на первое фото (длиннее CAPTION_LIMIT -
+                отдельным сообщением перед фото)
+
+        Returns:
+            list: отправленные сообщения; пустой - ни одного фото на диске не нашлось
+                (подпись тогда не отправляется, текст показывает вызывающий)
+
+        Ошибки Bot API пробрасываются вызывающему.
+        """
+        items = []
+        for photo in photos:
+            item = photo if isinstance(photo, AlbumPhoto) else AlbumPhoto(str(photo))
+            if item.path and os.path.exists(item.path):
+                items.append(item)
+            else:
+                logger.warning(f"📸 Фото не найдено на диске: {item.path}")
+        if not items:
+            return []
+
+        if caption is not None:
+            if len(caption) > CAPTION_LIMIT:
+                self.bot.send_message(chat_id, caption, parse_mode=parse_mode)
+            else:
+                items[0] = AlbumPhoto(items[0].path, caption)
+
+        messages = []
+        for start in range(0, len(items), MEDIA_GROUP_LIMIT):
+            messages.extend(self._send_chunk(chat_id, items[start:start + MEDIA_GROUP_LIMIT], parse_mode))
+        return messages
+
+    def _send_chunk(self, chat_id: int, chunk: List[AlbumPhoto], parse_mode: Optional[str]) -> List[types.Message]:
+        cached = {item.path: self.cache.get(item.path) for item in chunk}
+        try:
+            return self._send(chat_id, chunk, parse_mode, cached)
+        except apihelper.ApiTelegramException as e:
+            if e.error_code != 400 or not any(cached.values()):
+                raise
+            # file_id отклонен (например, сменился токен бота) - загружаем файлы заново
+            logger.warning(f"📸 Bot API отклонил сохраненные file_id, загружаем фото заново: {e}")
+            for path in cached:
+                self.cache.invalidate(path)
+            return self._send(chat_id, chunk, parse_mode, {})
+
+    def _send(self, chat_id: int, chunk: List[AlbumPhoto], parse_mode: Optional[str],
+              cached: Dict[str, Optional[str]]) -> List[types.Message]:
+        with ExitStack() as stack:
+            media = [cached.get(item.path) or stack.enter_context(open(item.path, 'rb')) for item in chunk]
+            if len(chunk) == 1:
+                messages = [self.bot.send_photo(chat_id, media[0], caption=chunk[0].caption, parse_mode=parse_mode)]
+            else:
+                messages = self.bot.send_media_group(chat_id, [
+                    types.InputMediaPhoto(photo, caption=item.caption, parse_mode=parse_mode)
+                    for photo, item in zip(media, chunk)
+                ])
+
+        uploaded = 0
+        for item, message in zip(chunk, messages):
+            if not cached.get(item.path) and message.photo:
+                self.cache.put(item.path, message.photo[-1].file_id)
+                uploaded += 1
+        logger.debug(f"📸 Отправлено фото: {len(chunk)}, загружено с диска: {uploaded}")
+        return messages
+
+
+def product_photo_paths(photos: List[dict]) -> List[str]:
+    """Пути фото товара (get_product_photos) для альбома: основное первым"""
+    return [photo['photo_path'] for photo in sorted(photos, key=lambda photo: not photo.get('is_main'))]
+
+
+_album_senders: Dict[str, AlbumSender] = {}
+_album_senders_lock = threading.Lock()
+
+
+def get_album_sender(bot) -> AlbumSender:
+    """Получить общий отправитель альбомов для бота (один кэш file_id на токен)"""
+    with _album_senders_lock:
+        sender = _album_senders.get(bot.token)
+        if sender is None:
+            sender = _album_senders[bot.token] = AlbumSender(bot)
+        return sender
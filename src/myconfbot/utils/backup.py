@@ -0,0 +1,461 @@
+# src/myconfbot/utils/backup.py
+"""
+Резервные копии базы и медиафайлов
+
+Копия - один архив tar.gz, который пишется потоком, и манифест рядом с ним:
+    backups/backup_20260101_120000_000.tar.gz
+    backups/backup_20260101_120000_000.manifest.json
+
+В архиве - согласованный снимок БД (SQLite - через backup API по страницам,
+бот может продолжать писать; PostgreSQL - внешней командой pg_dump) и
+медиафайлы data/orders, data/products, data/users, которые появились или
+изменились с прошлой копии. Манифест перечисляет все файлы на момент копии
+с размером, sha256 и архивом, в котором лежит содержимое, поэтому для
+восстановления любой копии достаточно ее манифеста и архивов из него.
+
+    python -m src.myconfbot.utils.backup create [--full]
+    python -m src.myconfbot.utils.backup list
+    python -m src.myconfbot.utils.backup verify backup_20260101_120000_000
+    python -m src.myconfbot.utils.backup restore backup_20260101_120000_000 --target restored/
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import shlex
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from src.myconfbot.config import DatabaseConfig, FileStorageConfig
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = '.manifest.json'
+ARCHIVE_SUFFIX = '.tar.gz'
+MEDIA_DIRS = ('orders', 'products', 'users')
+_CHUNK = 1024 * 1024
+_SNAPSHOT_MAX_RESTARTS = 5
+
+
+def _sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _HashingReader:
+    """Файл для tarfile.addfile, считающий sha256 прочитанного"""
+
+    def __init__(self, f):
+        self._f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self.digest.update(data)
+        return data
+
+
+class _SnapshotRestarted(Exception):
+    pass
+
+
+def snapshot_sqlite(source_path, target_path, pages_per_step: int = 256) -> bool:
+    """
+    Согласованная копия живой базы SQLite через backup API
+
+    Страницы копируются порциями, и между порциями бот может писать в базу.
+    Запись из другого соединения заставляет SQLite начать копирование
+    заново; если это случилось MAX_RESTARTS раз, база копируется одним шагом
+    внутри одной читающей транзакции.
+    """
+    restarts = {'count': 0, 'remaining': None}
+
+    def progress(status, remaining, total):
+        if restarts['remaining'] is not None and remaining > restarts['remaining']:
+            restarts['count'] += 1
+            if restarts['count'] >= _SNAPSHOT_MAX_RESTARTS:
+                raise _SnapshotRestarted()
+        restarts['remaining'] = remaining
+
+    try:
+        source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+        target = sqlite3.connect(str(target_path))
+        try:
+            try:
+                source.backup(target, pages=pages_per_step, progress=progress)
+            except _SnapshotRestarted:
+                logger.warning(f"⚠️ Снимок {source_path} перезапускался {restarts['count']} раз, копируем одним шагом")
+                source.backup(target)
+            result = target.execute('PRAGMA quick_check').fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+        if result != 'ok':
+            logger.error(f"❌ Снимок {source_path} поврежден: {result}")
+            return False
+        return True
+    except Exception as e:
+        logger.error(f"❌ Ошибка снимка SQLite {source_path}: {e}")
+        return False
+
+
+class BackupManager:
+    """
+    Создание, проверка и восстановление резервных копий
+
+    Настройки из окружения:
+        BACKUP_DIR                  - каталог копий (по умолчанию backups)
+        BACKUP_SQLITE_PAGES         - страниц SQLite за шаг backup API
+        BACKUP_PG_DUMP_COMMAND      - команда снимка PostgreSQL, пишет дамп в stdout
+        BACKUP_PG_RESTORE_COMMAND   - команда восстановления PostgreSQL
+    В командах подставляются {url} (строка подключения libpq) и {file} (путь к дампу).
+    """
+
+    def __init__(self, db_url: Optional[str] = None, base_dir=None, backup_dir=None):
+        self.db_url = db_url or DatabaseConfig().url
+        self.base_dir = Path(base_dir or FileStorageConfig().base_dir)
+        self.backup_dir = Path(backup_dir or os.getenv('BACKUP_DIR', 'backups'))
+        self.sqlite_pages = int(os.getenv('BACKUP_SQLITE_PAGES', '256'))
+        self.pg_dump_command = os.getenv('BACKUP_PG_DUMP_COMMAND', 'pg_dump --format=custom --no-owner --dbname {url}')
+        self.pg_restore_command = os.getenv(
+            'BACKUP_PG_RESTORE_COMMAND', 'pg_restore --clean --if-exists --no-owner --dbname {url} {file}'
+        )
+
+    # --- база данных ---
+
+    def _backend(self, db_url: str) -> str:
+        return make_url(db_url).get_backend_name()
+
+    def _sqlite_path(self, db_url: str) -> Path:
+        database = make_url(db_url).database
+        if not database or database == ':memory:':
+            raise ValueError("резервная копия базы SQLite в памяти невозможна")
+        return Path(database)
+
+    @staticmethod
+    def _libpq_url(db_url: str) -> str:
+        return make_url(db_url).set(drivername='postgresql').render_as_string(hide_password=False)
+
+    def _run_command(self, template: str, db_url: str, file: Path, stdout=None):
+        command = [part.format(url=self._libpq_url(db_url), file=str(file)) for part in shlex.split(template)]
+        result = subprocess.run(command, stdout=stdout, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"{command[0]} завершился с кодом {result.returncode}: "
+                               f"{result.stderr.decode(errors='replace')[-2000:]}")
+
+    def _dump_database(self, workdir: Path) -> Path:
+        """Снимок БД во временный файл"""
+        if self._backend(self.db_url) == 'sqlite':
+            snapshot = workdir / self._sqlite_path(self.db_url).name
+            if not snapshot_sqlite(self._sqlite_path(self.db_url), snapshot, self.sqlite_pages):
+                raise RuntimeError("снимок SQLite не создан")
+            return snapshot
+
+        dump = workdir / 'database.pgdump'
+        with open(dump, 'wb') as f:
+            self._run_command(self.pg_dump_command, self.db_url, dump, stdout=f)
+        return dump
+
+    # --- манифесты ---
+
+    def list_backups(self) -> List[dict]:
+        """Манифесты копий от старых к новым"""
+        manifests = []
+        for path in sorted(self.backup_dir.glob(f"backup_*{MANIFEST_SUFFIX}")):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    manifests.append(json.load(f))
+            except Exception as e:
+                logger.error(f"❌ Не удалось прочитать манифест {path}: {e}")
+        return manifests
+
+    def load_manifest(self, name: str) -> dict:
+        with open(self.backup_dir / f"{name}{MANIFEST_SUFFIX}", encoding='utf-8') as f:
+            return json.load(f)
+
+    def _scan_media(self) -> Dict[str, os.stat_result]:
+        files = {}
+        for directory in MEDIA_DIRS:
+            root = self.base_dir / directory
+            if not root.exists():
+                continue
+            for path in root.rglob('*'):
+                if path.is_file():
+                    files[path.relative_to(self.base_dir).as_posix()] = path.stat()
+        return files
+
+    # --- создание ---
+
+    def create(self, full: bool = False) -> Optional[Path]:
+        """
+        Создать копию: снимок БД и новые/измененные медиафайлы
+
+        Args:
+            full: положить в архив все медиафайлы, а не только изменения
+
+        Returns:
+            Path: путь к архиву или None при ошибке
+        """
+        started = time.perf_counter()
+        now = datetime.now()
+        name = f"backup_{now:%Y%m%d_%H%M%S}_{now.microsecond // 1000:03d}"
+        archive_name = f"{name}{ARCHIVE_SUFFIX}"
+        previous = None if full else (self.list_backups() or [None])[-1]
+        previous_files = previous['files'] if previous else {}
+
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        partial = self.backup_dir / f"{archive_name}.partial"
+        try:
+            with tempfile.TemporaryDirectory(prefix='myconfbot-backup-') as tmp:
+                dump = self._dump_database(Path(tmp))
+                files = {}
+                archived = 0
+                archived_bytes = 0
+
+                with tarfile.open(str(partial), mode='w|gz') as archive:
+                    database = {
+                        'backend': self._backend(self.db_url),
+                        'member': f"database/{dump.name}",
+                        'size': dump.stat().st_size,
+                        'sha256': self._add_file(archive, dump, f"database/{dump.name}"),
+                    }
+
+                    for relpath, stat in sorted(self._scan_media().items()):
+                        known = previous_files.get(relpath)
+                        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+                            files[relpath] = known
+                            continue
+                        sha256 = self._add_file(archive, self.base_dir / relpath, f"media/{relpath}", stat.st_size)
+                        files[relpath] = {
+                            'size': stat.st_size,
+                            'mtime_ns': stat.st_mtime_ns,
+                            'sha256': sha256,
+                            'archive': archive_name,
+                        }
+                        archived += 1
+                        archived_bytes += stat.st_size
+
+                    manifest = {
+                        'name': name,
+                        'created_at': now.isoformat(timespec='seconds'),
+                        'kind': 'incremental' if previous else 'full',
+                        'base': previous['name'] if previous else None,
+                        'archive': archive_name,
+                        'database': database,
+                        'files': files,
+                        'archived_files': archived,
+                        'archived_bytes': archived_bytes,
+                    }
+                    manifest_bytes = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+                    info = tarfile.TarInfo('manifest.json')
+                    info.size = len(manifest_bytes)
+                    info.mtime = int(now.timestamp())
+                    archive.addfile(info, io.BytesIO(manifest_bytes))
+
+            archive_path = self.backup_dir / archive_name
+            os.replace(partial, archive_path)
+            manifest_path = self.backup_dir / f"{name}{MANIFEST_SUFFIX}"
+            with open(f"{manifest_path}.partial", 'wb') as f:
+                f.write(manifest_bytes)
+            os.replace(f"{manifest_path}.partial", manifest_path)
+
+            logger.info(
+                f"💾 Копия {name} ({manifest['kind']}): БД {database['size'] / 1024 / 1024:.1f} МБ, "
+                f"файлов {archived} из {len(files)} ({archived_bytes / 1024 / 1024:.1f} МБ), "
+                f"архив {archive_path.stat().st_size / 1024 / 1024:.1f} МБ за {time.perf_counter() - started:.1f} с"
+            )
+            return archive_path
+        except Exception as e:
+            logger.error(f"❌ Ошибка создания резервной копии: {e}")
+            partial.unlink(missing_ok=True)
+            return None
+
+    @staticmethod
+    def _add_file(archive: tarfile.TarFile, path: Path, member: str, size: Optional[int] = None) -> str:
+        """Добавить файл в потоковый архив; вернуть sha256 записанного содержимого"""
+        info = tarfile.TarInfo(member)
+        stat = path.stat()
+        info.size = stat.st_size if size is None else size
+        info.mtime = int(stat.st_mtime)
+        with open(path, 'rb') as f:
+            reader = _HashingReader(f)
+            archive.addfile(info, reader)
+        return reader.digest.hexdigest()
+
+    # --- проверка и восстановление ---
+
+    def _extract(self, manifest: dict, target: Path) -> Path:
+        """
+        Распаковать БД и медиафайлы копии в target, проверяя sha256
+
+        Каждый архив цепочки читается потоком один раз.
+        Returns:
+            Path: путь к распакованному снимку БД
+        """
+        wanted: Dict[str, Dict[str, tuple]] = {}
+        database = manifest['database']
+        wanted.setdefault(manifest['archive'], {})[database['member']] = (
+            target / database['member'], database['sha256']
+        )
+        for relpath, entry in manifest['files'].items():
+            wanted.setdefault(entry['archive'], {})[f"media/{relpath}"] = (target / relpath, entry['sha256'])
+
+        for archive_name, members in wanted.items():
+            archive_path = self.backup_dir / archive_name
+            if not archive_path.exists():
+                raise FileNotFoundError(f"нет архива {archive_name} из цепочки копии")
+            remaining = dict(members)
+            with tarfile.open(str(archive_path), mode='r|gz') as archive:
+                for info in archive:
+                    if info.name not in remaining:
+                        continue
+                    destination, sha256 = remaining.pop(info.name)
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    source = archive.extractfile(info)
+                    digest = hashlib.sha256()
+                    with open(destination, 'wb') as f:
+                        for chunk in iter(lambda: source.read(_CHUNK), b''):
+                            digest.update(chunk)
+                            f.write(chunk)
+                    if digest.hexdigest() != sha256:
+                        raise ValueError(f"контрольная сумма не совпала: {info.name} в {archive_name}")
+            if remaining:
+                raise ValueError(f"в {archive_name} нет файлов: {sorted(remaining)[:5]}")
+
+        return target / database['member']
+
+    def _check_database_snapshot(self, manifest: dict, snapshot: Path):
+        if manifest['database']['backend'] != 'sqlite':
+            return
+        connection = sqlite3.connect(str(snapshot))
+        try:
+            result = connection.execute('PRAGMA integrity_check').fetchone()[0]
+        finally:
+            connection.close()
+        if result != 'ok':
+            raise ValueError(f"снимок БД не прошел integrity_check: {result}")
+
+    def verify(self, name: str) -> bool:
+        """Распаковать копию во временный каталог и проверить все файлы и целостность БД"""
+        try:
+            manifest = self.load_manifest(name)
+            with tempfile.TemporaryDirectory(prefix='myconfbot-verify-') as tmp:
+                snapshot = self._extract(manifest, Path(tmp))
+                self._check_database_snapshot(manifest, snapshot)
+            logger.info(f"✅ Копия {name} проверена: БД и {len(manifest['files'])} файлов")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Копия {name} не прошла проверку: {e}")
+            return False
+
+    def restore(self, name: str, target_dir=None, db_url: Optional[str] = None, force: bool = False) -> bool:
+        """
+        Восстановить копию (бот должен быть остановлен)
+
+        Все файлы сначала распаковываются и проверяются во временном каталоге
+        рядом с целью, затем переносятся на место. SQLite восстанавливается
+        файлом в target_dir, PostgreSQL - командой BACKUP_PG_RESTORE_COMMAND
+        в базу db_url.
+
+        Args:
+            target_dir: каталог данных (по умолчанию FILE_STORAGE_BASE_DIR)
+            db_url: база PostgreSQL для восстановления (по умолчанию текущая)
+            force: перезаписать существующие файлы
+        """
+        target = Path(target_dir or self.base_dir)
+        try:
+            manifest = self.load_manifest(name)
+            target.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(prefix='.restore-', dir=target))
+            try:
+                snapshot = self._extract(manifest, staging)
+                self._check_database_snapshot(manifest, snapshot)
+
+                database_path = target / snapshot.name
+                if not force:
+                    existing = [path for path in [target / relpath for relpath in manifest['files']]
+                                + ([database_path] if manifest['database']['backend'] == 'sqlite' else [])
+                                if path.exists()]
+                    if existing:
+                        raise FileExistsError(f"уже существуют {len(existing)} файлов, например {existing[0]} "
+                                              f"(используйте --force)")
+
+                if manifest['database']['backend'] == 'sqlite':
+                    for suffix in ('-wal', '-shm', '-journal'):
+                        Path(f"{database_path}{suffix}").unlink(missing_ok=True)
+                    os.replace(snapshot, database_path)
+                else:
+                    self._run_command(self.pg_restore_command, db_url or self.db_url, snapshot)
+
+                for relpath in manifest['files']:
+                    destination = target / relpath
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(staging / relpath, destination)
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+
+            mismatched = [
+                relpath for relpath, entry in manifest['files'].items()
+                if _sha256_file(target / relpath) != entry['sha256']
+            ]
+            if mismatched:
+                raise ValueError(f"после восстановления не совпали файлы: {mismatched[:5]}")
+
+            logger.info(f"✅ Копия {name} восстановлена в {target}: БД и {len(manifest['files'])} файлов")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка восстановления копии {name}: {e}")
+            return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Резервные копии базы и медиафайлов")
+    parser.add_argument('--backup-dir', help="каталог копий (по умолчанию BACKUP_DIR)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    create_parser = commands.add_parser('create', help="создать копию")
+    create_parser.add_argument('--full', action='store_true', help="все медиафайлы, а не только изменения")
+    commands.add_parser('list', help="список копий")
+    verify_parser = commands.add_parser('verify', help="проверить копию")
+    verify_parser.add_argument('name')
+    restore_parser = commands.add_parser('restore', help="восстановить копию")
+    restore_parser.add_argument('name')
+    restore_parser.add_argument('--target', help="каталог данных (по умолчанию FILE_STORAGE_BASE_DIR)")
+    restore_parser.add_argument('--db-url', help="база PostgreSQL для восстановления")
+    restore_parser.add_argument('--force', action='store_true', help="перезаписать существующие файлы")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    manager = BackupManager(backup_dir=args.backup_dir)
+
+    if args.command == 'create':
+        ok = manager.create(full=args.full) is not None
+    elif args.command == 'list':
+        for manifest in manager.list_backups():
+            print(f"{manifest['name']}  {manifest['kind']:<11} {manifest['created_at']}  "
+                  f"файлов {len(manifest['files'])}, в архиве {manifest['archived_files']}")
+        ok = True
+    elif args.command == 'verify':
+        ok = manager.verify(args.name)
+    else:
+        ok = manager.restore(args.name, args.target, args.db_url, args.force)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+# src/myconfbot/utils/bot_middleware.py
+"""
+Промежуточные обработчики (class-based middleware) TeleBot
+
+Метрики, профилировщик, unit of work и защита от флуда подключаются к
+боту штатным механизмом TeleBot: pre_process вызывается до обработчиков
+апдейта, post_process - после них (в том же порядке, в каком middleware
+подключены, и с исключением обработчика). Middleware передают состояние
+от pre_process к post_process через словарь data под своими ключами.
+Отменять апдейт нужно через SkipHandler: после CancelUpdate TeleBot не
+вызывает post_process ни одного middleware.
+
+Обработчики следующего шага (register_next_step_handler) и ответов
+(register_for_reply) TeleBot вызывает в обход middleware, поэтому бот
+создается как MiddlewareBot: он выполняет для них те же pre/post_process.
+"""
+
+import logging
+import re
+from contextlib import ExitStack
+from functools import wraps
+from typing import FrozenSet, Optional
+
+import telebot
+from telebot.handler_backends import BaseMiddleware, CancelUpdate, SkipHandler
+
+logger = logging.getLogger(__name__)
+
+# Типы апдейтов, на которые бот регистрирует обработчики
+UPDATE_TYPES = ['message', 'callback_query']
+# data[STEP_KEY] - имя обработчика следующего шага (апдейт - ответ в диалоге)
+STEP_KEY = 'step'
+
+
+def handler_name(function) -> str:
+    """Короткое имя обработчика: Класс.функция без <locals>"""
+    qualname = getattr(function, '__qualname__', type(function).__name__)
+    name = getattr(function, '__name__', qualname)
+    owner = qualname.split('.', 1)[0]
+    return name if owner == name else f"{owner}.{name}"
+
+
+def callback_prefix(data: Optional[str]) -> Optional[str]:
+    """Префикс callback data без идентификаторов: admin_order_status_15 -> admin_order_status"""
+    if not data:
+        return None
+    match = re.match(r'[A-Za-z_]+', data)
+    return match.group(0).rstrip('_') if match else None
+
+
+def update_type_of(update) -> str:
+    """Тип апдейта, переданного middleware: callback_query или message"""
+    return 'callback_query' if getattr(update, 'data', None) is not None else 'message'
+
+
+def update_route(update, data: Optional[dict] = None, menu_texts: FrozenSet[str] = frozenset()) -> str:
+    """
+    Маршрут апдейта для метрик и профилей
+
+    step:обработчик - ответ в диалоге, callback:префикс - нажатие кнопки,
+    menu:текст - кнопка меню (menu_texts), command - команда, иначе
+    message:тип содержимого. Произвольный текст пользователя в маршрут
+    не попадает: число рядов метрик ограничено.
+    """
+    if data and data.get(STEP_KEY):
+        return f"step:{data[STEP_KEY]}"
+    if getattr(update, 'data', None) is not None:
+        return f"callback:{callback_prefix(update.data) or '-'}"
+    content_type = getattr(update, 'content_type', None) or 'unknown'
+    if content_type == 'text':
+        text = update.text or ''
+        if text in menu_texts:
+            return f"menu:{text}"
+        if text.startswith('/'):
+            return 'command'
+    return f"message:{content_type}"
+
+
+class MiddlewareBot(telebot.TeleBot):
+    """
+    TeleBot с class-based middleware, в том числе для обработчиков
+    следующего шага и ответов
+
+    Их callback при регистрации оборачивается: middleware типа 'message'
+    получают апдейт с data[STEP_KEY] = имя обработчика. Исключение
+    обработчика передается в post_process и пробрасывается дальше, как
+    и без middleware (его обрабатывает пул потоков TeleBot).
+    """
+
+    def __init__(self, token: str, **kwargs):
+        kwargs.setdefault('use_class_middlewares', True)
+        super().__init__(token, **kwargs)
+
+    def register_next_step_handler_by_chat_id(self, chat_id, callback, *args, **kwargs) -> None:
+        super().register_next_step_handler_by_chat_id(chat_id, self._step_callback(callback), *args, **kwargs)
+
+    def register_for_reply_by_message_id(self, message_id, callback, *args, **kwargs) -> None:
+        super().register_for_reply_by_message_id(message_id, self._step_callback(callback), *args, **kwargs)
+
+    def _step_callback(self, callback):
+        if getattr(callback, '_step_middlewares', False):
+            return callback
+        name = handler_name(callback)
+
+        @wraps(callback)
+        def run_step(message, *args, **kwargs):
+            middlewares = [middleware for middleware in self.middlewares if 'message' in middleware.update_types]
+            data = {STEP_KEY: name}
+            skip = False
+            for middleware in middlewares:
+                if middleware.update_sensitive:
+                    result = middleware.pre_process_message(message, data)
+                else:
+                    result = middleware.pre_process(message, data)
+                if isinstance(result, CancelUpdate):
+                    return None
+                skip = skip or isinstance(result, SkipHandler)
+
+            error = None
+            try:
+                if not skip:
+                    return callback(message, *args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                for middleware in middlewares:
+                    if middleware.update_sensitive:
+                        middleware.post_process_message(message, data, error)
+                    else:
+                        middleware.post_process(message, data, error)
+            return None
+
+        run_step._step_middlewares = True
+        return run_step
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """
+    Unit of work БД на апдейт (DatabaseManager.unit_of_work)
+
+    Открывается в pre_process, отправитель апдейта находится один раз
+    (bind_update_user), закрывается в post_process.
+    """
+
+    def __init__(self, db_manager):
+        super().__init__()
+        self.update_types = UPDATE_TYPES
+        self.db_manager = db_manager
+
+    def pre_process(self, update, data):
+        scope = data['_unit_of_work'] = ExitStack()
+        scope.enter_context(self.db_manager.unit_of_work(update_type_of(update)))
+        self.db_manager.bind_update_user(update)
+
+    def post_process(self, update, data, exception):
+        scope = data.pop('_unit_of_work', None)
+        if scope is not None:
+            scope.close()
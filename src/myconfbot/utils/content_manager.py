@@ -1,11 +1,124 @@
 import os
 import logging
+import threading
 from pathlib import Path
+from typing import Dict, Optional
+
+# Символы, которые в MarkdownV2 нужно экранировать вне разметки
+MARKDOWN_V2_SPECIAL_CHARS = set('_*[]()~`>#+-=|{}.!')
+# Парные маркеры форматирования (длинные проверяются первыми)
+MARKDOWN_V2_MARKERS = ('||', '__', '*', '_', '~')
+
+
+def validate_markdown_v2(text: str) -> Optional[str]:
+    """
+    Проверка текста на корректность разметки Telegram MarkdownV2
+    
+    Args:
+        text: Проверяемый текст
+        
+    Returns:
+        str: Описание первой найденной ошибки или None, если разметка корректна
+    """
+    stack = []
+    line_start = True
+    i = 0
+    length = len(text)
+    
+    while i < length:
+        char = text[i]
+        top = stack[-1] if stack else None
+        
+        if char == '\\':
+            if i + 1 >= length:
+                return "текст не может заканчиваться символом \\"
+            i += 2
+            line_start = False
+            continue
+        
+        # Внутри кода и ссылок действуют свои правила экранирования
+        if top == '```':
+            if text.startswith('```', i):
+                stack.pop()
+                i += 3
+            else:
+                i += 1
+            continue
+        if top == '`':
+            if char == '`':
+                stack.pop()
+            i += 1
+            continue
+        if top == '(':
+            if char == ')':
+                stack.pop()
+            i += 1
+            continue
+        
+        if char == '\n':
+            line_start = True
+            i += 1
+            continue
+        
+        if text.startswith('```', i):
+            stack.append('```')
+            i += 3
+        elif char == '`':
+            stack.append('`')
+            i += 1
+        elif char == '>' and line_start:
+            # Цитата в начале строки
+            i += 1
+        elif char == '[':
+            stack.append('[')
+            i += 1
+        elif char == ']':
+            if top != '[':
+                return f"символ ']' в позиции {i + 1} должен быть экранирован"
+            stack.pop()
+            i += 1
+            if i < length and text[i] == '(':
+                stack.append('(')
+                i += 1
+        else:
+            marker = next((m for m in MARKDOWN_V2_MARKERS if text.startswith(m, i)), None)
+            if marker:
+                if marker not in stack:
+                    stack.append(marker)
+                elif top == marker:
+                    stack.pop()
+                else:
+                    return f"неправильная вложенность разметки '{marker}' в позиции {i + 1}"
+                i += len(marker)
+            elif char in MARKDOWN_V2_SPECIAL_CHARS:
+                return f"символ '{char}' в позиции {i + 1} должен быть экранирован: \\{char}"
+            else:
+                i += 1
+        
+        line_start = False
+    
+    if stack:
+        return f"не закрыта разметка '{stack[-1]}'"
+    return None
+
 
 class ContentManager:
-    def __init__(self):
-        self.data_dir = Path('data')
+    """
+    Менеджер текстовых страниц (приветствие, контакты, услуги)
+    
+    Страницы хранятся в памяти вместе с результатом проверки MarkdownV2
+    и перечитываются с диска только после update_content или изменения
+    времени модификации файла.
+    """
+    
+    PARSE_MODE = 'MarkdownV2'
+    
+    def __init__(self, data_dir='data'):
+        self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        # filename -> {'mtime': ..., 'text': ..., 'parse_mode': ..., 'error': ...}
+        self._pages: Dict[str, dict] = {}
+        self._lock = threading.Lock()
         
         # Создаем файлы по умолчанию если их нет
         self.ensure_default_files()
@@ -28,7 +141,7 @@ class ContentManager:
 🕒 Время работы: 9:00 \\- 21:00
 📧 Email: master@myconfbot\\.ru
 
-Мы всегда рады вашим вопросам и заказам\! 🎂""",
+Мы всегда рады вашим вопросам и заказам\\! 🎂""",
             'services.md': """🎁 Наши услуги:
 
 🎂 Торты на заказ
@@ -48,32 +161,99 @@ class ContentManager:
                     f.write(content)
                 logging.info(f"Создан файл {filename} с содержимым по умолчанию")
     
-    def get_content(self, filename):
-        """Получает содержимое файла"""
+    def get_page(self, filename) -> Optional[dict]:
+        """
+        Получить страницу из кэша (с перечитыванием при изменении файла)
+        
+        Returns:
+            dict: text, parse_mode (None если разметка невалидна), error
+        """
+        file_path = self.data_dir / filename
         try:
-            file_path = self.data_dir / filename
-            if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read().strip()
+            mtime = file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            with self._lock:
+                self._pages.pop(filename, None)
             return None
         except Exception as e:
             logging.error(f"Ошибка чтения файла {filename}: {e}")
             return None
+        
+        with self._lock:
+            page = self._pages.get(filename)
+            if page and page['mtime'] == mtime:
+                return page
+        
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                text = f.read().strip()
+        except Exception as e:
+            logging.error(f"Ошибка чтения файла {filename}: {e}")
+            return None
+        
+        error = validate_markdown_v2(text)
+        if error:
+            logging.warning(f"Некорректная разметка в {filename}: {error}")
+        
+        page = {
+            'mtime': mtime,
+            'text': text,
+            'parse_mode': None if error else self.PARSE_MODE,
+            'error': error
+        }
+        with self._lock:
+            self._pages[filename] = page
+        return page
+    
+    def get_content(self, filename):
+        """Получает содержимое файла"""
+        page = self.get_page(filename)
+        return page['text'] if page else None
+    
+    def validate_content(self, content) -> Optional[str]:
+        """Проверить разметку перед сохранением. Возвращает текст ошибки или None"""
+        return validate_markdown_v2(content.strip())
     
     def update_content(self, filename, content):
-        """Обновляет содержимое файла"""
+        """Обновляет содержимое файла (только с корректной разметкой)"""
+        error = self.validate_content(content)
+        if error:
+            logging.warning(f"Отклонено обновление {filename}: {error}")
+            return False
+        
         try:
             file_path = self.data_dir / filename
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            with self._lock:
+                self._pages.pop(filename, None)
             return True
         except Exception as e:
             logging.error(f"Ошибка записи в файл {filename}: {e}")
             return False
     
+    def cache_info(self) -> Dict[str, int]:
+        """Размер кэша страниц (для отчета о памяти)"""
+        with self._lock:
+            return {
+                'pages': len(self._pages),
+                'chars': sum(len(page['text']) for page in self._pages.values()),
+            }
+    
     def get_file_list(self):
         """Получает список доступных файлов контента"""
         return [f.name for f in self.data_dir.glob('*.md')]
 
-# Глобальный экземпляр
-content_manager = ContentManager()
\ No newline at end of file
+
+_content_manager = None
+_content_manager_lock = threading.Lock()
+
+
+def get_content_manager() -> ContentManager:
+    """Общий экземпляр менеджера контента (создается при первом обращении)"""
+    global _content_manager
+    if _content_manager is None:
+        with _content_manager_lock:
+            if _content_manager is None:
+                _content_manager = ContentManager()
+    return _content_manager
@@ -4,109 +4,263 @@ import logging
 logger = logging.getLogger(__name__)
 
 import os
+import json
 import sqlite3
 import logging
+import threading
 import sqlalchemy as sa
-from typing import Optional, Dict, List
-from src.myconfbot.config import Config
-from sqlalchemy import create_engine, text, func
+from typing import Optional, Dict, List, Set, Tuple, Union
+from src.myconfbot.config import Config, DatabaseConfig
+from sqlalchemy import create_engine, text, func, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
 from contextlib import contextmanager
-from datetime import datetime
-from dotenv import load_dotenv
+from datetime import datetime, timedelta
+from decimal import Decimal
 
 # Импортируем модели для создания таблиц
-from .models import Base, Order, Product, Category, OrderStatus, User, ProductPhoto, OrderStatusEnum, OrderNote, UserFavorite
+from .models import Base, Order, Product, Category, OrderStatus, User, ProductPhoto, OrderStatusEnum, OrderNote, UserFavorite, OutboxEvent
+from .events import (
+    EventBus, DomainEvent, get_event_bus,
+    OrderCreated, OrderStatusChanged, OrderFieldChanged, OrderNoteAdded,
+    ProductCreated, ProductChanged, ProductDeleted, CategoryChanged, UserCreated, UserChanged,
+)
+from .user_context import UserContext, UserContextCache
+
+
+def is_memory_sqlite(url: str) -> bool:
+    """sqlite://, sqlite:///:memory: и file::memory: - база в памяти процесса"""
+    parsed = make_url(url)
+    database = parsed.database or ''
+    return (parsed.get_backend_name() == 'sqlite'
+            and (database in ('', ':memory:') or database.startswith('file::memory:')
+                 or parsed.query.get('mode') == 'memory'))
+
+
+# Поля заказа, об изменении которых сообщается клиенту
+NOTIFY_ORDER_FIELDS = ('total_cost', 'ready_at')
+
+OUTBOX_PENDING = 'pending'
+OUTBOX_SENT = 'sent'
+OUTBOX_FAILED = 'failed'
+
+
+def _same_value(old, new) -> bool:
+    """Сравнение значений поля: Decimal('250.00') из БД равен 250 из обработчика"""
+    numbers = (int, float, Decimal)
+    if isinstance(old, numbers) and isinstance(new, numbers):
+        return Decimal(str(old)) == Decimal(str(new))
+    return old == new
+
+
+# Записей истории заказа (статусы, переписка) на странице
+HISTORY_PAGE_SIZE = 10
+
+_CURSOR_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_history_cursor(created_at: datetime, row_id: int) -> str:
+    """Курсор страницы истории: created_at и id записи в hex (коротко - для callback data)"""
+    micros = (created_at - _CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f"{micros:x}.{row_id:x}"
+
+
+def decode_history_cursor(cursor: str) -> tuple:
+    micros, row_id = cursor.split('.')
+    return _CURSOR_EPOCH + timedelta(microseconds=int(micros, 16)), int(row_id, 16)
+
+
+def _json_value(value):
+    """Значение поля заказа для JSON уведомления"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)  # Decimal
+
+
+class UnitOfWork:
+    """Сессия одного апдейта и счетчики его работы с БД"""
+
+    def __init__(self, session, name: str):
+        self.session = session
+        self.name = name
+        self.transactions = 0  # Начатых транзакций (выдач соединения из пула)
+        self.depth = 0  # Вложенность session_scope: коммит - при выходе из внешнего
+        self.user: Optional[UserContext] = None  # Отправитель апдейта (None - неизвестен или изменен)
+        self.user_bound = False
+
+
+def create_database_engine(url: str):
+    """
+    Движок SQLAlchemy для URL
+
+    SQLite в памяти живет, пока открыто соединение, поэтому все сессии
+    используют одно соединение (StaticPool). Для файловой SQLite создается
+    каталог базы и включается WAL: чтения не ждут пишущий поток, а запись
+    ждет освободившуюся блокировку SQLITE_BUSY_TIMEOUT мс вместо ошибки
+    "database is locked". Для PostgreSQL соединения проверяются перед
+    выдачей из пула.
+    postgresql:// без драйвера означает psycopg2 из зависимостей проекта
+    (SQLAlchemy 2.1 по умолчанию выбирает psycopg 3).
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != 'sqlite':
+        if parsed.drivername == 'postgresql':
+            parsed = parsed.set(drivername='postgresql+psycopg2')
+        return create_engine(parsed, pool_pre_ping=True, echo=False)
+
+    connect_args = {'check_same_thread': False}  # Для многопоточности
+    if is_memory_sqlite(url):
+        return create_engine(url, connect_args=connect_args, poolclass=StaticPool)
+
+    if parsed.database:
+        directory = os.path.dirname(parsed.database)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    engine = create_engine(url, connect_args=connect_args)
+    busy_timeout = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+        cursor.close()
+
+    return engine
+
 
-# Загрузка переменных окружения
-load_dotenv()
 class DatabaseManager:
-    _instance = None
-    _engine = None
-    _Session = None
-    _current_db_type = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
-    
-    def __init__(self):
-        os.makedirs('data', exist_ok=True)
-        if not self._initialized:
-            self.use_postgres = os.getenv('USE_POSTGRES', 'false').lower() == 'true'
-            self._initialize_engine()
+    """
+    Доступ к БД через SQLAlchemy
+
+    Экземпляр создается из URL, DatabaseConfig или Config (без аргументов -
+    из переменных окружения). Экземпляров может быть несколько: тесты и
+    инструменты работают со своими базами, не трогая data/confbot.db.
+    Общий экземпляр бота - get_db_manager().
+
+    Методы записи публикуют доменные события (utils.events) в шину events
+    (по умолчанию - общая get_event_bus()) после коммита своей транзакции.
+
+    Внутри unit_of_work() (бот открывает его на каждый апдейт, см.
+    instrument_bot) все методы работают в одной сессии: пользователь
+    апдейта и загруженные объекты переиспользуются, а изменения каждого
+    метода фиксируются сразу, не удерживая блокировку записи на время
+    запросов к Bot API.
+    """
+
+    def __init__(self, source: Union[str, DatabaseConfig, Config, None] = None, create_tables: bool = True,
+                 events: Optional[EventBus] = None):
+        self.url = self._resolve_url(source)
+        self._events = events
+        self._engine = None
+        self._Session = None
+        self._current_db_type = None
+        self._migrations = None
+        self._uow_local = threading.local()
+        self.user_cache = UserContextCache()
+        # telegram_id зарегистрированных пользователей: /start без запросов к БД (warm_known_users)
+        self.known_users: Set[int] = set()
+        # Окно объединения уведомлений одного получателя (с): серия правок - одно сообщение
+        self.notify_coalesce_seconds = float(os.getenv('NOTIFY_COALESCE_SECONDS', '10'))
+        self._initialize_engine()
+        if create_tables:
             self._create_tables()
-            self._initialized = True
-    
+
+    @staticmethod
+    def _resolve_url(source) -> str:
+        if source is None:
+            return DatabaseConfig().url
+        if isinstance(source, str):
+            return source
+        if isinstance(source, Config):
+            return source.db.url
+        return source.url
+
+    @property
+    def use_postgres(self) -> bool:
+        return self._current_db_type == 'postgresql'
+
     def _initialize_engine(self):
-        """Инициализация движка БД в зависимости от настроек"""
-        try:
-            if self.use_postgres:
-                self._setup_postgresql()
-                self._current_db_type = 'postgresql'
-            else:
-                self._setup_sqlite()
-                self._current_db_type = 'sqlite'
-            
-            logger.info(f"✓ Используется {self._current_db_type} база данных")
-        except Exception as e:
-            logger.error(f"Ошибка инициализации БД: {e}")
-            raise
-    
-    def _setup_postgresql(self):
-        """Настройка PostgreSQL соединения"""
+        """Инициализация движка БД по URL"""
         try:
-            db_user = os.getenv('DB_USER')
-            db_password = os.getenv('DB_PASSWORD')
-            db_host = os.getenv('DB_HOST')
-            db_port = os.getenv('DB_PORT')
-            db_name = os.getenv('DB_NAME')
-            
-            if not all([db_user, db_password, db_host, db_port, db_name]):
-                raise ValueError("Не все переменные окружения для PostgreSQL заданы")
-            
-            self._engine = create_engine(
-                f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}",
-                pool_pre_ping=True,  # Проверка соединения перед использованием
-                echo=False  # Установите True для отладки SQL запросов
-            )
+            self._engine = create_database_engine(self.url)
+            # expire_on_commit=False: объекты, возвращенные после коммита, остаются читаемыми
             self._Session = scoped_session(sessionmaker(
                 bind=self._engine,
                 autocommit=False,
-                autoflush=False
+                autoflush=False,
+                expire_on_commit=False
             ))
-            
+            self._current_db_type = self._engine.dialect.name
+            self._migrations = None
+            event.listen(self._Session, 'after_commit', self._publish_committed)
+            event.listen(self._Session, 'after_transaction_end', self._discard_uncommitted)
+            event.listen(self._Session, 'after_begin', self._count_transaction)
+            logger.info(f"✓ Используется {self._current_db_type} база данных")
         except Exception as e:
-            logger.error(f"❌ Ошибка подключения к PostgreSQL: {e}")
+            logger.error(f"Ошибка инициализации БД: {e}")
             raise
     
-    def _setup_sqlite(self):
-        """Настройка SQLite соединения"""
+    @property
+    def events(self) -> EventBus:
+        return self._events or get_event_bus()
+
+    # --- Доменные события ---
+
+    def _publish(self, session, domain_event: DomainEvent):
+        """Опубликовать событие после коммита транзакции session (при откате - отбросить)"""
+        if not session.in_transaction():
+            session.begin()  # Иначе откат без SQL не завершит транзакцию и событие останется в сессии
+        session.info.setdefault('domain_events', []).append(domain_event)
+        if isinstance(domain_event, (UserCreated, UserChanged)):
+            self._forget_user(domain_event.telegram_id)
+
+    def _publish_committed(self, session):
+        events = session.info.pop('domain_events', None)
+        if events:
+            for domain_event in events:
+                if isinstance(domain_event, (UserCreated, UserChanged)):
+                    # Другой поток мог закэшировать строку до коммита
+                    self.user_cache.invalidate(domain_event.telegram_id)
+                    self.known_users.add(domain_event.telegram_id)
+            self.events.publish(*events)
+
+    @staticmethod
+    def _discard_uncommitted(session, transaction):
+        # Сессия потока переиспользуется: события отмененной транзакции не должны уйти со следующей
+        if transaction.parent is None:
+            session.info.pop('domain_events', None)
+
+    @property
+    def migrations(self):
+        """Версионные миграции схемы этой базы (MigrationRunner)"""
+        if self._migrations is None:
+            from src.myconfbot.migrations import MigrationRunner
+            self._migrations = MigrationRunner(self._engine)
+        return self._migrations
+
+    def _create_tables(self):
+        """Применение блокирующих миграций схемы (новая база создается целиком)"""
         try:
-            os.makedirs('data', exist_ok=True)
-            self._engine = create_engine(
-                'sqlite:///data/confbot.db',
-                connect_args={'check_same_thread': False}  # Для многопоточности
-            )
-            self._Session = scoped_session(sessionmaker(
-                bind=self._engine,
-                autocommit=False,
-                autoflush=False
-            ))
+            applied = self.migrations.upgrade(include_online=False)
+            if applied:
+                logger.info(f"✓ Применено миграций: {applied} в {self._current_db_type}")
+            else:
+                logger.info(f"✓ Схема {self._current_db_type} актуальна")
         except Exception as e:
-            logger.error(f"❌ Ошибка настройки SQLite: {e}")
+            logger.error(f"❌ Ошибка миграции схемы: {e}")
             raise
-    
-    def _create_tables(self):
-        """Создание таблиц в базе данных"""
+
+    def start_online_migrations(self) -> bool:
+        """Запустить оставшиеся онлайн-миграции (индексы, заполнение данных) в фоне"""
         try:
-            Base.metadata.create_all(self._engine)
-            logger.info(f"✓ Таблицы созданы/проверены в {self._current_db_type}")
+            return self.migrations.start_online()
         except Exception as e:
-            logger.error(f"❌ Ошибка создания таблиц: {e}")
-            raise
+            logger.error(f"❌ Ошибка запуска фоновых миграций: {e}")
+            return False
     
     def switch_database(self, use_postgres: bool):
         """Переключение между базами данных"""
@@ -116,11 +270,16 @@ class DatabaseManager:
         
         try:
             old_session = self._Session
-            self.use_postgres = use_postgres
+            old_engine = self._engine
+            self.url = DatabaseConfig(use_postgres=use_postgres).url
             self._initialize_engine()
             
             if old_session:
                 old_session.remove()
+            if old_engine is not None:
+                old_engine.dispose()
+            self.user_cache.clear()
+            self.known_users.clear()
             
             logger.info(f"🔄 Успешно переключено на {'PostgreSQL' if use_postgres else 'SQLite'}")
             return True
@@ -135,7 +294,19 @@ class DatabaseManager:
     def switch_to_sqlite(self):
         """Переключение на SQLite"""
         return self.switch_database(False)
+
+    def dispose(self):
+        """Закрыть сессии и соединения пула"""
+        if self._Session is not None:
+            self._Session.remove()
+        if self._engine is not None:
+            self._engine.dispose()
     
+    @property
+    def engine(self):
+        """Текущий движок SQLAlchemy"""
+        return self._engine
+
     def get_db_type(self):
         """Получение типа текущей БД"""
         return self._current_db_type
@@ -152,9 +323,154 @@ class DatabaseManager:
         """Закрытие сессии"""
         self._Session.remove()
     
+    # --- Сессия на апдейт (unit of work) ---
+
+    @property
+    def current_unit_of_work(self) -> Optional[UnitOfWork]:
+        """Unit of work текущего потока (None - вне апдейта)"""
+        return getattr(self._uow_local, 'current', None)
+
+    def _count_transaction(self, session, transaction, connection):
+        uow = self.current_unit_of_work
+        if uow is not None:
+            uow.transactions += 1
+
+    @contextmanager
+    def unit_of_work(self, name: str = 'update'):
+        """
+        Одна сессия на апдейт
+
+        Вызовы DatabaseManager внутри используют общую сессию (объекты не
+        отсоединяются и могут подгружать связи, пользователь апдейта
+        находится один раз). Каждый метод фиксирует свои изменения сам
+        (session_scope), поэтому ошибка одного метода или исключение
+        обработчика не отменяют уже выполненные записи. Вложенный вызов
+        использует внешний unit of work.
+        """
+        current = self.current_unit_of_work
+        if current is not None:
+            yield current
+            return
+
+        uow = UnitOfWork(self._Session(), name)
+        self._uow_local.current = uow
+        try:
+            yield uow
+            uow.session.commit()
+        except Exception:
+            uow.session.rollback()
+            raise
+        finally:
+            self._uow_local.current = None
+            uow.session.close()
+            self._record_unit_of_work(uow)
+
+    @staticmethod
+    def _record_unit_of_work(uow: UnitOfWork):
+        from src.myconfbot.utils.metrics import get_metrics
+        get_metrics().update_db_transactions.observe(uow.transactions, uow.name)
+
+    def instrument_bot(self, bot):
+        """
+        Выполнять каждый апдейт бота (MiddlewareBot) в unit_of_work()
+
+        UnitOfWorkMiddleware открывает unit of work до обработчиков апдейта
+        и обработчиков следующего шага; отправитель апдейта находится один
+        раз (bind_update_user) и доступен как current_user. Подключается
+        после метрик и профилировщика, чтобы поиск пользователя попадал
+        в их замер.
+        """
+        from src.myconfbot.utils.bot_middleware import UnitOfWorkMiddleware
+        if any(isinstance(middleware, UnitOfWorkMiddleware) for middleware in bot.middlewares or ()):
+            return
+        bot.setup_middleware(UnitOfWorkMiddleware(self))
+
+    # --- Пользователь апдейта ---
+
+    def bind_update_user(self, update) -> Optional[UserContext]:
+        """Найти отправителя апдейта (message, callback_query...) один раз на unit of work"""
+        uow = self.current_unit_of_work
+        if uow is None or uow.user_bound:
+            return uow.user if uow is not None else None
+        from_user = getattr(update, 'from_user', None)
+        if from_user is None:
+            return None
+        uow.user_bound = True
+        uow.user = self.get_user_context(from_user.id)
+        return uow.user
+
+    @property
+    def current_user(self) -> Optional[UserContext]:
+        """Отправитель текущего апдейта (None - вне апдейта или не зарегистрирован)"""
+        uow = self.current_unit_of_work
+        return uow.user if uow is not None else None
+
+    def get_user_context(self, telegram_id: int) -> Optional[UserContext]:
+        """Пользователь по telegram_id: из апдейта, из кэша или одним запросом"""
+        try:
+            with self.session_scope() as session:
+                return self._resolve_user(session, telegram_id)
+        except Exception as e:
+            logger.error(f"Ошибка при получении пользователя {telegram_id}: {e}")
+            return None
+
+    def _resolve_user(self, session, telegram_id: int) -> Optional[UserContext]:
+        uow = self.current_unit_of_work
+        if uow is not None and uow.user is not None and uow.user.telegram_id == telegram_id:
+            return uow.user
+        context = self.user_cache.get(telegram_id)
+        if context is not None:
+            return context
+
+        row = session.query(User.id, User.telegram_id, User.is_admin, User.full_name, User.phone)\
+            .filter_by(telegram_id=telegram_id).first()
+        if row is None:
+            return None
+        context = UserContext(row.id, row.telegram_id, bool(row.is_admin), row.full_name, row.phone)
+        # Незафиксированные изменения апдейта (в т.ч. откатываемые) в общий кэш не попадают
+        if not session.info.get('domain_events'):
+            self.user_cache.put(context)
+        return context
+
+    def _resolve_user_id(self, session, telegram_id: int, user_id: Optional[int] = None) -> Optional[int]:
+        """Внутренний id пользователя: переданный явно или по telegram_id"""
+        if user_id is not None:
+            return user_id
+        context = self._resolve_user(session, telegram_id)
+        return context.id if context is not None else None
+
+    def _forget_user(self, telegram_id: int):
+        """Пользователь изменен: следующие обращения читают его из БД"""
+        self.user_cache.invalidate(telegram_id)
+        uow = self.current_unit_of_work
+        if uow is not None and uow.user is not None and uow.user.telegram_id == telegram_id:
+            uow.user = None
+
     @contextmanager
     def session_scope(self):
-        """Контекстный менеджер для сессий"""
+        """
+        Контекстный менеджер для сессий
+
+        Внутри unit_of_work() - сессия апдейта: внешний session_scope
+        фиксирует изменения метода при выходе, при ошибке откатывает
+        только их (записи предыдущих методов уже зафиксированы).
+        """
+        uow = self.current_unit_of_work
+        if uow is not None:
+            uow.depth += 1
+            try:
+                yield uow.session
+                if uow.depth == 1:
+                    uow.session.commit()
+            except Exception as e:
+                if uow.depth == 1:
+                    uow.session.rollback()
+                    logger.error(f"Ошибка в сессии БД: {e}")
+                raise
+            finally:
+                uow.depth -= 1
+            return
+
         session = self.get_session()
         try:
             yield session
@@ -180,7 +496,6 @@ class DatabaseManager:
                         rows = result.fetchall()
                         return [dict(row._mapping) for row in rows]
                 else:
-                    session.commit()
                     return result.rowcount
                     
         except Exception as e:
@@ -235,11 +550,101 @@ class DatabaseManager:
                 is_admin=is_admin
             )
             session.add(user)
+            self._publish(session, UserCreated(telegram_id, bool(is_admin)))
             return user
     
+    def upsert_user(self, telegram_id: int, full_name: str, telegram_username: str = None,
+                    is_admin: bool = False) -> Optional[Tuple[UserContext, bool]]:
+        """
+        Зарегистрировать пользователя через INSERT ... ON CONFLICT
+
+        Одновременные /start одного пользователя не упираются в уникальность
+        users.telegram_id. У существующего пользователя обновляется
+        telegram_username, а full_name - только если пустой (имя могли
+        изменить в профиле); is_admin задается только при создании.
+
+        Признак создания дает сама база: в PostgreSQL - xmax = 0 у
+        вставленной строки, в SQLite - число строк INSERT OR IGNORE.
+
+        Returns:
+            tuple: (пользователь, True - создан сейчас / False - уже был) или None при ошибке
+        """
+        users = User.__table__
+        values = dict(
+            telegram_id=telegram_id,
+            full_name=full_name,
+            telegram_username=telegram_username,
+            is_admin=is_admin,
+            created_at=datetime.utcnow(),
+        )
+        columns = (users.c.id, users.c.is_admin, users.c.full_name, users.c.phone)
+
+        try:
+            with self.session_scope() as session:
+                if self.use_postgres:
+                    (user_id, admin, name, phone), created = self._upsert_user_postgres(session, values, columns)
+                else:
+                    (user_id, admin, name, phone), created = self._upsert_user_sqlite(session, values, columns)
+                user = UserContext(user_id, telegram_id, bool(admin), name, phone)
+                if created:
+                    self._publish(session, UserCreated(telegram_id, user.is_admin))
+                else:
+                    self._publish(session, UserChanged(telegram_id, ('telegram_username',)))
+                return user, created
+        except Exception as e:
+            logger.error(f"Ошибка при регистрации пользователя {telegram_id}: {e}")
+            return None
+
+    @staticmethod
+    def _user_update_values(full_name: str, telegram_username: Optional[str]) -> dict:
+        """Поля существующего пользователя, которые обновляет повторная регистрация"""
+        users = User.__table__
+        return {
+            'telegram_username': telegram_username,
+            'full_name': func.coalesce(func.nullif(users.c.full_name, ''), full_name),
+        }
+
+    def _upsert_user_postgres(self, session, values: dict, columns: tuple):
+        from sqlalchemy.dialects.postgresql import insert
+
+        users = User.__table__
+        statement = insert(users).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[users.c.telegram_id],
+            set_=self._user_update_values(values['full_name'], values['telegram_username']),
+        ).returning(*columns, sa.literal_column('(xmax = 0)').label('created'))
+        *row, created = session.execute(statement).one()
+        return row, bool(created)
+
+    def _upsert_user_sqlite(self, session, values: dict, columns: tuple):
+        from sqlalchemy.dialects.sqlite import insert
+
+        users = User.__table__
+        result = session.execute(
+            insert(users).values(**values).on_conflict_do_nothing(index_elements=[users.c.telegram_id])
+        )
+        if result.rowcount == 1:
+            return (result.inserted_primary_key[0], values['is_admin'], values['full_name'], None), True
+        row = session.execute(
+            users.update().where(users.c.telegram_id == values['telegram_id'])
+            .values(**self._user_update_values(values['full_name'], values['telegram_username']))
+            .returning(*columns)
+        ).one()
+        return row, False
+
+    def warm_known_users(self) -> int:
+        """Загрузить telegram_id всех пользователей в known_users; возвращает их число"""
+        try:
+            with self.session_scope() as session:
+                self.known_users.update(telegram_id for telegram_id, in session.query(User.telegram_id))
+            return len(self.known_users)
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке списка пользователей: {e}")
+            return 0
+
     def get_user_info(self, telegram_id: int) -> Optional[Dict]:
         """Получить информацию о пользователе в виде словаря"""
-        with self._Session() as session:
+        with self.session_scope() as session:
             user = session.query(User).filter_by(telegram_id=telegram_id).first()
             if user:
                 return {
@@ -258,7 +663,7 @@ class DatabaseManager:
     
     def get_all_users_info(self) -> List[dict]:
         """Получить информацию о всех пользователях в виде списка словарей"""
-        with self._Session() as session:
+        with self.session_scope() as session:
             users = session.query(User).all()
             return [
                 {
@@ -291,7 +696,7 @@ class DatabaseManager:
     
     def is_admin(self, telegram_id: int) -> bool:
         """Проверка, является ли пользователь администратором"""
-        user = self.get_user_by_telegram_id(telegram_id)
+        user = self.get_user_context(telegram_id)
         return user.is_admin if user else False
     
     def update_user_info(self, telegram_id: int, **kwargs) -> bool:
@@ -299,23 +704,24 @@ class DatabaseManager:
         with self.session_scope() as session:
             user = session.query(User).filter_by(telegram_id=telegram_id).first()
             if user:
+                changed = []
                 for key, value in kwargs.items():
                     if hasattr(user, key) and value is not None:
                         setattr(user, key, value)
+                        changed.append(key)
+                if changed:
+                    self._publish(session, UserChanged(telegram_id, tuple(changed)))
                 return True
             return False
     
     def get_all_users(self) -> list:
         """Получить всех пользователей"""
         try:
-            session = self._Session()
-            users = session.query(User).all()
-            return users
+            with self.session_scope() as session:
+                return session.query(User).all()
         except Exception as e:
             logger.error(f"Ошибка при получении пользователей: {e}")
             return []
-        finally:
-            session.close()
 
 
 
@@ -326,6 +732,7 @@ class DatabaseManager:
                 user = session.query(User).filter_by(telegram_id=telegram_id).first()
                 if user:
                     user.characteristics = characteristic
+                    self._publish(session, UserChanged(telegram_id, ('characteristics',)))
                     return True
                 return False
         except Exception as e:
@@ -381,6 +788,7 @@ class DatabaseManager:
                     created_at=datetime.utcnow()
                 )
                 session.add(initial_status)
+                self._publish(session, OrderCreated(order.id, order.user_id, order.total_cost))
                 
                 return order
         except Exception as e:
@@ -391,15 +799,15 @@ class DatabaseManager:
         """Создание заказа и возврат его ID"""
         try:
             with self.session_scope() as session:
-                # Получаем пользователя по telegram_id
-                user = session.query(User).filter_by(telegram_id=order_data['user_id']).first()
-                if not user:
+                # Получаем id пользователя по telegram_id
+                user_id = self._resolve_user_id(session, order_data['user_id'])
+                if not user_id:
                     logger.error(f"Пользователь с telegram_id {order_data['user_id']} не найден")
                     return None
                 
                 # Создаем заказ с user_id (id пользователя)
                 order = Order(
-                    user_id=user.id,  # Используем id, а не telegram_id
+                    user_id=user_id,  # Используем id, а не telegram_id
                     product_id=order_data['product_id'],
                     quantity=order_data.get('quantity'),
                     weight_grams=order_data.get('weight_grams'),
@@ -421,26 +829,124 @@ class DatabaseManager:
                     created_at=datetime.utcnow()
                 )
                 session.add(initial_status)
+                self._publish(session, OrderCreated(order.id, order.user_id, order.total_cost))
                 
                 return order.id
         except Exception as e:
             logger.error(f"Ошибка при создании заказа: {e}")
             return None  
 
-    def get_orders_by_user(self, telegram_id: int) -> List[dict]:
-        """Получить заказы пользователя по telegram_id"""
+    def get_order_id_by_idempotency_key(self, idempotency_key: str) -> Optional[int]:
+        """ID заказа, созданного из черновика с этим ключом"""
+        try:
+            with self.session_scope() as session:
+                return session.query(Order.id).filter_by(idempotency_key=idempotency_key).scalar()
+        except Exception as e:
+            logger.error(f"Ошибка при поиске заказа по ключу: {e}")
+            return None
+
+    def place_order(self, telegram_id: int, order_data: dict, notes: List[str] = (),
+                    idempotency_key: Optional[str] = None, user_id: Optional[int] = None) -> Optional[tuple]:
+        """
+        Оформить заказ одной транзакцией: заказ, начальный статус и примечания
+
+        Повторный вызов с тем же idempotency_key (двойное нажатие
+        «Подтвердить», повтор апдейта) не создает второй заказ, а возвращает
+        уже созданный - в том числе при одновременных вызовах. user_id -
+        внутренний id пользователя, если он уже известен (иначе - по telegram_id).
+
+        Returns:
+            tuple: (id заказа, True - создан сейчас / False - уже был) или None при ошибке
+        """
+        try:
+            with self.session_scope() as session:
+                if idempotency_key:
+                    existing_id = session.query(Order.id).filter_by(idempotency_key=idempotency_key).scalar()
+                    if existing_id:
+                        return existing_id, False
+
+                user_id = self._resolve_user_id(session, telegram_id, user_id)
+                if not user_id:
+                    logger.error(f"Пользователь с telegram_id {telegram_id} не найден")
+                    return None
+
+                now = datetime.utcnow()
+                # Записи заказа - в точке сохранения: при гонке за idempotency_key
+                # откатываются только они, а не вся сессия (в unit of work - общая).
+                # В SQLite без открытой транзакции SAVEPOINT сам ее открывает,
+                # поэтому заказ, статус и уведомления фиксируются вместе
+                try:
+                    with session.begin_nested():
+                        order = Order(
+                            user_id=user_id,
+                            product_id=order_data['product_id'],
+                            quantity=order_data.get('quantity'),
+                            weight_grams=order_data.get('weight_grams'),
+                            delivery_type=order_data.get('delivery_type'),
+                            delivery_address=order_data.get('delivery_address'),
+                            ready_at=order_data.get('ready_at'),
+                            total_cost=order_data.get('total_cost'),
+                            payment_type=order_data.get('payment_type'),
+                            payment_status=order_data.get('payment_status', 'Не оплачен'),
+                            admin_notes=order_data.get('admin_notes'),
+                            idempotency_key=idempotency_key,
+                            created_at=now,
+                        )
+                        session.add(order)
+                        session.flush()
+
+                        session.add(OrderStatus(order_id=order.id, status=OrderStatusEnum.CREATED.value, created_at=now))
+                        session.add_all([
+                            OrderNote(order_id=order.id, user_id=user_id, note_text=note, created_at=now)
+                            for note in notes
+                        ])
+                        user = self._resolve_user(session, telegram_id)
+                        if user is not None and user.id == user_id:
+                            customer = user.full_name
+                        else:
+                            customer = session.query(User.full_name).filter_by(id=user_id).scalar()
+                        product_name = session.query(Product.name).filter_by(id=order.product_id).scalar()
+                        self._enqueue_notification(
+                            session, self._admin_chat_ids(session), order.id, 'order_created',
+                            {
+                                'customer': customer,
+                                'product': product_name,
+                                'quantity': order.quantity,
+                                'weight_grams': order.weight_grams,
+                                'total_cost': _json_value(order.total_cost),
+                                'ready_at': _json_value(order.ready_at),
+                                'delivery_type': order.delivery_type,
+                                'notes': list(notes),
+                            },
+                            dedupe_key=f"order_created:{order.id}", delay=0
+                        )
+                        self._publish(session, OrderCreated(order.id, user_id, order.total_cost))
+                        return order.id, True
+                except sa.exc.IntegrityError:
+                    # Тот же ключ только что записал параллельный вызов
+                    existing_id = idempotency_key and session.query(Order.id).filter_by(
+                        idempotency_key=idempotency_key).scalar()
+                    if existing_id:
+                        return existing_id, False
+                    raise
+        except Exception as e:
+            logger.error(f"Ошибка при оформлении заказа: {e}")
+            return None
+
+    def get_orders_by_user(self, telegram_id: int, user_id: Optional[int] = None) -> List[dict]:
+        """Получить заказы пользователя по telegram_id (или уже известному внутреннему user_id)"""
         try:
             with self.session_scope() as session:
                 # Находим пользователя по telegram_id
-                user = session.query(User).filter_by(telegram_id=telegram_id).first()
-                if not user:
+                user_id = self._resolve_user_id(session, telegram_id, user_id)
+                if not user_id:
                     logger.warning(f"Пользователь с telegram_id {telegram_id} не найден")
                     return []
                 
                 # Получаем заказы по user_id (id пользователя) с жадной загрузкой связанных данных
                 orders = session.query(Order)\
                     .options(sa.orm.joinedload(Order.product))\
-                    .filter_by(user_id=user.id)\
+                    .filter_by(user_id=user_id)\
                     .order_by(Order.created_at.desc())\
                     .all()
                 
@@ -538,6 +1044,7 @@ class DatabaseManager:
         """Обновить статус заказа"""
         try:
             with self.session_scope() as session:
+                previous_status = self._get_current_order_status_with_session(order_id, session)
                 # Создаем новую запись в истории статусов
                 order_status = OrderStatus(
                     order_id=order_id,
@@ -546,6 +1053,10 @@ class DatabaseManager:
                     created_at=datetime.utcnow()
                 )
                 session.add(order_status)
+                self._enqueue_customer_notification(
+                    session, order_id, 'status_changed', {'status': status.value, 'photo': bool(photo_path)}
+                )
+                self._publish(session, OrderStatusChanged(order_id, status.value, previous_status))
                 return True
         except Exception as e:
             logger.error(f"Ошибка при обновлении статуса заказа: {e}")
@@ -708,7 +1219,7 @@ class DatabaseManager:
             with self.session_scope() as session:
                 from src.myconfbot.utils.models import OrderNote
                 # Получаем пользователя по telegram_id
-                user = session.query(User).filter_by(telegram_id=telegram_id).first()
+                user = self._resolve_user(session, telegram_id)
                 if not user:
                     logger.error(f"Пользователь с telegram_id {telegram_id} не найден")
                     return False
@@ -720,6 +1231,16 @@ class DatabaseManager:
                     created_at=datetime.utcnow()
                 )
                 session.add(note)
+
+                # Сообщение клиента - администраторам, сообщение администратора - клиенту
+                payload = {'author': user.full_name, 'text': note_text}
+                owner_id = session.query(Order.user_id).filter_by(id=order_id).scalar()
+                if owner_id == user.id:
+                    chat_ids = [chat_id for chat_id in self._admin_chat_ids(session) if chat_id != telegram_id]
+                    self._enqueue_notification(session, chat_ids, order_id, 'note_added', payload)
+                else:
+                    self._enqueue_customer_notification(session, order_id, 'note_added', payload)
+                self._publish(session, OrderNoteAdded(order_id, user.id))
                 return True
         except Exception as e:
             logger.error(f"Ошибка при добавлении примечания к заказу: {e}")
@@ -741,106 +1262,111 @@ class DatabaseManager:
     #         logger.error(f"Ошибка при добавлении примечания к заказу: {e}")
     #         return False
 
-    def get_order_notes(self, order_id: int) -> List[dict]:
-        """Получить примечания к заказу"""
+    def _history_page(self, session, query, model, order_id: int, before: Optional[str], limit: int):
+        """
+        Страница истории заказа: новые сверху, keyset по (created_at, id)
+
+        Returns:
+            tuple: (строки страницы, курсор следующей страницы или None, всего записей)
+        """
+        query = query.filter(model.order_id == order_id)
+        if before:
+            created_at, row_id = decode_history_cursor(before)
+            query = query.filter(sa.or_(
+                model.created_at < created_at,
+                sa.and_(model.created_at == created_at, model.id < row_id),
+            ))
+        rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+        total = session.query(func.count(model.id)).filter(model.order_id == order_id).scalar() or 0
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1] if isinstance(rows[-1], model) else rows[-1][0]
+            next_cursor = encode_history_cursor(last.created_at, last.id)
+        return rows, next_cursor, total
+
+    def get_order_notes_page(self, order_id: int, before: Optional[str] = None,
+                             limit: int = HISTORY_PAGE_SIZE) -> dict:
+        """
+        Страница переписки по заказу, новые сообщения сверху
+
+        Args:
+            before: курсор из next_cursor предыдущей страницы (None - первая страница)
+
+        Returns:
+            dict: items (с курсором каждой записи), next_cursor (None - старше нет), total
+        """
         try:
             with self.session_scope() as session:
-                from src.myconfbot.utils.models import OrderNote, User
-                notes = session.query(OrderNote).filter_by(
-                    order_id=order_id
-                ).order_by(OrderNote.created_at).all()
-                
-                result = []
-                for note in notes:
-                    # Получаем пользователя по user_id
-                    user = session.query(User).filter_by(id=note.user_id).first()
-                    result.append({
+                query = session.query(OrderNote, User.full_name, User.is_admin)\
+                    .outerjoin(User, User.id == OrderNote.user_id)
+                rows, next_cursor, total = self._history_page(session, query, OrderNote, order_id, before, limit)
+                items = [
+                    {
                         'id': note.id,
-                        'user_name': user.full_name if user else 'Неизвестно',
+                        'user_name': user_name or 'Неизвестно',
+                        'is_admin': bool(is_admin),
                         'note_text': note.note_text,
-                        'created_at': note.created_at
-                    })
-                return result
+                        'created_at': note.created_at,
+                        'cursor': encode_history_cursor(note.created_at, note.id),
+                    }
+                    for note, user_name, is_admin in rows
+                ]
+                return {'items': items, 'next_cursor': next_cursor, 'total': total}
         except Exception as e:
-            logger.error(f"Ошибка при получении примечаний к заказу: {e}")
-            return []
+            logger.error(f"Ошибка при получении переписки по заказу: {e}")
+            return {'items': [], 'next_cursor': None, 'total': 0}
 
-    # def get_order_notes(self, order_id: int) -> List[dict]:
-    #     """Получить примечания к заказу"""
-    #     try:
-    #         with self.session_scope() as session:
-    #             notes = session.query(OrderNote).filter_by(
-    #                 order_id=order_id
-    #             ).order_by(OrderNote.created_at).all()
-                
-    #             return [
-    #                 {
-    #                     'id': note.id,
-    #                     'user_name': note.user.full_name,
-    #                     'note_text': note.note_text,
-    #                     'created_at': note.created_at
-    #                 }
-    #                 for note in notes
-    #             ]
-    #     except Exception as e:
-    #         logger.error(f"Ошибка при получении примечаний к заказу: {e}")
-    #         return []
-    
     # --- Методы для работы с продукцийе и категориями ---
 
     def add_product(self, product_data: dict) -> bool:
         """Добавить новый товар"""
         try:
-            session = self._Session()
-            product = Product(
-                name=product_data.get('name'),
-                category_id=product_data.get('category_id'),
-                cover_photo_path=product_data.get('cover_photo_path', ''),
-                short_description=product_data.get('short_description', ''),
-                is_available=product_data.get('is_available', True),
-                measurement_unit=product_data.get('measurement_unit', 'шт'),
-                quantity=product_data.get('quantity', 0),
-                price=product_data.get('price', 0),
-                prepayment_conditions=product_data.get('prepayment_conditions', '')
-            )
-            session.add(product)
-            session.commit()
+            with self.session_scope() as session:
+                product = Product(
+                    name=product_data.get('name'),
+                    category_id=product_data.get('category_id'),
+                    cover_photo_path=product_data.get('cover_photo_path', ''),
+                    short_description=product_data.get('short_description', ''),
+                    is_available=product_data.get('is_available', True),
+                    measurement_unit=product_data.get('measurement_unit', 'шт'),
+                    quantity=product_data.get('quantity', 0),
+                    price=product_data.get('price', 0),
+                    prepayment_conditions=product_data.get('prepayment_conditions', '')
+                )
+                session.add(product)
+                session.flush()
+                self._publish(session, ProductCreated(product.id, product.category_id))
             logger.info(f"Товар '{product.name}' успешно добавлен с ID {product.id}")
             return True
         except Exception as e:
-            session.rollback()
             logger.error(f"Ошибка при добавлении товара: {e}")
             return False
-        finally:
-            session.close()
 
     # -- НАЧАЛО УПРАВЛЕНИЕ КАТЕГОРИЯМИ
     
     def add_category(self, name: str, description: str = '') -> bool:
         """Добавить новую категорию"""
         try:
-            session = self._Session()
-            
-            # Проверяем, существует ли уже категория с таким названием
-            existing_category = session.query(Category).filter_by(name=name).first()
-            if existing_category:
-                logger.warning(f"Категория с названием '{name}' уже существует")
-                return False
-            
-            category = Category(
-                name=name,
-                description=description
-            )
-            session.add(category)
-            session.commit()
+            with self.session_scope() as session:
+                # Проверяем, существует ли уже категория с таким названием
+                existing_category = session.query(Category).filter_by(name=name).first()
+                if existing_category:
+                    logger.warning(f"Категория с названием '{name}' уже существует")
+                    return False
+                
+                category = Category(
+                    name=name,
+                    description=description
+                )
+                session.add(category)
+                session.flush()
+                self._publish(session, CategoryChanged(category.id))
             logger.info(f"Категория '{name}' успешно добавлена")
             return True
         except Exception as e:
-            session.rollback()
             logger.error(f"Ошибка при добавлении категории: {e}")
             return False
-        finally:
-            session.close()
 
     # def add_category(self, name: str, description: str = "") -> bool:
     #     """Добавить категорию"""
@@ -901,21 +1427,19 @@ class DatabaseManager:
     def get_all_categories(self) -> List[dict]:
         """Получить все категории"""
         try:
-            session = self._Session()
-            categories = session.query(Category).order_by(Category.name).all()
-            return [
-                {
-                    'id': category.id,
-                    'name': category.name,
-                    'description': category.description
-                }
-                for category in categories
-            ]
+            with self.session_scope() as session:
+                categories = session.query(Category).order_by(Category.name).all()
+                return [
+                    {
+                        'id': category.id,
+                        'name': category.name,
+                        'description': category.description
+                    }
+                    for category in categories
+                ]
         except Exception as e:
             logger.error(f"Ошибка при получении категорий: {e}")
             return []
-        finally:
-            session.close()
 
     # def get_all_categories(self) -> List[dict]:
     #     """Получить все категории"""
@@ -963,6 +1487,7 @@ class DatabaseManager:
                 if category:
                     if hasattr(category, field):
                         setattr(category, field, value)
+                        self._publish(session, CategoryChanged(category_id))
                         return True
                 return False
         except Exception as e:
@@ -983,6 +1508,9 @@ class DatabaseManager:
                     
                     # Удаляем категорию
                     session.delete(category)
+                    self._publish(session, CategoryChanged(category_id, deleted=True))
+                    for product in products:
+                        self._publish(session, ProductChanged(product.id, ('category_id',)))
                     return True
                 return False
         except Exception as e:
@@ -1009,6 +1537,7 @@ class DatabaseManager:
                 session.add(product)
                 session.flush()  # Получаем ID без коммита
                 product_id = product.id
+                self._publish(session, ProductCreated(product_id, product.category_id))
                 return product_id
                 
         except Exception as e:
@@ -1055,7 +1584,7 @@ class DatabaseManager:
 
     def update_product_field(self, product_id: int, field: str, value) -> bool:
         """Обновление конкретного поля товара"""
-        logger.info(f"Начало обновления: product_id={product_id}, field={field}, value={value}")
+        logger.debug("Начало обновления: product_id=%s, field=%s, value=%s", product_id, field, value)
         try:
             # Защита от попытки обновить поле id
             if field == 'id':
@@ -1072,11 +1601,10 @@ class DatabaseManager:
                 if hasattr(product, field):
                     setattr(product, field, value)
                     product.updated_at = datetime.utcnow()
+                    self._publish(session, ProductChanged(product_id, (field,)))
                 else:
                     logger.error(f"Поле {field} не существует в модели Product")
                     return False
-                    
-                session.commit()
             
             logger.info(f"Поле {field} товара {product_id} обновлено на: {value}")
             return True
@@ -1088,19 +1616,20 @@ class DatabaseManager:
     
     def delete_product(self, product_id: int) -> bool:
         """Удаление товара из базы данных"""
-        logger.info(f"DEBUG: DatabaseManager.delete_product called for {product_id}")
+        logger.debug("DatabaseManager.delete_product called for %s", product_id)
         try:
             with self.session_scope() as session:
                 # Сначала удаляем фотографии
                 photos_deleted = session.query(ProductPhoto).filter_by(product_id=product_id).delete()
-                print(f"DEBUG: Deleted {photos_deleted} photos from database")
+                logger.debug("Deleted %s photos from database", photos_deleted)
                 # Затем удаляем товар
                 product = session.query(Product).filter_by(id=product_id).first()
                 if product:
                     session.delete(product)
-                    print(f"DEBUG: Product {product_id} marked for deletion")
+                    self._publish(session, ProductDeleted(product_id))
+                    logger.debug("Product %s marked for deletion", product_id)
                     return True
-            print(f"DEBUG: Product {product_id} not found in database")
+            logger.debug("Product %s not found in database", product_id)
             return False
         except Exception as e:
             logger.error(f"Ошибка при удалении товара: {e}")
@@ -1111,7 +1640,8 @@ class DatabaseManager:
     def add_product_photo(self, product_id: int, photo_path: str, is_main: bool = False) -> bool:
         """Добавление фото товара в БД"""
         try:
-            logger.info(f"🔍 ДЕБАГ: add_product_photo called: product_id={product_id}, path={photo_path}, is_main={is_main}")
+            logger.debug("🔍 add_product_photo called: product_id=%s, path=%s, is_main=%s",
+                         product_id, photo_path, is_main)
             
             with self.session_scope() as session:
                 # Получаем максимальный order_index для этого товара
@@ -1127,8 +1657,9 @@ class DatabaseManager:
                 )
                 
                 session.add(photo)
-                session.commit()
-                logger.info(f"✅ ДЕБАГ: Фото успешно добавлено в БД, ID: {photo.id}")
+                self._publish(session, ProductChanged(product_id, ('photos',)))
+                session.flush()
+                logger.debug("✅ Фото успешно добавлено в БД, ID: %s", photo.id)
                 return True
                 
         except Exception as e:
@@ -1136,7 +1667,60 @@ class DatabaseManager:
             logger.error(f"❌ ДЕБАГ: Ошибка: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            return False                                                            
+            return False
+
+    def add_product_photos(self, product_id: int, photo_paths: List[str]) -> List[int]:
+        """
+        Пакетное добавление фото товара одной транзакцией (для альбомов)
+
+        Args:
+            product_id: ID товара
+            photo_paths: Пути к сохраненным фото в порядке альбома
+
+        Returns:
+            list: ID добавленных фото (пустой список при ошибке)
+        """
+        if not photo_paths:
+            return []
+
+        try:
+            with self.session_scope() as session:
+                # Один запрос на весь альбом: max(order_index) и есть ли у товара фото
+                max_order, photo_count = session.query(
+                    func.max(ProductPhoto.order_index), func.count(ProductPhoto.id)
+                ).filter(ProductPhoto.product_id == product_id).one()
+                max_order = max_order or 0
+                has_photos = photo_count > 0
+
+                photos = [
+                    ProductPhoto(
+                        product_id=product_id,
+                        photo_path=photo_path,
+                        # Первое фото товара без фотографий становится главным
+                        is_main=(index == 0 and not has_photos),
+                        order_index=max_order + index + 1
+                    )
+                    for index, photo_path in enumerate(photo_paths)
+                ]
+                session.add_all(photos)
+
+                if photos[0].is_main:
+                    session.query(Product).filter_by(id=product_id).update(
+                        {Product.cover_photo_path: photos[0].photo_path}
+                    )
+
+                session.flush()
+                photo_ids = [photo.id for photo in photos]
+                self._publish(session, ProductChanged(
+                    product_id, ('photos', 'cover_photo_path') if photos[0].is_main else ('photos',)
+                ))
+
+            logger.info(f"✅ Добавлено {len(photo_ids)} фото к товару {product_id} одной транзакцией")
+            return photo_ids
+
+        except Exception as e:
+            logger.error(f"Ошибка при пакетном добавлении фото товара {product_id}: {e}")
+            return []
 
     def get_product_photos(self, product_id: int) -> List[dict]:
         """Получение всех фото товара"""
@@ -1168,6 +1752,7 @@ class DatabaseManager:
                 photo = session.query(ProductPhoto).filter_by(product_id=product_id, photo_path=photo_path).first()
                 if photo:
                     photo.is_main = True
+                    self._publish(session, ProductChanged(product_id, ('photos',)))
                     return True
             return False
         except Exception as e:
@@ -1181,6 +1766,7 @@ class DatabaseManager:
                 product = session.query(Product).filter_by(id=product_id).first()
                 if product:
                     product.cover_photo_path = cover_photo_path
+                    self._publish(session, ProductChanged(product_id, ('cover_photo_path',)))
                     return True
             return False
         except Exception as e:
@@ -1246,19 +1832,19 @@ class DatabaseManager:
         
     # --- Методы для работы с избранным ---
 
-    def add_to_favorites(self, telegram_id: int, product_id: int) -> bool:
+    def add_to_favorites(self, telegram_id: int, product_id: int, user_id: Optional[int] = None) -> bool:
         """Добавить товар в избранное"""
         try:
             with self.session_scope() as session:
-                # Получаем пользователя по telegram_id
-                user = session.query(User).filter_by(telegram_id=telegram_id).first()
-                if not user:
+                # Получаем id пользователя по telegram_id
+                user_id = self._resolve_user_id(session, telegram_id, user_id)
+                if not user_id:
                     logger.error(f"Пользователь с telegram_id {telegram_id} не найден")
                     return False
                 
                 # Проверяем, не добавлен ли уже товар
                 existing_favorite = session.query(UserFavorite).filter_by(
-                    user_id=user.id, 
+                    user_id=user_id, 
                     product_id=product_id
                 ).first()
                 
@@ -1268,7 +1854,7 @@ class DatabaseManager:
                 
                 # Добавляем в избранное
                 favorite = UserFavorite(
-                    user_id=user.id,
+                    user_id=user_id,
                     product_id=product_id
                 )
                 session.add(favorite)
@@ -1279,19 +1865,19 @@ class DatabaseManager:
             logger.error(f"Ошибка при добавлении в избранное: {e}")
             return False
 
-    def remove_from_favorites(self, telegram_id: int, product_id: int) -> bool:
+    def remove_from_favorites(self, telegram_id: int, product_id: int, user_id: Optional[int] = None) -> bool:
         """Удалить товар из избранного"""
         try:
             with self.session_scope() as session:
-                # Получаем пользователя по telegram_id
-                user = session.query(User).filter_by(telegram_id=telegram_id).first()
-                if not user:
+                # Получаем id пользователя по telegram_id
+                user_id = self._resolve_user_id(session, telegram_id, user_id)
+                if not user_id:
                     logger.error(f"Пользователь с telegram_id {telegram_id} не найден")
                     return False
                 
                 # Находим и удаляем запись
                 favorite = session.query(UserFavorite).filter_by(
-                    user_id=user.id, 
+                    user_id=user_id, 
                     product_id=product_id
                 ).first()
                 
@@ -1307,18 +1893,18 @@ class DatabaseManager:
             logger.error(f"Ошибка при удалении из избранного: {e}")
             return False
 
-    def get_user_favorites(self, telegram_id: int) -> List[dict]:
+    def get_user_favorites(self, telegram_id: int, user_id: Optional[int] = None) -> List[dict]:
         """Получить избранные товары пользователя"""
         try:
             with self.session_scope() as session:
-                # Получаем пользователя по telegram_id
-                user = session.query(User).filter_by(telegram_id=telegram_id).first()
-                if not user:
+                # Получаем id пользователя по telegram_id
+                user_id = self._resolve_user_id(session, telegram_id, user_id)
+                if not user_id:
                     logger.warning(f"Пользователь с telegram_id {telegram_id} не найден")
                     return []
                 
                 # Получаем избранные товары
-                favorites = session.query(UserFavorite).filter_by(user_id=user.id).all()
+                favorites = session.query(UserFavorite).filter_by(user_id=user_id).all()
                 
                 result = []
                 for favorite in favorites:
@@ -1345,16 +1931,16 @@ class DatabaseManager:
             logger.error(f"Ошибка при получении избранного: {e}")
             return []
 
-    def is_in_favorites(self, telegram_id: int, product_id: int) -> bool:
+    def is_in_favorites(self, telegram_id: int, product_id: int, user_id: Optional[int] = None) -> bool:
         """Проверить, есть ли товар в избранном"""
         try:
             with self.session_scope() as session:
-                user = session.query(User).filter_by(telegram_id=telegram_id).first()
-                if not user:
+                user_id = self._resolve_user_id(session, telegram_id, user_id)
+                if not user_id:
                     return False
                 
                 favorite = session.query(UserFavorite).filter_by(
-                    user_id=user.id, 
+                    user_id=user_id, 
                     product_id=product_id
                 ).first()
                 
@@ -1381,6 +1967,7 @@ class DatabaseManager:
         """
         try:
             with self.session_scope() as session:
+                previous_status = self._get_current_order_status_with_session(order_id, session)
                 order_status = OrderStatus(
                     order_id=order_id,
                     status=status,
@@ -1389,6 +1976,11 @@ class DatabaseManager:
                     created_at=datetime.utcnow()
                 )
                 session.add(order_status)
+                self._enqueue_customer_notification(
+                    session, order_id, 'status_changed',
+                    {'status': status, 'admin_notes': admin_notes, 'photo': bool(photo_path)}
+                )
+                self._publish(session, OrderStatusChanged(order_id, status, previous_status))
                 logger.info(f"✅ Добавлен статус для заказа {order_id}: {status}")
                 if admin_notes:
                     logger.info(f"📝 Примечание админа: {admin_notes}")
@@ -1433,6 +2025,39 @@ class DatabaseManager:
             logger.error(f"⛔️ Ошибка при получении истории статусов: {e}")
             return []
     
+    def get_order_status_history_page(self, order_id: int, before: Optional[str] = None,
+                                      limit: int = HISTORY_PAGE_SIZE) -> dict:
+        """
+        Страница истории статусов заказа, новые сверху
+
+        Args:
+            before: курсор из next_cursor предыдущей страницы (None - первая страница)
+
+        Returns:
+            dict: items (с курсором каждой записи), next_cursor (None - старше нет), total
+        """
+        try:
+            with self.session_scope() as session:
+                rows, next_cursor, total = self._history_page(
+                    session, session.query(OrderStatus), OrderStatus, order_id, before, limit
+                )
+                items = [
+                    {
+                        'id': status.id,
+                        'order_id': status.order_id,
+                        'status': status.status,
+                        'admin_notes': status.admin_notes,
+                        'photo_path': status.photo_path,
+                        'created_at': status.created_at,
+                        'cursor': encode_history_cursor(status.created_at, status.id),
+                    }
+                    for status in rows
+                ]
+                return {'items': items, 'next_cursor': next_cursor, 'total': total}
+        except Exception as e:
+            logger.error(f"⛔️ Ошибка при получении истории статусов: {e}")
+            return {'items': [], 'next_cursor': None, 'total': 0}
+
     def get_current_order_status_with_notes(self, order_id: int) -> Optional[dict]:
         """
         Получить текущий статус заказа с примечанием админа
@@ -1721,6 +2346,8 @@ class DatabaseManager:
             with self.session_scope() as session:
                 order = session.query(Order).filter_by(id=order_id).first()
                 if order:
+                    if order.admin_notes != admin_notes:
+                        self._publish(session, OrderFieldChanged(order_id, 'admin_notes', order.admin_notes, admin_notes))
                     order.admin_notes = admin_notes
                     logger.info(f"✅ Обновлено примечание админа для заказа {order_id}")
                     return True
@@ -1768,13 +2395,171 @@ class DatabaseManager:
                 order = session.query(Order).filter_by(id=order_id).first()
                 if order:
                     if hasattr(order, field):
+                        previous = getattr(order, field)
                         setattr(order, field, value)
+                        if not _same_value(previous, value):
+                            self._publish(session, OrderFieldChanged(order_id, field, previous, value))
+                            if field in NOTIFY_ORDER_FIELDS:
+                                self._enqueue_notification(
+                                    session, [order.user.telegram_id], order_id, 'field_changed',
+                                    {'field': field, 'value': _json_value(value)}
+                                )
                         return True
                 return False
         except Exception as e:
             logger.error(f"Ошибка при обновлении поля заказа {order_id}.{field}: {e}")
             return False
 
-# Глобальный экземпляр менеджера БД
-db_manager = DatabaseManager()
+    # --- Исходящие уведомления (outbox) ---
+
+    def _admin_chat_ids(self, session) -> List[int]:
+        return [row[0] for row in session.query(User.telegram_id).filter(User.is_admin.is_(True)).all()]
+
+    def _enqueue_customer_notification(self, session, order_id: int, event_type: str, payload: dict):
+        chat_id = session.query(User.telegram_id).join(Order, Order.user_id == User.id).filter(
+            Order.id == order_id
+        ).scalar()
+        if chat_id:
+            self._enqueue_notification(session, [chat_id], order_id, event_type, payload)
+
+    def _enqueue_notification(self, session, chat_ids: List[int], order_id: int, event_type: str,
+                              payload: dict, dedupe_key: str = None, delay: float = None):
+        """
+        Записать уведомления в outbox в транзакции изменения
+
+        Отправляет их NotificationService после коммита; событие с dedupe_key,
+        уже записанным для получателя, повторно не добавляется. Ожидающие
+        уведомления получателя, которые еще не отправлялись, переносятся на
+        время отправки нового: серия правок уходит одним сообщением через
+        окно объединения после последней правки. Отложенные после ошибки
+        отправки (attempts > 0) ждут своего времени.
+        """
+        now = datetime.utcnow()
+        available_at = now + timedelta(seconds=self.notify_coalesce_seconds if delay is None else delay)
+        body = json.dumps(payload, ensure_ascii=False)
+        for chat_id in chat_ids:
+            key = f"{dedupe_key}:{chat_id}" if dedupe_key else None
+            if key and session.query(OutboxEvent.id).filter_by(dedupe_key=key).first():
+                continue
+            session.query(OutboxEvent).filter(
+                OutboxEvent.chat_id == chat_id, OutboxEvent.status == OUTBOX_PENDING, OutboxEvent.attempts == 0
+            ).update({'available_at': available_at}, synchronize_session=False)
+            session.add(OutboxEvent(
+                chat_id=chat_id, order_id=order_id, event_type=event_type, payload=body,
+                dedupe_key=key, status=OUTBOX_PENDING, attempts=0,
+                available_at=available_at, created_at=now
+            ))
+
+    def claim_outbox_events(self, max_chats: int = 50, lease_seconds: float = 60) -> List[dict]:
+        """
+        Взять уведомления для отправки
+
+        Выбираются получатели, у которых есть уведомление с наступившим
+        временем отправки, и для каждого - все его уведомления, время
+        которых тоже наступило. Серия правок к этому времени уже собрана:
+        _enqueue_notification переносит ее на окно объединения после
+        последней правки. Уведомления, отложенные после ошибки отправки,
+        ждут своего времени. Взятые уведомления арендуются на lease_seconds
+        (leased_until): другие процессы их не берут, а если процесс упадет
+        до mark_outbox_sent, они будут отправлены повторно.
+        """
+        try:
+            now = datetime.utcnow()
+            ready = (
+                OutboxEvent.status == OUTBOX_PENDING, OutboxEvent.available_at <= now,
+                sa.or_(OutboxEvent.leased_until.is_(None), OutboxEvent.leased_until <= now),
+            )
+            with self.session_scope() as session:
+                chat_ids = [row[0] for row in session.query(OutboxEvent.chat_id).filter(
+                    *ready
+                ).group_by(OutboxEvent.chat_id).order_by(func.min(OutboxEvent.available_at)).limit(max_chats).all()]
+                if not chat_ids:
+                    return []
+
+                events = session.query(OutboxEvent).filter(
+                    *ready, OutboxEvent.chat_id.in_(chat_ids)
+                ).order_by(OutboxEvent.id).with_for_update(skip_locked=True).all()
+                lease_until = now + timedelta(seconds=lease_seconds)
+                claimed = []
+                for event in events:
+                    event.leased_until = lease_until
+                    claimed.append({
+                        'id': event.id,
+                        'chat_id': event.chat_id,
+                        'order_id': event.order_id,
+                        'event_type': event.event_type,
+                        'payload': json.loads(event.payload) if event.payload else {},
+                        'attempts': event.attempts,
+                        'created_at': event.created_at,
+                    })
+                return claimed
+        except Exception as e:
+            logger.error(f"⛔️ Ошибка при выборке уведомлений: {e}")
+            return []
+
+    def mark_outbox_sent(self, event_ids: List[int]) -> bool:
+        """Отметить уведомления отправленными"""
+        try:
+            with self.session_scope() as session:
+                session.query(OutboxEvent).filter(OutboxEvent.id.in_(event_ids)).update(
+                    {'status': OUTBOX_SENT, 'sent_at': datetime.utcnow(), 'last_error': None},
+                    synchronize_session=False
+                )
+                return True
+        except Exception as e:
+            logger.error(f"⛔️ Ошибка при отметке уведомлений: {e}")
+            return False
+
+    def mark_outbox_failed(self, event_ids: List[int], error: str, retry_in: Optional[float] = None) -> bool:
+        """Неудачная отправка: повторить через retry_in секунд или (None) больше не пытаться"""
+        try:
+            values = {'attempts': OutboxEvent.attempts + 1, 'last_error': error[:1000], 'leased_until': None}
+            if retry_in is None:
+                values['status'] = OUTBOX_FAILED
+            else:
+                values['available_at'] = datetime.utcnow() + timedelta(seconds=retry_in)
+            with self.session_scope() as session:
+                session.query(OutboxEvent).filter(OutboxEvent.id.in_(event_ids)).update(
+                    values, synchronize_session=False
+                )
+                return True
+        except Exception as e:
+            logger.error(f"⛔️ Ошибка при отметке уведомлений: {e}")
+            return False
+
+    def get_outbox_stats(self) -> Dict[str, int]:
+        """Число уведомлений по статусам"""
+        try:
+            with self.session_scope() as session:
+                return dict(session.query(OutboxEvent.status, func.count(OutboxEvent.id)).group_by(OutboxEvent.status).all())
+        except Exception as e:
+            logger.error(f"⛔️ Ошибка при подсчете уведомлений: {e}")
+            return {}
+
+_db_manager: Optional[DatabaseManager] = None
+_db_manager_lock = threading.Lock()
+
+
+def get_db_manager() -> DatabaseManager:
+    """Общий менеджер БД бота (создается при первом обращении по настройкам окружения)"""
+    global _db_manager
+    with _db_manager_lock:
+        if _db_manager is None:
+            _db_manager = DatabaseManager()
+        return _db_manager
+
+
+def set_db_manager(manager: Optional[DatabaseManager]) -> Optional[DatabaseManager]:
+    """Подменить общий менеджер БД (тесты, инструменты); возвращает прежний"""
+    global _db_manager
+    with _db_manager_lock:
+        previous, _db_manager = _db_manager, manager
+        return previous
+
+
+def __getattr__(name):
+    # Обратная совместимость: `from ...database import db_manager` без создания БД при импорте модуля
+    if name == 'db_manager':
+        return get_db_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -0,0 +1,231 @@
+# src/myconfbot/utils/events.py
+"""
+Доменные события и шина событий процесса
+
+DatabaseManager публикует события после коммита транзакции, в которой
+изменились данные (при откате ничего не публикуется). Подписчики
+регистрируются при запуске (bootstrap -> services.event_subscribers):
+
+    bus.subscribe(OrderStatusChanged, handler)                 # сразу, в потоке записи
+    bus.subscribe(OrderStatusChanged, handler, deferred=True)  # позже, в фоновом потоке
+
+Синхронные подписчики должны быть быстрыми (счетчики, сброс кэша):
+они выполняются в потоке обработчика апдейта. Всё, что ходит в БД или
+сеть, подписывается с deferred=True. Ошибка подписчика пишется в лог и
+не влияет на вызвавший код и других подписчиков. Время каждого
+подписчика попадает в метрики (myconfbot_event_handler_duration_seconds).
+"""
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    """Базовый класс событий (неизменяемые значения: их получают несколько подписчиков)"""
+
+
+# --- заказы ---
+
+@dataclass(frozen=True)
+class OrderCreated(DomainEvent):
+    order_id: int
+    user_id: int
+    total_cost: object = None
+
+
+@dataclass(frozen=True)
+class OrderStatusChanged(DomainEvent):
+    order_id: int
+    status: str
+    previous_status: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class OrderFieldChanged(DomainEvent):
+    order_id: int
+    field: str
+    old_value: object = None
+    new_value: object = None
+
+
+@dataclass(frozen=True)
+class OrderNoteAdded(DomainEvent):
+    order_id: int
+    user_id: int
+
+
+# --- каталог ---
+
+@dataclass(frozen=True)
+class ProductCreated(DomainEvent):
+    product_id: int
+    category_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ProductChanged(DomainEvent):
+    product_id: int
+    fields: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class ProductDeleted(DomainEvent):
+    product_id: int
+
+
+@dataclass(frozen=True)
+class CategoryChanged(DomainEvent):
+    category_id: Optional[int]
+    deleted: bool = False
+
+
+# --- пользователи ---
+
+@dataclass(frozen=True)
+class UserCreated(DomainEvent):
+    telegram_id: int
+    is_admin: bool = False
+
+
+@dataclass(frozen=True)
+class UserChanged(DomainEvent):
+    telegram_id: int
+    fields: Tuple[str, ...] = ()
+
+
+Subscriber = Callable[[DomainEvent], None]
+
+
+class EventBus:
+    """
+    Синхронная и отложенная доставка доменных событий
+
+    Подписка на базовый класс получает и события подклассов (подписка на
+    DomainEvent - все события). Отложенные подписчики выполняются по
+    порядку публикации в одном фоновом потоке, который запускается при
+    первой отложенной публикации.
+    """
+
+    def __init__(self, metrics=None):
+        self._subscribers: Dict[Type[DomainEvent], List[Tuple[str, Subscriber, bool]]] = {}
+        self._resolved: Dict[Type[DomainEvent], List[Tuple[str, Subscriber, bool]]] = {}
+        self._lock = threading.Lock()
+        self._metrics = metrics
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- подписка ---
+
+    def subscribe(self, event_type: Type[DomainEvent], handler: Subscriber,
+                  deferred: bool = False, name: Optional[str] = None):
+        """Подписать обработчик на события типа event_type (и его подклассов)"""
+        name = name or getattr(handler, '__qualname__', repr(handler))
+        with self._lock:
+            self._subscribers.setdefault(event_type, []).append((name, handler, deferred))
+            self._resolved.clear()
+
+    def unsubscribe(self, handler: Subscriber):
+        with self._lock:
+            for event_type, items in self._subscribers.items():
+                self._subscribers[event_type] = [item for item in items if item[1] is not handler]
+            self._resolved.clear()
+
+    def subscribers(self, event_type: Type[DomainEvent]) -> List[Tuple[str, Subscriber, bool]]:
+        """Подписчики события с учетом подписок на базовые классы (кэшируется до изменения подписок)"""
+        resolved = self._resolved.get(event_type)
+        if resolved is None:
+            with self._lock:
+                resolved = [item for base in event_type.__mro__ for item in self._subscribers.get(base, ())]
+                self._resolved[event_type] = resolved
+        return resolved
+
+    # --- публикация ---
+
+    def publish(self, *events: DomainEvent):
+        """Доставить события: синхронным подписчикам сразу, отложенным - в очередь"""
+        for event in events:
+            for name, handler, deferred in self.subscribers(type(event)):
+                if deferred:
+                    self._ensure_worker()
+                    self._queue.put((name, handler, event))
+                else:
+                    self._deliver(name, handler, event)
+
+    def _deliver(self, name: str, handler: Subscriber, event: DomainEvent):
+        started = time.perf_counter()
+        event_name = type(event).__name__
+        try:
+            handler(event)
+        except Exception as e:
+            logger.error(f"❌ Ошибка подписчика {name} на {event_name}: {e}")
+            if self._metrics is not None:
+                self._metrics.event_handler_errors.inc(name, event_name)
+        finally:
+            if self._metrics is not None:
+                self._metrics.event_handler_duration.observe(time.perf_counter() - started, name, event_name)
+
+    # --- отложенные подписчики ---
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_deferred, name='event-bus', daemon=True)
+                self._thread.start()
+
+    def _run_deferred(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._deliver(*item)
+            finally:
+                self._queue.task_done()
+
+    def pending(self) -> int:
+        """Отложенных доставок в очереди"""
+        return self._queue.qsize()
+
+    def flush(self):
+        """Дождаться выполнения всех отложенных подписчиков"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def stop(self):
+        """Доставить очередь и остановить фоновый поток"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=5)
+
+
+_event_bus: Optional[EventBus] = None
+_event_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> EventBus:
+    """Общая шина событий процесса"""
+    global _event_bus
+    with _event_bus_lock:
+        if _event_bus is None:
+            from src.myconfbot.utils.metrics import get_metrics
+            _event_bus = EventBus(metrics=get_metrics())
+        return _event_bus
+
+
+def set_event_bus(bus: Optional[EventBus]) -> Optional[EventBus]:
+    """Подменить общую шину (тесты, инструменты); возвращает прежнюю"""
+    global _event_bus
+    with _event_bus_lock:
+        previous, _event_bus = _event_bus, bus
+        return previous
@@ -0,0 +1,146 @@
+# src/myconfbot/utils/file_downloader.py
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from telebot import apihelper
+from urllib3.util.retry import Retry
+
+from src.myconfbot.config import FileStorageConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_URL = "https://api.telegram.org/file/bot{0}/{1}"
+
+
+class TelegramFileDownloader:
+    """
+    Потоковая загрузка файлов из Bot API на диск
+
+    Файл скачивается частями во временный файл в temp_dir, проверяется
+    его размер, после чего он атомарно переименовывается в место назначения.
+    Все загрузки идут через одну keep-alive сессию и ограниченный пул потоков.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    MAX_WORKERS = 4
+    POOL_SIZE = 8
+    TIMEOUT = (5, 60)  # (connect, read) в секундах
+
+    def __init__(self, bot, temp_dir: Union[str, Path], max_workers: int = MAX_WORKERS):
+        self.bot = bot
+        self.temp_dir = Path(temp_dir)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='file-download')
+
+    def _file_url(self, file_path: str) -> str:
+        """URL файла с учетом переопределенного apihelper.FILE_URL"""
+        return (apihelper.FILE_URL or DEFAULT_FILE_URL).format(self.bot.token, file_path)
+
+    def download(self, file_id: str, destination_dir: Union[str, Path],
+                 stem: Optional[str] = None) -> Optional[Path]:
+        """
+        Скачать файл по file_id в указанную директорию
+
+        Args:
+            file_id: file_id из Telegram
+            destination_dir: Директория назначения
+            stem: Имя файла без расширения (по умолчанию случайное)
+
+        Returns:
+            Path: Путь к сохраненному файлу или None при ошибке
+        """
+        tmp_name = None
+        try:
+            file_info = self.bot.get_file(file_id)
+            file_extension = os.path.splitext(file_info.file_path)[1] or '.jpg'
+
+            destination_dir = Path(destination_dir)
+            destination_dir.mkdir(parents=True, exist_ok=True)
+            destination = destination_dir / f"{stem or uuid.uuid4().hex}{file_extension}"
+
+            tmp_fd, tmp_name = tempfile.mkstemp(dir=self.temp_dir, suffix='.part')
+            written = 0
+
+            with os.fdopen(tmp_fd, 'wb') as tmp_file:
+                with self.session.get(
+                    self._file_url(file_info.file_path),
+                    stream=True,
+                    timeout=self.TIMEOUT,
+                    proxies=apihelper.proxy
+                ) as response:
+                    response.raise_for_status()
+                    expected_size = file_info.file_size or int(response.headers.get('Content-Length') or 0)
+
+                    for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                        if chunk:
+                            tmp_file.write(chunk)
+                            written += len(chunk)
+
+            if expected_size and written != expected_size:
+                raise IOError(f"размер файла {written} байт, ожидалось {expected_size}")
+
+            try:
+                os.replace(tmp_name, destination)
+            except OSError:
+                # temp_dir на другом разделе - переносим копированием
+                shutil.move(tmp_name, destination)
+            tmp_name = None
+
+            logger.debug(f"Файл {file_id} сохранен: {destination} ({written} байт)")
+            return destination
+
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке файла {file_id}: {e}")
+            return None
+        finally:
+            if tmp_name and os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+    def submit(self, file_id: str, destination_dir: Union[str, Path],
+               stem: Optional[str] = None) -> Future:
+        """Поставить загрузку в пул потоков"""
+        return self._executor.submit(self.download, file_id, destination_dir, stem)
+
+    def download_many(self, file_ids: List[str], destination_dir: Union[str, Path]) -> List[Optional[Path]]:
+        """Параллельно скачать несколько файлов, сохраняя порядок"""
+        futures = [self.submit(file_id, destination_dir) for file_id in file_ids]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Остановить пул потоков и закрыть HTTP-сессию"""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+
+_downloaders = {}
+_downloaders_lock = threading.Lock()
+
+
+def get_file_downloader(bot, temp_dir: Union[str, Path, None] = None) -> TelegramFileDownloader:
+    """Получить общий загрузчик для бота (один пул соединений на токен)"""
+    with _downloaders_lock:
+        downloader = _downloaders.get(bot.token)
+        if downloader is None:
+            downloader = TelegramFileDownloader(bot, temp_dir or FileStorageConfig().temp_dir)
+            _downloaders[bot.token] = downloader
+        return downloader
@@ -0,0 +1,206 @@
+# src/myconfbot/utils/flood_guard.py
+"""
+Защита от флуда
+
+Каждое нажатие «🔍 Подробнее...» или категории - запросы к БД и отправка
+фотографий, а двойное нажатие «Подтвердить» запускает оформление дважды.
+FloodGuard отбрасывает апдейт до обработчиков, если:
+    - тот же пользователь нажал ту же кнопку того же сообщения в пределах
+      FLOOD_DUPLICATE_WINDOW секунд (повтор);
+    - у пользователя кончился бюджет: FLOOD_RATE апдейтов в секунду, не
+      больше FLOOD_BURST подряд (у администраторов - FLOOD_ADMIN_RATE и
+      FLOOD_ADMIN_BURST; 0 - без ограничения).
+
+На отброшенный callback бот сразу отвечает (answerCallbackQuery), чтобы
+у пользователя не висели «часики». Отброшенные апдейты считаются в
+метрике myconfbot_updates_dropped_total (update_type, reason, role).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from telebot.handler_backends import BaseMiddleware, SkipHandler
+
+from src.myconfbot.utils.bot_middleware import STEP_KEY, UPDATE_TYPES, update_type_of
+from src.myconfbot.utils.telegram_sender import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+THROTTLED = 'throttled'
+DUPLICATE = 'duplicate'
+
+# Не чаще одного предупреждения о лимите в чат за столько секунд
+WARNING_INTERVAL = 10
+
+
+class FloodGuard:
+    """Бюджет апдейтов на пользователя и подавление повторных нажатий"""
+
+    def __init__(self, rate: float = None, burst: float = None,
+                 admin_rate: float = None, admin_burst: float = None,
+                 duplicate_window: float = None,
+                 is_admin: Optional[Callable[[int], bool]] = None,
+                 metrics=None, max_users: int = 10000):
+        self.rate = rate if rate is not None else float(os.getenv('FLOOD_RATE', '1'))
+        self.burst = burst if burst is not None else float(os.getenv('FLOOD_BURST', '5'))
+        self.admin_rate = admin_rate if admin_rate is not None else float(os.getenv('FLOOD_ADMIN_RATE', '5'))
+        self.admin_burst = admin_burst if admin_burst is not None else float(os.getenv('FLOOD_ADMIN_BURST', '20'))
+        self.duplicate_window = (duplicate_window if duplicate_window is not None
+                                 else float(os.getenv('FLOOD_DUPLICATE_WINDOW', '2')))
+        self.is_admin = is_admin
+        self.metrics = metrics
+        self.max_users = max_users
+
+        self._buckets: 'OrderedDict[Tuple[int, bool], TokenBucket]' = OrderedDict()
+        self._pressed: 'OrderedDict[tuple, float]' = OrderedDict()
+        self._warned: 'OrderedDict[int, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 or self.admin_rate > 0 or self.duplicate_window > 0
+
+    # --- проверки ---
+
+    def check(self, update) -> Optional[str]:
+        """None - обработать апдейт, иначе причина отказа (THROTTLED, DUPLICATE)"""
+        from_user = getattr(update, 'from_user', None)
+        if from_user is None:
+            return None
+        press = self._press_key(from_user.id, update)
+        if press is not None and not self._claim_press(press):
+            return DUPLICATE
+        admin = self._admin(from_user.id)
+        rate, burst = (self.admin_rate, self.admin_burst) if admin else (self.rate, self.burst)
+        if rate > 0 and self._bucket((from_user.id, admin), rate, burst).try_acquire():
+            if press is not None:
+                self._release_press(press)  # Нажатие не обработано - повтор после паузы пройдет
+            return THROTTLED
+        return None
+
+    def _admin(self, user_id: int) -> bool:
+        if self.is_admin is None or self.rate == self.admin_rate and self.burst == self.admin_burst:
+            return False
+        try:
+            return bool(self.is_admin(user_id))
+        except Exception as e:
+            logger.error(f"❌ Не удалось определить роль {user_id} для лимита апдейтов: {e}")
+            return False
+
+    def _bucket(self, key: Tuple[int, bool], rate: float, burst: float) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, burst)
+                # Вытесненный бездействующий пользователь просто получит полный бюджет заново
+                if len(self._buckets) > self.max_users:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
+
+    def _press_key(self, user_id: int, update) -> Optional[tuple]:
+        data = getattr(update, 'data', None)
+        message = getattr(update, 'message', None)
+        if self.duplicate_window <= 0 or data is None or message is None:
+            return None  # Не callback или callback inline-режима
+        return user_id, message.chat.id, message.message_id, data
+
+    def _claim_press(self, key: tuple) -> bool:
+        """Запомнить нажатие; False - такое же было меньше duplicate_window назад"""
+        with self._lock:
+            now = time.monotonic()
+            # Нажатия добавляются по порядку времени: устаревшие - в начале
+            while self._pressed and (len(self._pressed) >= self.max_users
+                                     or now - next(iter(self._pressed.values())) >= self.duplicate_window):
+                self._pressed.popitem(last=False)
+            if key in self._pressed:
+                return False
+            self._pressed[key] = now
+            return True
+
+    def _release_press(self, key: tuple):
+        with self._lock:
+            self._pressed.pop(key, None)
+
+    # --- ответ на отброшенный апдейт ---
+
+    def _should_warn(self, user_id: int) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._warned.get(user_id, float('-inf')) < WARNING_INTERVAL:
+                return False
+            self._warned.pop(user_id, None)
+            self._warned[user_id] = now
+            while len(self._warned) > self.max_users:
+                self._warned.popitem(last=False)
+            return True
+
+    def drop(self, bot, update, reason: str):
+        """Учесть отброшенный апдейт в метриках и ответить пользователю"""
+        update_type = update_type_of(update)
+        if self.metrics is not None:
+            role = 'admin' if self._admin(update.from_user.id) else 'user'
+            self.metrics.updates_dropped.inc(update_type, reason, role)
+        logger.debug("🚦 Апдейт %s от %s отброшен: %s", update_type, update.from_user.id, reason)
+        self.reject(bot, update, reason)
+
+    def reject(self, bot, update, reason: str):
+        """Ответить на отброшенный апдейт: callback - сразу, сообщение - редким предупреждением"""
+        try:
+            if getattr(update, 'data', None) is not None:
+                text = "⏳ Слишком много нажатий, подождите немного" if reason == THROTTLED else None
+                bot.answer_callback_query(update.id, text)
+            elif reason == THROTTLED and getattr(update, 'chat', None) and self._should_warn(update.from_user.id):
+                bot.send_message(update.chat.id, "⏳ Слишком много сообщений. Подождите несколько секунд.")
+        except Exception as e:
+            logger.debug(f"Не удалось ответить на отброшенный апдейт: {e}")
+
+    # --- подключение к боту ---
+
+    def instrument_bot(self, bot):
+        """
+        Проверять каждый апдейт до обработчиков (FloodGuardMiddleware)
+
+        Подключается последним из middleware: проверка выполняется внутри
+        unit of work апдейта (роль берется из уже найденного пользователя),
+        а отброшенные апдейты попадают в метрики времени апдейтов.
+        """
+        if not self.enabled or any(isinstance(middleware, FloodGuardMiddleware) for middleware in bot.middlewares or ()):
+            return
+        bot.setup_middleware(FloodGuardMiddleware(self, bot))
+        logger.info(f"🚦 Защита от флуда: {self.rate:g}/с (подряд {self.burst:g}), "
+                    f"администраторы {self.admin_rate:g}/с (подряд {self.admin_burst:g}), "
+                    f"повтор кнопки - {self.duplicate_window:g} с")
+
+
+class FloodGuardMiddleware(BaseMiddleware):
+    """
+    Отбрасывает апдейт (SkipHandler) по решению FloodGuard.check
+
+    Ответы на шаг диалога (обработчик следующего шага) не проверяются:
+    TeleBot снимает обработчик шага до вызова, и отброшенный ответ
+    оборвал бы диалог.
+    """
+
+    def __init__(self, guard: FloodGuard, bot):
+        super().__init__()
+        self.update_types = UPDATE_TYPES
+        self.guard = guard
+        self.bot = bot
+
+    def pre_process(self, update, data):
+        if data.get(STEP_KEY):
+            return None
+        reason = self.guard.check(update)
+        if reason is None:
+            return None
+        self.guard.drop(self.bot, update, reason)
+        return SkipHandler()
+
+    def post_process(self, update, data, exception):
+        pass
@@ -0,0 +1,228 @@
+# src/myconfbot/utils/memory_monitor.py
+
+import linecache
+import logging
+import os
+import threading
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Период автоматических снимков в секундах (0 - только по команде /memory)
+MEMORY_SNAPSHOT_INTERVAL = float(os.getenv('MEMORY_SNAPSHOT_INTERVAL', '0'))
+# Глубина стека, сохраняемая tracemalloc для каждого выделения
+MEMORY_TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', '1'))
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def _format_size(size: int) -> str:
+    """Размер в читаемом виде со знаком"""
+    sign = '-' if size < 0 else '+'
+    size = abs(size)
+    if size < 1024:
+        return f"{sign}{size} Б"
+    if size < 1024 * 1024:
+        return f"{sign}{size / 1024:.1f} КБ"
+    return f"{sign}{size / 1024 / 1024:.1f} МБ"
+
+
+def _format_site(frame: tracemalloc.Frame) -> str:
+    """Место выделения без длинного префикса пути: пакет/модуль.py:строка"""
+    return f"{'/'.join(Path(frame.filename).parts[-3:])}:{frame.lineno}"
+
+
+class MemoryMonitor:
+    """
+    Снимки tracemalloc и размеры внутренних реестров бота
+
+    Первый снимок становится базовым, каждый следующий сравнивается и с ним,
+    и с предыдущим. Пробы (probe) - функции, возвращающие размеры реестров
+    в памяти процесса (состояния, обработчики следующего шага, кэши), чтобы
+    рост памяти можно было связать с конкретной подсистемой.
+    """
+
+    def __init__(self, frames: int = MEMORY_TRACE_FRAMES, history_size: int = 48):
+        self.frames = frames
+        self._probes: Dict[str, Callable[[], Dict[str, int]]] = {}
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- пробы ---
+
+    def add_probe(self, name: str, probe: Callable[[], Dict[str, int]]):
+        """Зарегистрировать функцию, возвращающую размеры реестра"""
+        self._probes[name] = probe
+
+    def probe_sizes(self) -> Dict[str, Dict[str, int]]:
+        sizes = {}
+        for name, probe in self._probes.items():
+            try:
+                sizes[name] = probe()
+            except Exception as e:
+                logger.error(f"❌ Ошибка пробы памяти {name}: {e}")
+                sizes[name] = {}
+        return sizes
+
+    # --- снимки ---
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info(f"🧠 tracemalloc запущен (кадров: {self.frames})")
+
+    def take_snapshot(self, limit: int = 10) -> dict:
+        """
+        Снять снимок и сравнить с предыдущим и базовым
+
+        Returns:
+            dict: traced_current, traced_peak, top_since_previous,
+                  top_since_baseline, probes, probes_previous
+        """
+        self.start_tracing()
+
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            current, peak = tracemalloc.get_traced_memory()
+            probes = self.probe_sizes()
+
+            report = {
+                'taken_at': datetime.now().isoformat(timespec='seconds'),
+                'traced_current': current,
+                'traced_peak': peak,
+                'top_since_previous': self._top_diff(snapshot, self._previous, limit),
+                'top_since_baseline': self._top_diff(snapshot, self._baseline, limit),
+                'probes': probes,
+                'probes_previous': self._history[-1]['probes'] if self._history else {},
+            }
+
+            if self._baseline is None:
+                self._baseline = snapshot
+            self._previous = snapshot
+            self._history.append({
+                'taken_at': report['taken_at'],
+                'traced_current': current,
+                'probes': probes,
+            })
+
+        return report
+
+    @staticmethod
+    def _top_diff(snapshot: tracemalloc.Snapshot, previous: Optional[tracemalloc.Snapshot],
+                  limit: int) -> List[dict]:
+        """Самые растущие места выделения памяти"""
+        if previous is None:
+            stats = snapshot.statistics('lineno')[:limit]
+            return [
+                {'site': _format_site(stat.traceback[0]), 'size': stat.size, 'size_diff': stat.size, 'count_diff': stat.count}
+                for stat in stats
+            ]
+
+        stats = snapshot.compare_to(previous, 'lineno')
+        stats = sorted(stats, key=lambda stat: stat.size_diff, reverse=True)[:limit]
+        return [
+            {'site': _format_site(stat.traceback[0]), 'size': stat.size,
+             'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+            for stat in stats if stat.size_diff > 0
+        ]
+
+    def history(self) -> List[dict]:
+        with self._lock:
+            return list(self._history)
+
+    def reset_baseline(self):
+        with self._lock:
+            self._baseline = None
+            self._previous = None
+            self._history.clear()
+
+    # --- текстовый отчет ---
+
+    def format_report(self, report: dict, limit: int = 10) -> str:
+        lines = [
+            f"🧠 Память (tracemalloc) на {report['taken_at']}:",
+            f"Сейчас: {report['traced_current'] / 1024 / 1024:.1f} МБ, "
+            f"пик: {report['traced_peak'] / 1024 / 1024:.1f} МБ",
+            "",
+            "📦 Реестры:",
+        ]
+        previous = report['probes_previous']
+        for name, sizes in report['probes'].items():
+            parts = []
+            for key, value in sizes.items():
+                delta = value - previous.get(name, {}).get(key, value)
+                parts.append(f"{key}={value}" + (f" ({delta:+d})" if delta else ""))
+            lines.append(f"  {name}: {', '.join(parts) or 'нет данных'}")
+
+        for title, key in (("📈 Рост с прошлого снимка:", 'top_since_previous'),
+                           ("📊 Рост с базового снимка:", 'top_since_baseline')):
+            lines.append("")
+            lines.append(title)
+            if not report[key]:
+                lines.append("  нет данных")
+            for stat in report[key][:limit]:
+                lines.append(f"  {_format_size(stat['size_diff'])} ({stat['count_diff']:+d}) {stat['site']}")
+
+        return '\n'.join(lines)
+
+    # --- периодическое задание ---
+
+    def start_periodic(self, interval: float = MEMORY_SNAPSHOT_INTERVAL) -> bool:
+        """Снимать снимки в фоне и писать отчет в лог"""
+        if interval <= 0 or self._thread is not None:
+            return False
+
+        self.start_tracing()
+        self._stop_event.clear()
+        # Базовый снимок - сразу после старта
+        self.take_snapshot()
+
+        def loop():
+            while not self._stop_event.wait(interval):
+                try:
+                    report = self.take_snapshot()
+                    logger.info(self.format_report(report, limit=5))
+                except Exception as e:
+                    logger.error(f"❌ Ошибка снимка памяти: {e}")
+
+        self._thread = threading.Thread(target=loop, name='memory-monitor', daemon=True)
+        self._thread.start()
+        logger.info(f"🧠 Снимки памяти каждые {interval:.0f} с")
+        return True
+
+    def stop_periodic(self):
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+_memory_monitor = None
+_memory_monitor_lock = threading.Lock()
+
+
+def get_memory_monitor() -> MemoryMonitor:
+    """Общий монитор памяти процесса"""
+    global _memory_monitor
+    with _memory_monitor_lock:
+        if _memory_monitor is None:
+            _memory_monitor = MemoryMonitor()
+        return _memory_monitor
@@ -0,0 +1,403 @@
+# src/myconfbot/utils/metrics.py
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from sqlalchemy import event
+from telebot import apihelper
+from telebot.handler_backends import BaseMiddleware
+
+from src.myconfbot.utils.bot_middleware import UPDATE_TYPES, update_route, update_type_of
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин в секундах: от быстрых SQL-запросов до long polling getUpdates
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    """Метки в формате Prometheus: {name="value",...}"""
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Счетчик с метками"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value:g}"
+            for labels, value in self.items()
+        ]
+
+
+class Gauge(Counter):
+    """Текущее значение (например, число запросов в работе)"""
+
+    type_name = 'gauge'
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [счетчики по корзинам (+Inf последней), сумма, количество]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        with self._lock:
+            return {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+
+    def quantile(self, q: float, counts: List[int], count: int) -> float:
+        """Оценка квантиля линейной интерполяцией внутри корзины"""
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for upper, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if upper == float('inf'):
+                    return lower
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+            lower = upper
+        return lower
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if upper == float('inf') else f"{upper:g}"
+                le_label = 'le="' + le + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class BotMetrics:
+    """
+    Метрики бота: время обработки апдейтов и отдельных обработчиков,
+    вызовы Bot API, SQL-запросы, ошибки и текущая нагрузка
+
+    Время в БД и в Bot API дополнительно накапливается по потоку, поэтому
+    для каждого маршрута апдейта видно, какая часть его времени ушла на них.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+
+        self.update_duration = Histogram(
+            'myconfbot_update_duration_seconds', 'Полное время обработки апдейта', ('update_type',))
+        self.handler_duration = Histogram(
+            'myconfbot_handler_duration_seconds', 'Время обработки по маршруту апдейта', ('handler',))
+        self.handler_db_time = Histogram(
+            'myconfbot_handler_db_seconds', 'Время в БД за вызов обработчика', ('handler',))
+        self.handler_api_time = Histogram(
+            'myconfbot_handler_api_seconds', 'Время в Bot API за вызов обработчика', ('handler',))
+        self.handler_errors = Counter(
+            'myconfbot_handler_errors_total', 'Исключения в обработчиках', ('handler', 'exception'))
+        self.handlers_in_flight = Gauge(
+            'myconfbot_handlers_in_flight', 'Обработчики, выполняющиеся сейчас')
+
+        self.api_duration = Histogram(
+            'myconfbot_api_request_duration_seconds', 'Время вызова метода Bot API', ('method',))
+        self.api_errors = Counter(
+            'myconfbot_api_errors_total', 'Ошибки вызовов Bot API', ('method', 'error'))
+        self.api_in_flight = Gauge(
+            'myconfbot_api_requests_in_flight', 'Вызовы Bot API, выполняющиеся сейчас')
+
+        self.db_duration = Histogram(
+            'myconfbot_db_query_duration_seconds', 'Время выполнения SQL-запроса', ('statement',))
+        self.update_db_transactions = Histogram(
+            'myconfbot_update_db_transactions', 'Транзакций БД за апдейт (unit of work)', ('update_type',),
+            buckets=(0, 1, 2, 3, 5, 10, 20))
+
+        self.event_handler_duration = Histogram(
+            'myconfbot_event_handler_duration_seconds', 'Время подписчика доменного события', ('subscriber', 'event'))
+        self.event_handler_errors = Counter(
+            'myconfbot_event_handler_errors_total', 'Исключения в подписчиках событий', ('subscriber', 'event'))
+
+        self.update_queue_wait = Histogram(
+            'myconfbot_update_queue_wait_seconds', 'Ожидание апдейта в очереди до обработки', ('lane',))
+        self.updates_shed = Counter(
+            'myconfbot_updates_shed_total', 'Апдейты, сброшенные из-за долгого ожидания в очереди',
+            ('lane', 'update_type'))
+        self.updates_dropped = Counter(
+            'myconfbot_updates_dropped_total', 'Апдейты, отброшенные защитой от флуда (лимит, повтор кнопки)',
+            ('update_type', 'reason', 'role'))
+
+        self._metrics = [
+            self.update_duration, self.handler_duration, self.handler_db_time, self.handler_api_time,
+            self.handler_errors, self.handlers_in_flight,
+            self.api_duration, self.api_errors, self.api_in_flight,
+            self.db_duration, self.update_db_transactions,
+            self.event_handler_duration, self.event_handler_errors,
+            self.update_queue_wait, self.updates_shed, self.updates_dropped,
+        ]
+        self._local = threading.local()
+        self._http_server: Optional[ThreadingHTTPServer] = None
+
+    # --- учет времени по потоку ---
+
+    def _add_thread_time(self, attribute: str, value: float):
+        if getattr(self._local, 'depth', 0):
+            setattr(self._local, attribute, getattr(self._local, attribute, 0.0) + value)
+
+    def handler_started(self) -> float:
+        """Начать замер обработки апдейта в текущем потоке"""
+        local = self._local
+        local.db_time = 0.0
+        local.api_time = 0.0
+        local.depth = 1
+        self.handlers_in_flight.inc()
+        return time.perf_counter()
+
+    def handler_finished(self, started: float, update_type: str, route: str,
+                         exception: Optional[BaseException] = None):
+        """Записать время апдейта, его маршрута и долю БД и Bot API"""
+        elapsed = time.perf_counter() - started
+        local = self._local
+        local.depth = 0
+        self.handlers_in_flight.dec()
+        if exception is not None:
+            self.handler_errors.inc(route, type(exception).__name__)
+        self.update_duration.observe(elapsed, update_type)
+        self.handler_duration.observe(elapsed, route)
+        self.handler_db_time.observe(getattr(local, 'db_time', 0.0), route)
+        self.handler_api_time.observe(getattr(local, 'api_time', 0.0), route)
+
+    # --- подключение к боту, API-клиенту и БД ---
+
+    def instrument_bot(self, bot, menu_texts=()):
+        """
+        Подключить метрики к боту (MiddlewareBot) через MetricsMiddleware
+
+        Подключается первым из middleware, чтобы замер охватывал остальные.
+        menu_texts - тексты кнопок меню, отдельные маршруты в метриках.
+        """
+        if any(isinstance(middleware, MetricsMiddleware) for middleware in bot.middlewares or ()):
+            return
+        bot.setup_middleware(MetricsMiddleware(self, menu_texts))
+        logger.info("📈 Метрики подключены к боту")
+
+    def instrument_api(self):
+        """
+        Замер вызовов Bot API через apihelper.CUSTOM_REQUEST_SENDER
+
+        Запрос выполняет ранее заданный CUSTOM_REQUEST_SENDER или сессия
+        requests текущего потока. Bot API отвечает на ошибки HTTP-статусом
+        (400, 403, 429...), поэтому ошибки считаются по статусу ответа,
+        а сетевые - по типу исключения.
+        """
+        send = apihelper.CUSTOM_REQUEST_SENDER
+        if getattr(send, '_metrics_instrumented', False):
+            return
+        send = send or self._send_api_request
+
+        def request_sender(method, request_url, **kwargs):
+            method_name = request_url.rstrip('/').rsplit('/', 1)[-1]
+            self.api_in_flight.inc()
+            started = time.perf_counter()
+            try:
+                response = send(method, request_url, **kwargs)
+            except Exception as e:
+                self.api_errors.inc(method_name, type(e).__name__)
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                self.api_in_flight.dec()
+                self.api_duration.observe(elapsed, method_name)
+                self._add_thread_time('api_time', elapsed)
+            if response.status_code != 200:
+                self.api_errors.inc(method_name, str(response.status_code))
+            return response
+
+        request_sender._metrics_instrumented = True
+        apihelper.CUSTOM_REQUEST_SENDER = request_sender
+
+    def _send_api_request(self, method, request_url, **kwargs) -> requests.Response:
+        """Запрос к Bot API через сессию requests потока (как в apihelper)"""
+        session = getattr(self._local, 'api_session', None)
+        if session is None:
+            session = self._local.api_session = requests.Session()
+        return session.request(method, request_url, **kwargs)
+
+    def instrument_engine(self, engine):
+        """Замер SQL-запросов через события SQLAlchemy"""
+        if getattr(engine, '_metrics_instrumented', False):
+            return
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info['_metrics_started'].pop()
+            elapsed = time.perf_counter() - started
+            self.db_duration.observe(elapsed, statement.lstrip().split(' ', 1)[0].upper())
+            self._add_thread_time('db_time', elapsed)
+
+        engine._metrics_instrumented = True
+
+    # --- экспорт ---
+
+    def render_prometheus(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        lines = [
+            '# HELP myconfbot_uptime_seconds Время работы процесса',
+            '# TYPE myconfbot_uptime_seconds gauge',
+            f"myconfbot_uptime_seconds {time.time() - self.started_at:.0f}",
+        ]
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def histogram_summary(self, histogram: Histogram, limit: int = 10) -> List[dict]:
+        """Сводка по гистограмме: самые нагруженные ряды по суммарному времени"""
+        rows = []
+        for labels, (counts, total, count) in histogram.snapshot().items():
+            rows.append({
+                'label': ','.join(labels) or '-',
+                'count': count,
+                'total': total,
+                'avg': total / count if count else 0.0,
+                'p50': histogram.quantile(0.5, counts, count),
+                'p95': histogram.quantile(0.95, counts, count),
+            })
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        return rows[:limit]
+
+    def start_http_server(self, host: Optional[str] = None, port: Optional[int] = None) -> bool:
+        """
+        Запустить локальный эндпоинт /metrics в фоновом потоке
+
+        По умолчанию адрес - METRICS_HOST и METRICS_PORT (0 - выключен).
+        """
+        if host is None:
+            host = os.getenv('METRICS_HOST', '127.0.0.1')
+        if port is None:
+            port = int(os.getenv('METRICS_PORT', '0'))
+        if self._http_server is not None or not port:
+            return False
+
+        metrics = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics: " + format, *args)
+
+        try:
+            self._http_server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        except OSError as e:
+            logger.error(f"❌ Не удалось запустить эндпоинт метрик на {host}:{port}: {e}")
+            return False
+
+        thread = threading.Thread(target=self._http_server.serve_forever, name='metrics-http', daemon=True)
+        thread.start()
+        logger.info(f"📈 Метрики доступны на http://{host}:{self._http_server.server_port}/metrics")
+        return True
+
+    def stop_http_server(self):
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Замер апдейта: время, маршрут (update_route), ошибки, доля БД и Bot API"""
+
+    def __init__(self, metrics: BotMetrics, menu_texts=()):
+        super().__init__()
+        self.update_types = UPDATE_TYPES
+        self.metrics = metrics
+        self.menu_texts = frozenset(menu_texts)
+
+    def pre_process(self, update, data):
+        data['_metrics_started'] = self.metrics.handler_started()
+
+    def post_process(self, update, data, exception):
+        started = data.pop('_metrics_started', None)
+        if started is not None:
+            route = update_route(update, data, self.menu_texts)
+            self.metrics.handler_finished(started, update_type_of(update), route, exception)
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> BotMetrics:
+    """Общий реестр метрик процесса"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = BotMetrics()
+        return _metrics
@@ -41,6 +41,10 @@ class Product(Base):
     photos = relationship("ProductPhoto", back_populates="product", lazy="select")
     orders = relationship("Order", back_populates="product")
 
+    __table_args__ = (
+        sa.Index('ix_products_category_id', 'category_id'),
+    )
+
     def __repr__(self):
         return f"Product(id={self.id}, name='{self.name}', price={self.price})"
     
@@ -58,6 +62,10 @@ class ProductPhoto(Base):
     
     product = relationship("Product", back_populates="photos")
 
+    __table_args__ = (
+        sa.Index('ix_product_photos_product_id', 'product_id'),
+    )
+
 class OrderStatusEnum(Enum):
     CREATED = "Создан / Новый"
     CONFIRMED = "Подтверждён"
@@ -82,6 +90,11 @@ class OrderStatus(Base):
     
     order = relationship("Order", back_populates="status_history")
 
+    # История статусов заказа по времени (текущий статус - последняя запись)
+    __table_args__ = (
+        sa.Index('ix_order_statuses_order_id_created_at', 'order_id', 'created_at'),
+    )
+
 class Order(Base):
     __tablename__ = "orders"
     
@@ -100,6 +113,7 @@ class Order(Base):
     payment_type = sa.Column(sa.String(50))
     payment_status = sa.Column(sa.String(50))
     admin_notes = sa.Column(sa.Text)  # Пометки к заказу (заполняет админ)
+    idempotency_key = sa.Column(sa.String(64))  # Ключ черновика: повторное подтверждение не создает дубль
     
     # Связи
     user = relationship("User", foreign_keys=[user_id])
@@ -108,6 +122,13 @@ class Order(Base):
     status_history = relationship("OrderStatus", back_populates="order")
     notes = relationship("OrderNote", back_populates="order")
 
+    # Заказы пользователя и списки заказов по дате
+    __table_args__ = (
+        sa.Index('ix_orders_user_id_created_at', 'user_id', 'created_at'),
+        sa.Index('ix_orders_created_at', 'created_at'),
+        sa.Index('ux_orders_idempotency_key', 'idempotency_key', unique=True),
+    )
+
 class OrderNote(Base):
     __tablename__ = "order_notes"
     
@@ -121,6 +142,36 @@ class OrderNote(Base):
     order = relationship("Order", back_populates="notes")
     user = relationship("User")
 
+    __table_args__ = (
+        # Переписка по заказу листается страницами: keyset по (created_at, id)
+        sa.Index('ix_order_notes_order_id_created_at', 'order_id', 'created_at', 'id'),
+    )
+
+class OutboxEvent(Base):
+    """Уведомление о событии заказа, записанное в одной транзакции с изменением"""
+    __tablename__ = "outbox_events"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    chat_id = sa.Column(sa.BigInteger, nullable=False)  # Получатель (telegram_id)
+    order_id = sa.Column(sa.Integer, sa.ForeignKey("orders.id"))
+    event_type = sa.Column(sa.String(50), nullable=False)
+    payload = sa.Column(sa.Text)  # JSON с данными для текста уведомления
+    dedupe_key = sa.Column(sa.String(200))
+    status = sa.Column(sa.String(20), nullable=False, default='pending')
+    attempts = sa.Column(sa.Integer, nullable=False, default=0)
+    available_at = sa.Column(sa.DateTime, nullable=False, default=datetime.utcnow)
+    leased_until = sa.Column(sa.DateTime)  # Взято на отправку до этого времени
+    created_at = sa.Column(sa.DateTime, default=datetime.utcnow)
+    sent_at = sa.Column(sa.DateTime)
+    last_error = sa.Column(sa.Text)
+
+    # Выборка готовых к отправке и всех ожидающих для получателя
+    __table_args__ = (
+        sa.Index('ix_outbox_events_status_available_at', 'status', 'available_at'),
+        sa.Index('ix_outbox_events_chat_id_status', 'chat_id', 'status'),
+        sa.Index('ux_outbox_events_dedupe_key', 'dedupe_key', unique=True),
+    )
+
 class User(Base):
     __tablename__ = "users"
     
@@ -0,0 +1,298 @@
+# src/myconfbot/utils/profiler.py
+"""
+Выборочное профилирование обработчиков апдейтов
+
+Включается переменными окружения:
+    PROFILE_SAMPLE_RATE=0.01      - доля апдейтов, снимаемых cProfile (0 - выключено)
+    PROFILE_SLOW_THRESHOLD=2      - секунды; у более долгих апдейтов сохраняется стек
+    PROFILE_DIR=logs/profiles     - куда писать профили
+    PROFILE_MAX_FILES=200         - сколько последних профилей хранить
+
+Сводка по собранным профилям:
+    python -m src.myconfbot.utils.profiler --top 30 [--handler NAME] [--role admin]
+"""
+
+import argparse
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from telebot.handler_backends import BaseMiddleware
+
+from src.myconfbot.utils.bot_middleware import UPDATE_TYPES, callback_prefix, update_route
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз снимать стек одного зависшего апдейта
+MAX_STACKS_PER_UPDATE = 5
+
+
+class UpdateProfiler:
+    """
+    Профилировщик обработчиков
+
+    Выбранная доля вызовов снимается cProfile целиком. Независимо от
+    выборки сторожевой поток снимает стек обработчика, который работает
+    дольше порога. Профили и стеки пишутся в profile_dir с метаданными:
+    обработчик, префикс callback data и роль пользователя.
+
+    С Python 3.12 cProfile работает через sys.monitoring и активен для всего
+    процесса, поэтому одновременно профилируется не больше одного апдейта.
+    Параметры по умолчанию берутся из переменных окружения PROFILE_*.
+    """
+
+    def __init__(self, sample_rate: Optional[float] = None,
+                 slow_threshold: Optional[float] = None,
+                 profile_dir: Optional[Path] = None,
+                 max_files: Optional[int] = None,
+                 role_resolver: Optional[Callable[[int], str]] = None):
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+        self.slow_threshold = (slow_threshold if slow_threshold is not None
+                               else float(os.getenv('PROFILE_SLOW_THRESHOLD', '0')))
+        self.profile_dir = Path(profile_dir if profile_dir is not None else os.getenv('PROFILE_DIR', 'logs/profiles'))
+        self.max_files = max_files if max_files is not None else int(os.getenv('PROFILE_MAX_FILES', '200'))
+        self.role_resolver = role_resolver
+
+        self._profile_lock = threading.Lock()
+        self._active: Dict[int, dict] = {}
+        self._active_lock = threading.Lock()
+        self._watchdog: Optional[threading.Thread] = None
+        self._write_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.slow_threshold > 0
+
+    def instrument_bot(self, bot, menu_texts=()):
+        """Подключить профилировщик к боту (MiddlewareBot) через ProfilerMiddleware"""
+        if not self.enabled or any(isinstance(middleware, ProfilerMiddleware) for middleware in bot.middlewares or ()):
+            return
+
+        bot.setup_middleware(ProfilerMiddleware(self, menu_texts))
+
+        if self.slow_threshold > 0:
+            self._watchdog = threading.Thread(target=self._watch_loop, name='profiler-watchdog', daemon=True)
+            self._watchdog.start()
+
+        logger.info(
+            f"🔬 Профилирование включено: выборка {self.sample_rate:.2%}, "
+            f"порог {self.slow_threshold} с, каталог {self.profile_dir}"
+        )
+
+    def start(self) -> Tuple[Optional[cProfile.Profile], Optional[int], float]:
+        """Начать выборочное профилирование апдейта в текущем потоке"""
+        profile = self._start_profile()
+        watch_id = self._start_watch() if self.slow_threshold > 0 else None
+        return profile, watch_id, time.perf_counter()
+
+    def finish(self, state: Tuple[Optional[cProfile.Profile], Optional[int], float], name: str, update):
+        """Остановить профилирование (start) и сохранить профиль или стеки долгого апдейта"""
+        profile, watch_id, started = state
+        elapsed = time.perf_counter() - started
+        if profile is not None:
+            profile.disable()
+            self._profile_lock.release()
+        stacks = self._stop_watch(watch_id) if watch_id is not None else []
+
+        if profile is not None or stacks:
+            try:
+                self._save(name, update, elapsed, profile, stacks)
+            except Exception as e:
+                logger.error(f"❌ Ошибка сохранения профиля {name}: {e}")
+
+    # --- cProfile ---
+
+    def _start_profile(self) -> Optional[cProfile.Profile]:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if not self._profile_lock.acquire(blocking=False):
+            return None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Уже работает другой профилировщик (отладчик, coverage)
+            self._profile_lock.release()
+            return None
+        return profile
+
+    # --- стеки долгих апдейтов ---
+
+    def _start_watch(self) -> int:
+        thread_id = threading.get_ident()
+        with self._active_lock:
+            self._active[thread_id] = {'started': time.monotonic(), 'last_capture': None, 'stacks': []}
+        return thread_id
+
+    def _stop_watch(self, thread_id: int) -> List[str]:
+        with self._active_lock:
+            entry = self._active.pop(thread_id, None)
+        return entry['stacks'] if entry else []
+
+    def _watch_loop(self):
+        interval = max(min(self.slow_threshold / 2, 1.0), 0.05)
+        while True:
+            time.sleep(interval)
+            now = time.monotonic()
+            frames = None
+
+            with self._active_lock:
+                for thread_id, entry in self._active.items():
+                    last = entry['last_capture'] or entry['started']
+                    if now - last < self.slow_threshold or len(entry['stacks']) >= MAX_STACKS_PER_UPDATE:
+                        continue
+                    if frames is None:
+                        frames = sys._current_frames()
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        elapsed = now - entry['started']
+                        entry['stacks'].append(
+                            f"+{elapsed:.2f} с\n" + ''.join(traceback.format_stack(frame))
+                        )
+                        entry['last_capture'] = now
+
+    # --- запись и ротация ---
+
+    def _resolve_role(self, user_id: Optional[int]) -> str:
+        if user_id is None or self.role_resolver is None:
+            return 'unknown'
+        try:
+            return self.role_resolver(user_id)
+        except Exception as e:
+            logger.debug("Не удалось определить роль пользователя %s: %s", user_id, e)
+            return 'unknown'
+
+    def _save(self, name: str, update, elapsed: float,
+              profile: Optional[cProfile.Profile], stacks: List[str]):
+        from_user = getattr(update, 'from_user', None)
+        meta = {
+            'handler': name,
+            'callback_prefix': callback_prefix(getattr(update, 'data', None)),
+            'role': self._resolve_role(getattr(from_user, 'id', None)),
+            'duration_ms': round(elapsed * 1000, 1),
+            'sampled': profile is not None,
+            'slow': elapsed >= self.slow_threshold > 0,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'stacks': stacks,
+        }
+
+        safe_name = re.sub(r'[^\w.-]+', '_', name)
+        stem = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{safe_name}"
+
+        with self._write_lock:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            if profile is not None:
+                profile.dump_stats(str(self.profile_dir / f"{stem}.prof"))
+            with open(self.profile_dir / f"{stem}.json", 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            self._rotate()
+
+        logger.info(f"🔬 Профиль {name} ({meta['duration_ms']} мс) сохранен: {stem}")
+
+    def _rotate(self):
+        """Оставить только max_files последних профилей"""
+        metas = sorted(self.profile_dir.glob('*.json'))
+        for meta_path in metas[:max(len(metas) - self.max_files, 0)]:
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix('.prof').unlink(missing_ok=True)
+
+
+class ProfilerMiddleware(BaseMiddleware):
+    """Профилирование апдейта от pre_process до post_process; имя профиля - маршрут апдейта"""
+
+    def __init__(self, profiler: UpdateProfiler, menu_texts=()):
+        super().__init__()
+        self.update_types = UPDATE_TYPES
+        self.profiler = profiler
+        self.menu_texts = frozenset(menu_texts)
+
+    def pre_process(self, update, data):
+        data['_profile'] = self.profiler.start()
+
+    def post_process(self, update, data, exception):
+        state = data.pop('_profile', None)
+        if state is not None:
+            self.profiler.finish(state, update_route(update, data, self.menu_texts), update)
+
+
+def load_profiles(profile_dir: Path, handler: Optional[str] = None,
+                  role: Optional[str] = None) -> List[dict]:
+    """Прочитать метаданные профилей с фильтрацией по обработчику и роли"""
+    profiles = []
+    for meta_path in sorted(Path(profile_dir).glob('*.json')):
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Пропущен поврежденный профиль {meta_path}: {e}")
+            continue
+        if handler and handler not in meta.get('handler', ''):
+            continue
+        if role and meta.get('role') != role:
+            continue
+        meta['prof_path'] = meta_path.with_suffix('.prof')
+        profiles.append(meta)
+    return profiles
+
+
+def print_report(profiles: List[dict], top: int = 30, sort: str = 'cumulative'):
+    """Сводка: обработчики, самые горячие функции и места зависаний"""
+    if not profiles:
+        print("Профили не найдены")
+        return
+
+    print(f"Профилей: {len(profiles)}\n")
+    by_handler: Dict[str, List[float]] = {}
+    for meta in profiles:
+        by_handler.setdefault(meta['handler'], []).append(meta['duration_ms'])
+    print(f"{'обработчик':<50} {'шт':>5} {'сред, мс':>10} {'макс, мс':>10}")
+    for name, durations in sorted(by_handler.items(), key=lambda item: -sum(item[1])):
+        print(f"{name:<50} {len(durations):>5} {sum(durations) / len(durations):>10.1f} {max(durations):>10.1f}")
+
+    prof_files = [str(meta['prof_path']) for meta in profiles if meta['prof_path'].exists()]
+    if prof_files:
+        print(f"\nСамые горячие функции ({len(prof_files)} профилей cProfile):")
+        stats = pstats.Stats(*prof_files)
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+    # Последний кадр каждого снятого стека - место, где обработчик провел время
+    hot_lines = Counter()
+    for meta in profiles:
+        for stack in meta.get('stacks', []):
+            frames = [line.strip() for line in stack.splitlines() if line.strip().startswith('File ')]
+            if frames:
+                hot_lines[frames[-1]] += 1
+    if hot_lines:
+        print("\nГде стояли долгие апдейты:")
+        for line, count in hot_lines.most_common(top):
+            print(f"{count:>5}  {line}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сводка по профилям обработчиков")
+    parser.add_argument('--dir', default=os.getenv('PROFILE_DIR', 'logs/profiles'), help="каталог с профилями")
+    parser.add_argument('--top', type=int, default=30, help="сколько строк выводить")
+    parser.add_argument('--sort', default='cumulative', help="ключ сортировки pstats (cumulative, tottime, ...)")
+    parser.add_argument('--handler', help="фильтр по имени обработчика (подстрока)")
+    parser.add_argument('--role', help="фильтр по роли пользователя (admin, user)")
+    args = parser.parse_args(argv)
+
+    profiles = load_profiles(Path(args.dir), handler=args.handler, role=args.role)
+    print_report(profiles, top=args.top, sort=args.sort)
+
+
+if __name__ == '__main__':
+    main()
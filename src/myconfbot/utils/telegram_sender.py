@@ -0,0 +1,104 @@
+# src/myconfbot/utils/telegram_sender.py
+"""
+Отправка сообщений с учетом ограничений Bot API
+
+Telegram допускает около 30 сообщений в секунду на бота и около одного
+сообщения в секунду в один чат; при превышении возвращает 429 с
+retry_after. Фоновые рассылки (уведомления о заказах) идут через
+RateLimitedSender, чтобы не упираться в эти ограничения и не тормозить
+ответы пользователям.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from telebot import apihelper
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity подряд"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> float:
+        """Взять токены; 0 - взяты, иначе сколько секунд ждать"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1):
+        """Дождаться и взять токены"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """retry_after из ответа 429 (секунды) или None"""
+    if isinstance(error, apihelper.ApiTelegramException) and error.error_code == 429:
+        parameters = (error.result_json or {}).get('parameters') or {}
+        return float(parameters.get('retry_after', 1))
+    return None
+
+
+class RateLimitedSender:
+    """
+    Отправка сообщений не быстрее rate_per_second всего и chat_interval секунд в один чат
+
+    После ответа 429 вся отправка приостанавливается на retry_after, а
+    исключение пробрасывается вызывающему - он решает, когда повторить.
+    """
+
+    def __init__(self, bot, rate_per_second: float = None, chat_interval: float = None):
+        self.bot = bot
+        rate_per_second = rate_per_second or float(os.getenv('NOTIFY_RATE_PER_SECOND', '25'))
+        self.chat_interval = chat_interval if chat_interval is not None else float(os.getenv('NOTIFY_CHAT_INTERVAL', '1'))
+        self._bucket = TokenBucket(rate_per_second)
+        self._last_sent: Dict[int, float] = {}
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_for_chat(self, chat_id: int):
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self._paused_until - now, self._last_sent.get(chat_id, 0.0) + self.chat_interval - now, 0.0)
+            # Резервируем слот чата, чтобы параллельная отправка ждала следующий
+            self._last_sent[chat_id] = now + wait
+            if len(self._last_sent) > 10000:
+                horizon = now - self.chat_interval
+                self._last_sent = {chat: sent for chat, sent in self._last_sent.items() if sent > horizon}
+        if wait:
+            time.sleep(wait)
+        self._bucket.acquire()
+
+    def send_message(self, chat_id: int, text: str, **kwargs):
+        self._wait_for_chat(chat_id)
+        try:
+            return self.bot.send_message(chat_id, text, **kwargs)
+        except apihelper.ApiTelegramException as e:
+            delay = retry_after(e)
+            if delay is not None:
+                with self._lock:
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                logger.warning(f"⏳ Bot API просит подождать {delay:.0f} с перед отправкой")
+            raise
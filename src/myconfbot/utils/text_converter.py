@@ -1,31 +1,141 @@
 import re
+from functools import lru_cache
+
+# Поддерживаемые режимы вывода
+PARSE_MODE_HTML = 'HTML'
+PARSE_MODE_MARKDOWN_V2 = 'MarkdownV2'
+
+# Простая разметка админа: `код`, **жирный**, _курсив_ (не внутри слов, как в snake_case).
+# Каждая ветка начинается с литерала, поэтому движок re быстро пропускает обычный текст.
+_INLINE_PATTERN = (
+    r'`(?P<code>[^`\n]+)`'
+    r'|\*\*(?P<bold>[^\n]+?)\*\*'
+    r'|_(?<!\w_)(?P<italic>[^_\n]+?)_(?!\w)'
+)
+_INLINE_RE = re.compile(_INLINE_PATTERN)
+
+# Весь документ за один проход: элемент списка (•, - или * с пробелом в начале строки) + inline
+_DOCUMENT_RE = re.compile(r'(?P<bullet>[•\-*](?<![^\n].)[ \t]+)|' + _INLINE_PATTERN)
+
+# Символы, при наличии которых внутри жирного/курсива нужен повторный разбор
+_MARKUP_CHARS = ('`', '**', '_')
+
+# Экранирование: цепочка str.replace и regex заметно быстрее str.translate на кириллице
+_MARKDOWN_V2_ESCAPE_RE = re.compile(r'([\\_*\[\]()~`>#+\-=|{}.!])')
+_MARKDOWN_V2_CODE_ESCAPE_RE = re.compile(r'([\\`])')
+
+_HTML_TAGS = {
+    'bold': ('<b>', '</b>'),
+    'italic': ('<i>', '</i>'),
+    'code': ('<code>', '</code>'),
+}
+
+_MARKDOWN_V2_TAGS = {
+    'bold': ('*', '*'),
+    'italic': ('_', '_'),
+    'code': ('`', '`'),
+}
+
+
+def _escape_html(text):
+    """Экранирование HTML (& первым, чтобы не задеть готовые сущности)"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _escape_markdown_v2(text):
+    """Экранирование служебных символов MarkdownV2"""
+    return _MARKDOWN_V2_ESCAPE_RE.sub(r'\\\1', text)
+
+
+def _html_token(match):
+    """Замена одного токена разметки на HTML-теги"""
+    kind = match.lastgroup
+    if kind == 'bullet':
+        return '• '
+
+    value = match.group(kind)
+    opening, closing = _HTML_TAGS[kind]
+    if kind != 'code' and any(char in value for char in _MARKUP_CHARS):
+        # Внутри жирного/курсива допускается вложенная разметка
+        value = _INLINE_RE.sub(_html_token, value)
+    return f"{opening}{value}{closing}"
+
+
+def _render_html(text):
+    """
+    HTML: экранирование не затрагивает символы разметки, поэтому текст
+    экранируется целиком, а затем за один проход заменяются токены
+    """
+    return _DOCUMENT_RE.sub(_html_token, _escape_html(text))
+
+
+def _render_markdown_v2(text, token_re=_DOCUMENT_RE):
+    """MarkdownV2: один проход, обычный текст между токенами экранируется"""
+    parts = []
+    position = 0
+
+    for match in token_re.finditer(text):
+        parts.append(_escape_markdown_v2(text[position:match.start()]))
+        position = match.end()
+        kind = match.lastgroup
+
+        if kind == 'bullet':
+            parts.append('• ')
+            continue
+
+        value = match.group(kind)
+        opening, closing = _MARKDOWN_V2_TAGS[kind]
+
+        if kind == 'code':
+            value = _MARKDOWN_V2_CODE_ESCAPE_RE.sub(r'\\\1', value)
+        elif any(char in value for char in _MARKUP_CHARS):
+            # Внутри жирного/курсива допускается вложенная разметка
+            value = _render_markdown_v2(value, _INLINE_RE)
+        else:
+            value = _escape_markdown_v2(value)
+
+        parts.append(f"{opening}{value}{closing}")
+
+    parts.append(_escape_markdown_v2(text[position:]))
+    return ''.join(parts)
+
+
+_RENDERERS = {
+    PARSE_MODE_HTML: _render_html,
+    PARSE_MODE_MARKDOWN_V2: _render_markdown_v2,
+}
+
+
+@lru_cache(maxsize=256)
+def render_simple_markup(text, parse_mode=PARSE_MODE_HTML):
+    """
+    Преобразует простую разметку админа в форматирование Telegram
+
+    Args:
+        text: Текст с простой разметкой (**жирный**, _курсив_, `код`, списки)
+        parse_mode: 'HTML' или 'MarkdownV2'
+
+    Returns:
+        str: Текст, готовый к отправке с указанным parse_mode
+    """
+    renderer = _RENDERERS.get(parse_mode)
+    if renderer is None:
+        raise ValueError(f"Неподдерживаемый режим форматирования: {parse_mode}")
+
+    return renderer(text)
+
 
 def simple_text_to_html(text):
     """
     Преобразует простой текст в HTML форматирование
     для обычных пользователей
     """
-    # Заголовки (строка с ** в начале и конце)
-    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-    
-    # Курсив (строка с _ в начале и конце)
-    text = re.sub(r'_(.+?)_', r'<i>\1</i>', text)
-    
-    # Моноширинный (строка с ` в начале и конце)
-    text = re.sub(r'`(.+?)`', r'<code>\1</code>', text)
-    
-    # Списки (строки начинающиеся с •, -, или *)
-    text = re.sub(r'^[•\-*]\s+(.+)$', r'• \1', text, flags=re.MULTILINE)
-    
-    # Переносы строк
-    text = text.replace('\n', '<br>')
-    
-    # Экранирование HTML символов
-    text = text.replace('&', '&amp;')
-    text = text.replace('<', '&lt;')
-    text = text.replace('>', '&gt;')
-    
-    return text
+    return render_simple_markup(text, PARSE_MODE_HTML)
+
+
+def simple_text_to_markdown_v2(text):
+    """Преобразует простой текст в форматирование MarkdownV2"""
+    return render_simple_markup(text, PARSE_MODE_MARKDOWN_V2)
 
 def get_formatting_help():
     """Возвращает справку по форматированию для админа"""
@@ -50,4 +160,4 @@ _Мы рады вас видеть_
 • Пирожные
 • Конфеты
 🎂 Вкуснейшие десерты!
-"""
\ No newline at end of file
+"""
@@ -0,0 +1,318 @@
+# src/myconfbot/utils/update_lanes.py
+"""
+Полосы приоритета для апдейтов
+
+TeleBot кладет все апдейты в одну очередь пула потоков, поэтому в пик
+просмотр каталога (каждое нажатие - пачка фотографий) задерживает смену
+статуса или стоимости заказа администратором. LanePool заменяет пул
+TeleBot: апдейты раскладываются по полосам, и свободный поток берет
+задачу из самой приоритетной полосы, где есть готовая к запуску:
+
+    admin  - действия администраторов
+    order  - оформление заказа и ввод данных в диалогах
+    browse - каталог, меню, профиль и всё остальное
+
+Апдейты одного чата выполняются по очереди и в порядке поступления:
+пока выполняется апдейт чата, его следующие апдейты ждут, а апдейт
+не обгоняет более ранний апдейт того же чата из менее приоритетной
+полосы (иначе ответ в диалоге мог бы обработаться раньше нажатия,
+которое этот диалог начинает).
+
+Если задача полосы ждала в очереди дольше ее бюджета (LANE_ORDER_MAX_WAIT,
+LANE_BROWSE_MAX_WAIT; 0 - ждать сколько угодно), она не выполняется:
+пользователь сразу получает короткий ответ «бот занят». Время ожидания
+по полосам - в метрике myconfbot_update_queue_wait_seconds, сброшенные
+апдейты - в myconfbot_updates_shed_total.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LANE_ADMIN = 'admin'
+LANE_ORDER = 'order'
+LANE_BROWSE = 'browse'
+LANES = (LANE_ADMIN, LANE_ORDER, LANE_BROWSE)  # В порядке приоритета
+
+# Маршруты администратора (роль могла еще не попасть в кэш)
+ADMIN_CALLBACK_PREFIXES = (
+    'orderadm_', 'admin_', 'edit_', 'product_', 'category_', 'photo_',
+    'status_', 'payment_status_', 'user_', 'select_category_', 'quantity_type_',
+)
+# Шаги оформления заказа
+ORDER_CALLBACK_PREFIXES = (
+    'order_start_', 'order_date_', 'order_time_', 'order_custom_', 'order_delivery_',
+    'order_payment_', 'order_confirm_', 'delivery_type_', 'skip_notes', 'userfavorite_order_',
+    'order_favorite_', 'my_order_notes_',
+)
+BUSY_TEXT = "⏳ Бот сейчас перегружен. Попробуйте еще раз через минуту."
+
+
+def classify_update(update, is_admin: Optional[Callable[[int], bool]] = None,
+                    menu_texts: FrozenSet[str] = frozenset()) -> str:
+    """
+    Полоса апдейта (message, callback_query...) по роли отправителя и маршруту
+
+    Команды и кнопки меню (menu_texts) - навигация, прочий текст - ввод
+    в диалоге (дата, адрес, примечание, стоимость).
+    """
+    from_user = getattr(update, 'from_user', None)
+    if from_user is not None and is_admin is not None and is_admin(from_user.id):
+        return LANE_ADMIN
+
+    data = getattr(update, 'data', None)
+    if data is not None:
+        if data.startswith(ADMIN_CALLBACK_PREFIXES):
+            return LANE_ADMIN
+        if data.startswith(ORDER_CALLBACK_PREFIXES):
+            return LANE_ORDER
+        return LANE_BROWSE
+
+    if getattr(update, 'content_type', None) == 'text':
+        text = update.text or ''
+        if text.startswith('/') or text in menu_texts:
+            return LANE_BROWSE
+        return LANE_ORDER
+    if getattr(update, 'content_type', None) in ('photo', 'contact', 'location'):
+        return LANE_ORDER  # Фото к примечанию, телефон, адрес
+    return LANE_BROWSE
+
+
+class LaneTask:
+    """Задача в очереди: апдейт (task, args, kwargs), его полоса и чат"""
+
+    __slots__ = ('item', 'lane', 'chat', 'enqueued_at')
+
+    def __init__(self, item: tuple, lane: str, chat: Optional[Hashable]):
+        self.item = item
+        self.lane = lane
+        self.chat = chat
+        self.enqueued_at = time.monotonic()
+
+
+class LaneQueue:
+    """
+    Очередь задач с полосами приоритета и порядком внутри чата
+
+    get() выдает первую задачу самой приоритетной полосы, чат которой
+    не занят и у которой нет более ранней задачи того же чата. Чат
+    занят до done() выданной задачи.
+    """
+
+    def __init__(self, classify: Callable[[tuple], str], chat_of: Callable[[tuple], Optional[Hashable]],
+                 max_wait: Dict[str, float], shed: Callable[[str, tuple], None], metrics=None):
+        self.classify = classify
+        self.chat_of = chat_of
+        self.max_wait = max_wait
+        self.shed = shed
+        self.metrics = metrics
+        self._lanes: Dict[str, deque] = {lane: deque() for lane in LANES}
+        self._chats: Dict[Hashable, deque] = {}  # Ожидающие задачи чата в порядке поступления
+        self._busy = set()  # Чаты, задача которых выполняется
+        self._condition = threading.Condition()
+
+    def put(self, item: tuple):
+        try:
+            lane = self.classify(item)
+            chat = self.chat_of(item)
+        except Exception as e:
+            logger.error(f"❌ Ошибка классификации апдейта: {e}")
+            lane, chat = LANE_BROWSE, None
+        task = LaneTask(item, lane, chat)
+        with self._condition:
+            self._lanes[lane].append(task)
+            if chat is not None:
+                self._chats.setdefault(chat, deque()).append(task)
+            self._condition.notify()
+
+    def _ready(self, task: LaneTask) -> bool:
+        return task.chat is None or task.chat not in self._busy and self._chats[task.chat][0] is task
+
+    def _take(self) -> Optional[LaneTask]:
+        for lane in LANES:
+            tasks = self._lanes[lane]
+            for index, task in enumerate(tasks):
+                if self._ready(task):
+                    del tasks[index]
+                    if task.chat is not None:
+                        pending = self._chats[task.chat]
+                        pending.popleft()
+                        if not pending:
+                            del self._chats[task.chat]
+                        self._busy.add(task.chat)
+                    return task
+        return None
+
+    def get(self, timeout: Optional[float] = None) -> Tuple[LaneTask, tuple]:
+        """
+        Следующая задача и то, что выполнить: (task, args, kwargs) апдейта
+        или ответ «бот занят», если задача ждала дольше бюджета полосы
+
+        Raises:
+            queue.Empty: Готовой задачи нет дольше timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                task = self._take()
+                if task is not None:
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._condition.wait(remaining)
+
+        waited = time.monotonic() - task.enqueued_at
+        if self.metrics is not None:
+            self.metrics.update_queue_wait.observe(waited, task.lane)
+        budget = self.max_wait.get(task.lane, 0)
+        if budget and waited > budget:
+            # Вместо обработчика - короткий ответ (выполнит тот же рабочий поток)
+            return task, (self.shed, (task.lane, task.item), {})
+        return task, task.item
+
+    def done(self, task: LaneTask):
+        """Задача выполнена: следующая задача ее чата может быть выдана"""
+        if task.chat is None:
+            return
+        with self._condition:
+            self._busy.discard(task.chat)
+            self._condition.notify_all()
+
+    def qsize(self) -> int:
+        with self._condition:
+            return sum(len(tasks) for tasks in self._lanes.values())
+
+    def sizes(self) -> Dict[str, int]:
+        with self._condition:
+            return {lane: len(tasks) for lane, tasks in self._lanes.items()}
+
+
+class LanePool:
+    """
+    Пул потоков TeleBot с полосами приоритета и сбросом нагрузки
+
+    Реализует интерфейс пула, который использует TeleBot: put(),
+    raise_exceptions(), clear_exceptions(), close() и exception_event.
+    Подключается install() после создания бота; исключение задачи
+    передается exception_handler бота, необработанное поднимается в
+    цикле polling, как и в штатном пуле.
+    """
+
+    def __init__(self, telebot, num_threads: int = None,
+                 is_admin: Optional[Callable[[int], bool]] = None, menu_texts: Iterable[str] = (),
+                 max_wait: Optional[Dict[str, float]] = None, metrics=None):
+        self.telebot = telebot
+        self.num_threads = num_threads or int(os.getenv('BOT_WORKER_THREADS', '2'))
+        self.is_admin = is_admin
+        self.menu_texts = frozenset(menu_texts)
+        self.metrics = metrics
+        if max_wait is None:
+            max_wait = {
+                LANE_ADMIN: 0,
+                LANE_ORDER: float(os.getenv('LANE_ORDER_MAX_WAIT', '0')),
+                LANE_BROWSE: float(os.getenv('LANE_BROWSE_MAX_WAIT', '5')),
+            }
+        self.tasks = LaneQueue(self._classify, self._chat, max_wait, self._shed, metrics)
+        self.exception_event = threading.Event()
+        self.exception_info: Optional[Exception] = None
+        self._running = True
+        self.workers: List[threading.Thread] = [
+            threading.Thread(target=self._work, name=f"LaneWorker{number + 1}", daemon=True)
+            for number in range(self.num_threads)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    @classmethod
+    def install(cls, bot, **kwargs) -> Optional['LanePool']:
+        """Заменить пул потоков бота (без потоков - threaded=False - ничего не делает)"""
+        if not bot.threaded or isinstance(bot.worker_pool, cls):
+            return None
+        pool = cls(bot, **kwargs)
+        previous, bot.worker_pool = bot.worker_pool, pool
+        # Потоки штатного пула простаивают; close() ждет их в фоне, не задерживая запуск
+        threading.Thread(target=previous.close, name='worker-pool-close', daemon=True).start()
+        logger.info(f"🚥 Полосы приоритета апдейтов: потоков {pool.num_threads}, бюджеты ожидания "
+                    + ', '.join(f"{lane} {seconds:g} с" for lane, seconds in pool.tasks.max_wait.items() if seconds))
+        return pool
+
+    # --- интерфейс пула TeleBot ---
+
+    def put(self, func, *args, **kwargs):
+        self.tasks.put((func, args, kwargs))
+
+    def raise_exceptions(self):
+        if self.exception_event.is_set():
+            raise self.exception_info
+
+    def clear_exceptions(self):
+        self.exception_event.clear()
+
+    def close(self):
+        self._running = False
+        for worker in self.workers:
+            if worker is not threading.current_thread():
+                worker.join()
+
+    # --- рабочие потоки ---
+
+    def _work(self):
+        while self._running:
+            try:
+                task, (function, args, kwargs) = self.tasks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                function(*args, **kwargs)
+            except Exception as e:
+                self._on_exception(e)
+            finally:
+                self.tasks.done(task)
+
+    def _on_exception(self, error: Exception):
+        handler = self.telebot.exception_handler
+        if handler is not None and handler.handle(error):
+            return
+        self.exception_info = error
+        self.exception_event.set()
+
+    def _classify(self, item: tuple) -> str:
+        task, args, kwargs = item
+        update = args[0] if args else None
+        if update is None or isinstance(update, list):
+            return LANE_BROWSE  # Слушатели получают список апдейтов
+        return classify_update(update, self.is_admin, self.menu_texts)
+
+    @staticmethod
+    def _chat(item: tuple) -> Optional[Hashable]:
+        """Чат апдейта (None - задача без чата, порядок не важен)"""
+        task, args, kwargs = item
+        update = args[0] if args else None
+        chat = getattr(update, 'chat', None) or getattr(getattr(update, 'message', None), 'chat', None)
+        if chat is not None:
+            return chat.id
+        from_user = getattr(update, 'from_user', None)
+        return ('user', from_user.id) if from_user is not None else None
+
+    def _shed(self, lane: str, item: Tuple):
+        """Ответ на сброшенный апдейт вместо его обработки"""
+        task, args, kwargs = item
+        update = args[0] if args else None
+        update_type = kwargs.get('update_type', 'task')
+        if self.metrics is not None:
+            self.metrics.updates_shed.inc(lane, update_type)
+        logger.warning(f"🚥 Апдейт {update_type} (полоса {lane}) сброшен: очередь перегружена")
+        try:
+            if getattr(update, 'data', None) is not None:
+                self.telebot.answer_callback_query(update.id, BUSY_TEXT, show_alert=False)
+            elif getattr(update, 'chat', None) is not None:
+                self.telebot.send_message(update.chat.id, BUSY_TEXT)
+        except Exception as e:
+            logger.debug(f"Не удалось ответить на сброшенный апдейт: {e}")
@@ -0,0 +1,75 @@
+# src/myconfbot/utils/user_context.py
+"""
+Пользователь апдейта
+
+Почти каждый обработчик ищет отправителя по telegram_id: проверка прав,
+имя для примечания, id для заказа или избранного. DatabaseManager
+находит пользователя один раз на апдейт (instrument_bot), держит его в
+unit of work апдейта и в кэше UserContextCache с коротким TTL, а методы
+БД берут внутренний id оттуда вместо повторного запроса.
+
+Изменения пользователя через DatabaseManager (события UserCreated,
+UserChanged) сбрасывают кэш сразу; TTL ограничивает устаревание при
+записи в обход DatabaseManager (скрипты, другой процесс).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class UserContext:
+    """Строка пользователя, нужная обработчикам апдейта"""
+    id: int
+    telegram_id: int
+    is_admin: bool
+    full_name: Optional[str] = None
+    phone: Optional[str] = None
+
+
+class UserContextCache:
+    """Пользователи по telegram_id на ttl секунд, не больше max_size записей"""
+
+    def __init__(self, ttl: float = None, max_size: int = 10000):
+        self.ttl = ttl if ttl is not None else float(os.getenv('USER_CONTEXT_TTL', '30'))
+        self.max_size = max_size
+        self._items: 'OrderedDict[int, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, telegram_id: int) -> Optional[UserContext]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            item = self._items.get(telegram_id)
+            if item is None:
+                return None
+            context, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._items[telegram_id]
+                return None
+            return context
+
+    def put(self, context: UserContext):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._items.pop(context.telegram_id, None)
+            self._items[context.telegram_id] = (context, time.monotonic() + self.ttl)
+            # Записи добавляются по порядку, поэтому самые старые - в начале
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, telegram_id: int):
+        with self._lock:
+            self._items.pop(telegram_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -1,7 +1,13 @@
 # tests/conftest.py
 
 import logging
+import os
+
 import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from src.myconfbot.utils.database import DatabaseManager, create_database_engine, set_db_manager
 
 # @pytest.fixture(autouse=True)
 # def disable_logging():
@@ -12,4 +18,111 @@ import pytest
 
 @pytest.fixture(autouse=True)
 def set_test_logging():
-    logging.getLogger().setLevel(logging.WARNING)
\ No newline at end of file
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+@pytest.fixture(scope='session')
+def worker_id() -> str:
+    """Имя воркера pytest-xdist ('master' без xdist)"""
+    return os.getenv('PYTEST_XDIST_WORKER', 'master')
+
+
+def _ensure_postgres_database(url) -> None:
+    """Создать базу PostgreSQL воркера, если ее нет"""
+    server = create_database_engine(url.set(database='postgres').render_as_string(hide_password=False))
+    server = server.execution_options(isolation_level='AUTOCOMMIT')
+    try:
+        with server.connect() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {'name': url.database}
+            ).scalar()
+            if not exists:
+                connection.execute(text(f'CREATE DATABASE "{url.database}"'))
+    finally:
+        server.dispose()
+
+
+@pytest.fixture(scope='session')
+def worker_database_url(tmp_path_factory, worker_id) -> str:
+    """
+    URL отдельной базы воркера
+
+    По умолчанию - файловая SQLite во временном каталоге воркера. Если задан
+    TEST_DATABASE_URL с PostgreSQL, каждый воркер получает свою базу
+    <имя>_<воркер>, поэтому тесты можно гонять параллельно (pytest -n auto).
+    """
+    base_url = os.getenv('TEST_DATABASE_URL')
+    if base_url and make_url(base_url).get_backend_name() == 'postgresql':
+        url = make_url(base_url)
+        url = url.set(database=f"{url.database}_{worker_id}")
+        _ensure_postgres_database(url)
+        return url.render_as_string(hide_password=False)
+    return f"sqlite:///{tmp_path_factory.mktemp(f'db-{worker_id}') / 'confbot.db'}"
+
+
+@pytest.fixture
+def db_manager_factory():
+    """
+    Фабрика менеджеров БД: make(url='sqlite://', create_tables=True)
+
+    По умолчанию - SQLite в памяти, своя для каждого вызова.
+    Созданные менеджеры закрываются после теста.
+    """
+    created = []
+
+    def make(url: str = 'sqlite://', create_tables: bool = True) -> DatabaseManager:
+        manager = DatabaseManager(url, create_tables=create_tables)
+        created.append(manager)
+        return manager
+
+    yield make
+    for manager in created:
+        manager.dispose()
+
+
+@pytest.fixture
+def db_manager(db_manager_factory) -> DatabaseManager:
+    """Чистая база в памяти на один тест"""
+    return db_manager_factory()
+
+
+@pytest.fixture(scope='session')
+def worker_db_manager(worker_database_url):
+    """Общая база воркера на всю сессию (для тестов, которым нужен файл или PostgreSQL)"""
+    manager = DatabaseManager(worker_database_url)
+    yield manager
+    manager.dispose()
+
+
+@pytest.fixture
+def global_db_manager(db_manager):
+    """Подставить db_manager теста в get_db_manager() для кода, использующего общий менеджер"""
+    previous = set_db_manager(db_manager)
+    yield db_manager
+    set_db_manager(previous)
+
+
+@pytest.fixture
+def customer(db_manager) -> int:
+    """telegram_id зарегистрированного клиента"""
+    telegram_id = 1001
+    db_manager.upsert_user(telegram_id, 'Клиент', 'customer')
+    return telegram_id
+
+
+@pytest.fixture
+def admin(db_manager) -> int:
+    """telegram_id зарегистрированного администратора"""
+    telegram_id = 9001
+    db_manager.upsert_user(telegram_id, 'Кондитер', 'admin', is_admin=True)
+    return telegram_id
+
+
+@pytest.fixture
+def product_id(db_manager) -> int:
+    """Товар в категории 'Торты'"""
+    db_manager.add_category('Торты')
+    category_id = db_manager.get_all_categories()[0]['id']
+    return db_manager.add_product_returning_id({
+        'name': 'Наполеон', 'category_id': category_id, 'price': 1500, 'measurement_unit': 'шт',
+    })
@@ -0,0 +1,99 @@
+# tests/test_album_sender.py
+
+from types import SimpleNamespace
+
+import pytest
+from telebot import apihelper
+
+from src.myconfbot.utils.album_sender import AlbumSender
+
+
+class RecordingBot:
+    """Запоминает, что ушло в Bot API: file_id или загрузка файла"""
+
+    def __init__(self):
+        self.calls = []
+        self.uploads = 0
+        self.reject_file_ids = False
+
+    def _message(self, photo):
+        if isinstance(photo, str):
+            if self.reject_file_ids:
+                raise apihelper.ApiTelegramException('sendMediaGroup', None, {
+                    'error_code': 400, 'description': 'Bad Request: wrong file identifier'})
+            return SimpleNamespace(photo=[SimpleNamespace(file_id=photo)])
+        self.uploads += 1
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=f"id-{photo.name.rsplit('/', 1)[-1]}")])
+
+    def send_media_group(self, chat_id, media, **kwargs):
+        self.calls.append(('album', [item.caption for item in media]))
+        return [self._message(item.media) for item in media]
+
+    def send_photo(self, chat_id, photo, caption=None, **kwargs):
+        self.calls.append(('photo', [caption]))
+        return self._message(photo)
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.calls.append(('message', [text]))
+
+
+@pytest.fixture
+def photos(tmp_path):
+    paths = []
+    for number in range(12):
+        path = tmp_path / f"{number}.jpg"
+        path.write_bytes(b'jpeg' * (number + 1))
+        paths.append(str(path))
+    return paths
+
+
+def test_photos_are_split_into_media_groups(photos):
+    bot = RecordingBot()
+
+    messages = AlbumSender(bot).send_album(77, photos, caption='Наполеон')
+
+    assert len(messages) == 12
+    assert bot.calls == [('album', ['Наполеон'] + [None] * 9), ('album', [None, None])]
+
+
+def test_repeated_album_reuses_file_ids(photos):
+    bot = RecordingBot()
+    sender = AlbumSender(bot)
+
+    sender.send_album(77, photos)
+    sender.send_album(78, photos)
+
+    assert bot.uploads == 12
+    assert len(sender.cache) == 12
+
+
+def test_changed_file_is_uploaded_again(photos):
+    bot = RecordingBot()
+    sender = AlbumSender(bot)
+    sender.send_album(77, photos[:1])
+
+    with open(photos[0], 'ab') as f:
+        f.write(b'retouched')
+    sender.send_album(77, photos[:1])
+
+    assert bot.calls == [('photo', [None]), ('photo', [None])]
+    assert bot.uploads == 2
+
+
+def test_rejected_file_ids_fall_back_to_upload(photos):
+    bot = RecordingBot()
+    sender = AlbumSender(bot)
+    sender.send_album(77, photos[:3])
+
+    bot.reject_file_ids = True
+    messages = sender.send_album(77, photos[:3])
+
+    assert len(messages) == 3
+    assert bot.uploads == 6
+
+
+def test_missing_files_are_skipped(tmp_path):
+    bot = RecordingBot()
+
+    assert AlbumSender(bot).send_album(77, [tmp_path / 'gone.jpg']) == []
+    assert bot.calls == []
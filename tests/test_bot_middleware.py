@@ -0,0 +1,131 @@
+# tests/test_bot_middleware.py
+
+import json
+
+import pytest
+import requests
+from telebot import apihelper
+from telebot.handler_backends import BaseMiddleware
+
+from src.myconfbot.utils.bot_middleware import MiddlewareBot, update_route
+from src.myconfbot.utils.metrics import BotMetrics
+from tests.updates import callback_update, message_update
+
+
+class RecordingMiddleware(BaseMiddleware):
+    def __init__(self):
+        super().__init__()
+        self.update_types = ['message', 'callback_query']
+        self.calls = []
+
+    def pre_process(self, update, data):
+        self.calls.append(('pre', data.get('step')))
+
+    def post_process(self, update, data, exception):
+        self.calls.append(('post', type(exception).__name__ if exception else None))
+
+
+@pytest.fixture
+def bot():
+    return MiddlewareBot('1:test', threaded=False)
+
+
+@pytest.fixture
+def metrics(bot):
+    metrics = BotMetrics()
+    metrics.instrument_bot(bot, menu_texts=['🎂 Продукция'])
+    return metrics
+
+
+def test_route_hides_free_text():
+    assert update_route(callback_update('order_product_15').callback_query) == 'callback:order_product'
+    assert update_route(message_update('/start').message) == 'command'
+    assert update_route(message_update('🎂 Продукция').message, menu_texts=frozenset({'🎂 Продукция'})) \
+        == 'menu:🎂 Продукция'
+    assert update_route(message_update('ул. Ленина, 1').message) == 'message:text'
+
+
+def test_metrics_record_routes_and_errors(bot, metrics):
+    @bot.message_handler(commands=['start'])
+    def start(message):
+        pass
+
+    @bot.callback_query_handler(func=lambda call: True)
+    def broken(call):
+        raise ValueError('boom')
+
+    bot.process_new_updates([message_update('/start'), callback_update('order_product_15')])
+
+    assert {labels for labels, _ in metrics.handler_duration.snapshot().items()} == {
+        ('command',), ('callback:order_product',)}
+    assert metrics.handler_errors.items() == [(('callback:order_product', 'ValueError'), 1.0)]
+    assert metrics.handlers_in_flight.items() == [((), 0.0)]
+
+
+class AddressDialog:
+    def __init__(self, bot):
+        self.bot = bot
+        self.answers = []
+        bot.register_message_handler(self.start, commands=['address'])
+
+    def start(self, message):
+        self.bot.register_next_step_handler(message, self.process_address)
+
+    def process_address(self, message):
+        self.answers.append(message.text)
+
+
+def test_next_step_handler_runs_middlewares(bot, metrics):
+    recorder = RecordingMiddleware()
+    bot.setup_middleware(recorder)
+    dialog = AddressDialog(bot)
+
+    bot.process_new_updates([message_update('/address', 1)])
+    bot.process_new_updates([message_update('ул. Ленина, 1', 2)])
+
+    assert dialog.answers == ['ул. Ленина, 1']
+    assert recorder.calls == [
+        ('pre', None), ('post', None), ('pre', 'AddressDialog.process_address'), ('post', None)]
+    assert ('step:AddressDialog.process_address',) in metrics.handler_duration.snapshot()
+
+
+def test_api_sender_counts_http_errors(monkeypatch):
+    def send(method, request_url, **kwargs):
+        response = requests.Response()
+        response.status_code = 429
+        response._content = json.dumps(
+            {'ok': False, 'error_code': 429, 'description': 'Too Many Requests'}).encode()
+        return response
+
+    monkeypatch.setattr(apihelper, 'CUSTOM_REQUEST_SENDER', send)
+    metrics = BotMetrics()
+    metrics.instrument_api()
+
+    with pytest.raises(apihelper.ApiTelegramException):
+        apihelper.send_message('1:test', 5, 'Привет')
+
+    assert metrics.api_errors.items() == [(('sendMessage', '429'), 1.0)]
+    assert ('sendMessage',) in metrics.api_duration.snapshot()
+
+
+def test_metrics_server_reads_port_at_start(monkeypatch):
+    monkeypatch.setenv('METRICS_PORT', '0')
+
+    assert BotMetrics().start_http_server() is False
+
+
+def test_unit_of_work_wraps_next_step_handler(bot, db_manager, customer):
+    seen = []
+
+    def process_address(message):
+        seen.append((db_manager.current_unit_of_work is not None, db_manager.current_user.telegram_id))
+
+    db_manager.instrument_bot(bot)
+    bot.register_message_handler(lambda message: bot.register_next_step_handler(message, process_address),
+                                 commands=['address'])
+
+    bot.process_new_updates([message_update('/address', 1, user_id=customer)])
+    bot.process_new_updates([message_update('ул. Ленина, 1', 2, user_id=customer)])
+
+    assert seen == [(True, customer)]
+    assert db_manager.current_unit_of_work is None
@@ -0,0 +1,201 @@
+# tests/test_database.py
+
+import threading
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+
+from src.myconfbot.utils.database import decode_history_cursor, encode_history_cursor
+
+
+def order_data(product_id: int) -> dict:
+    return {'product_id': product_id, 'quantity': 1, 'delivery_type': 'Самовывоз', 'total_cost': 1500}
+
+
+def test_factory_databases_are_isolated(db_manager_factory):
+    first = db_manager_factory()
+    second = db_manager_factory()
+    first.upsert_user(1, 'Первый')
+
+    assert first.get_user_info(1) is not None
+    assert second.get_user_info(1) is None
+
+
+def test_worker_database_is_migrated(worker_db_manager):
+    user, _ = worker_db_manager.upsert_user(424242, 'Воркер')
+
+    assert worker_db_manager.get_user_info(424242)['id'] == user.id
+
+
+def test_upsert_user_creates_once(db_manager):
+    user, created = db_manager.upsert_user(5, 'Анна', 'anna', is_admin=True)
+    again, created_again = db_manager.upsert_user(5, 'Другое имя', 'anna_new')
+
+    assert created is True
+    assert created_again is False
+    assert again.id == user.id
+    assert again.is_admin is True
+    assert again.full_name == 'Анна'
+    assert db_manager.get_user_info(5)['telegram_username'] == 'anna_new'
+
+
+def test_upsert_user_reports_creation_once_under_concurrency(db_manager_factory, tmp_path):
+    manager = db_manager_factory(f"sqlite:///{tmp_path / 'users.db'}")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.upsert_user(7, 'Ольга')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(created for _, created in results) == [False] * 7 + [True]
+    assert len({user.id for user, _ in results}) == 1
+
+
+def test_place_order_is_idempotent(db_manager, customer, product_id):
+    first = db_manager.place_order(customer, order_data(product_id), notes=['Без орехов'], idempotency_key='draft-1')
+    second = db_manager.place_order(customer, order_data(product_id), notes=['Без орехов'], idempotency_key='draft-1')
+
+    assert first[1] is True
+    assert second == (first[0], False)
+    assert len(db_manager.get_orders_by_user(customer)) == 1
+    assert db_manager.get_order_notes_page(first[0])['total'] == 1
+
+
+def test_place_order_without_key_creates_each_time(db_manager, customer, product_id):
+    first = db_manager.place_order(customer, order_data(product_id))
+    second = db_manager.place_order(customer, order_data(product_id))
+
+    assert first[0] != second[0]
+
+
+def test_history_cursor_round_trips():
+    created_at = datetime(2024, 5, 17, 12, 30, 45, 123456)
+
+    assert decode_history_cursor(encode_history_cursor(created_at, 4097)) == (created_at, 4097)
+
+
+def test_notes_pages_cover_history_once(db_manager, customer, product_id):
+    # Все примечания заказа записаны одним временем: порядок держится на id
+    notes = [f"Сообщение {number}" for number in range(23)]
+    order_id, _ = db_manager.place_order(customer, order_data(product_id), notes=notes)
+
+    seen = []
+    before = None
+    while True:
+        page = db_manager.get_order_notes_page(order_id, before=before, limit=10)
+        assert page['total'] == 23
+        seen.extend(item['note_text'] for item in page['items'])
+        before = page['next_cursor']
+        if before is None:
+            break
+
+    assert seen == list(reversed(notes))
+
+
+def test_status_history_pages_newest_first(db_manager, customer, product_id):
+    order_id, _ = db_manager.place_order(customer, order_data(product_id))
+    for number in range(4):
+        db_manager.add_order_status(order_id, 'В работе', admin_notes=f"Этап {number}")
+
+    first = db_manager.get_order_status_history_page(order_id, limit=3)
+    second = db_manager.get_order_status_history_page(order_id, before=first['next_cursor'], limit=3)
+
+    assert first['total'] == 5
+    assert [item['admin_notes'] for item in first['items']] == ['Этап 3', 'Этап 2', 'Этап 1']
+    assert [item['admin_notes'] for item in second['items']] == ['Этап 0', None]
+    assert second['next_cursor'] is None
+
+
+def test_concurrent_place_order_with_one_key(db_manager_factory, tmp_path):
+    manager = db_manager_factory(f"sqlite:///{tmp_path / 'orders.db'}")
+    manager.upsert_user(1001, 'Клиент')
+    manager.add_category('Торты')
+    product = manager.add_product_returning_id({
+        'name': 'Наполеон', 'category_id': manager.get_all_categories()[0]['id'], 'price': 1500,
+    })
+    # Оба вызова проходят проверку ключа до того, как один из них запишет заказ
+    barrier = threading.Barrier(2)
+    resolve_user_id = manager._resolve_user_id
+
+    def resolve_after_both_checked(*args):
+        barrier.wait(5)
+        return resolve_user_id(*args)
+
+    manager._resolve_user_id = resolve_after_both_checked
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(
+            manager.place_order(1001, order_data(product), notes=['Без орехов'], idempotency_key='draft-2')))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(created for _, created in results) == [False, True]
+    assert len({order_id for order_id, _ in results}) == 1
+    order_id = results[0][0]
+    assert manager.get_order_status_history_page(order_id)['total'] == 1
+    assert manager.get_order_notes_page(order_id)['total'] == 1
+
+
+def test_duplicate_key_keeps_earlier_writes_of_update(db_manager, customer, product_id):
+    order_id, _ = db_manager.place_order(customer, order_data(product_id))
+    resolve_user_id = db_manager._resolve_user_id
+    racing = []
+
+    def resolve_and_race(session, *args):
+        # Параллельный вызов записал заказ с тем же ключом после проверки ключа
+        db_manager._resolve_user_id = resolve_user_id
+        racing.append(db_manager.place_order(customer, order_data(product_id), idempotency_key='draft-3'))
+        return resolve_user_id(session, *args)
+
+    with db_manager.unit_of_work():
+        db_manager.add_order_note(order_id, customer, 'Можно без надписи?')
+        db_manager._resolve_user_id = resolve_and_race
+        placed = db_manager.place_order(customer, order_data(product_id), idempotency_key='draft-3')
+
+    assert placed == (racing[0][0], False)
+    assert db_manager.get_order_notes_page(order_id)['total'] == 1
+    assert len(db_manager.get_orders_by_user(customer)) == 2
+
+
+def test_unit_of_work_keeps_writes_after_handler_error(db_manager, customer, product_id):
+    with pytest.raises(RuntimeError):
+        with db_manager.unit_of_work():
+            db_manager.place_order(customer, order_data(product_id))
+            raise RuntimeError('Bot API недоступен')
+
+    assert len(db_manager.get_orders_by_user(customer)) == 1
+
+
+def test_read_error_keeps_earlier_writes_of_update(db_manager, customer, product_id):
+    order_id, _ = db_manager.place_order(customer, order_data(product_id))
+
+    with db_manager.unit_of_work():
+        db_manager.add_order_note(order_id, customer, 'Можно без надписи?')
+        with pytest.raises(sa.exc.OperationalError):
+            with db_manager.session_scope() as session:
+                session.execute(sa.text('SELECT missing FROM orders'))
+        db_manager.add_order_note(order_id, customer, 'И без свечей')
+
+    assert db_manager.get_order_notes_page(order_id)['total'] == 2
+
+
+def test_unit_of_work_does_not_hold_write_lock(db_manager_factory, tmp_path):
+    url = f"sqlite:///{tmp_path / 'lock.db'}"
+    handler_db = db_manager_factory(url)
+    other_db = db_manager_factory(url, create_tables=False)
+
+    with handler_db.unit_of_work():
+        handler_db.upsert_user(1, 'Анна')
+        # Обработчик ждет Bot API, а другой поток в это время регистрирует пользователя
+        _, created = other_db.upsert_user(2, 'Борис')
+
+    assert created is True
+    with handler_db.session_scope() as session:
+        assert session.execute(sa.text('PRAGMA journal_mode')).scalar() == 'wal'
@@ -0,0 +1,83 @@
+# tests/test_events.py
+
+import pytest
+
+from src.myconfbot.utils.database import DatabaseManager
+from src.myconfbot.utils.events import DomainEvent, EventBus, OrderCreated, OrderStatusChanged, ProductDeleted
+from src.myconfbot.utils.metrics import BotMetrics
+
+
+@pytest.fixture
+def metrics():
+    return BotMetrics()
+
+
+@pytest.fixture
+def bus(metrics):
+    bus = EventBus(metrics=metrics)
+    yield bus
+    bus.stop()
+
+
+@pytest.fixture
+def db_manager(bus):
+    """База теста, публикующая события в bus"""
+    manager = DatabaseManager('sqlite://', events=bus)
+    yield manager
+    manager.dispose()
+
+
+def test_base_subscription_gets_subclass_events(bus):
+    seen = []
+    bus.subscribe(DomainEvent, seen.append)
+
+    bus.publish(OrderCreated(1, 2), ProductDeleted(3))
+
+    assert seen == [OrderCreated(1, 2), ProductDeleted(3)]
+
+
+def test_failing_subscriber_does_not_stop_others(bus, metrics):
+    seen = []
+
+    def broken(event):
+        raise RuntimeError('boom')
+
+    bus.subscribe(OrderCreated, broken, name='broken')
+    bus.subscribe(OrderCreated, seen.append)
+
+    bus.publish(OrderCreated(1, 2))
+
+    assert seen == [OrderCreated(1, 2)]
+    assert metrics.event_handler_errors.items() == [(('broken', 'OrderCreated'), 1.0)]
+
+
+def test_deferred_subscribers_keep_publish_order(bus):
+    seen = []
+    bus.subscribe(OrderStatusChanged, seen.append, deferred=True)
+
+    bus.publish(*[OrderStatusChanged(1, status) for status in ('Новый', 'В работе', 'Готов')])
+    bus.flush()
+
+    assert [event.status for event in seen] == ['Новый', 'В работе', 'Готов']
+
+
+def test_events_are_published_after_commit(db_manager, bus, customer, product_id):
+    seen = []
+    bus.subscribe(OrderCreated, seen.append)
+
+    order_id, _ = db_manager.place_order(customer, {'product_id': product_id, 'quantity': 1})
+
+    assert [(event.order_id, event.user_id) for event in seen] == \
+        [(order_id, db_manager.get_user_context(customer).id)]
+
+
+def test_rolled_back_write_publishes_nothing(db_manager, bus):
+    seen = []
+    bus.subscribe(DomainEvent, seen.append)
+
+    with pytest.raises(RuntimeError):
+        with db_manager.session_scope() as session:
+            db_manager._publish(session, ProductDeleted(1))
+            raise RuntimeError('ошибка записи')
+
+    assert seen == []
@@ -0,0 +1,80 @@
+# tests/test_flood_guard.py
+
+import pytest
+
+from src.myconfbot.utils.bot_middleware import MiddlewareBot
+from src.myconfbot.utils.flood_guard import DUPLICATE, THROTTLED, FloodGuard
+from src.myconfbot.utils.metrics import BotMetrics
+from src.myconfbot.utils.telegram_sender import TokenBucket
+from tests.updates import callback_update, message_update
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    bot = MiddlewareBot('1:test', threaded=False)
+    bot.answers = []
+    bot.sent = []
+    monkeypatch.setattr(bot, 'answer_callback_query', lambda callback_id, text=None, **kwargs: bot.answers.append(text))
+    monkeypatch.setattr(bot, 'send_message', lambda chat_id, text, **kwargs: bot.sent.append(text))
+    return bot
+
+
+def test_token_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=1, capacity=3)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert 0 < bucket.try_acquire() <= 1
+
+
+def test_repeated_press_is_duplicate():
+    guard = FloodGuard(rate=0, duplicate_window=60)
+    press = callback_update('order_confirm_abc').callback_query
+
+    assert guard.check(press) is None
+    assert guard.check(press) == DUPLICATE
+    assert guard.check(callback_update('order_confirm_other').callback_query) is None
+
+
+def test_throttled_press_can_be_repeated():
+    guard = FloodGuard(rate=1, burst=1, duplicate_window=60)
+    guard.check(message_update('🎂 Продукция').message)
+
+    press = callback_update('order_product_15').callback_query
+    assert guard.check(press) == THROTTLED
+    # Отброшенное по лимиту нажатие не запоминается как обработанное
+    guard._buckets.clear()
+    assert guard.check(press) is None
+
+
+def test_admin_gets_own_budget():
+    guard = FloodGuard(rate=1, burst=1, admin_rate=5, admin_burst=3, duplicate_window=0,
+                       is_admin=lambda user_id: user_id == 9)
+
+    assert [guard.check(message_update('/start', user_id=5).message) for _ in range(2)] == [None, THROTTLED]
+    assert [guard.check(message_update('/start', user_id=9).message) for _ in range(4)] == [None] * 3 + [THROTTLED]
+
+
+def test_middleware_skips_dropped_updates(bot):
+    metrics = BotMetrics()
+    FloodGuard(rate=1, burst=2, duplicate_window=0, metrics=metrics).instrument_bot(bot)
+    handled = []
+    bot.register_callback_query_handler(lambda call: handled.append(call.data), func=None)
+
+    bot.process_new_updates([callback_update(f"order_product_{number}", number) for number in range(3)])
+
+    assert handled == ['order_product_0', 'order_product_1']
+    assert bot.answers == ["⏳ Слишком много нажатий, подождите немного"]
+    assert metrics.updates_dropped.items() == [(('callback_query', THROTTLED, 'user'), 1.0)]
+
+
+def test_dialog_step_is_not_throttled(bot):
+    FloodGuard(rate=1, burst=1, duplicate_window=0).instrument_bot(bot)
+    answers = []
+    bot.register_message_handler(
+        lambda message: bot.register_next_step_handler(message, lambda reply: answers.append(reply.text)),
+        commands=['address'])
+
+    bot.process_new_updates([message_update('/address', 1)])
+    bot.process_new_updates([message_update('ул. Ленина, 1', 2)])
+
+    assert answers == ['ул. Ленина, 1']
@@ -0,0 +1,65 @@
+# tests/test_history.py
+
+import pytest
+
+from src.myconfbot.handlers.admin.order_admin_handler import OrderAdminHandler
+from src.myconfbot.handlers.shared.utils import NOTE_TEXT_LIMIT, note_text_html, parse_history_callback, render_history_page
+
+
+@pytest.fixture
+def order_id(db_manager, customer, product_id):
+    order_id, _ = db_manager.place_order(customer, {'product_id': product_id, 'quantity': 1})
+    return order_id
+
+
+@pytest.fixture
+def handler(db_manager):
+    return OrderAdminHandler(None, None, db_manager)
+
+
+def test_note_text_is_escaped_and_truncated():
+    assert note_text_html('<b>Торт</b> & чай') == '&lt;b&gt;Торт&lt;/b&gt; &amp; чай'
+    assert note_text_html('x' * (NOTE_TEXT_LIMIT + 50)) == 'x' * NOTE_TEXT_LIMIT + '…'
+
+
+def test_history_callback_carries_cursor():
+    assert parse_history_callback('orderadm_notes_15', 'orderadm_notes_') == (15, None)
+    assert parse_history_callback('orderadm_notes_15_18c2.1f', 'orderadm_notes_') == (15, '18c2.1f')
+
+
+def test_page_breaks_before_message_limit():
+    page = {
+        'items': [{'text': 'a' * 40, 'cursor': f"c{number}"} for number in range(5)],
+        'next_cursor': 'older',
+        'total': 9,
+    }
+
+    text, shown, next_cursor = render_history_page('', page, lambda item: item['text'], limit=100)
+
+    assert len(text) <= 100
+    assert [item['cursor'] for item in shown] == ['c0', 'c1']
+    assert next_cursor == 'c1'
+
+
+def test_admin_status_notes_are_escaped(handler, db_manager, order_id):
+    db_manager.add_order_status(order_id, 'Готов', admin_notes='<script>' + 'x' * 2000)
+
+    page = db_manager.get_order_status_history_page(order_id)
+    text, _ = handler._format_status_history_for_admin(page, order_id)
+
+    assert '<script>' not in text
+    assert '&lt;script&gt;' in text
+    assert len(text) < 2 * NOTE_TEXT_LIMIT
+
+
+def test_note_sender_role_comes_from_user(handler, db_manager, order_id, customer, admin):
+    # Имя клиента похоже на админское, но роль берется из users.is_admin
+    db_manager.upsert_user(2002, 'Админ Петров')
+    db_manager.add_order_note(order_id, 2002, 'Можно забрать раньше?')
+    db_manager.add_order_note(order_id, admin, 'Да, к 10:00')
+
+    page = db_manager.get_order_notes_page(order_id)
+    text, _ = handler._format_order_notes_admin(page, order_id)
+
+    assert [item['is_admin'] for item in page['items']] == [True, False]
+    assert text.index('👤 Администратор') < text.index('👥 Клиент')
@@ -0,0 +1,99 @@
+# tests/test_order_processor.py
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.myconfbot.handlers.shared.states_manager import StatesManager
+from src.myconfbot.handlers.user.order_processor import OrderProcessor
+from src.myconfbot.handlers.user.order_states import OrderStatesManager
+
+
+class RecordingBot:
+    user = SimpleNamespace(id=1)
+
+    def __init__(self):
+        self.answers = []
+        self.edited = []
+
+    def answer_callback_query(self, callback_id, text=None, **kwargs):
+        self.answers.append(text)
+
+    def edit_message_text(self, text=None, chat_id=None, message_id=None, **kwargs):
+        self.edited.append(message_id)
+
+
+@pytest.fixture
+def processor(db_manager):
+    bot = RecordingBot()
+    return OrderProcessor(bot, db_manager, OrderStatesManager(StatesManager(), bot))
+
+
+def confirm_callback(telegram_id: int, idempotency_key: str, callback_id: str = 'cb'):
+    return SimpleNamespace(
+        id=callback_id, data=f"order_confirm_{idempotency_key}",
+        from_user=SimpleNamespace(id=telegram_id, is_bot=False),
+        message=SimpleNamespace(chat=SimpleNamespace(id=telegram_id), message_id=10),
+    )
+
+
+def start_draft(processor, telegram_id: int, product_id: int) -> str:
+    processor.order_states.start_order(telegram_id, product_id)
+    processor.order_states.update_order_data(telegram_id, quantity=2, delivery_type='Самовывоз')
+    return processor.order_states.get_order_data(telegram_id)['idempotency_key']
+
+
+def test_confirm_places_order_and_closes_draft(processor, db_manager, customer, product_id):
+    key = start_draft(processor, customer, product_id)
+
+    processor.complete_order(confirm_callback(customer, key))
+
+    assert processor.bot.answers == ["✅ Заказ создан!"]
+    assert processor.order_states.get_order_data(customer) is None
+    assert db_manager.get_order_id_by_idempotency_key(key) is not None
+
+
+def test_repeated_confirm_returns_same_order(processor, db_manager, customer, product_id):
+    key = start_draft(processor, customer, product_id)
+
+    processor.complete_order(confirm_callback(customer, key, 'first'))
+    processor.complete_order(confirm_callback(customer, key, 'second'))
+
+    assert processor.bot.answers == ["✅ Заказ создан!", "✅ Заказ уже оформлен"]
+    assert len(db_manager.get_orders_by_user(customer)) == 1
+
+
+def test_old_confirm_does_not_place_open_draft(processor, db_manager, customer, product_id):
+    placed_key = start_draft(processor, customer, product_id)
+    processor.complete_order(confirm_callback(customer, placed_key, 'first'))
+    # Новый черновик: выбран только товар, итога с его кнопкой еще не было
+    processor.order_states.start_order(customer, product_id)
+    draft = dict(processor.order_states.get_order_data(customer))
+
+    processor.complete_order(confirm_callback(customer, placed_key, 'second'))
+    processor.complete_order(confirm_callback(customer, 'stale', 'third'))
+
+    assert processor.bot.answers == [
+        "✅ Заказ создан!", "✅ Заказ уже оформлен", "⚠️ Итог заказа устарел, подтвердите последний"]
+    assert processor.order_states.get_order_data(customer) == draft
+    assert len(db_manager.get_orders_by_user(customer)) == 1
+
+
+def test_confirm_during_placement_keeps_draft(processor, db_manager, customer, product_id, monkeypatch):
+    key = start_draft(processor, customer, product_id)
+    place_order = db_manager.place_order
+    calls = []
+
+    def place_with_second_tap(*args, **kwargs):
+        # Второе нажатие приходит, пока первое еще оформляет заказ
+        calls.append(1)
+        if len(calls) == 1:
+            processor.complete_order(confirm_callback(customer, key, 'second'))
+        return place_order(*args, **kwargs)
+
+    monkeypatch.setattr(db_manager, 'place_order', place_with_second_tap)
+    processor.complete_order(confirm_callback(customer, key, 'first'))
+
+    assert processor.bot.answers == ["✅ Заказ создан!", "✅ Заказ уже оформлен"]
+    assert processor.bot.edited == [10]
+    assert len(db_manager.get_orders_by_user(customer)) == 1
@@ -0,0 +1,95 @@
+# tests/test_outbox.py
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.myconfbot.utils import database
+
+
+@pytest.fixture
+def place(db_manager, customer, admin, product_id):
+    """Оформить заказ: админу записывается уведомление order_created"""
+    def place_order() -> int:
+        order_id, _ = db_manager.place_order(customer, {'product_id': product_id, 'quantity': 1})
+        return order_id
+    return place_order
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое время outbox: clock.advance(секунды)"""
+    class Clock(datetime):
+        current = datetime.utcnow()
+
+        @classmethod
+        def utcnow(cls):
+            return cls.current
+
+        @classmethod
+        def advance(cls, seconds: float):
+            cls.current += timedelta(seconds=seconds)
+
+    monkeypatch.setattr(database, 'datetime', Clock)
+    return Clock
+
+
+def test_claimed_events_are_leased(db_manager, place, admin):
+    order_id = place()
+
+    claimed = db_manager.claim_outbox_events()
+
+    assert [(event['chat_id'], event['order_id']) for event in claimed] == [(admin, order_id)]
+    assert db_manager.claim_outbox_events() == []
+
+
+def test_claim_respects_retry_backoff(db_manager, place):
+    place()
+    failed = db_manager.claim_outbox_events()
+    db_manager.mark_outbox_failed([event['id'] for event in failed], 'Too Many Requests', retry_in=60)
+
+    # У получателя появилось новое уведомление: отложенное после ошибки с ним не уходит
+    second_order = place()
+    claimed = db_manager.claim_outbox_events()
+
+    assert [event['order_id'] for event in claimed] == [second_order]
+    assert db_manager.get_outbox_stats() == {'pending': 2}
+
+
+def test_sent_events_are_not_claimed_again(db_manager, place):
+    place()
+    claimed = db_manager.claim_outbox_events(lease_seconds=0)
+    db_manager.mark_outbox_sent([event['id'] for event in claimed])
+
+    assert db_manager.claim_outbox_events() == []
+    assert db_manager.get_outbox_stats() == {'sent': 1}
+
+
+def test_failed_events_give_up(db_manager, place):
+    place()
+    claimed = db_manager.claim_outbox_events(lease_seconds=0)
+    db_manager.mark_outbox_failed([event['id'] for event in claimed], 'Forbidden')
+
+    assert db_manager.claim_outbox_events() == []
+    assert db_manager.get_outbox_stats() == {'failed': 1}
+
+
+def test_edits_are_coalesced_after_last_one(db_manager, place, clock, customer):
+    order_id = place()
+    db_manager.notify_coalesce_seconds = 10
+
+    def claim_customer():
+        return [event for event in db_manager.claim_outbox_events() if event['chat_id'] == customer]
+
+    # Правки каждые 4 секунды, выборка - каждые 2: окно считается от последней правки
+    for cost in (100, 200, 300):
+        db_manager.update_order_field(order_id, 'total_cost', cost)
+        clock.advance(2)
+        assert claim_customer() == []
+        clock.advance(2)
+        assert claim_customer() == []
+
+    clock.advance(6)
+    claimed = claim_customer()
+
+    assert [event['payload']['value'] for event in claimed] == [100, 200, 300]
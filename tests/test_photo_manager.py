@@ -0,0 +1,78 @@
+# tests/test_photo_manager.py
+
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.myconfbot.handlers.admin.photo_manager import PhotoManager
+
+
+class RecordingBot:
+    token = 'test-photo-manager'
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class BlockingDownloader:
+    """Загрузчик, который держит альбом в обработке, пока тест его не отпустит"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def download_many(self, file_ids, destination_dir):
+        self.started.set()
+        self.release.wait(5)
+        return [Path(destination_dir) / f"{file_id}.jpg" for file_id in file_ids]
+
+
+def album_message(message_id: int, chat_id: int = 77, group_id: str = 'album-1'):
+    return SimpleNamespace(
+        message_id=message_id, media_group_id=group_id, chat=SimpleNamespace(id=chat_id),
+        photo=[SimpleNamespace(file_id=f"file-{message_id}")],
+    )
+
+
+def test_add_product_photos_sets_first_as_main(db_manager, product_id):
+    first = db_manager.add_product_photos(product_id, ['a.jpg', 'b.jpg'])
+    second = db_manager.add_product_photos(product_id, ['c.jpg'])
+
+    photos = db_manager.get_product_photos(product_id)
+    assert len(first) == 2 and len(second) == 1
+    assert [photo['photo_path'] for photo in photos if photo['is_main']] == ['a.jpg']
+    assert db_manager.get_product_by_id(product_id)['cover_photo_path'] == 'a.jpg'
+
+
+def test_flush_waits_for_album_in_flight(db_manager, product_id, tmp_path):
+    bot = RecordingBot()
+    manager = PhotoManager(bot, db_manager, states_manager=None, photos_dir=str(tmp_path))
+    manager.ALBUM_DEBOUNCE_SECONDS = 0.01
+    manager.downloader = BlockingDownloader()
+
+    manager._buffer_album_photo(album_message(1), product_id)
+    manager._buffer_album_photo(album_message(2), product_id)
+    # Таймер уже забрал альбом из буфера и загружает фото
+    assert manager.downloader.started.wait(5)
+
+    flushed = threading.Event()
+    done = threading.Thread(target=lambda: (manager.flush_pending_albums(77), flushed.set()))
+    done.start()
+    assert not flushed.wait(0.2)
+
+    manager.downloader.release.set()
+    done.join(5)
+    assert flushed.is_set()
+    assert len(db_manager.get_product_photos(product_id)) == 2
+    assert PhotoManager.pending_album_sizes() == {'albums': 0, 'photos': 0}
+
+
+def test_flush_without_albums_returns_at_once(db_manager, tmp_path):
+    manager = PhotoManager(RecordingBot(), db_manager, states_manager=None, photos_dir=str(tmp_path))
+
+    manager.flush_pending_albums(77)
+
+    assert manager._albums_in_flight == {}
@@ -0,0 +1,29 @@
+# tests/test_profiler.py
+
+from src.myconfbot.utils.bot_middleware import MiddlewareBot
+from src.myconfbot.utils.profiler import UpdateProfiler, load_profiles
+from tests.updates import callback_update
+
+
+def test_profiler_middleware_saves_sampled_update(tmp_path):
+    bot = MiddlewareBot('1:test', threaded=False)
+    profiler = UpdateProfiler(sample_rate=1, slow_threshold=0, profile_dir=tmp_path,
+                              role_resolver=lambda user_id: 'admin')
+    profiler.instrument_bot(bot)
+    bot.register_callback_query_handler(lambda call: sum(range(1000)), func=None)
+
+    bot.process_new_updates([callback_update('orderadm_order_15')])
+
+    [meta] = load_profiles(tmp_path)
+    assert (meta['handler'], meta['callback_prefix'], meta['role']) == \
+        ('callback:orderadm_order', 'orderadm_order', 'admin')
+    assert meta['sampled'] and meta['prof_path'].exists()
+
+
+def test_profiler_reads_settings_at_creation(monkeypatch, tmp_path):
+    monkeypatch.setenv('PROFILE_SAMPLE_RATE', '0.5')
+    monkeypatch.setenv('PROFILE_DIR', str(tmp_path))
+
+    profiler = UpdateProfiler()
+
+    assert (profiler.sample_rate, profiler.profile_dir) == (0.5, tmp_path)
@@ -0,0 +1,99 @@
+# tests/test_update_lanes.py
+
+import queue
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.myconfbot.utils.update_lanes import LANE_ADMIN, LANE_BROWSE, LANE_ORDER, LanePool, LaneQueue
+
+
+def lane_item(lane: str, chat: int, name: str) -> tuple:
+    return name, (SimpleNamespace(lane=lane, chat=SimpleNamespace(id=chat)),), {}
+
+
+def lane_queue(max_wait=None, shed=None) -> LaneQueue:
+    return LaneQueue(lambda item: item[1][0].lane, LanePool._chat, max_wait or {}, shed)
+
+
+def take(tasks: LaneQueue):
+    task, (name, args, kwargs) = tasks.get(timeout=0)
+    return task, name
+
+
+def test_priority_lanes_keep_chat_order():
+    tasks = lane_queue()
+    for item in (lane_item(LANE_BROWSE, 1, 'catalog-1'), lane_item(LANE_ORDER, 1, 'address-1'),
+                 lane_item(LANE_BROWSE, 2, 'catalog-2'), lane_item(LANE_ADMIN, 3, 'status-3')):
+        tasks.put(item)
+
+    admin, name = take(tasks)
+    assert name == 'status-3'
+    # Ввод адреса чата 1 не обгоняет его же более раннее нажатие в каталоге
+    first, name = take(tasks)
+    assert name == 'catalog-1'
+    # Пока чат 1 занят, выполняется другой чат
+    second, name = take(tasks)
+    assert name == 'catalog-2'
+    with pytest.raises(queue.Empty):
+        tasks.get(timeout=0)
+
+    tasks.done(first)
+    assert take(tasks)[1] == 'address-1'
+    assert tasks.sizes() == {LANE_ADMIN: 0, LANE_ORDER: 0, LANE_BROWSE: 0}
+
+
+def test_long_wait_is_shed():
+    def answer_busy(lane, item):
+        pass
+
+    tasks = lane_queue(max_wait={LANE_BROWSE: 0.01}, shed=answer_busy)
+    tasks.put(lane_item(LANE_BROWSE, 1, 'catalog-1'))
+    time.sleep(0.02)
+
+    task, (function, args, kwargs) = tasks.get(timeout=0)
+
+    assert function is answer_busy
+    assert args == (LANE_BROWSE, lane_item(LANE_BROWSE, 1, 'catalog-1'))
+
+
+@pytest.fixture
+def pool():
+    telebot = SimpleNamespace(threaded=True, exception_handler=None)
+    pool = LanePool(telebot, num_threads=4, max_wait={})
+    yield pool
+    pool.close()
+
+
+def test_pool_runs_chat_updates_in_order(pool):
+    pool.tasks.classify = lambda item: random.choice((LANE_ORDER, LANE_BROWSE))
+    seen = {1: [], 2: []}
+    finished = threading.Semaphore(0)
+
+    def handle(update):
+        time.sleep(random.random() / 500)
+        seen[update.chat.id].append(update.number)
+        finished.release()
+
+    for number in range(40):
+        pool.put(handle, SimpleNamespace(chat=SimpleNamespace(id=number % 2 + 1), number=number))
+    for _ in range(40):
+        assert finished.acquire(timeout=5)
+
+    assert seen == {1: list(range(0, 40, 2)), 2: list(range(1, 40, 2))}
+
+
+def test_pool_reports_unhandled_errors(pool):
+    def broken(update):
+        raise ValueError('boom')
+
+    pool.put(broken, SimpleNamespace(chat=SimpleNamespace(id=1)))
+
+    assert pool.exception_event.wait(5)
+    with pytest.raises(ValueError):
+        pool.raise_exceptions()
+    pool.clear_exceptions()
+    pool.raise_exceptions()
@@ -0,0 +1,54 @@
+# tests/test_user_context.py
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from src.myconfbot.utils.user_context import UserContext, UserContextCache
+
+
+@pytest.fixture
+def user_queries(db_manager):
+    """Запросы пользователя по telegram_id"""
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM users' in statement and 'WHERE users.telegram_id = ' in statement:
+            statements.append(statement)
+
+    event.listen(db_manager.engine, 'before_cursor_execute', count)
+    yield statements
+    event.remove(db_manager.engine, 'before_cursor_execute', count)
+
+
+def test_cache_expires_after_ttl():
+    cache = UserContextCache(ttl=0.05)
+    cache.put(UserContext(1, 1001, False, 'Анна'))
+
+    assert cache.get(1001).full_name == 'Анна'
+    time.sleep(0.06)
+    assert cache.get(1001) is None
+
+
+def test_update_user_is_resolved_once(db_manager, customer, product_id, user_queries):
+    db_manager.user_cache.clear()
+
+    with db_manager.unit_of_work():
+        user = db_manager.bind_update_user(SimpleNamespace(from_user=SimpleNamespace(id=customer)))
+        db_manager.place_order(customer, {'product_id': product_id, 'quantity': 1})
+        db_manager.add_to_favorites(customer, product_id)
+        assert db_manager.is_in_favorites(customer, product_id)
+
+    assert db_manager.current_user is None
+    assert user.telegram_id == customer
+    assert len(user_queries) == 1
+
+
+def test_user_change_invalidates_cache(db_manager, customer):
+    assert db_manager.get_user_context(customer).full_name == 'Клиент'
+
+    db_manager.update_user_info(customer, full_name='Анна Петрова')
+
+    assert db_manager.get_user_context(customer).full_name == 'Анна Петрова'
@@ -0,0 +1,23 @@
+# tests/updates.py
+"""Апдейты Telegram для тестов обработки ботом"""
+
+from telebot import types
+
+USER = {'id': 5, 'is_bot': False, 'first_name': 'Анна'}
+CHAT = {'id': 5, 'type': 'private'}
+
+
+def message_update(text: str, update_id: int = 1, user_id: int = USER['id']) -> types.Update:
+    message = {'message_id': update_id, 'date': 0, 'chat': dict(CHAT, id=user_id),
+               'from': dict(USER, id=user_id), 'text': text}
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return types.Update.de_json({'update_id': update_id, 'message': message})
+
+
+def callback_update(data: str, update_id: int = 100, user_id: int = USER['id']) -> types.Update:
+    message = {'message_id': 1, 'date': 0, 'chat': dict(CHAT, id=user_id), 'from': USER, 'text': 'Каталог'}
+    return types.Update.de_json({'update_id': update_id, 'callback_query': {
+        'id': f"cb{update_id}", 'chat_instance': 'chat', 'from': dict(USER, id=user_id),
+        'data': data, 'message': message,
+    }})